@@ -4,6 +4,10 @@ import os
 import subprocess
 import threading
 import json
+import html
+import time
+from array import array
+from bisect import bisect_left, bisect_right
 from datetime import datetime, timedelta
 
 if sys.platform == 'win32':
@@ -16,9 +20,13 @@ from PyQt5.QtWidgets import (
     QHBoxLayout, QPushButton, QTextEdit, QListWidget, QLabel,
     QDateTimeEdit, QSpinBox, QGroupBox, QMessageBox, QTableWidget,
     QTableWidgetItem, QLineEdit, QComboBox, QHeaderView, QFormLayout,
-    QRadioButton, QButtonGroup, QGridLayout, QCheckBox
+    QRadioButton, QButtonGroup, QGridLayout, QCheckBox, QTableView,
+    QGraphicsView, QGraphicsScene, QGraphicsItem, QToolTip, QProgressBar
+)
+from PyQt5.QtCore import (
+    QTimer, QThread, pyqtSignal, QDateTime, QProcess, Qt,
+    QAbstractTableModel, QModelIndex, QSortFilterProxyModel, QRectF, QPointF
 )
-from PyQt5.QtCore import QTimer, QThread, pyqtSignal, QDateTime, QProcess
 from PyQt5.QtGui import QFont, QColor
 import mysql.connector
 from dotenv import load_dotenv
@@ -34,6 +42,10 @@ db_config = {
     'database': os.getenv('MYSQL_DATABASE')
 }
 
+# 後端 API 位址 (儀表板 KPI 等共用查詢)
+API_BASE_URL = os.getenv('APS_API_BASE_URL', 'http://localhost:8000/api/v1')
+KPI_STATS_KEYS = ('total_lots', 'completed_count', 'wip_count', 'normal_count', 'new_add_count')
+
 class WorkerThread(QThread):
     """用於執行長時間任務的線程"""
     finished = pyqtSignal(object)  # 發送結果訊號
@@ -52,6 +64,834 @@ class WorkerThread(QThread):
         except Exception as e:
             self.error.emit(str(e))
 
+# 表格分頁讀取筆數 (捲動到底時才向資料庫取下一頁)
+TABLE_PAGE_SIZE = 2000
+
+# 自訂資料角色：回傳原始值，供代理模型排序使用 (數字、時間不以字串比較)
+SORT_ROLE = Qt.UserRole + 1
+
+LOTS_COLUMNS = ["LotId", "Priority", "DueDate", "LotCreateDate"]
+LOTS_KEY_COLUMNS = ["LotId"]
+
+OPERATIONS_COLUMNS = [
+    "LotId", "Step", "MachineGroup", "Duration", "Sequence", "StepStatus",
+    "CheckInTime", "CheckOutTime", "PlanMachineId", "PlanCheckInTime", "PlanCheckOutTime"
+]
+# 依途程順序分頁；主鍵為 (LotId, Step)，排序鍵由 idx_lot_sequence_step 索引支援
+# (backend/prisma/migrations/20261019000000_lot_operations_sequence_index)
+OPERATIONS_KEY_COLUMNS = ["LotId", "Sequence", "Step"]
+
+# 異動追蹤欄位 (由 add_change_tracking_columns.py 建立) 與自動更新設定
+CHANGE_TRACKING_COLUMN = "UpdatedAt"
+CHANGE_FEED_INTERVAL_MS = 3000
+# 寫入交易可能持續數十秒 (模擬、排程結果回寫)：UpdatedAt 為語句執行時間，提交後才可見，重疊區間需涵蓋最長的交易
+CHANGE_FEED_OVERLAP_SECONDS = 120
+CHANGE_FEED_MAX_ROWS = 5000
+# 超過重疊區間的交易仍可能遺漏，定期重新讀取已載入範圍比對 (不重設表格)
+CHANGE_FEED_RECONCILE_SECONDS = 300
+
+STEP_STATUS_MAP = {0: "New Add", 1: "WIP", 2: "Completed"}
+STEP_STATUS_COLORS = {
+    0: QColor("#E3F2FD"),  # 淺藍色 for New Add
+    1: QColor("#FFF3E0"),  # 淺橙色 for WIP
+    2: QColor("#E8F5E8")   # 淺綠色 for Completed
+}
+
+
+def fetch_table_page(table, columns, key_columns, after=None, limit=TABLE_PAGE_SIZE):
+    """
+    依排序鍵分頁 (keyset) 讀取資料表
+
+    (a, b) > (x, y) 展開為 a > x OR (a = x AND b > y)，讓 MySQL 在 key_columns 的索引 (主鍵或同順序的次要索引)
+    上做範圍掃描，不論翻到第幾頁都不需略過前面的資料列
+
+    Returns:
+        list[tuple]: 依 columns 順序的資料列
+    """
+    params = []
+    where = ""
+    if after is not None:
+        conditions = []
+        for i, column in enumerate(key_columns):
+            terms = [f"{key_columns[j]} = %s" for j in range(i)] + [f"{column} > %s"]
+            conditions.append("(" + " AND ".join(terms) + ")")
+            params.extend(after[:i + 1])
+        where = "WHERE " + " OR ".join(conditions)
+
+    conn = mysql.connector.connect(**db_config)
+    try:
+        cursor = conn.cursor()
+        cursor.execute(
+            f"SELECT {', '.join(columns)} FROM {table} {where} "
+            f"ORDER BY {', '.join(key_columns)} LIMIT %s",
+            params + [limit]
+        )
+        rows = cursor.fetchall()
+        cursor.close()
+        return rows
+    finally:
+        conn.close()
+
+
+def get_table_watermark(table):
+    """
+    取得資料表筆數與異動水位 (MAX(UpdatedAt))
+
+    尚未執行 add_change_tracking_columns.py 時水位為 None (僅回傳筆數，不支援自動更新)
+    """
+    conn = mysql.connector.connect(**db_config)
+    try:
+        cursor = conn.cursor()
+        try:
+            cursor.execute(f"SELECT COUNT(*), MAX({CHANGE_TRACKING_COLUMN}) FROM {table}")
+            total, watermark = cursor.fetchone()
+            # 空資料表也要有水位，之後新增的資料列才會被取回
+            watermark = watermark or datetime(1970, 1, 1)
+        except mysql.connector.ProgrammingError:
+            cursor.execute(f"SELECT COUNT(*) FROM {table}")
+            total, watermark = cursor.fetchone()[0], None
+        cursor.close()
+        return total, watermark
+    finally:
+        conn.close()
+
+
+def fetch_table_changes(table, columns, watermark, limit=CHANGE_FEED_MAX_ROWS):
+    """
+    讀取水位之後異動的資料列 (使用 idx_updated_at 索引) 與目前筆數
+
+    交易提交順序與 UpdatedAt 不一定一致 (較早的時間戳記可能較晚才可見)，
+    因此最近 CHANGE_FEED_OVERLAP_SECONDS 秒內的資料列每次都會重新取回；重複取回的資料列不會造成變動。
+    執行更久的交易由 PagedTableModel 每 CHANGE_FEED_RECONCILE_SECONDS 秒一次的完整比對補上
+
+    Returns:
+        (rows, total): rows 為依 columns 順序的資料列，最後一欄附加 UpdatedAt
+    """
+    conn = mysql.connector.connect(**db_config)
+    try:
+        cursor = conn.cursor()
+        cursor.execute(
+            f"SELECT {', '.join(columns)}, {CHANGE_TRACKING_COLUMN} FROM {table} "
+            f"WHERE {CHANGE_TRACKING_COLUMN} > %s "
+            f"OR {CHANGE_TRACKING_COLUMN} >= NOW(3) - INTERVAL %s SECOND "
+            f"ORDER BY {CHANGE_TRACKING_COLUMN} LIMIT %s",
+            (watermark, CHANGE_FEED_OVERLAP_SECONDS, limit)
+        )
+        rows = cursor.fetchall()
+        # 筆數用於偵測刪除 (UpdatedAt 無法記錄已刪除的資料列)
+        cursor.execute(f"SELECT COUNT(*) FROM {table}")
+        total = cursor.fetchone()[0]
+        cursor.close()
+        return rows, total
+    finally:
+        conn.close()
+
+
+class PagedTableModel(QAbstractTableModel):
+    """
+    分頁讀取資料庫的表格模型 (搭配 QTableView)
+
+    - 資料以欄為單位存放 (每欄一個 list)，不為每個儲存格建立物件
+    - 顯示文字與背景色只在 view 要求可見儲存格時才產生
+    - 依排序鍵分頁讀取：view 捲動到底時呼叫 canFetchMore / fetchMore，於背景執行緒取下一頁
+    - 自動更新：poll_changes() 只取回 UpdatedAt 超過水位的資料列並就地更新，不重新載入整張表；
+      每 CHANGE_FEED_RECONCILE_SECONDS 秒改為重新讀取已載入的範圍比對，補上提交晚於重疊區間的異動
+    """
+    page_loaded = pyqtSignal(int, int)  # (已載入筆數, 總筆數)
+    changes_applied = pyqtSignal(int)   # 本次輪詢實際變動的筆數
+    load_error = pyqtSignal(str)
+
+    def __init__(self, table, columns, key_columns, id_columns=None,
+                 formatters=None, backgrounds=None, parent=None):
+        super().__init__(parent)
+        self.table = table
+        self.columns = list(columns)
+        self.key_columns = list(key_columns)
+        self.key_indexes = [self.columns.index(c) for c in key_columns]
+        # 識別資料列的主鍵 (排序鍵可能包含會變動的欄位)
+        self.id_indexes = [self.columns.index(c) for c in (id_columns or key_columns)]
+        self.formatters = formatters or {}    # 欄位索引 -> 顯示格式函式
+        self.backgrounds = backgrounds or {}  # 欄位索引 -> 背景色函式
+        self.total_rows = 0
+        self.watermark = None
+        self._data = [[] for _ in self.columns]
+        self._row_index = {}  # 主鍵 -> 列索引
+        self._row_count = 0
+        self._last_key = None
+        self._exhausted = True
+        self._fetching = False
+        self._polling = False
+        self._fetch_all = False
+        self._generation = 0
+        self._last_reconcile = 0.0
+        self._workers = set()
+
+    # ---- 載入控制 ----
+
+    def load(self):
+        """清空並重新由第一頁載入 (進行中的舊請求結果會被忽略)"""
+        self.beginResetModel()
+        self._data = [[] for _ in self.columns]
+        self._row_index = {}
+        self._row_count = 0
+        self.endResetModel()
+        self.total_rows = 0
+        self.watermark = None
+        self._last_key = None
+        self._exhausted = False
+        self._fetching = False
+        self._polling = False
+        self._fetch_all = False
+        self._generation += 1
+        self._last_reconcile = time.monotonic()
+        self._start_fetch()
+
+    def reload(self):
+        """重新載入並保留「載入全部」狀態"""
+        fetch_all = self._fetch_all
+        self.load()
+        if fetch_all:
+            self.fetch_all()
+
+    def fetch_all(self):
+        """在背景持續載入剩餘頁面 (過濾或排序需要完整資料時使用)"""
+        self._fetch_all = True
+        self._start_fetch()
+
+    def loaded_rows(self):
+        return self._row_count
+
+    def raw(self, row, column):
+        return self._data[column][row]
+
+    def _run_worker(self, func, on_finished, on_error, *args):
+        worker = WorkerThread(func, *args)
+        worker.finished.connect(on_finished)
+        worker.error.connect(on_error)
+        # 保留執行緒參考直到結束，避免重新載入時被回收
+        self._workers.add(worker)
+        worker.finished.connect(lambda _: self._release_worker(worker))
+        worker.error.connect(lambda _: self._release_worker(worker))
+        worker.start()
+
+    def _release_worker(self, worker):
+        # 訊號在 run() 結束前送出，等待執行緒真正結束後再釋放
+        worker.wait()
+        self._workers.discard(worker)
+
+    def _start_fetch(self):
+        if self._fetching or self._exhausted:
+            return
+        self._fetching = True
+        self._run_worker(self._fetch_page, self._on_page_loaded, self._on_page_error,
+                         self._generation, self._last_key)
+
+    def _fetch_page(self, generation, after):
+        # 第一頁先取水位再讀資料：讀取期間的異動會在下次輪詢重複取回，不會遺漏
+        watermark = get_table_watermark(self.table) if after is None else None
+        rows = fetch_table_page(self.table, self.columns, self.key_columns, after)
+        return generation, rows, watermark
+
+    def _on_page_loaded(self, result):
+        generation, rows, watermark = result
+        if generation != self._generation:
+            return
+        self._fetching = False
+        if watermark is not None:
+            self.total_rows, self.watermark = watermark
+        if rows:
+            # 輪詢時可能已先插入同一筆資料，只附加尚未存在的資料列
+            self._append_rows(self._merge_rows(rows)[0])
+            self._last_key = tuple(rows[-1][i] for i in self.key_indexes)
+        if len(rows) < TABLE_PAGE_SIZE:
+            self._exhausted = True
+        self.total_rows = max(self.total_rows, self._row_count)
+        self.page_loaded.emit(self._row_count, self.total_rows)
+        if self._fetch_all:
+            self._start_fetch()
+
+    def _on_page_error(self, error):
+        self._fetching = False
+        self._exhausted = True
+        self.load_error.emit(error)
+
+    # ---- 異動追蹤 (change feed) ----
+
+    def poll_changes(self):
+        """
+        取回水位之後異動的資料列並就地更新
+
+        Returns:
+            False 表示資料表尚未建立 UpdatedAt 欄位，無法自動更新
+        """
+        if self._fetching or self._polling or self._generation == 0:
+            return True
+        if self.watermark is None:
+            return False
+        self._polling = True
+        if time.monotonic() - self._last_reconcile >= CHANGE_FEED_RECONCILE_SECONDS:
+            self._last_reconcile = time.monotonic()
+            self._run_worker(self._fetch_loaded_range, self._on_reconcile_loaded, self._on_changes_error,
+                             self._generation, None if self._exhausted else self._last_key)
+            return True
+        self._run_worker(self._fetch_changes, self._on_changes_loaded, self._on_changes_error,
+                         self._generation, self.watermark)
+        return True
+
+    def _fetch_changes(self, generation, watermark):
+        rows, total = fetch_table_changes(self.table, self.columns, watermark)
+        return generation, rows, total
+
+    def _on_changes_loaded(self, result):
+        generation, rows, total = result
+        if generation != self._generation:
+            return
+        self._polling = False
+        # 異動過多或有資料被刪除時，直接重新載入
+        if len(rows) >= CHANGE_FEED_MAX_ROWS or total < self.total_rows or (
+                self._exhausted and total != self._row_count + self._pending_count(rows)):
+            self.reload()
+            return
+
+        if rows:
+            self.watermark = max(self.watermark, max(row[-1] for row in rows))
+        new_rows, changed = self._merge_rows([row[:-1] for row in rows])
+        # 尚未載入到的位置由後續分頁取得；已載入範圍內 (或已全部載入) 的新資料列直接附加
+        new_rows = [row for row in new_rows if self._exhausted or self._sort_key(row) <= self._last_key]
+        self._append_rows(new_rows)
+        self.total_rows = max(total, self._row_count)
+        self.changes_applied.emit(changed + len(new_rows))
+
+    def _fetch_loaded_range(self, generation, last_key):
+        """重新讀取已載入的範圍 (排序鍵 <= last_key；None 表示已全部載入，讀取整張表)"""
+        _, watermark = get_table_watermark(self.table)
+        rows = []
+        after = None
+        while True:
+            page = fetch_table_page(self.table, self.columns, self.key_columns, after)
+            rows.extend(page)
+            if len(page) < TABLE_PAGE_SIZE:
+                break
+            after = self._sort_key(page[-1])
+            if last_key is not None and after >= last_key:
+                break
+        if last_key is not None:
+            rows = [row for row in rows if self._sort_key(row) <= last_key]
+        return generation, last_key, rows, watermark
+
+    def _on_reconcile_loaded(self, result):
+        generation, last_key, rows, watermark = result
+        if generation != self._generation:
+            return
+        self._polling = False
+        # 比對期間可能又載入了後面的分頁：只與同一範圍內的模型資料列比較，資料庫較少表示有資料被刪除
+        loaded = self._row_count if last_key is None else sum(
+            1 for index in range(self._row_count)
+            if tuple(self._data[i][index] for i in self.key_indexes) <= last_key
+        )
+        if len(rows) < loaded:
+            self.reload()
+            return
+        new_rows, changed = self._merge_rows(rows)
+        self._append_rows(new_rows)
+        if watermark is not None:
+            self.watermark = max(self.watermark, watermark)
+        self.total_rows = max(self.total_rows, self._row_count)
+        self.changes_applied.emit(changed + len(new_rows))
+
+    def _on_changes_error(self, error):
+        self._polling = False
+        self.load_error.emit(error)
+
+    def _pending_count(self, rows):
+        """變動資料中尚未出現在模型內的筆數 (新增的資料列)"""
+        return sum(1 for row in rows if self._row_id(row) not in self._row_index)
+
+    def _row_id(self, row):
+        return tuple(row[i] for i in self.id_indexes)
+
+    def _sort_key(self, row):
+        return tuple(row[i] for i in self.key_indexes)
+
+    def _merge_rows(self, rows):
+        """
+        更新已存在的資料列 (只在值有變動時通知 view)
+
+        Returns:
+            (new_rows, changed): 尚未存在的資料列與實際變動的筆數
+        """
+        new_rows = []
+        changed_count = 0
+        last_column = len(self.columns) - 1
+        for row in rows:
+            index = self._row_index.get(self._row_id(row))
+            if index is None:
+                new_rows.append(row)
+                continue
+            changed = False
+            for values, value in zip(self._data, row):
+                if values[index] != value:
+                    values[index] = value
+                    changed = True
+            if changed:
+                changed_count += 1
+                self.dataChanged.emit(self.index(index, 0), self.index(index, last_column))
+        return new_rows, changed_count
+
+    def _append_rows(self, rows):
+        if not rows:
+            return
+        first = self._row_count
+        self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+        for values, column_values in zip(self._data, zip(*rows)):
+            values.extend(column_values)
+        for offset, row in enumerate(rows):
+            self._row_index[self._row_id(row)] = first + offset
+        self._row_count += len(rows)
+        self.endInsertRows()
+
+    # ---- QAbstractTableModel ----
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._row_count
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        value = self._data[index.column()][index.row()]
+        if role == Qt.DisplayRole:
+            formatter = self.formatters.get(index.column())
+            if formatter:
+                return formatter(value)
+            return "" if value is None else str(value)
+        if role == SORT_ROLE:
+            # datetime 轉為 ISO 字串 (可依字串順序比較)，其餘維持原始型別
+            return value.isoformat() if isinstance(value, datetime) else value
+        if role == Qt.BackgroundRole:
+            background = self.backgrounds.get(index.column())
+            return background(value) if background else None
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self.columns[section]
+        return str(section + 1)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self._exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        if not parent.isValid():
+            self._start_fetch()
+
+
+class TableFilterProxyModel(QSortFilterProxyModel):
+    """依欄位條件過濾與排序 (直接讀取來源模型的原始值，不產生顯示文字)"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setSortRole(SORT_ROLE)
+        self._contains = {}  # 欄位索引 -> 小寫子字串
+        self._equals = {}    # 欄位索引 -> 完全相符的字串
+
+    def set_filters(self, contains=None, equals=None):
+        self._contains = {c: v for c, v in (contains or {}).items() if v}
+        self._equals = {c: v for c, v in (equals or {}).items() if v}
+        self.invalidateFilter()
+
+    def is_filtering(self):
+        return bool(self._contains or self._equals)
+
+    def needs_all_rows(self):
+        """過濾或排序中時結果必須涵蓋全部資料"""
+        return self.is_filtering() or self.sortColumn() >= 0
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        source = self.sourceModel()
+        for column, text in self._contains.items():
+            if text not in str(source.raw(source_row, column)).lower():
+                return False
+        for column, value in self._equals.items():
+            if str(source.raw(source_row, column)) != value:
+                return False
+        return True
+
+
+# 甘特圖設定
+GANTT_ROW_HEIGHT = 24
+GANTT_HEADER_HEIGHT = 28
+GANTT_LABEL_WIDTH = 110
+GANTT_MIN_SEGMENT_PX = 3       # 平均區段寬度小於此像素時改為彙總顯示
+GANTT_MIN_BUCKET_PX = 4        # 彙總時間桶的最小顯示寬度
+GANTT_LOD_BUCKETS = (900, 3600, 4 * 3600, 86400, 7 * 86400)  # 彙總層級的時間桶 (秒)
+GANTT_TICK_STEPS = (60, 300, 900, 3600, 4 * 3600, 12 * 3600, 86400, 7 * 86400)
+GANTT_MIN_TICK_PX = 110
+GANTT_ZOOM_STEP = 1.25
+GANTT_AGGREGATE_COLOR = QColor("#5B8DB8")
+
+
+def load_latest_gantt_segments():
+    """
+    讀取最新一次排程的甘特圖區段
+
+    優先使用正規化的 ScheduleTaskSegment (依 idx_schedule_machine_start 索引讀取)，
+    舊排程沒有正規化資料時才解析 DynamicSchedulingJob.machineTaskSegment
+
+    Returns:
+        (schedule_id, rows): rows 為 (MachineId, Text, StartTime, EndTime, Color)
+    """
+    conn = mysql.connector.connect(**db_config)
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT ScheduleId, machineTaskSegment
+            FROM DynamicSchedulingJob
+            ORDER BY CreateDate DESC
+            LIMIT 1
+        """)
+        latest = cursor.fetchone()
+        if not latest:
+            cursor.close()
+            return None, []
+        schedule_id, segment_json = latest
+
+        cursor.execute("""
+            SELECT MachineId, Text, StartTime, EndTime, Color
+            FROM ScheduleTaskSegment
+            WHERE ScheduleId = %s
+            ORDER BY MachineId, StartTime
+        """, (schedule_id,))
+        rows = cursor.fetchall()
+        cursor.close()
+    finally:
+        conn.close()
+
+    if not rows and segment_json:
+        for seg in json.loads(segment_json):
+            if seg.get("parent") and seg.get("start_date") and seg.get("end_date"):
+                rows.append((
+                    seg["parent"], seg.get("text"),
+                    datetime.fromisoformat(str(seg["start_date"]).replace("Z", "")),
+                    datetime.fromisoformat(str(seg["end_date"]).replace("Z", "")),
+                    seg.get("color")
+                ))
+    return schedule_id, rows
+
+
+class GanttIntervalIndex:
+    """
+    甘特圖區段的每機台區間索引 (不含 Qt 物件，可在背景執行緒建立)
+
+    - 每台機台的區段依開始時間排序，另存「前綴最大結束時間」：
+      以二分搜尋在 O(log n + k) 內找出與時間窗重疊的 k 筆區段 (PM 與作業區段可能重疊)
+    - 預先計算多個時間桶層級的佔用率，縮小檢視時以彙總長條取代逐筆區段
+    - 時間一律以相對於最早開始時間的秒數 (float) 儲存
+    """
+
+    def __init__(self, rows):
+        by_machine = {}
+        for machine_id, text, start, end, color in rows:
+            by_machine.setdefault(machine_id, []).append((start, end, text, color))
+
+        self.machines = sorted(by_machine)
+        self.origin = min((s for segs in by_machine.values() for s, _, _, _ in segs), default=datetime.now())
+        self.horizon = 0.0
+        self.segment_count = 0
+        self.starts, self.ends, self.max_ends, self.texts, self.colors = [], [], [], [], []
+        durations = []
+
+        for machine_id in self.machines:
+            segs = sorted(by_machine[machine_id], key=lambda s: s[0])
+            starts = array('d', ((s - self.origin).total_seconds() for s, _, _, _ in segs))
+            ends = array('d', ((e - self.origin).total_seconds() for _, e, _, _ in segs))
+            max_ends = array('d', ends)
+            for i in range(1, len(max_ends)):
+                if max_ends[i] < max_ends[i - 1]:
+                    max_ends[i] = max_ends[i - 1]
+            self.starts.append(starts)
+            self.ends.append(ends)
+            self.max_ends.append(max_ends)
+            self.texts.append([t or "" for _, _, t, _ in segs])
+            self.colors.append([c for _, _, _, c in segs])
+            durations.extend(e - s for s, e in zip(starts, ends))
+            if max_ends:
+                self.horizon = max(self.horizon, max_ends[-1])
+            self.segment_count += len(segs)
+
+        durations.sort()
+        self.median_duration = durations[len(durations) // 2] if durations else 0.0
+        self.levels = {bucket: self._build_occupancy(bucket) for bucket in GANTT_LOD_BUCKETS}
+
+    def _build_occupancy(self, bucket):
+        """每台機台在每個時間桶內的佔用秒數"""
+        bucket_count = int(self.horizon // bucket) + 1
+        levels = []
+        for starts, ends in zip(self.starts, self.ends):
+            busy = array('f', bytes(4 * bucket_count))
+            for s, e in zip(starts, ends):
+                b = int(s // bucket)
+                while s < e:
+                    edge = min(e, (b + 1) * bucket)
+                    busy[b] += edge - s
+                    s = edge
+                    b += 1
+            levels.append(busy)
+        return levels
+
+    def query(self, row, t0, t1):
+        """與 [t0, t1] 重疊的區段索引範圍"""
+        first = bisect_right(self.max_ends[row], t0)
+        last = bisect_left(self.starts[row], t1)
+        return range(first, max(first, last))
+
+    def segment_at(self, row, t):
+        """時間點 t 所在的區段 (重疊時取最後開始者)"""
+        for i in reversed(self.query(row, t, t)):
+            if self.starts[row][i] <= t <= self.ends[row][i]:
+                return i
+        return None
+
+    def occupancy(self, row, bucket, t0, t1):
+        """時間窗內各時間桶的 (起始秒數, 佔用率)"""
+        busy = self.levels[bucket][row]
+        first = max(0, int(t0 // bucket))
+        last = min(len(busy), int(t1 // bucket) + 1)
+        for b in range(first, last):
+            if busy[b] > 0:
+                yield b * bucket, min(1.0, busy[b] / bucket)
+
+
+class GanttCanvasItem(QGraphicsItem):
+    """
+    甘特圖繪製項目
+
+    整張甘特圖只有這一個場景項目：paint() 依 exposedRect 查詢區間索引，只繪製可見範圍，
+    縮小到區段小於 GANTT_MIN_SEGMENT_PX 像素時改畫預先彙總的時間桶佔用率
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.setFlag(QGraphicsItem.ItemUsesExtendedStyleOption, True)
+        self.index: Optional[GanttIntervalIndex] = None
+        self.px_per_sec = 0.01
+        self._colors: Dict[str, QColor] = {}
+
+    def set_index(self, index):
+        self.prepareGeometryChange()
+        self.index = index
+
+    def set_scale(self, px_per_sec):
+        self.prepareGeometryChange()
+        self.px_per_sec = px_per_sec
+
+    def x_of(self, t):
+        return GANTT_LABEL_WIDTH + t * self.px_per_sec
+
+    def t_of(self, x):
+        return (x - GANTT_LABEL_WIDTH) / self.px_per_sec
+
+    def row_of(self, y):
+        return int((y - GANTT_HEADER_HEIGHT) // GANTT_ROW_HEIGHT)
+
+    def is_aggregated(self):
+        return self.index is not None and self.index.median_duration * self.px_per_sec < GANTT_MIN_SEGMENT_PX
+
+    def aggregate_bucket(self):
+        """寬度至少 GANTT_MIN_BUCKET_PX 像素的最小時間桶"""
+        for bucket in GANTT_LOD_BUCKETS:
+            if bucket * self.px_per_sec >= GANTT_MIN_BUCKET_PX:
+                return bucket
+        return GANTT_LOD_BUCKETS[-1]
+
+    def boundingRect(self):
+        if self.index is None:
+            return QRectF()
+        width = GANTT_LABEL_WIDTH + self.index.horizon * self.px_per_sec + GANTT_LABEL_WIDTH
+        height = GANTT_HEADER_HEIGHT + len(self.index.machines) * GANTT_ROW_HEIGHT
+        return QRectF(0, 0, width, height)
+
+    def _color(self, name):
+        color = self._colors.get(name)
+        if color is None:
+            color = QColor(name) if name else QColor("#90A4AE")
+            self._colors[name] = color
+        return color
+
+    def paint(self, painter, option, widget=None):
+        if self.index is None:
+            return
+        exposed = option.exposedRect
+        first_row = max(0, self.row_of(exposed.top()))
+        last_row = min(len(self.index.machines) - 1, self.row_of(exposed.bottom()))
+        t0 = self.t_of(exposed.left())
+        t1 = self.t_of(exposed.right())
+        aggregated = self.is_aggregated()
+        bucket = self.aggregate_bucket()
+
+        painter.setPen(Qt.NoPen)
+        for row in range(first_row, last_row + 1):
+            top = GANTT_HEADER_HEIGHT + row * GANTT_ROW_HEIGHT
+            if row % 2:
+                painter.fillRect(QRectF(exposed.left(), top, exposed.width(), GANTT_ROW_HEIGHT), QColor("#F7F9FB"))
+            if aggregated:
+                self._paint_aggregated(painter, row, top, bucket, t0, t1)
+            else:
+                self._paint_segments(painter, row, top, t0, t1)
+
+    def _paint_segments(self, painter, row, top, t0, t1):
+        index = self.index
+        starts, ends = index.starts[row], index.ends[row]
+        colors, texts = index.colors[row], index.texts[row]
+        metrics = painter.fontMetrics()
+        for i in index.query(row, t0, t1):
+            x = self.x_of(starts[i])
+            width = max(1.0, (ends[i] - starts[i]) * self.px_per_sec)
+            rect = QRectF(x, top + 3, width, GANTT_ROW_HEIGHT - 6)
+            painter.fillRect(rect, self._color(colors[i]))
+            if width > 40:
+                painter.setPen(Qt.black)
+                text = metrics.elidedText(texts[i], Qt.ElideRight, int(width) - 4)
+                painter.drawText(rect.adjusted(2, 0, -2, 0), Qt.AlignVCenter | Qt.AlignLeft, text)
+                painter.setPen(Qt.NoPen)
+
+    def _paint_aggregated(self, painter, row, top, bucket, t0, t1):
+        width = bucket * self.px_per_sec
+        full = GANTT_ROW_HEIGHT - 6
+        for start, ratio in self.index.occupancy(row, bucket, t0, t1):
+            height = max(1.0, full * ratio)
+            painter.fillRect(
+                QRectF(self.x_of(start), top + 3 + full - height, width, height),
+                GANTT_AGGREGATE_COLOR
+            )
+
+
+class GanttView(QGraphicsView):
+    """
+    甘特圖檢視：滑鼠拖曳平移、滾輪水平縮放 (Shift + 滾輪為上下捲動)
+
+    時間軸與機台名稱固定繪製在視窗上緣與左側 (drawForeground)，不隨捲動移出畫面
+    """
+    scale_changed = pyqtSignal(float)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        scene = QGraphicsScene(self)
+        scene.setItemIndexMethod(QGraphicsScene.NoIndex)
+        self.setScene(scene)
+        self.canvas = GanttCanvasItem()
+        scene.addItem(self.canvas)
+        self.setAlignment(Qt.AlignLeft | Qt.AlignTop)
+        self.setDragMode(QGraphicsView.ScrollHandDrag)
+        # 固定繪製的時間軸與機台名稱需要整個視窗重繪 (繪製本身已依可見範圍裁切)
+        self.setViewportUpdateMode(QGraphicsView.FullViewportUpdate)
+        self.setMouseTracking(True)
+
+    def set_index(self, index):
+        self.canvas.set_index(index)
+        self.fit_to_width()
+
+    def fit_to_width(self):
+        index = self.canvas.index
+        if index is None or index.horizon <= 0:
+            return
+        available = max(100, self.viewport().width() - 2 * GANTT_LABEL_WIDTH)
+        self.set_scale(available / index.horizon)
+
+    def zoom(self, factor, anchor_x=None):
+        self.set_scale(self.canvas.px_per_sec * factor, anchor_x)
+
+    def set_scale(self, px_per_sec, anchor_x=None):
+        """變更水平比例，並維持 anchor_x (視窗座標) 位置的時間不變"""
+        if anchor_x is None:
+            anchor_x = self.viewport().width() / 2
+        anchor_t = self.canvas.t_of(self.mapToScene(int(anchor_x), 0).x())
+
+        self.canvas.set_scale(max(1e-6, min(px_per_sec, 50.0)))
+        self.scene().setSceneRect(self.canvas.boundingRect())
+
+        target_x = self.canvas.x_of(anchor_t)
+        scroll = self.horizontalScrollBar()
+        scroll.setValue(int(target_x - anchor_x))
+        self.viewport().update()
+        self.scale_changed.emit(self.canvas.px_per_sec)
+
+    def wheelEvent(self, event):
+        if event.modifiers() & Qt.ShiftModifier:
+            super().wheelEvent(event)
+            return
+        factor = GANTT_ZOOM_STEP if event.angleDelta().y() > 0 else 1 / GANTT_ZOOM_STEP
+        self.zoom(factor, event.pos().x())
+
+    def mouseMoveEvent(self, event):
+        super().mouseMoveEvent(event)
+        index = self.canvas.index
+        if index is None or self.canvas.is_aggregated():
+            return
+        point = self.mapToScene(event.pos())
+        row = self.canvas.row_of(point.y())
+        if not 0 <= row < len(index.machines):
+            QToolTip.hideText()
+            return
+        i = index.segment_at(row, self.canvas.t_of(point.x()))
+        if i is None:
+            QToolTip.hideText()
+            return
+        start = index.origin + timedelta(seconds=index.starts[row][i])
+        end = index.origin + timedelta(seconds=index.ends[row][i])
+        QToolTip.showText(
+            event.globalPos(),
+            f"{index.machines[row]}\n{index.texts[row][i]}\n"
+            f"{start:%Y-%m-%d %H:%M} ~ {end:%Y-%m-%d %H:%M}"
+        )
+
+    def drawForeground(self, painter, rect):
+        index = self.canvas.index
+        if index is None:
+            return
+        top_left = self.mapToScene(0, 0)
+        view_rect = self.mapToScene(self.viewport().rect()).boundingRect()
+
+        # 左側機台名稱
+        painter.fillRect(
+            QRectF(top_left.x(), view_rect.top(), GANTT_LABEL_WIDTH, view_rect.height()), QColor("#ECEFF1")
+        )
+        painter.setPen(Qt.black)
+        first_row = max(0, self.canvas.row_of(view_rect.top()))
+        last_row = min(len(index.machines) - 1, self.canvas.row_of(view_rect.bottom()))
+        for row in range(first_row, last_row + 1):
+            label_rect = QRectF(
+                top_left.x() + 4, GANTT_HEADER_HEIGHT + row * GANTT_ROW_HEIGHT, GANTT_LABEL_WIDTH - 8, GANTT_ROW_HEIGHT
+            )
+            painter.drawText(label_rect, Qt.AlignVCenter | Qt.AlignLeft, index.machines[row])
+
+        # 上方時間軸 (刻度間距依縮放比例選擇)
+        header = QRectF(view_rect.left(), top_left.y(), view_rect.width(), GANTT_HEADER_HEIGHT)
+        painter.fillRect(header, QColor("#ECEFF1"))
+        step = next(
+            (s for s in GANTT_TICK_STEPS if s * self.canvas.px_per_sec >= GANTT_MIN_TICK_PX), GANTT_TICK_STEPS[-1]
+        )
+        time_format = "%m-%d" if step >= 86400 else "%m-%d %H:%M"
+        t = max(0.0, self.canvas.t_of(top_left.x() + GANTT_LABEL_WIDTH))
+        t = (int(t) // step + 1) * step
+        t_end = self.canvas.t_of(view_rect.right())
+        painter.setPen(QColor("#607D8B"))
+        while t <= t_end:
+            x = self.canvas.x_of(t)
+            painter.drawLine(QPointF(x, header.bottom() - 6), QPointF(x, header.bottom()))
+            label = (index.origin + timedelta(seconds=t)).strftime(time_format)
+            painter.drawText(QRectF(x + 2, header.top(), step * self.canvas.px_per_sec - 4, GANTT_HEADER_HEIGHT - 6),
+                             Qt.AlignVCenter | Qt.AlignLeft, label)
+            t += step
+        painter.fillRect(
+            QRectF(top_left.x(), top_left.y(), GANTT_LABEL_WIDTH, GANTT_HEADER_HEIGHT), QColor("#CFD8DC")
+        )
+
+
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -80,6 +920,7 @@ class MainWindow(QMainWindow):
         self.create_tab7()  # 自動化測試
         self.create_tab8()  # 機台數量調整
         self.create_tab9()  # 模擬規劃載入與儲存
+        self.create_tab10()  # 甘特圖
         
         # QProcess 相關變數初始化
         self.machine_expansion_process: Optional[QProcess] = None
@@ -261,9 +1102,22 @@ class MainWindow(QMainWindow):
         layout.addWidget(control_group)
 
         # 按鈕
+        button_layout = QHBoxLayout()
         self.btn_reschedule = QPushButton("執行")
         self.btn_reschedule.clicked.connect(self.reschedule)
-        layout.addWidget(self.btn_reschedule)
+        button_layout.addWidget(self.btn_reschedule)
+
+        self.btn_restart_scheduler_worker = QPushButton("重新啟動排程程序")
+        self.btn_restart_scheduler_worker.setToolTip("結束常駐排程程序並清除資料快取 (執行中的排程會被中止)")
+        self.btn_restart_scheduler_worker.clicked.connect(self.restart_scheduler_worker)
+        button_layout.addWidget(self.btn_restart_scheduler_worker)
+        layout.addLayout(button_layout)
+
+        # 進度
+        self.progress_reschedule = QProgressBar()
+        self.progress_reschedule.setRange(0, 100)
+        self.progress_reschedule.setValue(0)
+        layout.addWidget(self.progress_reschedule)
 
         # 結果顯示區域
         self.text_reschedule_result = QTextEdit()
@@ -271,8 +1125,11 @@ class MainWindow(QMainWindow):
         self.text_reschedule_result.setAcceptRichText(True)
         layout.addWidget(self.text_reschedule_result)
 
-        # QProcess 相關變數
-        self.reschedule_process: Optional[QProcess] = None
+        # 常駐排程程序 (scheduler_worker.py)：第一次重新排程時啟動，之後的排程都送到同一個程序
+        self.scheduler_worker: Optional[QProcess] = None
+        self.scheduler_worker_buffer = b""
+        self.scheduler_request_id = 0
+        self.reschedule_request_id: Optional[int] = None
 
         self.tab_widget.addTab(tab, "重新排程")
 
@@ -308,12 +1165,24 @@ class MainWindow(QMainWindow):
         self.btn_refresh_lots.clicked.connect(self.load_lots_data)
         filter_layout.addWidget(self.btn_refresh_lots)
 
+        self.check_lots_auto_refresh = QCheckBox("自動更新")
+        self.check_lots_auto_refresh.stateChanged.connect(self.update_change_feed_timer)
+        filter_layout.addWidget(self.check_lots_auto_refresh)
+
         layout.addWidget(filter_group)
 
-        # 表格
-        self.table_lots = QTableWidget()
-        self.table_lots.setAlternatingRowColors(True)
-        self.table_lots.setSelectionBehavior(QTableWidget.SelectRows)
+        self.label_lots_status = QLabel("")
+        layout.addWidget(self.label_lots_status)
+
+        # 表格 (分頁載入的模型 + 過濾排序代理)
+        self.lots_model = PagedTableModel("Lots", LOTS_COLUMNS, LOTS_KEY_COLUMNS, parent=self)
+        self.lots_model.page_loaded.connect(self.on_lots_page_loaded)
+        self.lots_model.changes_applied.connect(self.on_lots_changes_applied)
+        self.lots_model.load_error.connect(self.on_lots_data_error)
+        self.lots_proxy = TableFilterProxyModel(self)
+        self.lots_proxy.setSourceModel(self.lots_model)
+
+        self.table_lots = self.create_paged_table_view(self.lots_proxy, self.lots_model)
         layout.addWidget(self.table_lots)
 
         self.tab_widget.addTab(tab, "Lots")
@@ -360,12 +1229,31 @@ class MainWindow(QMainWindow):
         self.btn_refresh_operations.clicked.connect(self.load_operations_data)
         filter_layout.addWidget(self.btn_refresh_operations)
 
+        self.check_operations_auto_refresh = QCheckBox("自動更新")
+        self.check_operations_auto_refresh.stateChanged.connect(self.update_change_feed_timer)
+        filter_layout.addWidget(self.check_operations_auto_refresh)
+
         layout.addWidget(filter_group)
 
-        # 表格
-        self.table_operations = QTableWidget()
-        self.table_operations.setAlternatingRowColors(True)
-        self.table_operations.setSelectionBehavior(QTableWidget.SelectRows)
+        self.label_operations_status = QLabel("")
+        layout.addWidget(self.label_operations_status)
+
+        # 表格 (分頁載入的模型 + 過濾排序代理)
+        status_column = OPERATIONS_COLUMNS.index("StepStatus")
+        self.operations_model = PagedTableModel(
+            "LotOperations", OPERATIONS_COLUMNS, OPERATIONS_KEY_COLUMNS,
+            id_columns=["LotId", "Step"],
+            formatters={status_column: lambda v: STEP_STATUS_MAP.get(v, str(v))},
+            backgrounds={status_column: lambda v: STEP_STATUS_COLORS.get(v, QColor("#FFFFFF"))},
+            parent=self
+        )
+        self.operations_model.page_loaded.connect(self.on_operations_page_loaded)
+        self.operations_model.changes_applied.connect(self.on_operations_changes_applied)
+        self.operations_model.load_error.connect(self.on_operations_data_error)
+        self.operations_proxy = TableFilterProxyModel(self)
+        self.operations_proxy.setSourceModel(self.operations_model)
+
+        self.table_operations = self.create_paged_table_view(self.operations_proxy, self.operations_model)
         layout.addWidget(self.table_operations)
 
         self.tab_widget.addTab(tab, "LotOperations")
@@ -373,201 +1261,128 @@ class MainWindow(QMainWindow):
         # 載入數據
         self.load_operations_data()
 
-    def load_lots_data(self):
-        """載入 Lots 資料"""
-        def run_load_lots():
-            try:
-                conn = mysql.connector.connect(**db_config)
-                cursor = conn.cursor(dictionary=True)
-
-                cursor.execute("""
-                    SELECT LotId, Priority, DueDate, LotCreateDate
-                    FROM Lots
-                    ORDER BY LotId
-                """)
-
-                lots_data = cursor.fetchall()
-                cursor.close()
-                conn.close()
-
-                return lots_data
-
-            except mysql.connector.Error as err:
-                return f"資料庫錯誤: {err}"
-            except Exception as e:
-                return f"錯誤: {e}"
-
-        # 建立線程執行任務
-        self.worker = WorkerThread(run_load_lots)
-        self.worker.finished.connect(self.on_lots_data_loaded)
-        self.worker.error.connect(self.on_lots_data_error)
-        self.worker.start()
+    def create_paged_table_view(self, proxy, model):
+        """建立搭配分頁模型的 QTableView (固定列高，不逐列量測內容)"""
+        view = QTableView()
+        view.setModel(proxy)
+        view.setAlternatingRowColors(True)
+        view.setSelectionBehavior(QTableView.SelectRows)
+        view.setEditTriggers(QTableView.NoEditTriggers)
+        view.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        view.horizontalHeader().setSectionResizeMode(QHeaderView.Interactive)
+
+        # 預設維持資料庫順序；點選欄位標題排序時需要完整資料，於背景載入剩餘頁面
+        view.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+        view.setSortingEnabled(True)
+        view.horizontalHeader().sortIndicatorChanged.connect(lambda *_: model.fetch_all())
+        return view
+
+    def update_table_status(self, label, model, proxy, changed=None):
+        text = f"已載入 {model.loaded_rows()} / {model.total_rows} 筆"
+        if proxy.is_filtering():
+            text += f"，符合條件 {proxy.rowCount()} 筆"
+        if changed is not None:
+            text += f"，{datetime.now().strftime('%H:%M:%S')} 自動更新 {changed} 筆"
+        label.setText(text)
+
+    def update_change_feed_timer(self):
+        """任一表格勾選自動更新時啟動輪詢計時器"""
+        if not hasattr(self, 'change_feed_timer'):
+            self.change_feed_timer = QTimer(self)
+            self.change_feed_timer.setInterval(CHANGE_FEED_INTERVAL_MS)
+            self.change_feed_timer.timeout.connect(self.poll_table_changes)
+
+        enabled = (self.check_lots_auto_refresh.isChecked()
+                   or self.check_operations_auto_refresh.isChecked())
+        if enabled and not self.change_feed_timer.isActive():
+            self.change_feed_timer.start()
+        elif not enabled:
+            self.change_feed_timer.stop()
+
+    def poll_table_changes(self):
+        """只取回 UpdatedAt 超過水位的資料列並就地更新表格"""
+        for check, model, name in (
+            (self.check_lots_auto_refresh, self.lots_model, "Lots"),
+            (self.check_operations_auto_refresh, self.operations_model, "LotOperations"),
+        ):
+            if check.isChecked() and not model.poll_changes():
+                check.setChecked(False)
+                QMessageBox.warning(
+                    self, "錯誤",
+                    f"{name} 無法自動更新：請先執行 add_change_tracking_columns.py 建立 UpdatedAt 欄位後重新載入"
+                )
 
-    def on_lots_data_loaded(self, data):
-        if isinstance(data, list):
-            self.display_lots_data(data)
-        else:
-            QMessageBox.warning(self, "錯誤", f"載入 Lots 資料失敗: {data}")
+    def load_lots_data(self):
+        """載入 Lots 資料 (先取第一頁，其餘於捲動時分頁載入)"""
+        self.label_lots_status.setText("載入中...")
+        self.lots_model.load()
+        if self.lots_proxy.needs_all_rows():
+            self.lots_model.fetch_all()
+
+    def on_lots_page_loaded(self, loaded, total):
+        # 只在第一頁依內容調整欄寬 (ResizeToContents 會在每次資料變動時掃描所有列)
+        if loaded <= TABLE_PAGE_SIZE:
+            self.table_lots.resizeColumnsToContents()
+        self.update_table_status(self.label_lots_status, self.lots_model, self.lots_proxy)
+
+    def on_lots_changes_applied(self, changed):
+        if changed:
+            self.update_table_status(self.label_lots_status, self.lots_model, self.lots_proxy, changed)
 
     def on_lots_data_error(self, error):
         QMessageBox.warning(self, "錯誤", f"載入 Lots 資料錯誤: {error}")
 
-    def display_lots_data(self, lots_data, filtered_data=None):
-        """顯示 Lots 資料"""
-        display_data = filtered_data if filtered_data is not None else lots_data
-
-        self.table_lots.setRowCount(len(display_data))
-        self.table_lots.setColumnCount(4)
-        self.table_lots.setHorizontalHeaderLabels(["LotId", "Priority", "DueDate", "LotCreateDate"])
-
-        # 設置列寬
-        header = self.table_lots.horizontalHeader()
-        header.setSectionResizeMode(0, QHeaderView.ResizeToContents)
-        header.setSectionResizeMode(1, QHeaderView.ResizeToContents)
-        header.setSectionResizeMode(2, QHeaderView.ResizeToContents)
-        header.setSectionResizeMode(3, QHeaderView.ResizeToContents)
-
-        for row, lot in enumerate(display_data):
-            self.table_lots.setItem(row, 0, QTableWidgetItem(str(lot['LotId'])))
-            self.table_lots.setItem(row, 1, QTableWidgetItem(str(lot['Priority'])))
-            self.table_lots.setItem(row, 2, QTableWidgetItem(str(lot['DueDate']) if lot['DueDate'] else ""))
-            self.table_lots.setItem(row, 3, QTableWidgetItem(str(lot['LotCreateDate']) if lot['LotCreateDate'] else ""))
-
-        # 存儲原始數據用於過濾
-        self.lots_data = lots_data
-
     def filter_lots_data(self):
         """過濾 Lots 資料"""
-        if not hasattr(self, 'lots_data'):
-            return
-
         lot_id_filter = self.filter_lot_id.text().strip().lower()
         priority_filter = self.filter_priority.currentData()
 
-        filtered_data = []
-        for lot in self.lots_data:
-            # LotId 過濾
-            if lot_id_filter and lot_id_filter not in str(lot['LotId']).lower():
-                continue
-
-            # Priority 過濾
-            if priority_filter and str(lot['Priority']) != priority_filter:
-                continue
-
-            filtered_data.append(lot)
-
-        self.display_lots_data(self.lots_data, filtered_data)
+        self.lots_proxy.set_filters(
+            contains={LOTS_COLUMNS.index("LotId"): lot_id_filter},
+            equals={LOTS_COLUMNS.index("Priority"): priority_filter}
+        )
+        # 過濾需套用到全部資料，於背景載入剩餘頁面 (新頁面會即時套用條件)
+        if self.lots_proxy.needs_all_rows():
+            self.lots_model.fetch_all()
+        self.update_table_status(self.label_lots_status, self.lots_model, self.lots_proxy)
 
     def load_operations_data(self):
-        """載入 LotOperations 資料"""
-        def run_load_operations():
-            try:
-                conn = mysql.connector.connect(**db_config)
-                cursor = conn.cursor(dictionary=True)
-
-                cursor.execute("""
-                    SELECT LotId, Step, MachineGroup, Duration, Sequence, StepStatus,
-                           CheckInTime, CheckOutTime, PlanMachineId, PlanCheckInTime, PlanCheckOutTime
-                    FROM LotOperations
-                    ORDER BY LotId, Sequence
-                """)
-
-                operations_data = cursor.fetchall()
-                cursor.close()
-                conn.close()
-
-                return operations_data
-
-            except mysql.connector.Error as err:
-                return f"資料庫錯誤: {err}"
-            except Exception as e:
-                return f"錯誤: {e}"
-
-        # 建立線程執行任務
-        self.worker = WorkerThread(run_load_operations)
-        self.worker.finished.connect(self.on_operations_data_loaded)
-        self.worker.error.connect(self.on_operations_data_error)
-        self.worker.start()
-
-    def on_operations_data_loaded(self, data):
-        if isinstance(data, list):
-            self.display_operations_data(data)
-        else:
-            QMessageBox.warning(self, "錯誤", f"載入 LotOperations 資料失敗: {data}")
+        """載入 LotOperations 資料 (先取第一頁，其餘於捲動時分頁載入)"""
+        self.label_operations_status.setText("載入中...")
+        self.operations_model.load()
+        if self.operations_proxy.needs_all_rows():
+            self.operations_model.fetch_all()
+
+    def on_operations_page_loaded(self, loaded, total):
+        if loaded <= TABLE_PAGE_SIZE:
+            self.table_operations.resizeColumnsToContents()
+        self.update_table_status(self.label_operations_status, self.operations_model, self.operations_proxy)
+
+    def on_operations_changes_applied(self, changed):
+        if changed:
+            self.update_table_status(
+                self.label_operations_status, self.operations_model, self.operations_proxy, changed
+            )
 
     def on_operations_data_error(self, error):
         QMessageBox.warning(self, "錯誤", f"載入 LotOperations 資料錯誤: {error}")
 
-    def display_operations_data(self, operations_data, filtered_data=None):
-        """顯示 LotOperations 資料"""
-        display_data = filtered_data if filtered_data is not None else operations_data
-
-        self.table_operations.setRowCount(len(display_data))
-        self.table_operations.setColumnCount(11)
-        self.table_operations.setHorizontalHeaderLabels([
-            "LotId", "Step", "MachineGroup", "Duration", "Sequence", "StepStatus",
-            "CheckInTime", "CheckOutTime", "PlanMachineId", "PlanCheckInTime", "PlanCheckOutTime"
-        ])
-
-        # 設置列寬
-        header = self.table_operations.horizontalHeader()
-        for i in range(11):
-            header.setSectionResizeMode(i, QHeaderView.ResizeToContents)
-
-        status_map = {0: "New Add", 1: "WIP", 2: "Completed"}
-        status_colors = {
-            0: QColor("#E3F2FD"),  # 淺藍色 for New Add
-            1: QColor("#FFF3E0"),  # 淺橙色 for WIP
-            2: QColor("#E8F5E8")   # 淺綠色 for Completed
-        }
-
-        for row, op in enumerate(display_data):
-            self.table_operations.setItem(row, 0, QTableWidgetItem(str(op['LotId'])))
-            self.table_operations.setItem(row, 1, QTableWidgetItem(str(op['Step'])))
-            self.table_operations.setItem(row, 2, QTableWidgetItem(str(op['MachineGroup'])))
-            self.table_operations.setItem(row, 3, QTableWidgetItem(str(op['Duration'])))
-            self.table_operations.setItem(row, 4, QTableWidgetItem(str(op['Sequence'])))
-
-            # StepStatus 欄位設置顏色
-            status_item = QTableWidgetItem(status_map.get(op['StepStatus'], str(op['StepStatus'])))
-            status_item.setBackground(status_colors.get(op['StepStatus'], QColor("#FFFFFF")))
-            self.table_operations.setItem(row, 5, status_item)
-
-            self.table_operations.setItem(row, 6, QTableWidgetItem(str(op['CheckInTime']) if op['CheckInTime'] else ""))
-            self.table_operations.setItem(row, 7, QTableWidgetItem(str(op['CheckOutTime']) if op['CheckOutTime'] else ""))
-            self.table_operations.setItem(row, 8, QTableWidgetItem(str(op['PlanMachineId']) if op['PlanMachineId'] else ""))
-            self.table_operations.setItem(row, 9, QTableWidgetItem(str(op['PlanCheckInTime']) if op['PlanCheckInTime'] else ""))
-            self.table_operations.setItem(row, 10, QTableWidgetItem(str(op['PlanCheckOutTime']) if op['PlanCheckOutTime'] else ""))
-
-        # 存儲原始數據用於過濾
-        self.operations_data = operations_data
-
     def filter_operations_data(self):
         """過濾 LotOperations 資料"""
-        if not hasattr(self, 'operations_data'):
-            return
-
         lot_id_filter = self.filter_op_lot_id.text().strip().lower()
         step_filter = self.filter_step.text().strip().lower()
         status_filter = self.filter_status.currentData()
 
-        filtered_data = []
-        for op in self.operations_data:
-            # LotId 過濾
-            if lot_id_filter and lot_id_filter not in str(op['LotId']).lower():
-                continue
-
-            # Step 過濾
-            if step_filter and step_filter not in str(op['Step']).lower():
-                continue
-
-            # Status 過濾
-            if status_filter and str(op['StepStatus']) != status_filter:
-                continue
-
-            filtered_data.append(op)
-
-        self.display_operations_data(self.operations_data, filtered_data)
+        self.operations_proxy.set_filters(
+            contains={
+                OPERATIONS_COLUMNS.index("LotId"): lot_id_filter,
+                OPERATIONS_COLUMNS.index("Step"): step_filter
+            },
+            equals={OPERATIONS_COLUMNS.index("StepStatus"): status_filter}
+        )
+        if self.operations_proxy.needs_all_rows():
+            self.operations_model.fetch_all()
+        self.update_table_status(self.label_operations_status, self.operations_model, self.operations_proxy)
 
     def clean_test_data(self):
         """執行清空測試資料"""
@@ -675,21 +1490,25 @@ class MainWindow(QMainWindow):
         self.btn_generate_lots.setText("執行")
 
         if exit_code == 0:
-            # 獲取統計資訊並顯示
-            stats = self.get_database_stats()
-            if stats:
-                html_stats = f"""
-                <br><span style="color: #6C757D; font-weight: bold; font-size: 14px;">📊 資料庫統計</span><br>
-                <span style="color: #2E86AB;">總 Lot 數量: {stats['total_lots']}</span><br>
-                <span style="color: #28A745;">[Completed] 記錄數: {stats['completed_count']}</span><br>
-                <span style="color: #FFC107;">[WIP] 記錄數: {stats['wip_count']}</span><br>
-                <span style="color: #007BFF;">[Normal] 記錄數: {stats['normal_count']}</span><br>
-                <span style="color: #6C757D;">[New Add] 記錄數: {stats['new_add_count']}</span>
-                """
-                self.text_generate_result.append(html_stats)
+            # 獲取統計資訊並顯示 (於背景執行緒查詢，不阻塞 GUI；剛寫入新資料，略過後端快取)
+            self.generate_stats_worker = WorkerThread(self.get_database_stats, refresh=True)
+            self.generate_stats_worker.finished.connect(self.on_generate_stats_loaded)
+            self.generate_stats_worker.start()
         else:
             self.text_generate_result.append(f'<span style="color: #DC3545; font-weight: bold;">產生 Lots 異常結束 (代碼: {exit_code})</span>')
 
+    def on_generate_stats_loaded(self, stats):
+        if stats:
+            html_stats = f"""
+            <br><span style="color: #6C757D; font-weight: bold; font-size: 14px;">📊 資料庫統計</span><br>
+            <span style="color: #2E86AB;">總 Lot 數量: {stats['total_lots']}</span><br>
+            <span style="color: #28A745;">[Completed] 記錄數: {stats['completed_count']}</span><br>
+            <span style="color: #FFC107;">[WIP] 記錄數: {stats['wip_count']}</span><br>
+            <span style="color: #007BFF;">[Normal] 記錄數: {stats['normal_count']}</span><br>
+            <span style="color: #6C757D;">[New Add] 記錄數: {stats['new_add_count']}</span>
+            """
+            self.text_generate_result.append(html_stats)
+
     def show_current_stats(self):
         """顯示目前 Lots 統計資訊"""
         def run_show_stats():
@@ -801,18 +1620,45 @@ class MainWindow(QMainWindow):
                 self.text_simulation_result.append(html_error)
 
     def handle_reschedule_output(self):
-        """處理重新排程程式的標準輸出"""
-        if self.reschedule_process is not None:
-            output = self.reschedule_process.readAllStandardOutput().data().decode('utf-8', errors='ignore')
-            if output:
-                # 將換行符轉換為 HTML 換行
-                html_output = output.replace('\n', '<br>')
-                self.text_reschedule_result.append(html_output)
+        """處理常駐排程程序的標準輸出 (每行一個 JSON 訊息，見 scheduler_worker.py)"""
+        if self.scheduler_worker is None:
+            return
+        self.scheduler_worker_buffer += self.scheduler_worker.readAllStandardOutput().data()
+        *lines, self.scheduler_worker_buffer = self.scheduler_worker_buffer.split(b'\n')
+        for raw in lines:
+            line = raw.decode('utf-8', errors='ignore').strip()
+            if not line:
+                continue
+            try:
+                message = json.loads(line)
+            except ValueError:
+                # 非協定輸出 (例如 OR-Tools 直接寫到 stdout 的求解記錄) 原樣顯示
+                self.text_reschedule_result.append(html.escape(line))
+                continue
+            self.handle_scheduler_message(message)
+
+    def handle_scheduler_message(self, message):
+        """處理常駐排程程序的事件與回應"""
+        event = message.get("event")
+        if event == "ready":
+            self.text_reschedule_result.append(
+                f'<span style="color: #6C757D;">排程程序已啟動 (PID {message["pid"]}，載入 {message["startup_seconds"]} 秒)</span>'
+            )
+        elif event == "log":
+            self.text_reschedule_result.append(html.escape(message["line"]))
+        elif event == "progress":
+            if message.get("id") == self.reschedule_request_id:
+                self.progress_reschedule.setValue(int(message["percent"]))
+                self.progress_reschedule.setFormat(f"%p% {message['message']}")
+        elif message.get("id") is not None and message.get("id") == self.reschedule_request_id:
+            self.finish_reschedule(message.get("result"), message.get("error"))
+        elif message.get("error"):
+            self.text_reschedule_result.append(f'<span style="color: #DC3545;">{html.escape(message["error"])}</span>')
 
     def handle_reschedule_error(self):
-        """處理重新排程程式的錯誤輸出"""
-        if self.reschedule_process is not None:
-            error = self.reschedule_process.readAllStandardError().data().decode('utf-8', errors='ignore')
+        """處理常駐排程程序的錯誤輸出"""
+        if self.scheduler_worker is not None:
+            error = self.scheduler_worker.readAllStandardError().data().decode('utf-8', errors='ignore')
             if error:
                 # 將錯誤輸出標示為紅色
                 html_error = f'<span style="color: #DC3545;">{error.replace(chr(10), "<br>")}</span>'
@@ -859,38 +1705,43 @@ class MainWindow(QMainWindow):
 
 
 
-    def get_database_stats(self):
-        """獲取資料庫統計資訊"""
+    def get_database_stats(self, refresh=False):
+        """
+        獲取資料庫統計資訊 (優先使用後端 KPI API，後端未啟動時直接查詢資料庫)
+
+        會等待網路與資料庫，須在背景執行緒呼叫；refresh=True 時略過後端快取 (只影響本查詢條件的快取)
+        """
+        try:
+            params = {'refresh': 'true'} if refresh else None
+            response = requests.get(f"{API_BASE_URL}/kpi", params=params, timeout=3)
+            response.raise_for_status()
+            status = response.json()['status']
+            return {key: int(status[key]) for key in KPI_STATS_KEYS}
+        except (requests.RequestException, KeyError, ValueError):
+            pass
+
         try:
             conn = mysql.connector.connect(**db_config)
             cursor = conn.cursor()
 
-            stats: Dict[str, int] = {}
-
-            # 總 Lot 數量
-            cursor.execute("SELECT COUNT(*) FROM Lots")
-            result = cursor.fetchone()
-            stats['total_lots'] = int(result[0]) if result else 0  # type: ignore
-
-            # Completed 統計 (StepStatus = 2)
-            cursor.execute("SELECT COUNT(*) FROM LotOperations WHERE StepStatus = 2")
-            result = cursor.fetchone()
-            stats['completed_count'] = int(result[0]) if result else 0  # type: ignore
-
-            # WIP 統計 (StepStatus = 1)
-            cursor.execute("SELECT COUNT(*) FROM LotOperations WHERE StepStatus = 1")
-            result = cursor.fetchone()
-            stats['wip_count'] = int(result[0]) if result else 0  # type: ignore
-
-            # Normal 統計 (StepStatus = 0 AND PlanCheckInTime IS NOT NULL)
-            cursor.execute("SELECT COUNT(*) FROM LotOperations WHERE StepStatus = 0 AND PlanCheckInTime IS NOT NULL")
-            result = cursor.fetchone()
-            stats['normal_count'] = int(result[0]) if result else 0  # type: ignore
-
-            # New Add 統計 (StepStatus = 0 AND PlanCheckInTime IS NULL)
-            cursor.execute("SELECT COUNT(*) FROM LotOperations WHERE StepStatus = 0 AND PlanCheckInTime IS NULL")
-            result = cursor.fetchone()
-            stats['new_add_count'] = int(result[0]) if result else 0  # type: ignore
+            # 所有狀態統計以一次掃描、條件加總取得
+            cursor.execute("""
+                SELECT
+                    (SELECT COUNT(*) FROM Lots),
+                    COALESCE(SUM(StepStatus = 2), 0),
+                    COALESCE(SUM(StepStatus = 1), 0),
+                    COALESCE(SUM(StepStatus = 0 AND PlanCheckInTime IS NOT NULL), 0),
+                    COALESCE(SUM(StepStatus = 0 AND PlanCheckInTime IS NULL), 0)
+                FROM LotOperations
+            """)
+            result = cast(tuple, cursor.fetchone())
+            stats: Dict[str, int] = {
+                'total_lots': int(result[0]),        # 總 Lot 數量
+                'completed_count': int(result[1]),   # Completed (StepStatus = 2)
+                'wip_count': int(result[2]),         # WIP (StepStatus = 1)
+                'normal_count': int(result[3]),      # Normal (StepStatus = 0 AND PlanCheckInTime IS NOT NULL)
+                'new_add_count': int(result[4]),     # New Add (StepStatus = 0 AND PlanCheckInTime IS NULL)
+            }
 
             cursor.close()
             conn.close()
@@ -905,10 +1756,7 @@ class MainWindow(QMainWindow):
 
     def reschedule(self):
         """執行重新排成"""
-        # 重新讀取環境變數 (例如 SOLVER 參數)
-        load_dotenv(override=True)
-        
-        if self.reschedule_process is not None:
+        if self.reschedule_request_id is not None:
             return
 
         # 當點擊重新排程按鈕時，將模擬時鐘的開始時間設置為重新排程的開始時間
@@ -918,48 +1766,119 @@ class MainWindow(QMainWindow):
         # 取得排程開始時間
         start_datetime = self.datetime_reschedule_start.dateTime().toPyDateTime()
 
-        # 建構命令
-        script_path = os.path.join(os.path.dirname(__file__), '..', 'Scheduler_Full_Example_Qtime_V1_Wip_DB_Incremental_Scheduling.py')
-        args = [
-            sys.executable,
-            '-u',  # 強制無緩衝輸出
-            script_path,
-            '--start-time', start_datetime.strftime('%Y-%m-%d %H:%M:%S')
-        ]
-
-        # 啟動 QProcess
-        self.reschedule_process = QProcess()
-        self.reschedule_process.readyReadStandardOutput.connect(self.handle_reschedule_output)
-        self.reschedule_process.readyReadStandardError.connect(self.handle_reschedule_error)
-        self.reschedule_process.finished.connect(self.on_reschedule_finished)
-        self.reschedule_process.errorOccurred.connect(self.on_reschedule_error)
-
-        self.reschedule_process.start(args[0], args[1:])
+        self.text_reschedule_result.clear()
+        if self.scheduler_worker is None:
+            self.text_reschedule_result.append('<span style="color: #6C757D;">啟動排程程序...</span>')
+            self.start_scheduler_worker()
+
+        # 程序尚未就緒時，請求會留在 stdin 緩衝區，載入完成後立即處理
+        # (.env 的 SOLVER 參數由排程程序在每次排程前重新讀取)
+        self.reschedule_request_id = self.send_scheduler_request(
+            "reschedule", {"start_time": start_datetime.strftime('%Y-%m-%d %H:%M:%S')}
+        )
 
         # 更新 UI
         self.btn_reschedule.setEnabled(False)
         self.btn_reschedule.setText("執行中...")
+        self.progress_reschedule.setValue(0)
+        self.progress_reschedule.setFormat("%p%")
 
-        self.text_reschedule_result.clear()
         self.text_reschedule_result.append(f'<span style="color: #28A745; font-weight: bold;">開始重新排程: {start_datetime.strftime("%Y-%m-%d %H:%M:%S")}</span>')
 
-    def on_reschedule_error(self, error):
-        """處理重新排程程式的錯誤"""
-        self.text_reschedule_result.append(f'<span style="color: #DC3545; font-weight: bold;">重新排程錯誤: {error}</span>')
-        self.reschedule_process = None
+    def start_scheduler_worker(self):
+        """啟動常駐排程程序 (QProcess)"""
+        script_path = os.path.join(os.path.dirname(__file__), '..', 'scheduler_worker.py')
+        worker = QProcess(self)
+        worker.readyReadStandardOutput.connect(self.handle_reschedule_output)
+        worker.readyReadStandardError.connect(self.handle_reschedule_error)
+        worker.finished.connect(self.on_reschedule_finished)
+        worker.errorOccurred.connect(self.on_reschedule_error)
+
+        self.scheduler_worker = worker
+        self.scheduler_worker_buffer = b""
+        worker.start(sys.executable, ['-u', script_path])  # -u: 強制無緩衝輸出
+
+    def send_scheduler_request(self, method, params=None):
+        """送出一行 JSON 請求給常駐排程程序，回傳請求編號"""
+        self.scheduler_request_id += 1
+        request = {"id": self.scheduler_request_id, "method": method, "params": params or {}}
+        self.scheduler_worker.write((json.dumps(request, ensure_ascii=False) + "\n").encode('utf-8'))
+        return self.scheduler_request_id
+
+    def stop_scheduler_worker(self):
+        """結束常駐排程程序 (關閉 stdin 讓程序自行結束，逾時則強制終止)"""
+        worker = self.scheduler_worker
+        if worker is None:
+            return
+        self.scheduler_worker = None
+        if worker.state() != QProcess.NotRunning:
+            worker.closeWriteChannel()
+            if not worker.waitForFinished(2000):
+                worker.kill()
+                worker.waitForFinished(1000)
+        worker.deleteLater()
+
+    def restart_scheduler_worker(self):
+        """重新啟動排程程序 (清除資料快取；執行中的排程會被中止)"""
+        running = self.reschedule_request_id is not None
+        self.stop_scheduler_worker()
+        if running:
+            self.finish_reschedule(None, "已中止")
+        self.text_reschedule_result.append('<span style="color: #6C757D;">重新啟動排程程序...</span>')
+        self.start_scheduler_worker()
+
+    def finish_reschedule(self, result, error):
+        """重新排程完成 (或失敗) 時的處理"""
+        self.reschedule_request_id = None
         self.btn_reschedule.setEnabled(True)
         self.btn_reschedule.setText("執行")
 
-    def on_reschedule_finished(self, exit_code, exit_status):
-        """重新排程程式完成時的處理"""
-        self.reschedule_process = None
-        self.btn_reschedule.setEnabled(True)
-        self.btn_reschedule.setText("執行")
+        if error:
+            self.text_reschedule_result.append(f'<span style="color: #DC3545; font-weight: bold;">重新排程錯誤: {html.escape(error)}</span>')
+            return
 
-        if exit_code == 0:
-            self.text_reschedule_result.append('<span style="color: #28A745; font-weight: bold;">重新排程完成</span>')
+        status = result.get("status")
+        if status == "completed":
+            self.progress_reschedule.setValue(100)
+            self.text_reschedule_result.append(
+                f'<span style="color: #28A745; font-weight: bold;">重新排程完成 '
+                f'({result["schedule_id"]}，{result["lot_count"]} 個 Lot，耗時 {result["elapsed_seconds"]} 秒)</span>'
+            )
+            cache = result.get("data_cache")
+            if cache:
+                self.text_reschedule_result.append(
+                    '<span style="color: #6C757D;">資料快取: ' + html.escape(", ".join(f"{k}={v}" for k, v in cache.items())) + '</span>'
+                )
+        elif status == "no_jobs":
+            self.text_reschedule_result.append('<span style="color: #DC3545; font-weight: bold;">沒有需要排程的 Lot</span>')
         else:
-            self.text_reschedule_result.append(f'<span style="color: #DC3545; font-weight: bold;">重新排程異常結束 (代碼: {exit_code})</span>')
+            self.text_reschedule_result.append('<span style="color: #DC3545; font-weight: bold;">重新排程異常結束 (排程結果儲存失敗)</span>')
+
+    def on_reschedule_error(self, error):
+        """處理排程程序的錯誤 (無法啟動；程序中止由 on_reschedule_finished 處理)"""
+        if error != QProcess.FailedToStart or self.sender() is not self.scheduler_worker:
+            return
+        self.scheduler_worker.deleteLater()
+        self.scheduler_worker = None
+        self.text_reschedule_result.append(f'<span style="color: #DC3545; font-weight: bold;">重新排程錯誤: 無法啟動排程程序 ({error})</span>')
+        if self.reschedule_request_id is not None:
+            self.reschedule_request_id = None
+            self.btn_reschedule.setEnabled(True)
+            self.btn_reschedule.setText("執行")
+
+    def on_reschedule_finished(self, exit_code, exit_status):
+        """排程程序結束時的處理 (正常情況下只在關閉或重新啟動時結束)"""
+        if self.sender() is not self.scheduler_worker:
+            return
+        self.scheduler_worker.deleteLater()
+        self.scheduler_worker = None
+        if self.reschedule_request_id is not None:
+            self.finish_reschedule(None, f"排程程序異常結束 (代碼: {exit_code})，下次執行時會重新啟動")
+
+    def closeEvent(self, event):
+        """關閉視窗時一併結束常駐排程程序"""
+        self.stop_scheduler_worker()
+        super().closeEvent(event)
 
     def load_settings(self):
         """載入設定"""
@@ -1893,6 +2812,82 @@ class MainWindow(QMainWindow):
         else:
             QMessageBox.critical(self, "刪除失敗", str(result))
 
+    def create_tab10(self):
+        """第十個分頁：甘特圖 (最新一次排程)"""
+        tab = QWidget()
+        layout = QVBoxLayout(tab)
+
+        # 標題
+        title = QLabel("10.甘特圖")
+        title.setFont(QFont("Arial", 14, QFont.Bold))
+        layout.addWidget(title)
+
+        control_layout = QHBoxLayout()
+        self.btn_load_gantt = QPushButton("載入最新排程")
+        self.btn_load_gantt.clicked.connect(self.load_gantt)
+        control_layout.addWidget(self.btn_load_gantt)
+
+        btn_zoom_in = QPushButton("放大")
+        btn_zoom_in.clicked.connect(lambda: self.gantt_view.zoom(GANTT_ZOOM_STEP))
+        control_layout.addWidget(btn_zoom_in)
+
+        btn_zoom_out = QPushButton("縮小")
+        btn_zoom_out.clicked.connect(lambda: self.gantt_view.zoom(1 / GANTT_ZOOM_STEP))
+        control_layout.addWidget(btn_zoom_out)
+
+        btn_fit = QPushButton("全部顯示")
+        btn_fit.clicked.connect(lambda: self.gantt_view.fit_to_width())
+        control_layout.addWidget(btn_fit)
+
+        self.label_gantt_status = QLabel("滾輪縮放、拖曳平移 (Shift + 滾輪上下捲動)")
+        control_layout.addWidget(self.label_gantt_status)
+        control_layout.addStretch()
+        layout.addLayout(control_layout)
+
+        self.gantt_view = GanttView()
+        self.gantt_view.scale_changed.connect(self.update_gantt_status)
+        layout.addWidget(self.gantt_view)
+
+        self.gantt_schedule_id = None
+        self.tab_widget.addTab(tab, "甘特圖")
+
+    def load_gantt(self):
+        """於背景讀取區段並建立區間索引，完成後才交給畫面顯示"""
+        def run_load_gantt():
+            schedule_id, rows = load_latest_gantt_segments()
+            return schedule_id, GanttIntervalIndex(rows)
+
+        self.btn_load_gantt.setEnabled(False)
+        self.label_gantt_status.setText("載入中...")
+        self.gantt_worker = WorkerThread(run_load_gantt)
+        self.gantt_worker.finished.connect(self.on_gantt_loaded)
+        self.gantt_worker.error.connect(self.on_gantt_error)
+        self.gantt_worker.start()
+
+    def on_gantt_loaded(self, result):
+        self.btn_load_gantt.setEnabled(True)
+        self.gantt_schedule_id, index = result
+        if self.gantt_schedule_id is None:
+            self.label_gantt_status.setText("尚無排程結果")
+            return
+        self.gantt_view.set_index(index)
+        self.update_gantt_status(self.gantt_view.canvas.px_per_sec)
+
+    def on_gantt_error(self, error):
+        self.btn_load_gantt.setEnabled(True)
+        self.label_gantt_status.setText("")
+        QMessageBox.warning(self, "錯誤", f"載入甘特圖錯誤: {error}")
+
+    def update_gantt_status(self, px_per_sec):
+        index = self.gantt_view.canvas.index
+        if index is None:
+            return
+        mode = "彙總" if self.gantt_view.canvas.is_aggregated() else "明細"
+        self.label_gantt_status.setText(
+            f"{self.gantt_schedule_id}：{len(index.machines)} 台機台、{index.segment_count} 個區段，"
+            f"每像素 {1 / px_per_sec:.0f} 秒 ({mode})"
+        )
+
 def main():
     app = QApplication(sys.argv)
     window = MainWindow()
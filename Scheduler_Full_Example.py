@@ -1,13 +1,17 @@
+import argparse
+import io
 import json
 import os
 import sys
 from datetime import datetime, timedelta
 from enum import Enum
 from typing import List, Dict, Optional, Any
-from ortools.sat.python import cp_model
-import mysql.connector
 from dotenv import load_dotenv
-from flask import Flask, jsonify, request
+# OR-Tools、mysql.connector 與 Flask 改為用到時才匯入 (timed_import)，--help 與參數錯誤可立即回應；
+# 匯入與初始化耗時可用 --profile-startup 查看
+from startup_profile import startup_profiler, timed_import
+from task_registry import TaskRegistry
+from lexicographic_solve import OBJECTIVE_MODES, objective_mode, lexicographic_tolerance, solve_lexicographic, print_stage_results
 
 
 # =====================================================
@@ -66,16 +70,19 @@ class SchedulerFullExample:
         "M16": ["M16-1", "M16-2", "M16-3", "M16-4"],
     }
 
-    def __init__(self, optimization_type: int = 1, alpha: float = 0.5, beta: float = 0.5):
+    def __init__(self, optimization_type: int = 1, alpha: float = 0.5, beta: float = 0.5,
+                 objective_mode: str = "weighted"):
         """
         初始化排程器
         :param optimization_type: 優化類型 (1: 交期優先, 2: 優先權優先, 3: 多目標優化, 4: 準時交貨優先)
         :param alpha: 多目標優化中加權完成時間的權重
         :param beta: 多目標優化中延遲的權重
+        :param objective_mode: 多目標的合成方式 (weighted: α/β 加權和, lexicographic: 先加權完成時間再 makespan)
         """
         self.optimization_type = optimization_type
         self.alpha = alpha
         self.beta = beta
+        self.objective_mode = objective_mode
         self.schedule_id: Optional[str] = None
 
         self.file_new_lot_plan = r"C:\Data\APS\lot_Plan\lot_Plan.json"
@@ -104,6 +111,7 @@ class SchedulerFullExample:
     
     def run(self):
         load_dotenv()
+        cp_model = timed_import("ortools.sat.python.cp_model")
         log_str = ["New Schedule"]
 
         # 讀取資料
@@ -127,7 +135,7 @@ class SchedulerFullExample:
         }
 
         model = cp_model.CpModel()
-        all_tasks = []
+        tasks = TaskRegistry()
         machine_to_intervals = {}
 
         # 變數範圍設定為 30 天 (分鐘)
@@ -162,7 +170,7 @@ class SchedulerFullExample:
                         machine_to_intervals[m_name] = []
                     machine_to_intervals[m_name].append(interval)
 
-                all_tasks.append({
+                tasks.add(lot["LotId"], {
                     "start": start, "end": end, "machine_idx": machine_idx,
                     "lot": lot, "op": op, "machines": machines
                 })
@@ -176,27 +184,39 @@ class SchedulerFullExample:
         for i in range(len(sorted_lots) - 1):
             lot_a = sorted_lots[i]
             lot_b = sorted_lots[i+1]
-            task_a = next(t for t in all_tasks if t["lot"] == lot_a and t["op"]["StepIdx"] == 1)
-            task_b = next(t for t in all_tasks if t["lot"] == lot_b and t["op"]["StepIdx"] == 1)
+            task_a = tasks.first(lot_a["LotId"])
+            task_b = tasks.first(lot_b["LotId"])
             model.Add(task_a["start"] <= task_b["start"])
 
 
 
-        # 設定目標函數
-        self.set_objective_function(model, lots, all_tasks, horizon)
+        # 設定目標函數 (字典序模式回傳各階段目標)
+        objective_stages = self.set_objective_function(model, lots, tasks, horizon)
 
         # 求解
-        solver = cp_model.CpSolver()
-        solver.parameters.max_time_in_seconds = int(os.getenv('SOLVER_MAX_TIME_IN_SECONDS', '60'))
-        solver.parameters.num_search_workers = int(os.getenv('SOLVER_NUM_SEARCH_WORKERS', '12'))
-        solver.parameters.random_seed = int(os.getenv('SOLVER_RANDOM_SEED', '42'))
-        solver.parameters.log_search_progress = os.getenv('SOLVER_LOG_SEARCH_PROGRESS', 'false').lower() == 'true'
-        solver.parameters.cp_model_presolve = os.getenv('SOLVER_CP_MODEL_PRESOLVE', 'true').lower() == 'true'
-        solver.parameters.linearization_level = int(os.getenv('SOLVER_LINEARIZATION_LEVEL', '2'))
+        max_time = int(os.getenv('SOLVER_MAX_TIME_IN_SECONDS', '60'))
+
+        def make_solver():
+            solver = cp_model.CpSolver()
+            solver.parameters.max_time_in_seconds = max_time
+            solver.parameters.num_search_workers = int(os.getenv('SOLVER_NUM_SEARCH_WORKERS', '12'))
+            solver.parameters.random_seed = int(os.getenv('SOLVER_RANDOM_SEED', '42'))
+            solver.parameters.log_search_progress = os.getenv('SOLVER_LOG_SEARCH_PROGRESS', 'false').lower() == 'true'
+            solver.parameters.cp_model_presolve = os.getenv('SOLVER_CP_MODEL_PRESOLVE', 'true').lower() == 'true'
+            solver.parameters.linearization_level = int(os.getenv('SOLVER_LINEARIZATION_LEVEL', '2'))
+            return solver
 
         # 記錄計算開始時間
         calc_start_time = datetime.now()
-        status = solver.Solve(model)
+        startup_profiler.mark("first solve started")
+        if objective_stages:
+            status, solver, stage_results = solve_lexicographic(
+                cp_model, model, objective_stages, make_solver, max_time, tolerance=lexicographic_tolerance()
+            )
+            print_stage_results(stage_results)
+        else:
+            solver = make_solver()
+            status = solver.Solve(model)
         calc_end_time = datetime.now()
 
         results_new = []
@@ -216,7 +236,7 @@ class SchedulerFullExample:
             print(f"計算批數: {len(lots)}")
 
             # 按開始時間排序輸出
-            sorted_tasks = sorted(all_tasks, key=lambda x: solver.Value(x["start"]))
+            sorted_tasks = sorted(tasks, key=lambda x: solver.Value(x["start"]))
             for task in sorted_tasks:
                 s_min = solver.Value(task["start"])
                 e_min = solver.Value(task["end"])
@@ -264,12 +284,16 @@ class SchedulerFullExample:
         # 產生 Lot_Plan_Result
         lot_plan_results = []
         if has_solution:
+            # 各 lot 最後一個步驟的結果 (一次走訪 results_new 建立索引)
+            last_results = {}
+            for r in results_new:
+                last = last_results.get(r["LotId"])
+                if last is None or r["StepIdx"] > last["StepIdx"]:
+                    last_results[r["LotId"]] = r
             for lot in lots:
-                # 找到該 lot 的所有任務
-                lot_tasks = [r for r in results_new if r["LotId"] == lot["LotId"]]
-                if lot_tasks:
-                    # 找到最後一個步驟的 End 時間
-                    last_task = max(lot_tasks, key=lambda x: x["StepIdx"])
+                last_task = last_results.get(lot["LotId"])
+                if last_task:
+                    # 最後一個步驟的 End 時間
                     plan_date = last_task["End"]
                     due_date_str = lot["DueDate"]
                     due_date = datetime.fromisoformat(due_date_str)
@@ -346,8 +370,9 @@ class SchedulerFullExample:
         if not all([os.getenv('MYSQL_HOST'), os.getenv('MYSQL_PORT'), os.getenv('MYSQL_USER'), os.getenv('MYSQL_PASSWORD'), os.getenv('MYSQL_DATABASE')]):
             print("MySQL 環境變數未設定")
             return result_summary
+        mysql_connector = timed_import("mysql.connector")
         try:
-            conn = mysql.connector.connect(
+            conn = mysql_connector.connect(
                 host=os.getenv('MYSQL_HOST'),
                 port=int(os.getenv('MYSQL_PORT')),
                 user=os.getenv('MYSQL_USER'),
@@ -368,7 +393,7 @@ class SchedulerFullExample:
 
             conn.commit()
             print("資料已插入 MySQL")
-        except mysql.connector.Error as err:
+        except mysql_connector.Error as err:
             print(f"MySQL 錯誤: {err}")
         finally:
             if 'cursor' in locals() and cursor:
@@ -493,6 +518,8 @@ class SchedulerFullExample:
         elif self.optimization_type == 2:
             return "優先權優先 (最小化加權完成時間)"
         elif self.optimization_type == 3:
+            if self.objective_mode == "lexicographic":
+                return "多目標優化 (字典序：加權完成時間 → makespan)"
             return f"多目標優化 (α={self.alpha}, β={self.beta})"
         elif self.optimization_type == 4:
             return "準時交貨優先 (最小化總延遲時間)"
@@ -542,21 +569,23 @@ class SchedulerFullExample:
 
         return top5_list
 
-    def set_objective_function(self, model: cp_model.CpModel, lots: List[Dict], all_tasks: List[Dict], horizon: int):
+    def set_objective_function(self, model: "cp_model.CpModel", lots: List[Dict], tasks: TaskRegistry, horizon: int):
         """
         設定目標函數
         :param model: CP模型
         :param lots: Lot列表
-        :param all_tasks: 所有任務列表
+        :param tasks: 依 LotId 索引的任務表
         :param horizon: 時間範圍
+        :return: 字典序模式的多目標 (類型 3) 回傳各階段 [(名稱, 目標)]，由 solve_lexicographic 依序求解；其餘為 None
         """
+        # 各 Lot 的完工時間 = 最後一道工序的 end (O(1) 取得)
+        lot_ends = {lot["LotId"]: tasks.last(lot["LotId"])["end"] for lot in lots}
+
         if self.optimization_type == 1:
             # 1. 交期優先：最小化 makespan (最後一批產出時間)
             makespan = model.NewIntVar(0, horizon, 'makespan')
             for lot in lots:
-                lot_tasks = [t for t in all_tasks if t["lot"] == lot]
-                last_task = max(lot_tasks, key=lambda x: x["op"]["StepIdx"])
-                model.Add(makespan >= last_task["end"])
+                model.Add(makespan >= lot_ends[lot["LotId"]])
             model.Minimize(makespan)
             print("優化目標：交期優先 (最小化總完成時間)")
 
@@ -565,11 +594,9 @@ class SchedulerFullExample:
             weighted_completion = model.NewIntVar(0, horizon * 1000, 'weighted_completion')  # 假設Priority最大1000
             total_weighted = []
             for lot in lots:
-                lot_tasks = [t for t in all_tasks if t["lot"] == lot]
-                last_task = max(lot_tasks, key=lambda x: x["op"]["StepIdx"])
                 priority = lot["Priority"]
                 weighted_end = model.NewIntVar(0, horizon * priority, f'weighted_end_{lot["LotId"]}')
-                model.Add(weighted_end == last_task["end"] * priority)
+                model.Add(weighted_end == lot_ends[lot["LotId"]] * priority)
                 total_weighted.append(weighted_end)
 
             model.Add(weighted_completion == sum(total_weighted))
@@ -580,22 +607,23 @@ class SchedulerFullExample:
             # 3. 多目標優化：Minimize(α × weighted_completion_time + β × makespan)
             makespan = model.NewIntVar(0, horizon, 'makespan')
             for lot in lots:
-                lot_tasks = [t for t in all_tasks if t["lot"] == lot]
-                last_task = max(lot_tasks, key=lambda x: x["op"]["StepIdx"])
-                model.Add(makespan >= last_task["end"])
+                model.Add(makespan >= lot_ends[lot["LotId"]])
 
             weighted_completion = model.NewIntVar(0, horizon * 1000, 'weighted_completion')
             total_weighted = []
             for lot in lots:
-                lot_tasks = [t for t in all_tasks if t["lot"] == lot]
-                last_task = max(lot_tasks, key=lambda x: x["op"]["StepIdx"])
                 priority = lot["Priority"]
                 weighted_end = model.NewIntVar(0, horizon * priority, f'weighted_end_{lot["LotId"]}')
-                model.Add(weighted_end == last_task["end"] * priority)
+                model.Add(weighted_end == lot_ends[lot["LotId"]] * priority)
                 total_weighted.append(weighted_end)
 
             model.Add(weighted_completion == sum(total_weighted))
 
+            if self.objective_mode == "lexicographic":
+                # 字典序：先最小化加權完成時間，固定後再最小化 makespan (不使用放大係數)
+                print("優化目標：多目標優化 (字典序：加權完成時間 → makespan)")
+                return [("weighted_completion", weighted_completion), ("makespan", makespan)]
+
             # 多目標：α × weighted_completion + β × makespan
             # 注意：OR-Tools CP-SAT 僅支援整數係數，因此我們將權重放大 100 倍
             objective = model.NewIntVar(0, horizon * 1000 * 100, 'multi_objective')
@@ -611,16 +639,13 @@ class SchedulerFullExample:
             lateness_terms = []
 
             for lot in lots:
-                lot_tasks = [t for t in all_tasks if t["lot"] == lot]
-                last_task = max(lot_tasks, key=lambda x: x["op"]["StepIdx"])
-
                 # 將 DueDate 轉換為相對於 SCHEDULE_START 的分鐘數
                 due_date = datetime.fromisoformat(lot["DueDate"])
                 due_minutes = int((due_date - self.SCHEDULE_START).total_seconds() / 60)
 
                 # 計算延遲：max(0, completion_time - DueDate)
                 lateness = model.NewIntVar(0, horizon, f'lateness_{lot["LotId"]}')
-                model.AddMaxEquality(lateness, [last_task["end"] - due_minutes, 0])
+                model.AddMaxEquality(lateness, [lot_ends[lot["LotId"]] - due_minutes, 0])
                 lateness_terms.append(lateness)
 
             model.Add(total_lateness == sum(lateness_terms))
@@ -633,7 +658,21 @@ class SchedulerFullExample:
 
 
 if __name__ == "__main__":
-    load_dotenv()
+    # 解析命令行參數 (用於多目標優化的權重)：先於載入 .env 與連線資料庫
+    parser = argparse.ArgumentParser(description="依 PlanModel 選定的優化類型執行排程")
+    parser.add_argument('alpha', nargs='?', type=float, default=0.5, help='多目標優化中加權完成時間的權重 (預設 0.5)')
+    parser.add_argument('beta', nargs='?', type=float, default=0.5, help='多目標優化中延遲的權重 (預設 0.5)')
+    parser.add_argument('--api', action='store_true', help='排程完成後啟動 Flask API (port 5000)')
+    parser.add_argument('--objective-mode', choices=OBJECTIVE_MODES, default=None,
+                        help='多目標優化的合成方式：weighted (α/β 加權和) 或 lexicographic (預設 SOLVER_OBJECTIVE_MODE 或 weighted)')
+    parser.add_argument('--profile-startup', action='store_true', help='顯示匯入與初始化各階段耗時')
+    args, _ = parser.parse_known_args()
+    startup_profiler.enable(args.profile_startup)
+    alpha = args.alpha
+    beta = args.beta
+
+    with startup_profiler.phase("load .env"):
+        load_dotenv()
 
     # 記錄程式開始執行時間
     program_start_time = datetime.now()
@@ -644,8 +683,9 @@ if __name__ == "__main__":
         print("MySQL 環境變數未設定")
         sys.exit(1)
 
+    mysql_connector = timed_import("mysql.connector")
     try:
-        conn = mysql.connector.connect(
+        conn = mysql_connector.connect(
             host=os.getenv('MYSQL_HOST'),
             port=int(os.getenv('MYSQL_PORT')),
             user=os.getenv('MYSQL_USER'),
@@ -657,28 +697,10 @@ if __name__ == "__main__":
         plan_models = cursor.fetchall()
         cursor.close()
         conn.close()
-    except mysql.connector.Error as err:
+    except mysql_connector.Error as err:
         print(f"MySQL 錯誤: {err}")
         sys.exit(1)
 
-    # 解析命令行參數 (用於多目標優化的權重)
-    alpha = 0.5
-    beta = 0.5
-
-    if len(sys.argv) > 1:
-        try:
-            alpha = float(sys.argv[1])
-        except ValueError:
-            print("錯誤：alpha 必須是浮點數")
-            sys.exit(1)
-
-    if len(sys.argv) > 2:
-        try:
-            beta = float(sys.argv[2])
-        except ValueError:
-            print("錯誤：beta 必須是浮點數")
-            sys.exit(1)
-
     # 讀取 lots 用於 ScheduleJob
     lots = []
     if os.path.exists(r"C:\Data\APS\lot_Plan\lot_Plan.json"):
@@ -693,7 +715,8 @@ if __name__ == "__main__":
             seq_no_int = int(optimization_type)
             executed_types.append(seq_no_int)
             print(f"執行優化類型: {seq_no_int}, ScheduleId: {schedule_id}")
-            scheduler = SchedulerFullExample(optimization_type=seq_no_int, alpha=alpha, beta=beta)
+            scheduler = SchedulerFullExample(optimization_type=seq_no_int, alpha=alpha, beta=beta,
+                                             objective_mode=args.objective_mode or objective_mode())
             # 修改 scheduler 的 schedule_id
             scheduler.schedule_id = schedule_id
             summary = scheduler.run()
@@ -728,7 +751,7 @@ if __name__ == "__main__":
         plan_summary = "\n".join(plan_summary_lines)
 
         try:
-            conn = mysql.connector.connect(
+            conn = mysql_connector.connect(
                 host=os.getenv('MYSQL_HOST'),
                 port=int(os.getenv('MYSQL_PORT')),
                 user=os.getenv('MYSQL_USER'),
@@ -743,7 +766,7 @@ if __name__ == "__main__":
             cursor.execute(sql_schedule_job, (schedule_id, lot_plan_json, plan_summary, create_date, create_user))
             conn.commit()
             print("ScheduleJob 資料已插入 MySQL")
-        except mysql.connector.Error as err:
+        except mysql_connector.Error as err:
             print(f"MySQL 錯誤: {err}")
         finally:
             if 'cursor' in locals() and cursor:
@@ -751,8 +774,12 @@ if __name__ == "__main__":
             if 'conn' in locals() and conn:
                 conn.close()
 
+    startup_profiler.report()
+
     # 如果有 --api 參數，啟動 Flask API
-    if len(sys.argv) > 3 and sys.argv[3] == '--api':
+    if args.api:
+        flask = timed_import("flask")
+        Flask, jsonify, request = flask.Flask, flask.jsonify, flask.request
         app = Flask(__name__)
 
         @app.after_request
@@ -765,7 +792,7 @@ if __name__ == "__main__":
         @app.route('/get_schedule_jobs')
         def get_schedule_jobs():
             try:
-                conn = mysql.connector.connect(
+                conn = mysql_connector.connect(
                     host=os.getenv('MYSQL_HOST'),
                     port=int(os.getenv('MYSQL_PORT')),
                     user=os.getenv('MYSQL_USER'),
@@ -787,14 +814,14 @@ if __name__ == "__main__":
                 cursor.close()
                 conn.close()
                 return jsonify(result)
-            except mysql.connector.Error as err:
+            except mysql_connector.Error as err:
                 return jsonify({'error': str(err)}), 500
 
         @app.route('/get_plan_models')
         def get_plan_models():
             try:
                 limit = request.args.get('limit', 10, type=int)
-                conn = mysql.connector.connect(
+                conn = mysql_connector.connect(
                     host=os.getenv('MYSQL_HOST'),
                     port=int(os.getenv('MYSQL_PORT')),
                     user=os.getenv('MYSQL_USER'),
@@ -817,7 +844,7 @@ if __name__ == "__main__":
                 cursor.close()
                 conn.close()
                 return jsonify(result)
-            except mysql.connector.Error as err:
+            except mysql_connector.Error as err:
                 return jsonify({'error': str(err)}), 500
 
         @app.route('/get_json/<path:filepath>')
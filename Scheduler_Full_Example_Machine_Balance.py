@@ -4,6 +4,8 @@ from datetime import datetime, timedelta
 from enum import Enum
 from typing import List, Dict, Optional, Any
 from ortools.sat.python import cp_model
+from task_registry import TaskRegistry
+from lexicographic_solve import objective_mode, lexicographic_tolerance, solve_lexicographic, print_stage_results
 
 # --- 資料類別定義 ---
 
@@ -87,7 +89,7 @@ class SchedulerFullExample:
         lots = self.load_json(self.file_new_lot_plan, [])
 
         model = cp_model.CpModel()
-        all_tasks = []
+        tasks = TaskRegistry()
         machine_to_intervals = {}
 
         # 建立新排程任務
@@ -121,7 +123,7 @@ class SchedulerFullExample:
                         machine_to_intervals[m_name] = []
                     machine_to_intervals[m_name].append(interval)
 
-                all_tasks.append({
+                tasks.add(lot["LotId"], {
                     "start": start, "end": end, "machine_idx": machine_idx,
                     "lot": lot, "op": op, "machines": machines
                 })
@@ -135,8 +137,8 @@ class SchedulerFullExample:
         for i in range(len(sorted_lots) - 1):
             lot_a = sorted_lots[i]
             lot_b = sorted_lots[i+1]
-            task_a = next(t for t in all_tasks if t["lot"] == lot_a and t["op"]["StepIdx"] == 1)
-            task_b = next(t for t in all_tasks if t["lot"] == lot_b and t["op"]["StepIdx"] == 1)
+            task_a = tasks.first(lot_a["LotId"])
+            task_b = tasks.first(lot_b["LotId"])
             model.Add(task_a["start"] <= task_b["start"])
 
         # 計算每個機台的總工作時間
@@ -160,26 +162,39 @@ class SchedulerFullExample:
         # 目標函數：最小化 makespan + 平衡懲罰
         makespan = model.NewIntVar(0, horizon, 'makespan')
         for lot in lots:
-            # 取得該 Lot 的最後一道工序
-            lot_tasks = [t for t in all_tasks if t["lot"] == lot]
-            last_task = max(lot_tasks, key=lambda x: x["op"]["StepIdx"])
-            model.Add(makespan >= last_task["end"])
+            # 該 Lot 的最後一道工序
+            model.Add(makespan >= tasks.last(lot["LotId"])["end"])
 
         # 組合目標：主要最小化 makespan，次要最小化機台平衡
-        model.Minimize(makespan * 1000 + balance_penalty)
+        # SOLVER_OBJECTIVE_MODE=lexicographic 時改為先求 makespan、固定後再求平衡 (不使用 ×1000 放大係數)
+        lexicographic = objective_mode() == "lexicographic"
+        if not lexicographic:
+            model.Minimize(makespan * 1000 + balance_penalty)
 
         # 求解
-        solver = cp_model.CpSolver()
-        solver.parameters.max_time_in_seconds = 60  # 增加到60秒讓求解器有更多時間優化
-        solver.parameters.num_search_workers = 12
-        solver.parameters.random_seed = 42             # 設定固定隨機種子以獲得穩定結果
-        solver.parameters.log_search_progress = False  # 減少日誌輸出以加快速度
-        solver.parameters.cp_model_presolve = True     # 啟用預處理
-        solver.parameters.linearization_level = 2      # 提高線性化等級
+        max_time = 60  # 增加到60秒讓求解器有更多時間優化
+
+        def make_solver():
+            solver = cp_model.CpSolver()
+            solver.parameters.max_time_in_seconds = max_time
+            solver.parameters.num_search_workers = 12
+            solver.parameters.random_seed = 42             # 設定固定隨機種子以獲得穩定結果
+            solver.parameters.log_search_progress = False  # 減少日誌輸出以加快速度
+            solver.parameters.cp_model_presolve = True     # 啟用預處理
+            solver.parameters.linearization_level = 2      # 提高線性化等級
+            return solver
 
         # 記錄計算開始時間
         calc_start_time = datetime.now()
-        status = solver.Solve(model)
+        if lexicographic:
+            status, solver, stage_results = solve_lexicographic(
+                cp_model, model, [("makespan", makespan), ("balance", balance_penalty)], make_solver, max_time,
+                tolerance=lexicographic_tolerance()
+            )
+            print_stage_results(stage_results)
+        else:
+            solver = make_solver()
+            status = solver.Solve(model)
         calc_end_time = datetime.now()
 
         results_new = []
@@ -206,7 +221,7 @@ class SchedulerFullExample:
                 print(f"機台平衡度: 最小 {min_work_val/60:.1f} 小時, 最大 {max_work_val/60:.1f} 小時, 差異 {balance_val/60:.1f} 小時")
 
             # 按開始時間排序輸出
-            sorted_tasks = sorted(all_tasks, key=lambda x: solver.Value(x["start"]))
+            sorted_tasks = sorted(tasks, key=lambda x: solver.Value(x["start"]))
             for task in sorted_tasks:
                 s_min = solver.Value(task["start"])
                 e_min = solver.Value(task["end"])
@@ -2,28 +2,36 @@
 
 import sys
 import io
-import mysql.connector
 import os
 import json
 import argparse
-from ortools.sat.python import cp_model
 from datetime import datetime, timedelta
-from dotenv import load_dotenv
+from startup_profile import startup_profiler
 
 if sys.platform == 'win32':
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
     sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
 
-# 載入環境變數
-load_dotenv()
-
-# 解析命令行參數
+# 解析命令行參數 (先於匯入 OR-Tools / mysql.connector，--help 與參數錯誤可立即回應)
 parser = argparse.ArgumentParser()
 parser.add_argument('--start-time', type=str, default='2026-01-22 14:00:00',
                     help='排程開始時間 (YYYY-MM-DD HH:MM:SS)')
+parser.add_argument('--profile-startup', action='store_true',
+                    help='顯示匯入與初始化各階段耗時')
 args = parser.parse_args()
+startup_profiler.enable(args.profile_startup)
 print(f"Scheduling start time: {args.start_time}")
 
+with startup_profiler.phase("import dotenv / mysql.connector"):
+    import mysql.connector
+    from dotenv import load_dotenv
+with startup_profiler.phase("import ortools.sat.python.cp_model"):
+    from ortools.sat.python import cp_model
+
+# 載入環境變數
+with startup_profiler.phase("load .env"):
+    load_dotenv()
+
 # 資料庫連線設定
 db_config = {
     'host': os.getenv('MYSQL_HOST'),
@@ -458,6 +466,8 @@ if not MACHINE_GROUPS:
         "M08": ["M08-1", "M08-2", "M08-3", "M08-4"],
     }
 
+startup_profiler.mark("data loaded")
+
 # =====================================================
 # OR-Tools Model
 # =====================================================
@@ -783,9 +793,11 @@ solver.parameters.log_search_progress = os.getenv('SOLVER_LOG_SEARCH_PROGRESS',
 
 print(f"Solver parameters: max_time={max_time}s, num_workers={num_workers}")
 calc_start_time = datetime.now()
+startup_profiler.mark("first solve started")
 status = solver.Solve(model)
 calc_end_time = datetime.now()
 print(f"Scheduling calculation duration: {calc_end_time - calc_start_time}")
+startup_profiler.report()
 # 強制刷新輸出，確保 GUI 能即時讀取
 sys.stdout.flush()
 
@@ -1,32 +1,26 @@
 # 因應資料量可能會有幾百個 lots,作業站 20~30站, 會無法在限定時間內完成計算,需要用分批處理方式
 # 需要未來依照客戶需求調整參數, 依照客戶狀況調整參數
 
+# OR-Tools 與 mysql.connector 改為用到時才匯入 (timed_import)：--help / --dry-run 不必等待 OR-Tools 載入，
+# 匯入與初始化耗時可用 --profile-startup 查看
+
 import sys
 import io
-import mysql.connector
 import os
 import time
 import json
 import argparse
-from ortools.sat.python import cp_model
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
-from concurrent.futures import ThreadPoolExecutor
-import multiprocessing
-
-if sys.platform == 'win32':
-    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
-    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+from schedule_result_store import save_schedule_results, create_tables as create_result_tables
+from startup_profile import startup_profiler, timed_import
+from scheduler_trace import RunTrace
+from solver_stats import SolverStatsRecorder, combine_stage_stats, print_stats as print_solver_stats, save_stats as save_solver_stats
+from lexicographic_solve import objective_mode, lexicographic_tolerance, solve_lexicographic, print_stage_results
 
 # 載入環境變數
-load_dotenv()
-
-# 解析命令行參數
-parser = argparse.ArgumentParser()
-parser.add_argument('--start-time', type=str, default='2026-01-22 14:00:00',
-                    help='Scheduling start time (YYYY-MM-DD HH:MM:SS)')
-args = parser.parse_args()
-print(f"Scheduling start time: {args.start_time}")
+with startup_profiler.phase("load .env"):
+    load_dotenv()
 
 # 資料庫連線設定
 db_config = {
@@ -36,11 +30,61 @@ db_config = {
     'database': os.getenv('MYSQL_DATABASE')
 }
 
+
+def connect_db(**kwargs):
+    """建立 MySQL 連線 (mysql.connector 在第一次連線時才匯入)"""
+    return timed_import("mysql.connector").connect(**db_config, **kwargs)
+
+
+def preload_solver():
+    """預先匯入 OR-Tools (常駐 worker 啟動時呼叫，讓第一次排程不必等待載入)"""
+    timed_import("ortools.sat.python.cp_model")
+
 # =====================================================
 # 基本設定
 # =====================================================
-SCHEDULE_START = datetime.strptime(args.start_time, '%Y-%m-%d %H:%M:%S')
-OBJECTIVE_TYPE = "total_completion_time"   # "makespan" | "weighted_delay" | "total_completion_time"
+DEFAULT_START_TIME = '2026-01-22 14:00:00'
+DEFAULT_TRACE_FILE = os.path.join('plan_result', 'scheduler_trace.json')
+OBJECTIVE_TYPES = ("makespan", "weighted_delay", "total_completion_time")
+
+
+def objective_settings():
+    """
+    讀取並檢查目標函數設定 (每次排程開始時呼叫：常駐 worker 重新載入 .env 後即生效)
+
+    - SCHEDULER_OBJECTIVE_TYPE：makespan | weighted_delay | total_completion_time (預設 total_completion_time)
+    - SOLVER_OBJECTIVE_MODE：weighted_delay 的合成方式，weighted = sum(delay) * 1000 + makespan；
+      lexicographic = 先最小化加權延遲，固定後再最小化 makespan (見 lexicographic_solve.py)
+    - SOLVER_LEXICOGRAPHIC_TOLERANCE：字典序模式的相對容許量
+    - SCHEDULER_FAST_VERIFICATION：快速驗證模式，不設定目標函數，只求可行解
+
+    Returns:
+        tuple: (objective_type, objective_mode, lexicographic_tolerance, fast_verification)
+    """
+    objective_type = os.getenv('SCHEDULER_OBJECTIVE_TYPE', 'total_completion_time').strip().lower()
+    if objective_type not in OBJECTIVE_TYPES:
+        raise ValueError(f"Invalid SCHEDULER_OBJECTIVE_TYPE: {objective_type} (expected one of {', '.join(OBJECTIVE_TYPES)})")
+    fast_verification = os.getenv('SCHEDULER_FAST_VERIFICATION', 'true').lower() == 'true'
+    return objective_type, objective_mode(), lexicographic_tolerance(), fast_verification
+
+
+# 啟動時先檢查一次，設定錯誤時不必等到第一次排程才失敗
+objective_settings()
+
+
+def warn_unused_objective_mode(objective_type, mode, fast_verification):
+    """SOLVER_OBJECTIVE_MODE=lexicographic 只作用於 weighted_delay 目標；設定不會生效時提示"""
+    if mode != "lexicographic":
+        return
+    if fast_verification:
+        reason = "SCHEDULER_FAST_VERIFICATION=true (no objective)"
+    elif objective_type != "weighted_delay":
+        reason = f"SCHEDULER_OBJECTIVE_TYPE={objective_type} (single objective)"
+    else:
+        return
+    print(f"Warning: SOLVER_OBJECTIVE_MODE=lexicographic has no effect with {reason}; "
+          f"set SCHEDULER_OBJECTIVE_TYPE=weighted_delay and SCHEDULER_FAST_VERIFICATION=false to use it")
+    sys.stdout.flush()
 
 
 # 下面順序可以調整, 須注意與前端UI同步
@@ -63,136 +107,225 @@ class BookingColorMap:
     def get_color(booking: int) -> str:
         return BookingColorMap.COLOR_BY_BOOKING.get(booking, "#F0F8FF")
 
-def load_machine_unavailable_periods():
+JOB_LOT_COLUMNS = ("LotId", "Priority", "DueDate", "ActualFinishDate", "PlanFinishDate", "PlanStartTime", "LotCreateDate")
+JOB_OPERATION_COLUMNS = (
+    "LotId", "Step", "MachineGroup", "Duration", "Sequence", "StepStatus", "CheckInTime", "CheckOutTime",
+    "PlanCheckInTime", "PlanCheckOutTime", "PlanMachineId",
+)
+# 機台不可用時段讀取範圍 (排程起點之後的天數)
+UNAVAILABLE_WINDOW_DAYS = 30
+JOB_QUERY_CHUNK_SIZE = 1000
+
+
+def _chunks(values, size=JOB_QUERY_CHUNK_SIZE):
+    values = list(values)
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+def _group_by_machine(periods):
+    machine_unavailable = {}
+    for period in periods:
+        machine_id = period['MachineId']
+        if machine_id not in machine_unavailable:
+            machine_unavailable[machine_id] = []
+        machine_unavailable[machine_id].append(period)
+    return machine_unavailable
+
+
+def query_machine_unavailable_periods(cursor, schedule_start=None):
+    """
+    查詢機台不可用時段，依機台分組
+
+    schedule_start 為 None 時讀取全部 ACTIVE 時段 (常駐 worker 快取後以 filter_unavailable_periods 依起點篩選)，
+    否則只讀取排程起點後 UNAVAILABLE_WINDOW_DAYS 天內的時段
+    """
+    window_filter = ""
+    params = ()
+    if schedule_start is not None:
+        window_filter = "AND StartTime < DATE_ADD(%s, INTERVAL %s DAY) AND EndTime > %s"
+        params = (schedule_start, UNAVAILABLE_WINDOW_DAYS, schedule_start)
+    cursor.execute(f"""
+        SELECT Id, MachineId, StartTime, EndTime, PeriodType, Reason, Priority
+        FROM machine_unavailable_periods
+        WHERE Status = 'ACTIVE'
+        {window_filter}
+        ORDER BY MachineId, StartTime
+    """, params)
+
+    unavailable_periods = cursor.fetchall()
+    print(f"Loaded {len(unavailable_periods)} machine unavailable periods from database")
+    return _group_by_machine(unavailable_periods)
+
+
+def filter_unavailable_periods(machine_unavailable, schedule_start):
+    """由全部 ACTIVE 時段篩選排程起點後 UNAVAILABLE_WINDOW_DAYS 天內的時段 (與 SQL 篩選條件相同)"""
+    window_end = schedule_start + timedelta(days=UNAVAILABLE_WINDOW_DAYS)
+    filtered = {}
+    for machine_id, periods in machine_unavailable.items():
+        in_window = [p for p in periods if p['StartTime'] < window_end and p['EndTime'] > schedule_start]
+        if in_window:
+            filtered[machine_id] = in_window
+    return filtered
+
+def load_machine_unavailable_periods(schedule_start):
     """從資料庫載入機台不可用時段"""
     try:
-        conn = mysql.connector.connect(**db_config)
+        conn = connect_db()
         cursor = conn.cursor(dictionary=True)
-
-        cursor.execute("""
-            SELECT Id, MachineId, StartTime, EndTime, PeriodType, Reason, Priority
-            FROM machine_unavailable_periods
-            WHERE Status = 'ACTIVE'
-            AND StartTime < DATE_ADD(%s, INTERVAL 30 DAY)
-            AND EndTime > %s
-            ORDER BY MachineId, StartTime
-        """, (SCHEDULE_START, SCHEDULE_START))
-
-        unavailable_periods = cursor.fetchall()
+        machine_unavailable = query_machine_unavailable_periods(cursor, schedule_start)
         cursor.close()
         conn.close()
-        print(f"Loaded {len(unavailable_periods)} machine unavailable periods from database")
-        
-        machine_unavailable = {}
-        for period in unavailable_periods:
-            machine_id = period['MachineId']
-            if machine_id not in machine_unavailable:
-                machine_unavailable[machine_id] = []
-            machine_unavailable[machine_id].append(period)
-
         return machine_unavailable
 
     except Exception as e:
         print(f"Error loading machine unavailable periods: {e}")
         return {}
 
-def load_jobs_from_database():
+def query_exclude_completed(cursor):
+    """讀取 ui_settings 的 scheduler_exclude_completed_lots 設定 (預設排除已完成的 Lot)"""
+    cursor.execute("SELECT parameter_value FROM ui_settings WHERE parameter_name = 'scheduler_exclude_completed_lots'")
+    row = cursor.fetchone()
+    exclude_completed = True
+    if row:
+        exclude_completed = row['parameter_value'].lower() == 'true'
+    return exclude_completed
+
+def query_job_rows(cursor, exclude_completed, lot_ids=None, tracking_column=None):
+    """
+    批次讀取排程所需的 Lots / LotOperations 資料列
+
+    作業以 LotId IN (...) 分段查詢 (每段 JOB_QUERY_CHUNK_SIZE 個 Lot)，取代逐 Lot 各查一次。
+
+    Args:
+        exclude_completed: 是否排除已完成 (ActualFinishDate 不為 NULL) 的 Lot
+        lot_ids: 只讀取指定的 Lot；None 表示全部
+        tracking_column: 另外讀取的異動追蹤欄位 (UpdatedAt，常駐 worker 快取用來判斷資料列是否已讀過)
+
+    Returns:
+        (lots, operations_by_lot)：lots 依 LotId 排序，operations_by_lot 為 LotId -> 依 Sequence 排序的作業
+    """
+    extra_columns = (tracking_column,) if tracking_column else ()
+    lot_query = f"SELECT {', '.join(JOB_LOT_COLUMNS + extra_columns)} FROM Lots"
+    completed_filter = " AND ActualFinishDate IS NULL" if exclude_completed else ""
+    lots = []
+    if lot_ids is None:
+        cursor.execute(f"{lot_query} WHERE LotId IS NOT NULL{completed_filter} ORDER BY LotId")
+        lots = cursor.fetchall()
+    else:
+        for chunk in _chunks(lot_ids):
+            placeholders = ", ".join(["%s"] * len(chunk))
+            cursor.execute(f"{lot_query} WHERE LotId IN ({placeholders}){completed_filter} ORDER BY LotId", chunk)
+            lots.extend(cursor.fetchall())
+    lots = [lot for lot in lots if lot.get('LotId')]
+
+    operations_by_lot = {lot['LotId']: [] for lot in lots}
+    for chunk in _chunks(operations_by_lot.keys()):
+        placeholders = ", ".join(["%s"] * len(chunk))
+        cursor.execute(f"""
+            SELECT {', '.join(JOB_OPERATION_COLUMNS + extra_columns)}
+            FROM LotOperations
+            WHERE LotId IN ({placeholders})
+            ORDER BY LotId, Sequence
+        """, chunk)
+        for op in cursor.fetchall():
+            operations_by_lot.setdefault(op['LotId'], []).append(op)
+
+    return lots, operations_by_lot
+
+def query_frozen_rows(cursor, lot_ids=None):
+    """讀取凍結作業 (FrozenOperations)，依 LotId 分組；lot_ids 為 None 時讀取全部"""
+    rows = []
+    if lot_ids is None:
+        cursor.execute("SELECT LotId, Step, MachineId, StartTime, EndTime FROM FrozenOperations")
+        rows = cursor.fetchall()
+    else:
+        for chunk in _chunks(lot_ids):
+            placeholders = ", ".join(["%s"] * len(chunk))
+            cursor.execute(f"""
+                SELECT LotId, Step, MachineId, StartTime, EndTime
+                FROM FrozenOperations
+                WHERE LotId IN ({placeholders})
+            """, chunk)
+            rows.extend(cursor.fetchall())
+
+    frozen_by_lot = {}
+    for frozen in rows:
+        frozen_by_lot.setdefault(frozen['LotId'], []).append(frozen)
+    return frozen_by_lot
+
+def build_job(lot, operations_data, frozen_data, schedule_start):
+    """由 Lot / 作業 / 凍結作業資料列組出單一 job (WIP 已進行時間依 schedule_start 計算)"""
+    completed_ops = {}
+    wip_ops = {}
+    frozen_ops = {}
+    new_schedule_type = {}
+
+    for op in operations_data:
+        step = op.get('Step', None)
+        status = op.get('StepStatus', None)
+        check_in = op.get('CheckInTime', None)
+        plan_check_in = op.get('PlanCheckInTime', None)
+        plan_check_out = op.get('PlanCheckOutTime', None)
+        machine = op.get('PlanMachineId', None)
+
+        if status == 0:
+            new_schedule_type[step] = 0 if plan_check_in is None else 10
+        elif status == 2:
+            completed_ops[step] = {"start_time": plan_check_in, "end_time": plan_check_out, "machine": machine}
+        elif status == 1:
+            elapsed = 0
+            if check_in:
+                elapsed = int((schedule_start - check_in).total_seconds() / 60)
+            wip_ops[step] = {
+                "start_time": plan_check_in, 
+                "end_time": plan_check_out,
+                "elapsed_minutes": max(0, elapsed),
+                "machine": machine
+            }
+
+    for frozen in frozen_data:
+        frozen_ops[frozen['Step']] = {
+            "start_time": frozen['StartTime'],
+            "end_time": frozen['EndTime'],
+            "machine": frozen['MachineId']
+        }
+
+    operations = []
+    for op in operations_data:
+        operations.append((op['Step'], op['MachineGroup'], op['Duration']))
+
+    return {
+        "LotId": lot['LotId'],
+        "Priority": lot['Priority'],
+        "DueDate": lot['DueDate'].strftime("%Y-%m-%dT%H:%M:%S") if lot['DueDate'] else None,
+        "ActualFinishDate": lot['ActualFinishDate'].strftime("%Y-%m-%dT%H:%M:%S") if lot['ActualFinishDate'] else None,
+        "PlanFinishDate": lot['PlanFinishDate'].strftime("%Y-%m-%dT%H:%M:%S") if lot['PlanFinishDate'] else None,
+        "PlanStartTime": lot['PlanStartTime'].strftime("%Y-%m-%dT%H:%M:%S") if lot['PlanStartTime'] else None,
+        "LotCreateDate": lot['LotCreateDate'].strftime("%Y-%m-%dT%H:%M:%S") if lot['LotCreateDate'] else None,
+        "Operations": operations,
+        "CompletedOps": completed_ops,
+        "WIPOps": wip_ops,
+        "FrozenOps": frozen_ops,
+        "NewScheduleType": new_schedule_type,
+    }
+
+def load_jobs_from_database(schedule_start):
     """從資料庫載入 jobs_data"""
     try:
-        conn = mysql.connector.connect(**db_config)
+        conn = connect_db()
         cursor = conn.cursor(dictionary=True)
 
-        cursor.execute("SELECT parameter_value FROM ui_settings WHERE parameter_name = 'scheduler_exclude_completed_lots'")
-        row = cursor.fetchone()
-        exclude_completed = True
-        if row:
-            exclude_completed = row['parameter_value'].lower() == 'true'
-            
+        exclude_completed = query_exclude_completed(cursor)
         print(f"Scheduler setting: exclude_completed_lots = {exclude_completed}")
 
-        query = "SELECT LotId, Priority, DueDate, ActualFinishDate, PlanFinishDate, PlanStartTime, LotCreateDate FROM Lots"
-        if exclude_completed:
-            query += " WHERE ActualFinishDate IS NULL"
-        query += " ORDER BY LotId"
-        
-        cursor.execute(query)
-        lots_data = cursor.fetchall()
+        lots_data, operations_by_lot = query_job_rows(cursor, exclude_completed)
+        frozen_by_lot = query_frozen_rows(cursor, [lot['LotId'] for lot in lots_data])
 
         jobs_data = []
         for lot in lots_data:
-            lot_id = lot.get('LotId', None)
-            if not lot_id: continue
-
-            cursor.execute("""
-                SELECT Step, MachineGroup, Duration, Sequence, StepStatus, CheckInTime, CheckOutTime, PlanCheckInTime, PlanCheckOutTime, PlanMachineId
-                FROM LotOperations
-                WHERE LotId = %s
-                AND LotId IS NOT NULL
-                ORDER BY Sequence
-            """, (lot_id,))
-
-            operations_data = cursor.fetchall()
-
-            completed_ops = {}
-            wip_ops = {}
-            frozen_ops = {}
-            new_schedule_type = {}
-
-            for op in operations_data:
-                step = op.get('Step', None)
-                status = op.get('StepStatus', None)
-                check_in = op.get('CheckInTime', None)
-                plan_check_in = op.get('PlanCheckInTime', None)
-                plan_check_out = op.get('PlanCheckOutTime', None)
-                machine = op.get('PlanMachineId', None)
-
-                if status == 0:
-                    new_schedule_type[step] = 0 if plan_check_in is None else 10
-                elif status == 2:
-                    completed_ops[step] = {"start_time": plan_check_in, "end_time": plan_check_out, "machine": machine}
-                elif status == 1:
-                    elapsed = 0
-                    if check_in:
-                        elapsed = int((SCHEDULE_START - check_in).total_seconds() / 60)
-                    wip_ops[step] = {
-                        "start_time": plan_check_in, 
-                        "end_time": plan_check_out,
-                        "elapsed_minutes": max(0, elapsed),
-                        "machine": machine
-                    }
-
-            cursor.execute("""
-                SELECT Step, MachineId, StartTime, EndTime
-                FROM FrozenOperations
-                WHERE LotId = %s
-            """, (lot_id,))
-            frozen_data = cursor.fetchall()
-            for frozen in frozen_data:
-                frozen_ops[frozen['Step']] = {
-                    "start_time": frozen['StartTime'],
-                    "end_time": frozen['EndTime'],
-                    "machine": frozen['MachineId']
-                }
-
-            operations = []
-            for op in operations_data:
-                operations.append((op['Step'], op['MachineGroup'], op['Duration']))
-
-            job = {
-                "LotId": lot_id,
-                "Priority": lot['Priority'],
-                "DueDate": lot['DueDate'].strftime("%Y-%m-%dT%H:%M:%S") if lot['DueDate'] else None,
-                "ActualFinishDate": lot['ActualFinishDate'].strftime("%Y-%m-%dT%H:%M:%S") if lot['ActualFinishDate'] else None,
-                "PlanFinishDate": lot['PlanFinishDate'].strftime("%Y-%m-%dT%H:%M:%S") if lot['PlanFinishDate'] else None,
-                "PlanStartTime": lot['PlanStartTime'].strftime("%Y-%m-%dT%H:%M:%S") if lot['PlanStartTime'] else None,
-                "LotCreateDate": lot['LotCreateDate'].strftime("%Y-%m-%dT%H:%M:%S") if lot['LotCreateDate'] else None,
-                "Operations": operations,
-                "CompletedOps": completed_ops,
-                "WIPOps": wip_ops,
-                "FrozenOps": frozen_ops,
-                "NewScheduleType": new_schedule_type,
-            }
-            jobs_data.append(job)
+            lot_id = lot['LotId']
+            jobs_data.append(build_job(lot, operations_by_lot.get(lot_id, []), frozen_by_lot.get(lot_id, []), schedule_start))
 
         cursor.close()
         conn.close()
@@ -208,7 +341,7 @@ def save_jobs_to_plan_raw(jobs_data):
     import time
     plan_id = f"PLAN_{int(time.time())}"
     try:
-        conn = mysql.connector.connect(**db_config)
+        conn = connect_db()
         cursor = conn.cursor()
         raw_data_json = json.dumps(jobs_data, ensure_ascii=False, default=str)
         cursor.execute("INSERT INTO PlanRaw (PlanID, RawData) VALUES (%s, %s)", (plan_id, raw_data_json))
@@ -228,7 +361,7 @@ def update_plan_chunk(lots_chunk, ops_chunk):
     """Worker function for updating a chunk of data in a separate thread"""
     conn = None
     try:
-        conn = mysql.connector.connect(**db_config)
+        conn = connect_db()
         cursor = conn.cursor()
         
         cursor.callproc('sp_UpdatePlanResultsJSON', (
@@ -245,7 +378,7 @@ def update_plan_chunk(lots_chunk, ops_chunk):
         print(f"!!! DB Update Task Error: {e}")
         return False, str(e)
 
-def update_plan_times(lot_results, plan_id, all_tasks_status):
+def update_plan_times(lot_results, plan_id, all_tasks_status, jobs_data):
     """Update plan times using Multi-threading and Stored Procedure"""
     main_start = datetime.now()
     try:
@@ -312,6 +445,7 @@ def update_plan_times(lot_results, plan_id, all_tasks_status):
         results = []
         # Use more workers for better concurrency, but balance with DB connection limits
         num_workers = min(len(tasks), 8)
+        from concurrent.futures import ThreadPoolExecutor
         with ThreadPoolExecutor(max_workers=num_workers) as executor:
             futures = [executor.submit(update_plan_chunk, t[0], t[1]) for t in tasks]
             for future in futures:
@@ -326,20 +460,27 @@ def update_plan_times(lot_results, plan_id, all_tasks_status):
         print(f"Successfully updated plan times using {success_count}/{len(tasks)} parallel tasks (Total items: {total_items}) - Total Time: {main_end - main_start}")
         if error_msgs:
             print(f"Update errors encountered: {set(error_msgs)}")
+        return {"sp_calls": len(tasks), "sp_failed_calls": len(tasks) - success_count,
+                "lots": len(lots_json_list), "operations": len(ops_json_list)}
     except Exception as e:
         print(f"Parallel update error: {e}")
+        return {}
+
+def query_machine_groups(cursor):
+    cursor.execute("SELECT MachineId, GroupId FROM Machines WHERE is_active = 1 ORDER BY GroupId, MachineId")
+    rows = cursor.fetchall()
+    groups = {}
+    for row in rows:
+        gid = row['GroupId']; mid = row['MachineId']
+        if gid not in groups: groups[gid] = []
+        groups[gid].append(mid)
+    return groups
 
 def load_machine_groups():
     try:
-        conn = mysql.connector.connect(**db_config)
+        conn = connect_db()
         cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT MachineId, GroupId FROM Machines WHERE is_active = 1 ORDER BY GroupId, MachineId")
-        rows = cursor.fetchall()
-        groups = {}
-        for row in rows:
-            gid = row['GroupId']; mid = row['MachineId']
-            if gid not in groups: groups[gid] = []
-            groups[gid].append(mid)
+        groups = query_machine_groups(cursor)
         cursor.close()
         conn.close()
         return groups
@@ -385,7 +526,7 @@ def calculate_and_save_utilization(final_lot_results, plan_id, machine_groups):
     print(f"Window: {window_start} to {window_end} ({window_duration:.1f} mins)")
     
     try:
-        conn = mysql.connector.connect(**db_config)
+        conn = connect_db()
         cursor = conn.cursor()
         
         insert_data = []
@@ -415,393 +556,851 @@ def calculate_and_save_utilization(final_lot_results, plan_id, machine_groups):
     except Exception as e:
         print(f"Error saving utilization results: {e}")
 
+def export_trace(trace, trace_file=None, schedule_id=None, plan_id=None, save_metrics=True):
+    """印出各階段耗時、輸出 Chrome trace 檔並寫入 SchedulerRunMetrics (失敗只印出訊息，不影響排程結果)"""
+    trace.print_summary()
+    path = trace_file or os.getenv('SCHEDULER_TRACE_FILE', DEFAULT_TRACE_FILE)
+    try:
+        trace.write_chrome_trace(path)
+        print(f"Trace saved to {path} (open with chrome://tracing or ui.perfetto.dev)")
+    except Exception as e:
+        print(f"Error writing trace file: {e}")
+        path = None
+
+    if save_metrics and os.getenv('SCHEDULER_RUN_METRICS', 'true').lower() == 'true':
+        try:
+            conn = connect_db()
+            cursor = conn.cursor()
+            saved_count = trace.save_metrics(cursor, schedule_id, plan_id)
+            conn.commit()
+            cursor.close()
+            conn.close()
+            print(f"Saved {saved_count} spans to SchedulerRunMetrics (RunId: {trace.run_id})")
+        except Exception as e:
+            print(f"Error saving run metrics: {e}")
+    sys.stdout.flush()
+    return path
+
+
+def export_solver_stats(stats, run_id, schedule_id=None, plan_id=None):
+    """印出各批次求解統計並寫入 SolverRunStats (RunId 與 SchedulerRunMetrics 相同；失敗只印出訊息)"""
+    print_solver_stats(stats)
+    if not stats or os.getenv('SOLVER_RUN_STATS', 'true').lower() != 'true':
+        return
+    try:
+        conn = connect_db()
+        cursor = conn.cursor()
+        saved_count = save_solver_stats(cursor, stats, run_id, schedule_id, plan_id)
+        conn.commit()
+        cursor.close()
+        conn.close()
+        print(f"Saved {saved_count} batches to SolverRunStats (RunId: {run_id})")
+    except Exception as e:
+        print(f"Error saving solver stats: {e}")
+    sys.stdout.flush()
+
+# =====================================================
+# 常駐 worker 資料快取
+# =====================================================
+MACHINE_GROUPS_SIGNATURE_QUERY = """
+    SELECT COUNT(*) AS row_count,
+           COALESCE(SUM(CRC32(CONCAT_WS('|', MachineId, GroupId, is_active))), 0) AS checksum
+    FROM Machines
+"""
+UNAVAILABLE_SIGNATURE_QUERY = """
+    SELECT COUNT(*) AS row_count,
+           COALESCE(SUM(CRC32(CONCAT_WS('|', Id, MachineId, StartTime, EndTime, PeriodType, Reason, Priority, Status))), 0) AS checksum
+    FROM machine_unavailable_periods
+"""
+JOB_CHANGE_TRACKING_COLUMN = "UpdatedAt"
+JOB_WATERMARK_EPOCH = datetime(1970, 1, 1)
+# UpdatedAt 是語句開始執行的時間 (CURRENT_TIMESTAMP(3))，交易提交後才看得到：讀取水位時仍未提交的交易，
+# 提交後的 UpdatedAt 可能小於水位。下次由「水位 - 重疊秒數」起比對，需涵蓋最長的寫入交易
+JOB_WATERMARK_OVERLAP = timedelta(seconds=int(os.getenv('SCHEDULER_CACHE_OVERLAP_SECONDS', '300')))
+
+
+class SchedulingDataCache:
+    """
+    常駐排程 worker (scheduler_worker.py) 跨多次 run_incremental_schedule 保留的資料快取
+
+    - 保留一條 autocommit 的 MySQL 連線 (使用前 ping 自動重連)，每次讀取都看得到最新資料
+    - 機台群組、不可用時段：先以一次彙總查詢 (筆數 + CRC32 校驗和) 確認資料未變動，未變動時直接沿用；
+      不可用時段快取全部 ACTIVE 時段，每次依排程起點在記憶體中篩選 (起點不同也能命中)
+    - Lots / LotOperations 資料列：依 UpdatedAt 水位 (見 add_change_tracking_columns.py) 只重新讀取有異動的 Lot；
+      由「水位 - JOB_WATERMARK_OVERLAP」起只取 (主鍵, UpdatedAt)，與快取資料列的 UpdatedAt 相同者視為已讀過；
+      沒有 UpdatedAt 欄位、排除已完成設定改變或作業筆數對不上 (有作業被刪除) 時整批重新載入
+    - 本次排程寫回計畫時間 (sp_UpdatePlanResultsJSON) 會更新已排程 Lot 的 UpdatedAt，
+      寫回後呼叫 refresh_after_own_writes() 讀回並推進水位，下一次排程只需讀取其他程式 (模擬、GUI) 的異動
+    - FrozenOperations 沒有異動欄位，每次都重新讀取 (資料量小)
+    - jobs_data 每次都由快取資料列重新組出，WIP 已進行時間依本次排程起點計算
+
+    任何讀取錯誤都會清除快取並改用原本的 load_* 函式整批載入。
+    """
+
+    def __init__(self):
+        self._conn = None
+        self._entries = {}
+        self._job_watermark = None
+        self._exclude_completed = None
+        self._lots = {}
+        self._operations = {}
+        self._lot_order = []
+        self.last_refresh = {}
+
+    def invalidate(self):
+        """清除所有快取資料 (下次排程整批重新載入)"""
+        self._entries = {}
+        self._job_watermark = None
+        self._exclude_completed = None
+        self._lots = {}
+        self._operations = {}
+        self._lot_order = []
+
+    def close(self):
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+            self._conn = None
+
+    def _cursor(self):
+        if self._conn is None:
+            self._conn = connect_db(autocommit=True)
+        else:
+            self._conn.ping(reconnect=True, attempts=2, delay=1)
+        return self._conn.cursor(dictionary=True)
+
+    def _cached(self, name, signature_query, key, query):
+        """以 (key, 彙總簽章) 判斷快取是否有效；失效時以 query(cursor) 重新讀取"""
+        cursor = self._cursor()
+        try:
+            cursor.execute(signature_query)
+            signature = (key, tuple(cursor.fetchone().values()))
+            entry = self._entries.get(name)
+            if entry is not None and entry[0] == signature:
+                self.last_refresh[name] = "cached"
+                return entry[1]
+            value = query(cursor)
+            self._entries[name] = (signature, value)
+            self.last_refresh[name] = "reloaded"
+            return value
+        finally:
+            cursor.close()
+
+    def machine_groups(self):
+        """機台群組 (GroupId -> [MachineId])"""
+        try:
+            groups = self._cached("machine_groups", MACHINE_GROUPS_SIGNATURE_QUERY, None, query_machine_groups)
+        except Exception as e:
+            print(f"Error refreshing cached machine groups: {e}")
+            self.invalidate()
+            return load_machine_groups()
+        return {gid: list(machines) for gid, machines in groups.items()}
+
+    def machine_unavailable(self, schedule_start):
+        """排程起點後 UNAVAILABLE_WINDOW_DAYS 天內的機台不可用時段 (MachineId -> [period])"""
+        try:
+            # 快取只依資料表簽章；排程起點每次不同，時段依起點在記憶體中篩選
+            unavailable = self._cached(
+                "machine_unavailable", UNAVAILABLE_SIGNATURE_QUERY, None, query_machine_unavailable_periods,
+            )
+        except Exception as e:
+            print(f"Error refreshing cached machine unavailable periods: {e}")
+            self.invalidate()
+            return load_machine_unavailable_periods(schedule_start)
+        unavailable = filter_unavailable_periods(unavailable, schedule_start)
+        if self.last_refresh["machine_unavailable"] == "cached":
+            print(f"Using cached machine unavailable periods ({sum(len(p) for p in unavailable.values())} periods)")
+        return unavailable
+
+    def jobs(self, schedule_start):
+        """jobs_data (與 load_jobs_from_database 相同格式)"""
+        try:
+            cursor = self._cursor()
+            try:
+                self._refresh_job_rows(cursor)
+                frozen_by_lot = query_frozen_rows(cursor)
+            finally:
+                cursor.close()
+        except Exception as e:
+            print(f"Error refreshing cached jobs: {e}")
+            self.invalidate()
+            return load_jobs_from_database(schedule_start)
+
+        jobs_data = [
+            build_job(self._lots[lot_id], self._operations.get(lot_id, []), frozen_by_lot.get(lot_id, []), schedule_start)
+            for lot_id in self._lot_order
+        ]
+        print(f"Loaded {len(jobs_data)} jobs ({self.last_refresh['jobs']})")
+        sys.stdout.flush()
+        return jobs_data
+
+    def _read_job_watermark(self, cursor):
+        """Lots / LotOperations 目前的 UpdatedAt 水位；資料表沒有 UpdatedAt 欄位時回傳 None"""
+        try:
+            cursor.execute(f"""
+                SELECT (SELECT MAX({JOB_CHANGE_TRACKING_COLUMN}) FROM Lots) AS lots_updated,
+                       (SELECT MAX({JOB_CHANGE_TRACKING_COLUMN}) FROM LotOperations) AS operations_updated
+            """)
+        except timed_import("mysql.connector").errors.ProgrammingError:
+            return None
+        row = cursor.fetchone()
+        return (row['lots_updated'] or JOB_WATERMARK_EPOCH, row['operations_updated'] or JOB_WATERMARK_EPOCH)
+
+    def refresh_after_own_writes(self):
+        """
+        本次排程寫回計畫時間後呼叫：讀回 sp_UpdatePlanResultsJSON 更新的 Lot 並推進水位
+
+        讀回的資料列帶有新的 UpdatedAt，下一次排程比對時視為已讀過，不會因本次寫回而重新載入幾乎全部的 Lot
+        """
+        jobs_refresh = self.last_refresh.get("jobs")
+        try:
+            cursor = self._cursor()
+            try:
+                self._refresh_job_rows(cursor)
+            finally:
+                cursor.close()
+        except Exception as e:
+            print(f"Error refreshing cached jobs after plan update: {e}")
+            self.invalidate()
+            return
+        self.last_refresh["jobs_after_update"] = self.last_refresh.get("jobs")
+        self.last_refresh["jobs"] = jobs_refresh
+
+    def _refresh_job_rows(self, cursor):
+        exclude_completed = query_exclude_completed(cursor)
+        # 先取水位再讀資料。水位之後提交、但 UpdatedAt 早於水位的資料列 (讀取水位時仍在進行的交易)
+        # 由下次比對的重疊區間 (JOB_WATERMARK_OVERLAP) 補上
+        watermark = self._read_job_watermark(cursor)
+        if watermark is None or self._job_watermark is None or exclude_completed != self._exclude_completed:
+            self._reload_job_rows(cursor, exclude_completed, tracked=watermark is not None)
+        else:
+            self._apply_job_changes(cursor, exclude_completed)
+        self._job_watermark = watermark
+        self._exclude_completed = exclude_completed
+
+    def _reload_job_rows(self, cursor, exclude_completed, tracked=True):
+        tracking_column = JOB_CHANGE_TRACKING_COLUMN if tracked else None
+        lots, operations_by_lot = query_job_rows(cursor, exclude_completed, tracking_column=tracking_column)
+        self._lots = {lot['LotId']: lot for lot in lots}
+        self._operations = operations_by_lot
+        self._lot_order = list(self._lots)
+        self.last_refresh["jobs"] = "reloaded"
+
+    def _apply_job_changes(self, cursor, exclude_completed):
+        column = JOB_CHANGE_TRACKING_COLUMN
+        lots_since, operations_since = (watermark - JOB_WATERMARK_OVERLAP for watermark in self._job_watermark)
+        # 只取主鍵與 UpdatedAt (idx_updated_at 覆蓋索引)；與快取資料列的 UpdatedAt 相同表示已讀過
+        cursor.execute(f"SELECT LotId, {column} FROM Lots WHERE {column} >= %s", (lots_since,))
+        changed = {
+            row['LotId'] for row in cursor.fetchall()
+            if row['LotId'] and (row['LotId'] not in self._lots or self._lots[row['LotId']].get(column) != row[column])
+        }
+        cursor.execute(f"SELECT LotId, Step, {column} FROM LotOperations WHERE {column} >= %s", (operations_since,))
+        operation_rows = cursor.fetchall()
+        if operation_rows:
+            versions = {(op['LotId'], op['Step']): op.get(column) for ops in self._operations.values() for op in ops}
+            changed.update(
+                row['LotId'] for row in operation_rows
+                if row['LotId'] and versions.get((row['LotId'], row['Step'])) != row[column]
+            )
+
+        # 目前應排程的 Lot 與順序 (主鍵索引)，同時找出被刪除或新出現的 Lot
+        completed_filter = " AND ActualFinishDate IS NULL" if exclude_completed else ""
+        cursor.execute(f"SELECT LotId FROM Lots WHERE LotId IS NOT NULL{completed_filter} ORDER BY LotId")
+        order = [row['LotId'] for row in cursor.fetchall()]
+        current = set(order)
+
+        reload_ids = (changed & current) | (current - self._lots.keys())
+        for lot_id in changed | (self._lots.keys() - current):
+            self._lots.pop(lot_id, None)
+            self._operations.pop(lot_id, None)
+        if reload_ids:
+            lots, operations_by_lot = query_job_rows(cursor, exclude_completed, sorted(reload_ids), column)
+            self._lots.update((lot['LotId'], lot) for lot in lots)
+            self._operations.update(operations_by_lot)
+        self._lot_order = [lot_id for lot_id in order if lot_id in self._lots]
+
+        # 作業被刪除不會留下 UpdatedAt 異動：筆數對不上時整批重新載入
+        cursor.execute(f"""
+            SELECT COUNT(*) AS operation_count
+            FROM LotOperations o
+            JOIN Lots l ON l.LotId = o.LotId{" AND l.ActualFinishDate IS NULL" if exclude_completed else ""}
+        """)
+        expected = cursor.fetchone()['operation_count']
+        if expected != sum(len(self._operations.get(lot_id, [])) for lot_id in self._lot_order):
+            self._reload_job_rows(cursor, exclude_completed)
+            return
+        self.last_refresh["jobs"] = f"cached, {len(reload_ids)} lots refreshed"
+
 # =====================================================
 # Main Logic
 # =====================================================
-jobs_data = load_jobs_from_database()
-if not jobs_data:
-    print("No jobs to schedule.")
-    exit(1)
-
-machine_unavailable = load_machine_unavailable_periods()
-plan_id = save_jobs_to_plan_raw(jobs_data)
-MACHINE_GROUPS = load_machine_groups()
-if not MACHINE_GROUPS:
-    MACHINE_GROUPS = {"M01": ["M01-1", "M01-2", "M01-3"], "M02": ["M02-1", "M02-2"], "M03": ["M03-1", "M03-2", "M03-3"]}
-
-# Incremental Scheduling Batching
-lots_to_schedule = jobs_data
-batch_threshold = int(os.getenv('INCREMENTAL_BATCH_THRESHOLD', 30))
-initial_size = int(os.getenv('INCREMENTAL_BATCH_INITIAL_SIZE', 30))
-step_size = int(os.getenv('INCREMENTAL_BATCH_STEP_SIZE', 3))
-
-if len(lots_to_schedule) > batch_threshold:
-    batches = []
-    # 第一步：先取初始批次
-    batches.append(lots_to_schedule[:initial_size])
-    # 第二步：之後每次增加固定步長
-    remaining_lots = lots_to_schedule[initial_size:]
-    for i in range(0, len(remaining_lots), step_size):
-        batches.append(remaining_lots[i : i + step_size])
-else:
-    batches = [lots_to_schedule]
-
-# Global result storage
-final_lot_results = {} # lot -> step -> {start_time, end_time, machine}
-all_tasks_info = {} # (lot, step) -> {status, ...}
-calc_start_time = datetime.now()
-total_solved_tasks = {} # (lot, step) -> {start_min, end_min, machine}
-
-for batch_idx, current_batch in enumerate(batches):
-    progress = int((batch_idx) / len(batches) * 100)
-    print(f"\n>>> Solving Batch {batch_idx + 1}/{len(batches)} ({len(current_batch)} lots) - Progress: {progress}%")
-    sys.stdout.flush()
-    
-    model = cp_model.CpModel()
-    # Horizon: Sum of durations of all lots * safety factor
-    #horizon = sum(op[2] for job in jobs_data for op in job["Operations"]) * 10
-    horizon = max(sum(op[2] for op in job["Operations"]) for job in jobs_data) + 60*24* 50 # 多增加 3天
-    machines = {m: [] for g in MACHINE_GROUPS.values() for m in g}
-    batch_tasks = {}
-
-    # 1. Add Fixed Machine Intervals from previous batches
-    for (lot_id, step_name), res in total_solved_tasks.items():
-        dur = res['end_min'] - res['start_min']
-        itv = model.NewFixedSizeIntervalVar(res['start_min'], dur, f"fix_{lot_id}_{step_name}")
-        machines[res['machine']].append(itv)
-
-    # 2. Add Machine Unavailability
-    for machine_id, unavailable_periods in machine_unavailable.items():
-        if machine_id not in machines: continue
-        for period in unavailable_periods:
-            s_m = int((period['StartTime'] - SCHEDULE_START).total_seconds() / 60)
-            e_m = int((period['EndTime'] - SCHEDULE_START).total_seconds() / 60)
-            if e_m <= 0 or s_m >= horizon: continue
-            s_m = max(0, s_m); e_m = min(horizon, e_m)
-            if e_m <= s_m: continue
-            itv = model.NewFixedSizeIntervalVar(s_m, e_m - s_m, f"unav_{machine_id}_{period['Id']}")
-            machines[machine_id].append(itv)
-
-    # 3. Add Current Batch Lots
-    for job in current_batch:
-        lot = job["LotId"]
-        
-        # Determine Release Time (Earliest Start)
-        release_min = 0
-        p_start = job.get("PlanStartTime")
-        l_create = job.get("LotCreateDate")
-        
-        target_release = None
-        if p_start:
-            target_release = datetime.fromisoformat(p_start)
-        elif l_create:
-            target_release = datetime.fromisoformat(l_create)
-            
-        if target_release:
-            # Calculate release minute relative to SCHEDULE_START
-            # If target_release is BEFORE SCHEDULE_START, it becomes 0 (ready immediatley)
-            # If target_release is AFTER SCHEDULE_START, it becomes positive delay
-            delta_min = int((target_release - SCHEDULE_START).total_seconds() / 60)
-            release_min = max(0, delta_min)
-
-        print(f"Lot {lot}: Release Constraint = {release_min} min (from {target_release})")
-
-        completed_ops = job.get("CompletedOps", {})
-        wip_ops = job.get("WIPOps", {})
-        frozen_ops = job.get("FrozenOps", {})
-
-        prev_end = release_min
-        for step, group, duration in job["Operations"]:
-            submachines = MACHINE_GROUPS[group]
-            
-            # --- Completed ---
-            if step in completed_ops:
-                info = completed_ops[step]
-                s = max(0, int((info["start_time"] - SCHEDULE_START).total_seconds() / 60))
-                e = int((info["end_time"] - SCHEDULE_START).total_seconds() / 60)
-                if e <= 0:
-                    start_var, end_var = model.NewConstant(0), model.NewConstant(0)
-                    batch_tasks[(lot, step)] = {"start": start_var, "end": end_var, "machine": info["machine"], "status": "Completed"}
-                    prev_end = 0; continue
-                start_var, end_var = model.NewConstant(s), model.NewConstant(e)
-                itv = model.NewFixedSizeIntervalVar(s, e - s, f"{lot}_{step}_completed")
-                machines[info["machine"]].append(itv)
-                batch_tasks[(lot, step)] = {"start": start_var, "end": end_var, "machine": info["machine"], "status": "Completed"}
-                prev_end = e; continue
-
-            # --- WIP ---
-            if step in wip_ops:
-                info = wip_ops[step]
-                elapsed = info["elapsed_minutes"]
-                remaining = max(0, duration - elapsed)
-                start_var, end_var = model.NewConstant(prev_end), model.NewConstant(prev_end + remaining)
-                itv = model.NewFixedSizeIntervalVar(prev_end, remaining, f"{lot}_{step}_wip")
-                machines[info["machine"]].append(itv)
-                batch_tasks[(lot, step)] = {"start": start_var, "end": end_var, "machine": info["machine"], "status": "WIP"}
-                prev_end = prev_end + remaining; continue
-
-            # --- Frozen ---
-            if step in frozen_ops:
-                info = frozen_ops[step]
-                s = max(0, int((info["start_time"] - SCHEDULE_START).total_seconds() / 60))
-                e = int((info["end_time"] - SCHEDULE_START).total_seconds() / 60)
-                if e <= 0:
-                    start_var, end_var = model.NewConstant(0), model.NewConstant(0)
-                    batch_tasks[(lot, step)] = {"start": start_var, "end": end_var, "machine": info["machine"], "status": "Frozen"}
-                    prev_end = 0; continue
-                start_var, end_var = model.NewConstant(s), model.NewConstant(e)
-                itv = model.NewFixedSizeIntervalVar(s, e - s, f"{lot}_{step}_frozen")
-                machines[info["machine"]].append(itv)
-                batch_tasks[(lot, step)] = {"start": start_var, "end": end_var, "machine": info["machine"], "status": "Frozen"}
-                prev_end = e; continue
-
-            # --- Normal ---
-            start_var = model.NewIntVar(0, horizon, f"{lot}_{step}_start")
-            end_var = model.NewIntVar(0, horizon, f"{lot}_{step}_end")
-            machine_choice = model.NewIntVar(0, len(submachines) - 1, f"{lot}_{step}_machine")
-            model.Add(start_var >= prev_end)
-
-            itvs, presents = [], []
-            for i, m in enumerate(submachines):
-                p = model.NewBoolVar(f"{lot}_{step}_p_{i}")
-                itv = model.NewOptionalIntervalVar(start_var, duration, end_var, p, f"{lot}_{step}_{m}")
-                itvs.append(itv); presents.append(p); machines[m].append(itv)
-                model.Add(machine_choice == i).OnlyEnforceIf(p)
-                model.Add(machine_choice != i).OnlyEnforceIf(p.Not())
-            model.Add(sum(presents) == 1)
-
-            batch_tasks[(lot, step)] = {
-                "start": start_var, "end": end_var, "machine_group": group,
-                "machine_choice": machine_choice, "status": "Normal"
-            }
-            prev_end = end_var
-
-    # 4. No Overlap
-    for m, itvs in machines.items():
-        if itvs: model.AddNoOverlap(itvs)
-
-    # 5. Q-time Constraints (per batch)
-    for job in current_batch:
-        lot = job["LotId"]
-        ops_names = [s for s, _, _ in job["Operations"]]
-        if "STEP3" in ops_names and "STEP4" in ops_names:
-            if (lot, "STEP3") in batch_tasks and (lot, "STEP4") in batch_tasks:
-                model.Add(batch_tasks[(lot, "STEP4")]["start"] - batch_tasks[(lot, "STEP3")]["end"] <= 200)
-
-    # 6. Objective (per batch)
-    is_fast_verification = os.getenv('SCHEDULER_FAST_VERIFICATION', 'true').lower() == 'true'
-    if is_fast_verification:
-        # Fast verification mode: no objective
-        pass
+def run_incremental_schedule(start_time=DEFAULT_START_TIME, progress=None, data_cache=None, dry_run=False,
+                             trace_file=None):
+    """
+    執行一次增量排程 (載入資料 -> 分批求解 -> 寫回 DB)
+
+    可由命令列執行，也可由常駐 worker 重複呼叫 (OR-Tools 與模組只需載入一次)。
+
+    Args:
+        start_time: 排程起點 (datetime 或 'YYYY-MM-DD HH:MM:SS')
+        progress: 進度回呼 progress(percent, message)，percent 為 0~100
+        data_cache: SchedulingDataCache；提供時由快取取得 jobs、機台群組與不可用時段 (常駐 worker 使用)
+        dry_run: 只載入資料並列出分批計畫，不匯入 OR-Tools、不求解也不寫回資料庫
+        trace_file: 各階段耗時的 Chrome trace 輸出路徑 (預設 SCHEDULER_TRACE_FILE 或 plan_result/scheduler_trace.json)
+
+    Returns:
+        dict: status, schedule_id, plan_id, lot_count 等執行摘要
+    """
+    schedule_start = datetime.strptime(start_time, '%Y-%m-%d %H:%M:%S') if isinstance(start_time, str) else start_time
+    report = progress or (lambda percent, message: None)
+    print(f"Scheduling start time: {schedule_start}")
+    objective_type, mode, tolerance, fast_verification = objective_settings()
+    warn_unused_objective_mode(objective_type, mode, fast_verification)
+    report(0, "Loading jobs")
+    trace = RunTrace(start_time=schedule_start.strftime('%Y-%m-%d %H:%M:%S'), dry_run=dry_run,
+                     data_cache=data_cache is not None)
+
+    with startup_profiler.phase("load jobs"), trace.span("load jobs") as load_span:
+        jobs_data = data_cache.jobs(schedule_start) if data_cache else load_jobs_from_database(schedule_start)
+        load_span.set(lots=len(jobs_data), operations=sum(len(job['Operations']) for job in jobs_data))
+    if not jobs_data:
+        print("No jobs to schedule.")
+        return {"status": "no_jobs", "schedule_id": None, "plan_id": None, "lot_count": 0}
+
+    with startup_profiler.phase("load machines / unavailable periods"), trace.span("load machines") as load_span:
+        if data_cache:
+            machine_unavailable = data_cache.machine_unavailable(schedule_start)
+        else:
+            machine_unavailable = load_machine_unavailable_periods(schedule_start)
+        machine_groups = data_cache.machine_groups() if data_cache else load_machine_groups()
+        load_span.set(machine_groups=len(machine_groups),
+                      unavailable_periods=sum(len(p) for p in machine_unavailable.values()))
+    if not machine_groups:
+        machine_groups = {"M01": ["M01-1", "M01-2", "M01-3"], "M02": ["M02-1", "M02-2"], "M03": ["M03-1", "M03-2", "M03-3"]}
+
+    # Incremental Scheduling Batching
+    lots_to_schedule = jobs_data
+    batch_threshold = int(os.getenv('INCREMENTAL_BATCH_THRESHOLD', 30))
+    initial_size = int(os.getenv('INCREMENTAL_BATCH_INITIAL_SIZE', 30))
+    step_size = int(os.getenv('INCREMENTAL_BATCH_STEP_SIZE', 3))
+
+    if len(lots_to_schedule) > batch_threshold:
+        batches = []
+        # 第一步：先取初始批次
+        batches.append(lots_to_schedule[:initial_size])
+        # 第二步：之後每次增加固定步長
+        remaining_lots = lots_to_schedule[initial_size:]
+        for i in range(0, len(remaining_lots), step_size):
+            batches.append(remaining_lots[i : i + step_size])
     else:
-        # Calculate makespan for current batch
-        batch_makespan = model.NewIntVar(0, horizon, f"batch_makespan_{batch_idx}")
-        last_step_ends = []
-        for job in current_batch:
-            last_step = job["Operations"][-1][0]
-            last_step_ends.append(batch_tasks[(job["LotId"], last_step)]["end"])
-        model.AddMaxEquality(batch_makespan, last_step_ends)
-
-        if OBJECTIVE_TYPE == "weighted_delay":
-            delay_vars = []
-            for job in current_batch:
-                lot = job["LotId"]
-                if job["DueDate"]:
-                    due = datetime.fromisoformat(job["DueDate"])
-                    due_min = int((due - SCHEDULE_START).total_seconds() / 60)
-                    last_step = job["Operations"][-1][0]
-                    
-                    delay = model.NewIntVar(0, horizon, f"{lot}_delay_b{batch_idx}")
-                    model.Add(delay >= batch_tasks[(lot, last_step)]["end"] - due_min)
-                    model.Add(delay >= 0)
-                    delay_vars.append(delay * job["Priority"])
-            
-            if delay_vars:
-                model.Minimize(sum(delay_vars) * 1000 + batch_makespan)
+        batches = [lots_to_schedule]
+
+    if dry_run:
+        print(f"Dry run: {len(jobs_data)} lots, {sum(len(job['Operations']) for job in jobs_data)} operations, "
+              f"{len(machine_groups)} machine groups, {sum(len(p) for p in machine_unavailable.values())} unavailable periods")
+        print(f"Dry run: {len(batches)} batches (sizes: {[len(batch) for batch in batches]})")
+        trace.finish(status="dry_run", batch_count=len(batches))
+        result = {"status": "dry_run", "schedule_id": None, "plan_id": None, "lot_count": len(jobs_data), "batch_count": len(batches)}
+        result["trace_file"] = export_trace(trace, trace_file, save_metrics=False)
+        return result
+
+    with trace.span("save plan raw"):
+        plan_id = save_jobs_to_plan_raw(jobs_data)
+    with trace.span("import ortools"):
+        cp_model = timed_import("ortools.sat.python.cp_model")
+
+    # Global result storage
+    final_lot_results = {} # lot -> step -> {start_time, end_time, machine}
+    all_tasks_info = {} # (lot, step) -> {status, ...}
+    calc_start_time = datetime.now()
+    total_solved_tasks = {} # (lot, step) -> {start_min, end_min, machine}
+    solve_totals = {"solve_seconds": 0.0, "objective": None, "best_bound": None}  # 各批次加總 (寫入 SchedulerRunMetrics)
+    batch_solver_stats = []  # 各批次求解統計 (寫入 SolverRunStats)
+
+    for batch_idx, current_batch in enumerate(batches):
+        with trace.span("batch", index=batch_idx + 1, lots=len(current_batch)) as batch_span:
+            progress_pct = int((batch_idx) / len(batches) * 100)
+            print(f"\n>>> Solving Batch {batch_idx + 1}/{len(batches)} ({len(current_batch)} lots) - Progress: {progress_pct}%")
+            sys.stdout.flush()
+            report(int(progress_pct * 0.9), f"Solving batch {batch_idx + 1}/{len(batches)}")
+
+            with trace.span("build model") as build_span:
+                model = cp_model.CpModel()
+                # Horizon: Sum of durations of all lots * safety factor
+                #horizon = sum(op[2] for job in jobs_data for op in job["Operations"]) * 10
+                horizon = max(sum(op[2] for op in job["Operations"]) for job in jobs_data) + 60*24* 50 # 多增加 3天
+                machines = {m: [] for g in machine_groups.values() for m in g}
+                batch_tasks = {}
+
+                # 1. Add Fixed Machine Intervals from previous batches
+                for (lot_id, step_name), res in total_solved_tasks.items():
+                    dur = res['end_min'] - res['start_min']
+                    itv = model.NewFixedSizeIntervalVar(res['start_min'], dur, f"fix_{lot_id}_{step_name}")
+                    machines[res['machine']].append(itv)
+
+                # 2. Add Machine Unavailability
+                for machine_id, unavailable_periods in machine_unavailable.items():
+                    if machine_id not in machines: continue
+                    for period in unavailable_periods:
+                        s_m = int((period['StartTime'] - schedule_start).total_seconds() / 60)
+                        e_m = int((period['EndTime'] - schedule_start).total_seconds() / 60)
+                        if e_m <= 0 or s_m >= horizon: continue
+                        s_m = max(0, s_m); e_m = min(horizon, e_m)
+                        if e_m <= s_m: continue
+                        itv = model.NewFixedSizeIntervalVar(s_m, e_m - s_m, f"unav_{machine_id}_{period['Id']}")
+                        machines[machine_id].append(itv)
+
+                # 3. Add Current Batch Lots
+                for job in current_batch:
+                    lot = job["LotId"]
+
+                    # Determine Release Time (Earliest Start)
+                    release_min = 0
+                    p_start = job.get("PlanStartTime")
+                    l_create = job.get("LotCreateDate")
+
+                    target_release = None
+                    if p_start:
+                        target_release = datetime.fromisoformat(p_start)
+                    elif l_create:
+                        target_release = datetime.fromisoformat(l_create)
+
+                    if target_release:
+                        # Calculate release minute relative to schedule_start
+                        # If target_release is BEFORE schedule_start, it becomes 0 (ready immediatley)
+                        # If target_release is AFTER schedule_start, it becomes positive delay
+                        delta_min = int((target_release - schedule_start).total_seconds() / 60)
+                        release_min = max(0, delta_min)
+
+                    print(f"Lot {lot}: Release Constraint = {release_min} min (from {target_release})")
+
+                    completed_ops = job.get("CompletedOps", {})
+                    wip_ops = job.get("WIPOps", {})
+                    frozen_ops = job.get("FrozenOps", {})
+
+                    prev_end = release_min
+                    for step, group, duration in job["Operations"]:
+                        submachines = machine_groups[group]
+
+                        # --- Completed ---
+                        if step in completed_ops:
+                            info = completed_ops[step]
+                            s = max(0, int((info["start_time"] - schedule_start).total_seconds() / 60))
+                            e = int((info["end_time"] - schedule_start).total_seconds() / 60)
+                            if e <= 0:
+                                start_var, end_var = model.NewConstant(0), model.NewConstant(0)
+                                batch_tasks[(lot, step)] = {"start": start_var, "end": end_var, "machine": info["machine"], "status": "Completed"}
+                                prev_end = 0; continue
+                            start_var, end_var = model.NewConstant(s), model.NewConstant(e)
+                            itv = model.NewFixedSizeIntervalVar(s, e - s, f"{lot}_{step}_completed")
+                            machines[info["machine"]].append(itv)
+                            batch_tasks[(lot, step)] = {"start": start_var, "end": end_var, "machine": info["machine"], "status": "Completed"}
+                            prev_end = e; continue
+
+                        # --- WIP ---
+                        if step in wip_ops:
+                            info = wip_ops[step]
+                            elapsed = info["elapsed_minutes"]
+                            remaining = max(0, duration - elapsed)
+                            start_var, end_var = model.NewConstant(prev_end), model.NewConstant(prev_end + remaining)
+                            itv = model.NewFixedSizeIntervalVar(prev_end, remaining, f"{lot}_{step}_wip")
+                            machines[info["machine"]].append(itv)
+                            batch_tasks[(lot, step)] = {"start": start_var, "end": end_var, "machine": info["machine"], "status": "WIP"}
+                            prev_end = prev_end + remaining; continue
+
+                        # --- Frozen ---
+                        if step in frozen_ops:
+                            info = frozen_ops[step]
+                            s = max(0, int((info["start_time"] - schedule_start).total_seconds() / 60))
+                            e = int((info["end_time"] - schedule_start).total_seconds() / 60)
+                            if e <= 0:
+                                start_var, end_var = model.NewConstant(0), model.NewConstant(0)
+                                batch_tasks[(lot, step)] = {"start": start_var, "end": end_var, "machine": info["machine"], "status": "Frozen"}
+                                prev_end = 0; continue
+                            start_var, end_var = model.NewConstant(s), model.NewConstant(e)
+                            itv = model.NewFixedSizeIntervalVar(s, e - s, f"{lot}_{step}_frozen")
+                            machines[info["machine"]].append(itv)
+                            batch_tasks[(lot, step)] = {"start": start_var, "end": end_var, "machine": info["machine"], "status": "Frozen"}
+                            prev_end = e; continue
+
+                        # --- Normal ---
+                        start_var = model.NewIntVar(0, horizon, f"{lot}_{step}_start")
+                        end_var = model.NewIntVar(0, horizon, f"{lot}_{step}_end")
+                        machine_choice = model.NewIntVar(0, len(submachines) - 1, f"{lot}_{step}_machine")
+                        model.Add(start_var >= prev_end)
+
+                        itvs, presents = [], []
+                        for i, m in enumerate(submachines):
+                            p = model.NewBoolVar(f"{lot}_{step}_p_{i}")
+                            itv = model.NewOptionalIntervalVar(start_var, duration, end_var, p, f"{lot}_{step}_{m}")
+                            itvs.append(itv); presents.append(p); machines[m].append(itv)
+                            model.Add(machine_choice == i).OnlyEnforceIf(p)
+                            model.Add(machine_choice != i).OnlyEnforceIf(p.Not())
+                        model.Add(sum(presents) == 1)
+
+                        batch_tasks[(lot, step)] = {
+                            "start": start_var, "end": end_var, "machine_group": group,
+                            "machine_choice": machine_choice, "status": "Normal"
+                        }
+                        prev_end = end_var
+
+                # 4. No Overlap
+                for m, itvs in machines.items():
+                    if itvs: model.AddNoOverlap(itvs)
+
+                # 5. Q-time Constraints (per batch)
+                for job in current_batch:
+                    lot = job["LotId"]
+                    ops_names = [s for s, _, _ in job["Operations"]]
+                    if "STEP3" in ops_names and "STEP4" in ops_names:
+                        if (lot, "STEP3") in batch_tasks and (lot, "STEP4") in batch_tasks:
+                            model.Add(batch_tasks[(lot, "STEP4")]["start"] - batch_tasks[(lot, "STEP3")]["end"] <= 200)
+
+                # 6. Objective (per batch)
+                objective_stages = None  # 字典序模式的各階段目標 (None 表示單一目標)
+                if fast_verification:
+                    # Fast verification mode: no objective
+                    pass
+                else:
+                    # Calculate makespan for current batch
+                    batch_makespan = model.NewIntVar(0, horizon, f"batch_makespan_{batch_idx}")
+                    last_step_ends = []
+                    for job in current_batch:
+                        last_step = job["Operations"][-1][0]
+                        last_step_ends.append(batch_tasks[(job["LotId"], last_step)]["end"])
+                    model.AddMaxEquality(batch_makespan, last_step_ends)
+
+                    if objective_type == "weighted_delay":
+                        delay_vars = []
+                        for job in current_batch:
+                            lot = job["LotId"]
+                            if job["DueDate"]:
+                                due = datetime.fromisoformat(job["DueDate"])
+                                due_min = int((due - schedule_start).total_seconds() / 60)
+                                last_step = job["Operations"][-1][0]
+
+                                delay = model.NewIntVar(0, horizon, f"{lot}_delay_b{batch_idx}")
+                                model.Add(delay >= batch_tasks[(lot, last_step)]["end"] - due_min)
+                                model.Add(delay >= 0)
+                                delay_vars.append(delay * job["Priority"])
+
+                        if delay_vars and mode == "lexicographic":
+                            objective_stages = [("weighted_tardiness", sum(delay_vars)), ("makespan", batch_makespan)]
+                        elif delay_vars:
+                            model.Minimize(sum(delay_vars) * 1000 + batch_makespan)
+                        else:
+                            model.Minimize(batch_makespan)
+
+                    elif objective_type == "total_completion_time":
+                        completion_times = []
+                        for job in current_batch:
+                            last_step = job["Operations"][-1][0]
+                            completion_times.append(batch_tasks[(job["LotId"], last_step)]["end"])
+                        model.Minimize(sum(completion_times))
+
+                    else: # makespan
+                        model.Minimize(batch_makespan)
+
+                proto = model.Proto()
+                build_span.set(variables=len(proto.variables), constraints=len(proto.constraints))
+
+            # 7. Solve
+            max_time = int(os.getenv('SOLVER_MAX_TIME_IN_SECONDS', 30))
+            echo_log = os.getenv('SOLVER_LOG_SEARCH_PROGRESS', 'false').lower() == 'true'
+
+            def make_solver():
+                stage_solver = cp_model.CpSolver()
+                stage_solver.parameters.max_time_in_seconds = max_time
+                stage_solver.parameters.num_search_workers = int(os.getenv('SOLVER_NUM_SEARCH_WORKERS', 8))
+                #stage_solver.parameters.relative_gap_limit = 0.15
+                return stage_solver
+
+            # 搜尋日誌一律擷取 (解析 presolve 摘要)，SOLVER_LOG_SEARCH_PROGRESS=true 時才印出並保存全文
+            stage_recorders = []
+
+            def solve_stage(stage_solver, stage_model):
+                stage_recorders.append(SolverStatsRecorder(cp_model, stage_solver, echo_log=echo_log))
+                return stage_recorders[-1].solve(stage_model)
+
+            batch_solve_start = datetime.now()
+            startup_profiler.mark("first solve started")
+            with trace.span("solve") as solve_span:
+                if objective_stages:
+                    status, solver, stage_results = solve_lexicographic(
+                        cp_model, model, objective_stages, make_solver, max_time,
+                        tolerance=tolerance, solve=solve_stage
+                    )
+                    print_stage_results(stage_results)
+                    solve_span.set(stages=len(stage_results))
+                else:
+                    solver = make_solver()
+                    status = solve_stage(solver, model)
+                recorder = next(stage for stage in stage_recorders if stage.solver is solver)
+                wall_time = sum(stage.solver.WallTime() for stage in stage_recorders)
+                solve_span.set(status=solver.StatusName(status), wall_time=round(wall_time, 3),
+                               branches=solver.NumBranches(), conflicts=solver.NumConflicts())
+                solve_totals["solve_seconds"] += wall_time
+                objective, best_bound = recorder.objective()
+                if objective is not None:
+                    solve_span.set(objective=objective, best_bound=best_bound)
+                    solve_totals["objective"] = (solve_totals["objective"] or 0) + objective
+                    solve_totals["best_bound"] = (solve_totals["best_bound"] or 0) + best_bound
+            stage_stats = [stage.stats(
+                batch_idx + 1, batch_count=len(batches), lot_count=len(current_batch),
+                operation_count=sum(len(job["Operations"]) for job in current_batch),
+                objective_type=None if fast_verification else objective_type,
+            ) for stage in stage_recorders]
+            if objective_stages:
+                batch_stats = combine_stage_stats(stage_stats, solver.StatusName(status), max_time)
+                batch_stats["ObjectiveType"] = f"{objective_type}:lexicographic"
             else:
-                model.Minimize(batch_makespan)
+                batch_stats = stage_stats[0]
+            batch_solver_stats.append(batch_stats)
+            batch_solve_end = datetime.now()
+            batch_duration = batch_solve_end - batch_solve_start
+
+            if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+                print(f"Batch {batch_idx + 1} solved: {solver.StatusName(status)} (Time: {batch_duration.total_seconds():.2f}s)")
+                sys.stdout.flush()
+                with trace.span("extract results"):
+                    for job in current_batch:
+                        lot = job["LotId"]
+                        lot_ops = {}
+                        for step, group, dur in job["Operations"]:
+                            t = batch_tasks[(lot, step)]
+                            st_min = solver.Value(t["start"])
+                            et_min = solver.Value(t["end"])
+
+                            if t["status"] in ["Completed", "WIP", "Frozen"]:
+                                m_name = t["machine"]
+                                # Get actual datetimes for output
+                                if t["status"] == "Completed":
+                                    st_dt = job["CompletedOps"][step]["start_time"]
+                                    et_dt = job["CompletedOps"][step]["end_time"]
+                                elif t["status"] == "WIP":
+                                    st_dt = job["WIPOps"][step]["start_time"]
+                                    et_dt = job["WIPOps"][step]["end_time"]
+                                else: # Frozen
+                                    st_dt = job["FrozenOps"][step]["start_time"]
+                                    et_dt = job["FrozenOps"][step]["end_time"]
+                            else:
+                                idx = solver.Value(t["machine_choice"])
+                                m_name = machine_groups[group][idx]
+                                st_dt = schedule_start + timedelta(minutes=st_min)
+                                et_dt = schedule_start + timedelta(minutes=et_min)
+
+                            lot_ops[step] = {'start_time': st_dt, 'end_time': et_dt, 'machine': m_name}
+                            total_solved_tasks[(lot, step)] = {'start_min': st_min, 'end_min': et_min, 'machine': m_name}
+                            all_tasks_info[(lot, step)] = t
+                        final_lot_results[lot] = lot_ops
+            else:
+                print(f"Batch {batch_idx + 1} failed or no solution: {solver.StatusName(status)} (Time: {batch_duration.total_seconds():.2f}s)")
+                sys.stdout.flush()
+            batch_span.set(status=solver.StatusName(status))
 
-        elif OBJECTIVE_TYPE == "total_completion_time":
-            completion_times = []
-            for job in current_batch:
+    print(f"\n>>> All batches solved! (100% Progress)")
+    sys.stdout.flush()
+    report(90, "Saving results")
+
+    # =====================================================
+    # Database Update & Results Export
+    # =====================================================
+    # We need a status map for update_plan_times
+    all_tasks_status = {k: v['status'] for k, v in all_tasks_info.items()}
+    with trace.span("update plan times (sp_UpdatePlanResultsJSON)") as update_span:
+        update_span.set(**update_plan_times(final_lot_results, plan_id, all_tasks_status, jobs_data))
+    if data_cache:
+        with trace.span("refresh data cache after plan update"):
+            data_cache.refresh_after_own_writes()
+    calc_end_time = datetime.now()
+
+    with trace.span("write JSON artifacts"):
+        # Generate JSON result files
+        plan_result_dir = "plan_result"
+        os.makedirs(plan_result_dir, exist_ok=True)
+
+        # 1. LotStepResult.json
+        lot_step_results = []
+        for lot_id, operations in final_lot_results.items():
+            job_info = next(j for j in jobs_data if j["LotId"] == lot_id)
+            for step, res in operations.items():
+                task_status = all_tasks_info[(lot_id, step)]["status"]
+                booking = 0
+                if task_status in ["Completed", "Frozen"]: booking = 2
+                elif task_status == "WIP": booking = 1
+                elif task_status == "Normal":
+                    booking = job_info.get("NewScheduleType", {}).get(step, 0)
+
+                lot_step_results.append({
+                    "LotId": lot_id, "Product": "", "Priority": job_info["Priority"],
+                    "StepIdx": next(i for i, op in enumerate(job_info["Operations"]) if op[0] == step) + 1,
+                    "Step": step, "Machine": res['machine'],
+                    "Start": res['start_time'].strftime("%Y-%m-%dT%H:%M:%S"),
+                    "End": res['end_time'].strftime("%Y-%m-%dT%H:%M:%S"),
+                    "Booking": booking
+                })
+        with open(os.path.join(plan_result_dir, "LotStepResult.json"), 'w', encoding='utf-8') as f:
+            json.dump(lot_step_results, f, indent=4, ensure_ascii=False)
+
+        # 2. LotPlanResult.json
+        lot_plan_results = []
+        for job in jobs_data:
+            lot_id = job["LotId"]
+            if lot_id in final_lot_results:
                 last_step = job["Operations"][-1][0]
-                completion_times.append(batch_tasks[(job["LotId"], last_step)]["end"])
-            model.Minimize(sum(completion_times))
-
-        else: # makespan
-            model.Minimize(batch_makespan)
-
-    # 7. Solve
-    solver = cp_model.CpSolver()
-    solver.parameters.max_time_in_seconds = int(os.getenv('SOLVER_MAX_TIME_IN_SECONDS', 30))
-    solver.parameters.num_search_workers = int(os.getenv('SOLVER_NUM_SEARCH_WORKERS', 8))
-    solver.parameters.log_search_progress = os.getenv('SOLVER_LOG_SEARCH_PROGRESS', 'false').lower() == 'true'
-    #solver.parameters.relative_gap_limit = 0.15
-
-    batch_solve_start = datetime.now()
-    status = solver.Solve(model)
-    batch_solve_end = datetime.now()
-    batch_duration = batch_solve_end - batch_solve_start
-
-    if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
-        print(f"Batch {batch_idx + 1} solved: {solver.StatusName(status)} (Time: {batch_duration.total_seconds():.2f}s)")
-        sys.stdout.flush()
-        for job in current_batch:
-            lot = job["LotId"]
-            lot_ops = {}
-            for step, group, dur in job["Operations"]:
-                t = batch_tasks[(lot, step)]
-                st_min = solver.Value(t["start"])
-                et_min = solver.Value(t["end"])
-                
-                if t["status"] in ["Completed", "WIP", "Frozen"]:
-                    m_name = t["machine"]
-                    # Get actual datetimes for output
-                    if t["status"] == "Completed":
-                        st_dt = job["CompletedOps"][step]["start_time"]
-                        et_dt = job["CompletedOps"][step]["end_time"]
-                    elif t["status"] == "WIP":
-                        st_dt = job["WIPOps"][step]["start_time"]
-                        et_dt = job["WIPOps"][step]["end_time"]
-                    else: # Frozen
-                        st_dt = job["FrozenOps"][step]["start_time"]
-                        et_dt = job["FrozenOps"][step]["end_time"]
-                else:
-                    idx = solver.Value(t["machine_choice"])
-                    m_name = MACHINE_GROUPS[group][idx]
-                    st_dt = SCHEDULE_START + timedelta(minutes=st_min)
-                    et_dt = SCHEDULE_START + timedelta(minutes=et_min)
-
-                lot_ops[step] = {'start_time': st_dt, 'end_time': et_dt, 'machine': m_name}
-                total_solved_tasks[(lot, step)] = {'start_min': st_min, 'end_min': et_min, 'machine': m_name}
-                all_tasks_info[(lot, step)] = t
-            final_lot_results[lot] = lot_ops
-    else:
-        print(f"Batch {batch_idx + 1} failed or no solution: {solver.StatusName(status)} (Time: {batch_duration.total_seconds():.2f}s)")
-        sys.stdout.flush()
-
-print(f"\n>>> All batches solved! (100% Progress)")
-sys.stdout.flush()
+                plan_date = final_lot_results[lot_id][last_step]["end_time"]
+                due_date = datetime.fromisoformat(job["DueDate"]) if job["DueDate"] else plan_date
+                diff = plan_date - due_date
+                delay_str = f"{diff.days}:{diff.seconds//3600:02d}" if diff.total_seconds() > 0 else f"-{abs(diff).days}:{abs(diff).seconds//3600:02d}"
+                lot_plan_results.append({
+                    "Lot": lot_id, "Product": "", "Priority": job["Priority"], "DueDate": job["DueDate"],
+                    "PlanFinishDate": plan_date.strftime("%Y-%m-%dT%H:%M:%S"), "ActualFinishDate": job["ActualFinishDate"],
+                    "delay time": delay_str
+                })
+        stats = {
+            "optimization_type": "incremental_scheduling", "batch_count": len(jobs_data),
+            "calculation_duration": str(calc_end_time - calc_start_time),
+            "calculation_end": calc_end_time.strftime("%Y-%m-%dT%H:%M:%S")
+        }
+        with open(os.path.join(plan_result_dir, "LotPlanResult.json"), 'w', encoding='utf-8') as f:
+            json.dump({"statistics": stats, "lot_results": lot_plan_results}, f, indent=4, ensure_ascii=False)
+
+        # 3. machineTaskSegment.json
+        task_segments = []
+        machine_map = {}
+        for r in lot_step_results:
+            m = r["Machine"]
+            if m not in machine_map: machine_map[m] = []
+            machine_map[m].append(r)
+
+        for m_id in sorted(machine_map.keys()):
+            task_segments.append({"id": m_id, "text": m_id, "parent": None, "render": "split"})
+            if m_id in machine_unavailable:
+                for p in machine_unavailable[m_id]:
+                    task_segments.append({
+                        "id": f"{m_id}_u_{p['Id']}", "text": f"{p['PeriodType']}: {p['Reason']}",
+                        "parent": m_id, "start_date": p["StartTime"].strftime("%Y-%m-%dT%H:%M:%S"),
+                        "end_date": p["EndTime"].strftime("%Y-%m-%dT%H:%M:%S"), "Booking": -1, "color": BookingColorMap.get_color(-1)
+                    })
+            for r in machine_map[m_id]:
+                task_segments.append({
+                    "id": f"{r['Machine']}_{r['LotId']}_{r['Step']}", "text": f"{r['LotId']} {r['Step']}",
+                    "parent": r["Machine"], "start_date": r["Start"], "end_date": r["End"],
+                    "Booking": r["Booking"], "color": BookingColorMap.get_color(r["Booking"])
+                })
+        with open(os.path.join(plan_result_dir, "machineTaskSegment.json"), 'w', encoding='utf-8') as f:
+            json.dump(task_segments, f, indent=4, ensure_ascii=False)
 
-# =====================================================
-# Database Update & Results Export
-# =====================================================
-# We need a status map for update_plan_times
-all_tasks_status = {k: v['status'] for k, v in all_tasks_info.items()}
-update_plan_times(final_lot_results, plan_id, all_tasks_status)
-calc_end_time = datetime.now()
-
-# Generate JSON result files
-plan_result_dir = "plan_result"
-os.makedirs(plan_result_dir, exist_ok=True)
-
-# 1. LotStepResult.json
-lot_step_results = []
-for lot_id, operations in final_lot_results.items():
-    job_info = next(j for j in jobs_data if j["LotId"] == lot_id)
-    for step, res in operations.items():
-        task_status = all_tasks_info[(lot_id, step)]["status"]
-        booking = 0
-        if task_status in ["Completed", "Frozen"]: booking = 2
-        elif task_status == "WIP": booking = 1
-        elif task_status == "Normal":
-            booking = job_info.get("NewScheduleType", {}).get(step, 0)
-        
-        lot_step_results.append({
-            "LotId": lot_id, "Product": "", "Priority": job_info["Priority"],
-            "StepIdx": next(i for i, op in enumerate(job_info["Operations"]) if op[0] == step) + 1,
-            "Step": step, "Machine": res['machine'],
-            "Start": res['start_time'].strftime("%Y-%m-%dT%H:%M:%S"),
-            "End": res['end_time'].strftime("%Y-%m-%dT%H:%M:%S"),
-            "Booking": booking
-        })
-with open(os.path.join(plan_result_dir, "LotStepResult.json"), 'w', encoding='utf-8') as f:
-    json.dump(lot_step_results, f, indent=4, ensure_ascii=False)
-
-# 2. LotPlanResult.json
-lot_plan_results = []
-for job in jobs_data:
-    lot_id = job["LotId"]
-    if lot_id in final_lot_results:
-        last_step = job["Operations"][-1][0]
-        plan_date = final_lot_results[lot_id][last_step]["end_time"]
-        due_date = datetime.fromisoformat(job["DueDate"]) if job["DueDate"] else plan_date
-        diff = plan_date - due_date
-        delay_str = f"{diff.days}:{diff.seconds//3600:02d}" if diff.total_seconds() > 0 else f"-{abs(diff).days}:{abs(diff).seconds//3600:02d}"
-        lot_plan_results.append({
-            "Lot": lot_id, "Product": "", "Priority": job["Priority"], "DueDate": job["DueDate"],
-            "PlanFinishDate": plan_date.strftime("%Y-%m-%dT%H:%M:%S"), "ActualFinishDate": job["ActualFinishDate"],
-            "delay time": delay_str
-        })
-stats = {
-    "optimization_type": "incremental_scheduling", "batch_count": len(jobs_data),
-    "calculation_duration": str(calc_end_time - calc_start_time),
-    "calculation_end": calc_end_time.strftime("%Y-%m-%dT%H:%M:%S")
-}
-with open(os.path.join(plan_result_dir, "LotPlanResult.json"), 'w', encoding='utf-8') as f:
-    json.dump({"statistics": stats, "lot_results": lot_plan_results}, f, indent=4, ensure_ascii=False)
-
-# 3. machineTaskSegment.json
-task_segments = []
-machine_map = {}
-for r in lot_step_results:
-    m = r["Machine"]
-    if m not in machine_map: machine_map[m] = []
-    machine_map[m].append(r)
-
-for m_id in sorted(machine_map.keys()):
-    task_segments.append({"id": m_id, "text": m_id, "parent": None, "render": "split"})
-    if m_id in machine_unavailable:
-        for p in machine_unavailable[m_id]:
-            task_segments.append({
-                "id": f"{m_id}_u_{p['Id']}", "text": f"{p['PeriodType']}: {p['Reason']}",
-                "parent": m_id, "start_date": p["StartTime"].strftime("%Y-%m-%dT%H:%M:%S"),
-                "end_date": p["EndTime"].strftime("%Y-%m-%dT%H:%M:%S"), "Booking": -1, "color": BookingColorMap.get_color(-1)
-            })
-    for r in machine_map[m_id]:
-        task_segments.append({
-            "id": f"{r['Machine']}_{r['LotId']}_{r['Step']}", "text": f"{r['LotId']} {r['Step']}",
-            "parent": r["Machine"], "start_date": r["Start"], "end_date": r["End"],
-            "Booking": r["Booking"], "color": BookingColorMap.get_color(r["Booking"])
-        })
-with open(os.path.join(plan_result_dir, "machineTaskSegment.json"), 'w', encoding='utf-8') as f:
-    json.dump(task_segments, f, indent=4, ensure_ascii=False)
-
-# 4. Save to DynamicSchedulingJob using Stored Procedure
-try:
-    with open('plan_result/LotPlanRaw.json', 'r', encoding='utf-8') as f: raw_j = f.read()
-    with open('plan_result/LotPlanResult.json', 'r', encoding='utf-8') as f: res_j = f.read()
-    with open('plan_result/LotStepResult.json', 'r', encoding='utf-8') as f: step_j = f.read()
-    with open('plan_result/machineTaskSegment.json', 'r', encoding='utf-8') as f: seg_j = f.read()
-
-    conn = mysql.connector.connect(**db_config); cursor = conn.cursor()
-    
-    # Call Stored Procedure
+    # 4. Save to DynamicSchedulingJob using Stored Procedure + normalized result tables (同一交易)
+    # 預設 JSON 欄位與正規化子資料表雙寫：工作清單、Hist、快照 / 匯出等讀取端仍直接讀 JSON 欄位，
+    # 全部改由子資料表組出之前不可關閉；SCHEDULE_RESULT_JSON_COLUMNS=false 只存子資料表 (僅 /api/schedule 系列可讀)
+    store_json_columns = os.getenv('SCHEDULE_RESULT_JSON_COLUMNS', 'true').lower() == 'true'
     schedule_id = f"SCH_INC_{int(datetime.now().timestamp())}"
-    plan_summary = f"Incremental Schedule - {len(jobs_data)} lots"
-    
-    save_start = datetime.now()
-    cursor.callproc('sp_SaveDynamicSchedulingJob', (
-        schedule_id,
-        raw_j,
-        "SYSTEM",
-        plan_summary,
-        res_j,
-        step_j,
-        seg_j
-    ))
-    save_end = datetime.now()
-    
-    conn.commit(); cursor.close(); conn.close()
-    print(f"Saved results to DynamicSchedulingJob (via SP) - Time: {save_end - save_start}")
-    sys.stdout.flush()
-except Exception as e:
-    print(f"Error saving job: {e}")
+    saved = False
+    with trace.span("save results") as save_span:
+        try:
+            with open('plan_result/LotPlanRaw.json', 'r', encoding='utf-8') as f: raw_j = f.read()
+            if store_json_columns:
+                with open('plan_result/LotPlanResult.json', 'r', encoding='utf-8') as f: res_j = f.read()
+                with open('plan_result/LotStepResult.json', 'r', encoding='utf-8') as f: step_j = f.read()
+                with open('plan_result/machineTaskSegment.json', 'r', encoding='utf-8') as f: seg_j = f.read()
+            else:
+                res_j = json.dumps({"statistics": stats, "lot_results": []}, ensure_ascii=False)
+                step_j = None
+                seg_j = None
+
+            conn = connect_db(); cursor = conn.cursor()
+            create_result_tables(cursor)
+
+            # Call Stored Procedure
+            plan_summary = f"Incremental Schedule - {len(jobs_data)} lots"
+
+            save_start = datetime.now()
+            with trace.span("sp_SaveDynamicSchedulingJob"):
+                cursor.callproc('sp_SaveDynamicSchedulingJob', (
+                    schedule_id,
+                    raw_j,
+                    "SYSTEM",
+                    plan_summary,
+                    res_j,
+                    step_j,
+                    seg_j
+                ))
+            machine_to_group = {m: g for g, ms in machine_groups.items() for m in ms}
+            with trace.span("save normalized results") as normalized_span:
+                saved_counts = save_schedule_results(
+                    cursor, schedule_id, plan_id, lot_step_results, lot_plan_results, task_segments, machine_to_group
+                )
+                normalized_span.set(**saved_counts)
+            save_end = datetime.now()
+
+            conn.commit(); cursor.close(); conn.close()
+            print(f"Saved results to DynamicSchedulingJob (via SP) - Time: {save_end - save_start}")
+            print(f"Saved normalized results: {saved_counts['steps']} steps, {saved_counts['lots']} lots, {saved_counts['segments']} segments")
+            sys.stdout.flush()
+            saved = True
+        except Exception as e:
+            print(f"Error saving job: {e}")
+            sys.stdout.flush()
+            save_span.set(error=str(e))
+
+    # Calculate and save Utilization metrics
+    with trace.span("utilization"):
+        calculate_and_save_utilization(final_lot_results, plan_id, machine_groups)
+
+    print(f"Total calculation duration: {calc_end_time - calc_start_time}")
+    print("\nScheduling Complete.")
     sys.stdout.flush()
+    objective, best_bound = solve_totals["objective"], solve_totals["best_bound"]
+    trace.finish(
+        status="completed" if saved else "save_failed", batch_count=len(batches),
+        lot_count=len(jobs_data), scheduled_lot_count=len(final_lot_results),
+        solve_seconds=round(solve_totals["solve_seconds"], 3), objective=objective, best_bound=best_bound,
+        gap=round(abs(objective - best_bound) / max(abs(objective), 1e-9), 6) if objective is not None else None,
+    )
+    trace_path = export_trace(trace, trace_file, schedule_id=schedule_id if saved else None, plan_id=plan_id)
+    export_solver_stats(batch_solver_stats, trace.run_id, schedule_id=schedule_id if saved else None, plan_id=plan_id)
+    report(100, "Scheduling complete")
+
+    result = {
+        "status": "completed" if saved else "save_failed",
+        "schedule_id": schedule_id if saved else None,
+        "plan_id": plan_id,
+        "lot_count": len(jobs_data),
+        "scheduled_lot_count": len(final_lot_results),
+        "batch_count": len(batches),
+        "calculation_duration": str(calc_end_time - calc_start_time),
+        "trace_file": trace_path,
+    }
+    if data_cache:
+        result["data_cache"] = dict(data_cache.last_refresh)
+    return result
+
+
+if __name__ == "__main__":
+    if sys.platform == 'win32':
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+    # 解析命令行參數
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--start-time', type=str, default=DEFAULT_START_TIME,
+                        help='Scheduling start time (YYYY-MM-DD HH:MM:SS)')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Load data and print the batch plan without solving or writing results')
+    parser.add_argument('--profile-startup', action='store_true',
+                        help='Print import and initialization times')
+    parser.add_argument('--trace-file', type=str, default=None,
+                        help=f'Chrome trace output path (default: SCHEDULER_TRACE_FILE or {DEFAULT_TRACE_FILE})')
+    args = parser.parse_args()
+    startup_profiler.enable(args.profile_startup)
 
-# Calculate and save Utilization metrics
-calculate_and_save_utilization(final_lot_results, plan_id, MACHINE_GROUPS)
-
-print(f"Total calculation duration: {calc_end_time - calc_start_time}")
-print("\nScheduling Complete.")
-sys.stdout.flush()
+    try:
+        result = run_incremental_schedule(args.start_time, dry_run=args.dry_run, trace_file=args.trace_file)
+    finally:
+        startup_profiler.report()
+    if result["status"] == "no_jobs":
+        exit(1)
@@ -5,6 +5,7 @@ from enum import Enum
 from typing import List, Dict, Optional, Any
 from ortools.sat.python import cp_model
 from pyjobshop import ProblemData, Solution, TaskData, Job, Task, Mode, Machine
+from task_registry import TaskRegistry
 
 # --- 資料類別定義 ---
 
@@ -88,7 +89,7 @@ class SchedulerFullExample:
         lots = self.load_json(self.file_new_lot_plan, [])
 
         model = cp_model.CpModel()
-        all_tasks = []
+        tasks = TaskRegistry()
         machine_to_intervals = {}
 
         # 建立新排程任務
@@ -122,7 +123,7 @@ class SchedulerFullExample:
                         machine_to_intervals[m_name] = []
                     machine_to_intervals[m_name].append(interval)
 
-                all_tasks.append({
+                tasks.add(lot["LotId"], {
                     "start": start, "end": end, "machine_idx": machine_idx,
                     "lot": lot, "op": op, "machines": machines
                 })
@@ -136,8 +137,8 @@ class SchedulerFullExample:
         for i in range(len(sorted_lots) - 1):
             lot_a = sorted_lots[i]
             lot_b = sorted_lots[i+1]
-            task_a = next(t for t in all_tasks if t["lot"] == lot_a and t["op"]["StepIdx"] == 1)
-            task_b = next(t for t in all_tasks if t["lot"] == lot_b and t["op"]["StepIdx"] == 1)
+            task_a = tasks.first(lot_a["LotId"])
+            task_b = tasks.first(lot_b["LotId"])
             model.Add(task_a["start"] <= task_b["start"])
 
 
@@ -145,10 +146,8 @@ class SchedulerFullExample:
         # 目標函數：最小化 makespan (最後一批產出時間)
         makespan = model.NewIntVar(0, horizon, 'makespan')
         for lot in lots:
-            # 取得該 Lot 的最後一道工序
-            lot_tasks = [t for t in all_tasks if t["lot"] == lot]
-            last_task = max(lot_tasks, key=lambda x: x["op"]["StepIdx"])
-            model.Add(makespan >= last_task["end"])
+            # 該 Lot 的最後一道工序
+            model.Add(makespan >= tasks.last(lot["LotId"])["end"])
 
         model.Minimize(makespan)
 
@@ -177,7 +176,7 @@ class SchedulerFullExample:
             print(f"計算批數: {len(lots)}")
             
             # 按開始時間排序輸出
-            sorted_tasks = sorted(all_tasks, key=lambda x: solver.Value(x["start"]))
+            sorted_tasks = sorted(tasks, key=lambda x: solver.Value(x["start"]))
             for task in sorted_tasks:
                 s_min = solver.Value(task["start"])
                 e_min = solver.Value(task["end"])
@@ -344,10 +343,6 @@ class SchedulerFullExample:
         # 建立 Solution
         task_data_list = []
         for r in results:
-            lot_id = r["LotId"]
-            task_name = f"{lot_id}_{r['Step']}"
-            task_idx = next(i for i, t in enumerate(tasks) if t.name == task_name)
-
             start_time = int((datetime.fromisoformat(r["Start"].replace('Z', '')) - self.SCHEDULE_START).total_seconds() / 60)
             end_time = int((datetime.fromisoformat(r["End"].replace('Z', '')) - self.SCHEDULE_START).total_seconds() / 60)
 
@@ -449,10 +444,6 @@ class SchedulerFullExample:
         # 建立 Solution
         task_data_list = []
         for r in results:
-            lot_id = r["LotId"]
-            task_name = f"{lot_id}_{r['Step']}"
-            task_idx = next(i for i, t in enumerate(tasks) if t.name == task_name)
-
             start_time = int((datetime.fromisoformat(r["Start"].replace('Z', '')) - self.SCHEDULE_START).total_seconds() / 60)
             end_time = int((datetime.fromisoformat(r["End"].replace('Z', '')) - self.SCHEDULE_START).total_seconds() / 60)
 
@@ -1,9 +1,13 @@
+import sys
+import io
 import mysql.connector
 import os
 import time
 import argparse
+import numpy as np
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
+from simulation_event_log import SimulationEventLogWriter, DEFAULT_EVENT_LOG_PATH, EVENT_CHECKIN, EVENT_CHECKOUT, EVENT_LOT_COMPLETED
 
 # =====================================================
 # Windows Unicode Output Encoding Fix
@@ -21,6 +25,7 @@ parser = argparse.ArgumentParser(description='APS Simulation Program')
 parser.add_argument('--iterations', type=int, default=100, help='Number of iterations (default: 100)')
 parser.add_argument('--timedelta', type=int, default=120, help='Time delta per iteration in seconds (default: 120)')
 parser.add_argument('--start-time', type=str, default='2026-01-22 13:00:00', help='Simulation start time (format: YYYY-MM-DD HH:MM:SS, default: 2026-01-22 13:00:00)')
+parser.add_argument('--event-log', type=str, default=DEFAULT_EVENT_LOG_PATH, help=f'Structured event log base path, each run writes <base>_<run_id>.csv.gz; empty to disable (default: {DEFAULT_EVENT_LOG_PATH})')
 args = parser.parse_args()
 
 # 解析起始時間
@@ -70,122 +75,278 @@ if db_settings:
 else:
     print(f"Using command line/default settings: Iterations={iterations}, TimeDelta={time_delta}", flush=True)
 
+# =====================================================
+# 向量化模擬狀態 (欄式 NumPy 陣列)
+# =====================================================
+STATUS_WAITING = 0
+STATUS_RUNNING = 1
+STATUS_COMPLETED = 2
+
+EPOCH = datetime(1970, 1, 1)
+NO_PLAN_SECOND = np.iinfo(np.int64).max
+LOAD_CHUNK_SIZE = 5000  # 串流讀取每批筆數
+
+
+def to_epoch_seconds(value):
+    """將 datetime 轉為 epoch 秒 (PlanCheckInTime / PlanCheckOutTime 為 DATETIME(0)，以秒保存不會失真)"""
+    return (value - EPOCH) // timedelta(seconds=1)
+
+
+def from_epoch_seconds(seconds):
+    """將 epoch 秒轉回 datetime"""
+    return EPOCH + timedelta(seconds=int(seconds))
+
+
+class SimulationState:
+    """
+    以欄式陣列保存每個作業步驟的模擬狀態
+
+    - plan_in / plan_out: 計畫進出站時間 (int64 epoch 秒，與原本直接比較 datetime 的觸發時間相同)
+    - status: StepStatus (int8)
+    - lot_idx: 對應 lot_ids 的索引 (int32)
+    - step_idx: 對應 step_names 的索引 (int32)
+    - machine_idx: 對應 machine_ids 的索引 (int32)
+    - has_checkin: 是否已有 CheckInTime
+    - is_last: 是否為該 Lot 的最後一站
+    """
+
+    COLUMNS = {
+        'plan_in': np.int64,
+        'plan_out': np.int64,
+        'status': np.int8,
+        'lot_idx': np.int32,
+        'step_idx': np.int32,
+        'machine_idx': np.int32,
+        'has_checkin': bool,
+        'is_last': bool,
+    }
+
+    def __init__(self):
+        self.lot_ids = []
+        self.step_names = []
+        self.machine_ids = []
+        self._lot_index = {}
+        self._step_index = {}
+        self._machine_index = {}
+        for name, dtype in self.COLUMNS.items():
+            setattr(self, name, np.empty(0, dtype=dtype))
+
+    @classmethod
+    def from_row_chunks(cls, row_chunks):
+        """逐批將資料列編碼為欄式陣列，避免同時保留整份 dict 列表"""
+        state = cls()
+        parts = {name: [] for name in cls.COLUMNS}
+        for rows in row_chunks:
+            for name, column in state._encode_rows(rows).items():
+                parts[name].append(column)
+        for name, dtype in cls.COLUMNS.items():
+            if parts[name]:
+                setattr(state, name, np.concatenate(parts[name]).astype(dtype, copy=False))
+        return state
+
+    def _encode_rows(self, rows):
+        count = len(rows)
+        columns = {name: np.empty(count, dtype=dtype) for name, dtype in self.COLUMNS.items()}
+
+        for row, op in enumerate(rows):
+            lot_id = op['LotId']
+            step = op['Step']
+            if lot_id not in self._lot_index:
+                self._lot_index[lot_id] = len(self.lot_ids)
+                self.lot_ids.append(lot_id)
+            if step not in self._step_index:
+                self._step_index[step] = len(self.step_names)
+                self.step_names.append(step)
+            machine = op['PlanMachineId']
+            if machine not in self._machine_index:
+                self._machine_index[machine] = len(self.machine_ids)
+                self.machine_ids.append(machine)
+
+            plan_checkin = op['PlanCheckInTime']
+            plan_checkout = op['PlanCheckOutTime']
+            columns['plan_in'][row] = to_epoch_seconds(plan_checkin) if plan_checkin else NO_PLAN_SECOND
+            columns['plan_out'][row] = to_epoch_seconds(plan_checkout) if plan_checkout else NO_PLAN_SECOND
+            columns['status'][row] = op['StepStatus'] or STATUS_WAITING
+            columns['lot_idx'][row] = self._lot_index[lot_id]
+            columns['step_idx'][row] = self._step_index[step]
+            columns['machine_idx'][row] = self._machine_index[machine]
+            columns['has_checkin'][row] = op['CheckInTime'] is not None
+            columns['is_last'][row] = op['Sequence'] == op['MaxSequence']
+
+        return columns
+
+    def __len__(self):
+        return len(self.status)
+
+    def due_transitions(self, simulation_time):
+        """以向量化遮罩計算本步應 CheckIn / CheckOut 的列索引"""
+        now = to_epoch_seconds(simulation_time)
+        checkin_rows = np.flatnonzero((self.status == STATUS_WAITING) & (self.plan_in <= now))
+        checkout_rows = np.flatnonzero(
+            (self.status == STATUS_RUNNING) & self.has_checkin & (self.plan_out <= now)
+        )
+        return checkin_rows, checkout_rows
+
+    def apply_transitions(self, checkin_rows, checkout_rows):
+        """僅回寫有變動的列"""
+        self.status[checkin_rows] = STATUS_RUNNING
+        self.has_checkin[checkin_rows] = True
+        self.status[checkout_rows] = STATUS_COMPLETED
+
+    def key(self, row):
+        """取得 (LotId, Step)"""
+        return self.lot_ids[self.lot_idx[row]], self.step_names[self.step_idx[row]]
+
+    def machine(self, row):
+        """取得計畫機台"""
+        return self.machine_ids[self.machine_idx[row]]
+
+    def planned_checkin(self, row):
+        """原始 PlanCheckInTime (事件日誌的 planned_time，不經取整)"""
+        return from_epoch_seconds(self.plan_in[row])
+
+    def planned_checkout(self, row):
+        """原始 PlanCheckOutTime (事件日誌的 planned_time，不經取整)"""
+        return from_epoch_seconds(self.plan_out[row])
+
+
 def load_lot_operations():
-    """載入 LotOperations 資料"""
+    """
+    載入尚未完成的 LotOperations 並編碼為 SimulationState
+
+    - 僅讀取 StepStatus 0/1 (NULL 視為 0 等待中；已完成的歷史資料不再載入)
+    - MaxSequence 只對讀到的作業以 idx_lot_sequence_step (LotId, Sequence, Step) 索引查最後一站，
+      成本隨進行中的作業數增加，不再 GROUP BY 掃描全部 LotOperations 歷史資料
+    - 以非緩衝 (server-side) cursor 分批 fetchmany 串流讀取
+    """
+    conn = None
     try:
         conn = mysql.connector.connect(**db_config)
-        cursor = conn.cursor(dictionary=True)
+        cursor = conn.cursor(dictionary=True, buffered=False)
 
         cursor.execute("""
-            SELECT lo.LotId, lo.Step, lo.PlanCheckInTime, lo.PlanCheckOutTime, lo.StepStatus, lo.CheckInTime, lo.CheckOutTime, lo.Sequence,
-                   (SELECT MAX(Sequence) FROM LotOperations WHERE LotId = lo.LotId) as MaxSequence
+            SELECT lo.LotId, lo.Step, lo.PlanCheckInTime, lo.PlanCheckOutTime, lo.StepStatus, lo.CheckInTime, lo.Sequence,
+                   lo.PlanMachineId,
+                   (SELECT MAX(m.Sequence) FROM LotOperations m WHERE m.LotId = lo.LotId) AS MaxSequence
             FROM LotOperations lo
-            WHERE lo.PlanCheckInTime IS NOT NULL AND lo.PlanCheckOutTime IS NOT NULL
+            WHERE COALESCE(lo.StepStatus, 0) IN (0, 1)
+              AND lo.PlanCheckInTime IS NOT NULL AND lo.PlanCheckOutTime IS NOT NULL
             ORDER BY lo.LotId, lo.Sequence
         """)
 
-        operations = cursor.fetchall()
+        def row_chunks():
+            while True:
+                rows = cursor.fetchmany(LOAD_CHUNK_SIZE)
+                if not rows:
+                    break
+                yield rows
+
+        state = SimulationState.from_row_chunks(row_chunks())
         cursor.close()
         conn.close()
 
-        print(f"Loaded {len(operations)} operation steps", flush=True)
-        return operations
+        print(f"Loaded {len(state)} active operation steps", flush=True)
+        return state
 
     except mysql.connector.Error as err:
         print(f"Database error: {err}", flush=True)
-        return []
     except Exception as e:
         print(f"Error: {e}", flush=True)
-        return []
+    if conn:
+        try:
+            conn.close()
+        except Exception:
+            pass
+    return None
+
 
-def update_operation_status(operation, checkin_time=None, checkout_time=None, step_status=None, is_last_step=False):
-    """更新作業狀態，若為最後一步則同步更新 Lots 表的 ActualFinishDate"""
+def write_transitions(state, checkin_rows, checkout_rows, simulation_time):
+    """將本步變動一次批次寫回資料庫，若為最後一步則同步更新 Lots 表的 ActualFinishDate"""
+    conn = None
     try:
         conn = mysql.connector.connect(**db_config)
         cursor = conn.cursor()
 
-        lot_id = operation['LotId']
-        step = operation['Step']
-
-        # 建構動態更新語句
-        updates = []
-        params = []
-
-        if checkin_time is not None:
-            updates.append("CheckInTime = %s")
-            params.append(checkin_time)
-        if checkout_time is not None:
-            updates.append("CheckOutTime = %s")
-            params.append(checkout_time)
-        if step_status is not None:
-            updates.append("StepStatus = %s")
-            params.append(step_status)
-
-        if updates:
-            query = f"UPDATE LotOperations SET {', '.join(updates)} WHERE LotId = %s AND Step = %s"
-            params.extend([lot_id, step])
-            cursor.execute(query, params)
-            
-            # 若是最後一步且正在 CheckOut，則更新 Lots 表的 ActualFinishDate
-            if checkout_time is not None and is_last_step:
-                cursor.execute("UPDATE Lots SET ActualFinishDate = %s WHERE LotId = %s", (checkout_time, lot_id))
-                print(f"  -> Lot {lot_id} is completed. ActualFinishDate updated.", flush=True)
-
-            conn.commit()
-
-            # 同步更新本地 operation 物件
-            if checkin_time is not None:
-                operation['CheckInTime'] = checkin_time
-            if checkout_time is not None:
-                operation['CheckOutTime'] = checkout_time
-            if step_status is not None:
-                operation['StepStatus'] = step_status
-
-            cursor.close()
-            conn.close()
-            return True
-        else:
-            cursor.close()
-            conn.close()
-            return False
+        if len(checkin_rows):
+            cursor.executemany(
+                "UPDATE LotOperations SET CheckInTime = %s, StepStatus = %s WHERE LotId = %s AND Step = %s",
+                [(simulation_time, STATUS_RUNNING, *state.key(row)) for row in checkin_rows]
+            )
+        if len(checkout_rows):
+            cursor.executemany(
+                "UPDATE LotOperations SET CheckOutTime = %s, StepStatus = %s WHERE LotId = %s AND Step = %s",
+                [(simulation_time, STATUS_COMPLETED, *state.key(row)) for row in checkout_rows]
+            )
+            finished_rows = checkout_rows[state.is_last[checkout_rows]]
+            if len(finished_rows):
+                cursor.executemany(
+                    "UPDATE Lots SET ActualFinishDate = %s WHERE LotId = %s",
+                    [(simulation_time, state.lot_ids[state.lot_idx[row]]) for row in finished_rows]
+                )
+
+        conn.commit()
+        cursor.close()
+        conn.close()
+        return True
 
     except mysql.connector.Error as err:
         print(f"Update error: {err}", flush=True)
-        return False
     except Exception as e:
         print(f"Update error: {e}", flush=True)
-        return False
+    if conn:
+        try:
+            conn.rollback()
+            conn.close()
+        except Exception:
+            pass
+    return False
 
 # 載入作業資料
-operations = load_lot_operations()
+state = load_lot_operations()
 
-if not operations:
+if state is None:
     print("Failed to load operation data", flush=True)
     exit(1)
+if len(state) == 0:
+    print("No active operation steps to simulate", flush=True)
+
+# 結構化事件日誌 (計畫 vs 實際)，供離線分析使用
+event_log = SimulationEventLogWriter(args.event_log).open() if args.event_log else None
 
 # 模擬開始
 simulation_time = SIMULATE_START
 for i in range(iterations):
     print(f"\nSimulation time: {simulation_time.strftime('%Y-%m-%d %H:%M:%S')}", flush=True)
 
-    # 檢查每個作業步驟
-    for op in operations:
-        lot_id = op['LotId']
-        step = op['Step']
-        plan_checkin = op['PlanCheckInTime']
-        plan_checkout = op['PlanCheckOutTime']
-        current_status = op['StepStatus']
-
-        # 條件 1: 若 StepStatus = 0，且 simulation_time >= PlanCheckInTime
-        if current_status == 0 and plan_checkin and simulation_time >= plan_checkin:
-            if update_operation_status(op, checkin_time=simulation_time, step_status=1):
-                print(f"  {lot_id} {step}: CheckIn - {simulation_time.strftime('%H:%M:%S')}", flush=True)
-
-        # 條件 2: 若 StepStatus = 1，且 simulation_time >= PlanCheckOutTime 且 CheckInTime 不為null
-        elif current_status == 1 and plan_checkout and simulation_time >= plan_checkout and op['CheckInTime'] is not None:
-            is_last = (op['Sequence'] == op['MaxSequence'])
-            if update_operation_status(op, checkout_time=simulation_time, step_status=2, is_last_step=is_last):
-                print(f"  {lot_id} {step}: CheckOut - {simulation_time.strftime('%H:%M:%S')}", flush=True)
+    # 條件 1: StepStatus = 0 且 simulation_time >= PlanCheckInTime
+    # 條件 2: StepStatus = 1 且 simulation_time >= PlanCheckOutTime 且 CheckInTime 不為 null
+    checkin_rows, checkout_rows = state.due_transitions(simulation_time)
+
+    if len(checkin_rows) or len(checkout_rows):
+        if write_transitions(state, checkin_rows, checkout_rows, simulation_time):
+            state.apply_transitions(checkin_rows, checkout_rows)
+
+            # 依原始 (LotId, Sequence) 順序輸出，供 GUI / SSE 解析
+            time_str = simulation_time.strftime('%H:%M:%S')
+            checkout_set = set(checkout_rows.tolist())
+            for row in np.sort(np.concatenate((checkin_rows, checkout_rows))):
+                lot_id, step = state.key(row)
+                machine = state.machine(row)
+                if row in checkout_set:
+                    planned = state.planned_checkout(row)
+                    if state.is_last[row]:
+                        print(f"  -> Lot {lot_id} is completed. ActualFinishDate updated.", flush=True)
+                        if event_log:
+                            event_log.write(simulation_time, lot_id, step, machine, EVENT_LOT_COMPLETED, planned, simulation_time)
+                    print(f"  {lot_id} {step}: CheckOut - {time_str}", flush=True)
+                    if event_log:
+                        event_log.write(simulation_time, lot_id, step, machine, EVENT_CHECKOUT, planned, simulation_time)
+                else:
+                    print(f"  {lot_id} {step}: CheckIn - {time_str}", flush=True)
+                    if event_log:
+                        event_log.write(simulation_time, lot_id, step, machine, EVENT_CHECKIN, state.planned_checkin(row), simulation_time)
+            if event_log:
+                event_log.flush()
 
     simulation_time += timedelta(seconds=time_delta)
     time.sleep(0.02)  # 模擬延遲，方便觀察輸出
@@ -194,6 +355,10 @@ for i in range(iterations):
 
 
 
+if event_log:
+    event_log.close()
+    print(f"Event log written to {event_log.path} (run_id: {event_log.run_id})", flush=True)
+
 print("\nSimulation completed", flush=True)
 
 # 更新 ui_settings 資料表 (simulation_start_time 和 simulation_end_time)
@@ -0,0 +1,72 @@
+"""
+本程式用於為 Lots / LotOperations 加上異動追蹤欄位 (change feed)。
+主要功能：
+1. 從 .env 讀取資料庫連線資訊。
+2. 新增 `UpdatedAt DATETIME(3)` 欄位，由 MySQL 在 INSERT 與實際變更資料的 UPDATE 時自動填入
+   (DEFAULT / ON UPDATE CURRENT_TIMESTAMP(3))，排程程式、模擬程式與 Stored Procedure 都不需修改。
+3. 建立 `idx_updated_at` 索引，讓 GUI 以「UpdatedAt >= 上次水位」只取回異動的資料列。
+4. 若欄位或索引已存在，則不會重複建立。
+
+以 Prisma 管理的資料庫由 migration 20261019010000_change_tracking_updated_at 建立相同的欄位與索引 (schema.prisma 已宣告)；
+本程式供未使用 Prisma migration 的資料庫使用，定義須與該 migration 一致。
+"""
+import mysql.connector
+import os
+from dotenv import load_dotenv
+
+# 載入環境變數
+load_dotenv()
+
+# 設定資料庫連線參數
+db_config = {
+    'host': os.getenv('MYSQL_HOST'),
+    'user': os.getenv('MYSQL_USER'),
+    'password': os.getenv('MYSQL_PASSWORD'),
+    'database': os.getenv('MYSQL_DATABASE')
+}
+
+CHANGE_TRACKING_COLUMN = "UpdatedAt"
+CHANGE_TRACKING_INDEX = "idx_updated_at"
+CHANGE_TRACKING_TABLES = ("Lots", "LotOperations")
+
+
+def ensure_change_tracking(cursor, table):
+    """為單一資料表加上 UpdatedAt 欄位與索引"""
+    cursor.execute(f"DESCRIBE {table}")
+    columns = [row[0] for row in cursor.fetchall()]
+    if CHANGE_TRACKING_COLUMN not in columns:
+        print(f"Adding {CHANGE_TRACKING_COLUMN} column to {table}...")
+        cursor.execute(
+            f"ALTER TABLE {table} ADD COLUMN {CHANGE_TRACKING_COLUMN} DATETIME(3) NOT NULL "
+            f"DEFAULT CURRENT_TIMESTAMP(3) ON UPDATE CURRENT_TIMESTAMP(3)"
+        )
+    else:
+        print(f"Column {table}.{CHANGE_TRACKING_COLUMN} already exists.")
+
+    cursor.execute(f"SHOW INDEX FROM {table} WHERE Key_name = %s", (CHANGE_TRACKING_INDEX,))
+    if not cursor.fetchall():
+        print(f"Creating index {CHANGE_TRACKING_INDEX} on {table}...")
+        cursor.execute(f"CREATE INDEX {CHANGE_TRACKING_INDEX} ON {table} ({CHANGE_TRACKING_COLUMN})")
+    else:
+        print(f"Index {table}.{CHANGE_TRACKING_INDEX} already exists.")
+
+
+def main():
+    """執行欄位與索引建立作業"""
+    try:
+        conn = mysql.connector.connect(**db_config)
+        cursor = conn.cursor()
+
+        for table in CHANGE_TRACKING_TABLES:
+            ensure_change_tracking(cursor, table)
+        conn.commit()
+
+        cursor.close()
+        conn.close()
+        print("Change tracking columns are ready.")
+    except Exception as e:
+        print(f"Error: {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,9 @@
 """
 import sys
 import os
+import re
 import json
+import time
 import random
 import argparse
 import subprocess
@@ -30,25 +32,43 @@ db_config = {
     'database': os.getenv('MYSQL_DATABASE')
 }
 
+# 排程程式每個批次求解完成時輸出的耗時 (例如 "Batch 1 solved: OPTIMAL (Time: 1.23s)")
+SOLVE_TIME_PATTERN = re.compile(r"Batch \d+ (?:solved|failed or no solution): \S+ \(Time: ([\d.]+)s\)")
+
 class AutomatedTestRunner:
     """自動化測試執行器"""
     
-    def __init__(self, config_path: str):
+    def __init__(self, config_path: str, database: str = None, work_dir: str = None):
         """
         初始化測試執行器
         
         Args:
             config_path: 測試配置檔案路徑
+            database: 測試使用的資料庫 (schema)，預設為 .env 的 MYSQL_DATABASE；
+                      指定時本程式與產生 Lot、排程、模擬子程序都改用此資料庫 (見 parallel_test_runner.py)
+            work_dir: 子程序的工作目錄，預設為目前目錄；排程 (plan_result/*.json) 與模擬事件日誌寫在此目錄下，
+                      平行執行多個配置時各自指定，避免互相覆寫
         """
         self.config_path = config_path
+        self.db_config = dict(db_config, database=database) if database else dict(db_config)
+        # 子程序以 load_dotenv() 讀取 .env，不會覆寫已存在的環境變數
+        self.env = dict(os.environ, MYSQL_DATABASE=database) if database else None
+        # 各步驟累計耗時 (秒) 與排程求解耗時，供批次比較報表使用
+        self.stage_seconds: Dict[str, float] = {}
+        self.solve_seconds = 0.0
+        self.solve_batches = 0
+        self.failed_step = None
         self.config = self.load_config()
         self.db_settings = self.load_db_settings()
         self.base_dir = os.path.dirname(os.path.abspath(__file__))
+        self.work_dir = os.path.abspath(work_dir) if work_dir else None
+        if self.work_dir:
+            os.makedirs(self.work_dir, exist_ok=True)
         
     def load_db_settings(self) -> Dict[str, Any]:
         """從資料庫載入模擬設定"""
         try:
-            conn = mysql.connector.connect(**db_config)
+            conn = mysql.connector.connect(**self.db_config)
             cursor = conn.cursor(dictionary=True)
             cursor.execute("SELECT parameter_name, parameter_value FROM ui_settings WHERE parameter_name IN ('spin_iterations', 'spin_timedelta', 'simulation_start_time', 'simulation_start_time_setting')")
             rows = cursor.fetchall()
@@ -92,8 +112,9 @@ class AutomatedTestRunner:
         print("Step 1: Clean test data", flush=True)
         print("="*60, flush=True)
         
+        started = time.perf_counter()
         try:
-            conn = mysql.connector.connect(**db_config)
+            conn = mysql.connector.connect(**self.db_config)
             cursor = conn.cursor()
             
             # Call stored procedure
@@ -108,16 +129,20 @@ class AutomatedTestRunner:
             
         except mysql.connector.Error as err:
             print(f"❌ Database error: {err}", flush=True)
+            self.failed_step = self.failed_step or "Clean test data"
             return False
         except Exception as e:
             print(f"❌ Error: {e}", flush=True)
+            self.failed_step = self.failed_step or "Clean test data"
             return False
+        finally:
+            self._record_stage("Clean test data", started)
 
     def init_simulation_settings(self, start_time: datetime) -> bool:
         """初始化模擬設定，確保同步"""
         print(f"\nInitializing simulation settings to baseline (Start: {start_time.strftime('%Y-%m-%d %H:%M:%S')})...", flush=True)
         try:
-            conn = mysql.connector.connect(**db_config)
+            conn = mysql.connector.connect(**self.db_config)
             cursor = conn.cursor()
             
             # 將基準時間同步到 simulation_start_time 和 simulation_end_time
@@ -145,8 +170,13 @@ class AutomatedTestRunner:
             print(f"⚠️ Failed to initialize simulation settings: {e}", flush=True)
             return False
     
+    def _record_stage(self, step_name: str, started: float):
+        """累計步驟耗時"""
+        self.stage_seconds[step_name] = self.stage_seconds.get(step_name, 0.0) + time.perf_counter() - started
+
     def _run_script(self, args: list, step_name: str) -> bool:
         """協助執行外部腳本並即時輸出內容"""
+        started = time.perf_counter()
         try:
             # 建立子程序，將 stdout/stderr 導向 PIPE
             process = subprocess.Popen(
@@ -156,13 +186,19 @@ class AutomatedTestRunner:
                 text=True,
                 encoding='utf-8',
                 errors='ignore',
-                bufsize=1  # 行緩衝
+                bufsize=1,  # 行緩衝
+                env=self.env,
+                cwd=self.work_dir
             )
 
             # 即時讀取並輸出
             if process.stdout:
                 for line in iter(process.stdout.readline, ""):
                     print(f"   {line.strip()}", flush=True)
+                    match = SOLVE_TIME_PATTERN.search(line)
+                    if match:
+                        self.solve_seconds += float(match.group(1))
+                        self.solve_batches += 1
                 process.stdout.close()
 
             return_code = process.wait()
@@ -172,11 +208,15 @@ class AutomatedTestRunner:
                 return True
             else:
                 print(f"❌ {step_name} failed (Code: {return_code})", flush=True)
+                self.failed_step = self.failed_step or step_name
                 return False
 
         except Exception as e:
             print(f"❌ Error executing {step_name}: {e}", flush=True)
+            self.failed_step = self.failed_step or step_name
             return False
+        finally:
+            self._record_stage(step_name, started)
 
     def generate_lots(self, count: int) -> bool:
         """
@@ -220,6 +260,8 @@ class AutomatedTestRunner:
             '--timedelta', str(timedelta_seconds),
             '--start-time', start_time.strftime('%Y-%m-%d %H:%M:%S')
         ]
+        if self.work_dir:
+            args += ['--event-log', os.path.join(self.work_dir, 'plan_result', 'SimulationEvents.csv.gz')]
         return self._run_script(args, "Simulation Clock")
     
     def get_simulation_start_time(self) -> datetime:
@@ -242,7 +284,7 @@ class AutomatedTestRunner:
     def get_simulation_end_time(self) -> datetime:
         """從資料庫取得最後的模擬結束時間"""
         try:
-            conn = mysql.connector.connect(**db_config)
+            conn = mysql.connector.connect(**self.db_config)
             cursor = conn.cursor()
             cursor.execute("SELECT parameter_value FROM ui_settings WHERE parameter_name = 'simulation_end_time' LIMIT 1")
             result = cursor.fetchone()
@@ -318,8 +360,8 @@ class AutomatedTestRunner:
         
         return next_time
     
-    def run(self):
-        """執行完整測試流程"""
+    def run(self) -> bool:
+        """執行完整測試流程，所有步驟都成功時回傳 True"""
         # 取得最終使用的模擬設定用於顯示
         iterations = self.db_settings.get('spin_iterations', self.config.get('simulation_iterations', 50))
         timedelta_seconds = self.db_settings.get('spin_timedelta', self.config.get('simulation_timedelta', 60))
@@ -336,7 +378,7 @@ class AutomatedTestRunner:
         # Step 1: Clean test data
         if not self.clean_test_data():
             print("\n❌ Test failed: Clean test data failed", flush=True)
-            return
+            return False
         
         # 從資料庫取得起始時間 (simulation_start_time)
         start_date = self.get_simulation_start_time()
@@ -356,7 +398,7 @@ class AutomatedTestRunner:
             print("="*60, flush=True)
             if not self.generate_lots(initial_lots):
                 print("\n❌ Test failed: Generate initial Lot failed", flush=True)
-                return
+                return False
         
         # 執行 N 次循環
         total_cycles = self.config['cycles']
@@ -371,7 +413,11 @@ class AutomatedTestRunner:
         print(f"Completed cycles: {total_cycles}", flush=True)
         total_lots = self.config.get('initial_lots', 0) + (total_cycles * self.config['lots_per_cycle'])
         print(f"Total Lots generated: {total_lots}", flush=True)
+        for step_name, seconds in self.stage_seconds.items():
+            print(f"{step_name} time: {seconds:.2f}s", flush=True)
+        print(f"Solver time: {self.solve_seconds:.2f}s ({self.solve_batches} batches)", flush=True)
         print("="*60, flush=True)
+        return self.failed_step is None
 
 
 def main():
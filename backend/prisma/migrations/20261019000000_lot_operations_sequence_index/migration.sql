@@ -0,0 +1,3 @@
+-- CreateIndex
+-- GUI 的 LotOperations 表格依 (LotId, Sequence, Step) 分頁 (keyset)，排程程式依 LotId, Sequence 排序讀取
+CREATE INDEX `idx_lot_sequence_step` ON `LotOperations`(`LotId`, `Sequence`, `Step`);
@@ -0,0 +1,13 @@
+-- AlterTable
+-- 異動追蹤欄位：MySQL 在 INSERT 與實際變更資料的 UPDATE 時自動填入 (語句開始時間，毫秒精度)，
+-- GUI 的 change feed 與增量排程的資料快取依此只讀取異動的資料列 (原本由 add_change_tracking_columns.py 建立)
+ALTER TABLE `Lots` ADD COLUMN `UpdatedAt` DATETIME(3) NOT NULL DEFAULT CURRENT_TIMESTAMP(3) ON UPDATE CURRENT_TIMESTAMP(3);
+
+-- AlterTable
+ALTER TABLE `LotOperations` ADD COLUMN `UpdatedAt` DATETIME(3) NOT NULL DEFAULT CURRENT_TIMESTAMP(3) ON UPDATE CURRENT_TIMESTAMP(3);
+
+-- CreateIndex
+CREATE INDEX `idx_updated_at` ON `Lots`(`UpdatedAt`);
+
+-- CreateIndex
+CREATE INDEX `idx_updated_at` ON `LotOperations`(`UpdatedAt`);
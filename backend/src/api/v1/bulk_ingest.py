@@ -0,0 +1,169 @@
+"""
+批次寫入 (bulk ingest) 的共用處理
+讀取 JSON 陣列或 NDJSON 串流、一次驗證全部項目，並在單一交易中 upsert
+"""
+import json
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Set, Type
+
+from fastapi import HTTPException, Request
+from pydantic import BaseModel, ValidationError
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from core.config import settings
+
+NDJSON_CONTENT_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl", "application/x-jsonlines")
+
+STATUS_CREATED = "created"
+STATUS_UPDATED = "updated"
+STATUS_ERROR = "error"
+STATUS_SKIPPED = "skipped"
+
+
+class _ParseError:
+    """NDJSON 中無法解析的行 (於驗證階段回報為該項目的錯誤)"""
+
+    __slots__ = ("message",)
+
+    def __init__(self, message: str):
+        self.message = message
+
+
+def _check_size(count: int) -> None:
+    if count > settings.BULK_INGEST_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"單次最多 {settings.BULK_INGEST_MAX_ITEMS} 筆")
+
+
+def _parse_line(line: bytes) -> Any:
+    try:
+        return json.loads(line)
+    except ValueError as e:
+        return _ParseError(f"Invalid JSON: {e}")
+
+
+async def read_bulk_items(request: Request) -> List[Any]:
+    """
+    讀取請求中的項目
+
+    - Content-Type 為 NDJSON 時逐塊讀取串流，每行一個 JSON 物件 (空行略過)
+    - 其他情況視為 JSON：陣列，或 {"items": [...]}
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+
+    if content_type in NDJSON_CONTENT_TYPES:
+        items: List[Any] = []
+        buffer = b""
+        async for chunk in request.stream():
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                if line.strip():
+                    items.append(_parse_line(line))
+            _check_size(len(items))
+        if buffer.strip():
+            items.append(_parse_line(buffer))
+        _check_size(len(items))
+        return items
+
+    try:
+        data = json.loads(await request.body())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"JSON 格式錯誤: {e}")
+    if isinstance(data, dict):
+        data = data.get("items")
+    if not isinstance(data, list):
+        raise HTTPException(status_code=400, detail="請求內容必須是陣列或 {\"items\": [...]}")
+    _check_size(len(data))
+    return data
+
+
+def _format_validation_error(e: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(loc) for loc in err['loc']) or 'item'}: {err['msg']}" for err in e.errors()
+    )
+
+
+def ingest_items(
+    db: Session,
+    raw_items: Sequence[Any],
+    schema: Type[BaseModel],
+    key_of: Callable[[BaseModel], Hashable],
+    format_key: Callable[[Hashable], str],
+    find_existing: Callable[[Session, List[Hashable]], Set[Hashable]],
+    upsert: Callable[[Session, List[Dict[str, Any]]], int],
+    check: Optional[Callable[[Session, List[BaseModel]], List[Optional[str]]]] = None,
+    atomic: bool = False,
+) -> Dict[str, Any]:
+    """
+    驗證並 upsert 全部項目，回傳逐筆結果
+
+    Args:
+        check: 額外的資料檢查 (例如外鍵)，回傳與輸入等長的錯誤訊息列表 (None 代表通過)
+        atomic: 為 True 時只要有任一筆錯誤就不寫入任何資料 (其餘項目標記為 skipped)
+
+    Raises:
+        HTTPException: 資料庫寫入失敗 (整批回滾)
+    """
+    results: List[Dict[str, Any]] = []
+    valid: List[int] = []
+    models: List[BaseModel] = []
+    first_index: Dict[Hashable, int] = {}
+
+    # 1. 一次驗證所有項目
+    for index, raw in enumerate(raw_items):
+        result = {"index": index, "key": None, "status": None, "error": None}
+        results.append(result)
+        if isinstance(raw, _ParseError):
+            result.update(status=STATUS_ERROR, error=raw.message)
+            continue
+        try:
+            model = schema.model_validate(raw)
+        except ValidationError as e:
+            result.update(status=STATUS_ERROR, error=_format_validation_error(e))
+            continue
+        key = key_of(model)
+        result["key"] = format_key(key)
+        if key in first_index:
+            result.update(status=STATUS_ERROR, error=f"Duplicate key in request (first at index {first_index[key]})")
+            continue
+        first_index[key] = index
+        valid.append(index)
+        models.append(model)
+
+    if check is not None and models:
+        errors = check(db, models)
+        kept = [(i, m) for i, m, err in zip(valid, models, errors) if err is None]
+        for i, err in zip(valid, errors):
+            if err is not None:
+                results[i].update(status=STATUS_ERROR, error=err)
+        valid = [i for i, _ in kept]
+        models = [m for _, m in kept]
+
+    failed = sum(1 for r in results if r["status"] == STATUS_ERROR)
+    if atomic and failed:
+        for i in valid:
+            results[i]["status"] = STATUS_SKIPPED
+        models = []
+
+    # 2. 單一交易內批次 upsert
+    if models:
+        keys = [key_of(m) for m in models]
+        try:
+            existing = find_existing(db, keys)
+            upsert(db, [m.model_dump() for m in models])
+            db.commit()
+        except SQLAlchemyError as e:
+            db.rollback()
+            raise HTTPException(status_code=500, detail=f"批次寫入失敗，已回滾: {getattr(e, 'orig', e)}")
+        for i, key in zip(valid, keys):
+            results[i]["status"] = STATUS_UPDATED if key in existing else STATUS_CREATED
+
+    statuses = [r["status"] for r in results]
+    return {
+        "total": len(results),
+        "created": statuses.count(STATUS_CREATED),
+        "updated": statuses.count(STATUS_UPDATED),
+        "failed": statuses.count(STATUS_ERROR),
+        "skipped": statuses.count(STATUS_SKIPPED),
+        "items": results,
+    }
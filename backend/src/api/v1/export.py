@@ -0,0 +1,98 @@
+"""
+串流匯出 (NDJSON / CSV) 的共用處理
+以伺服器端游標 (stream_results) 逐批讀取並寫出，記憶體用量與資料筆數無關
+"""
+import csv
+import io
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Iterator, List
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy.sql import Select
+
+from infra.db.database import SessionLocal
+
+EXPORT_FORMATS = ("ndjson", "csv")
+EXPORT_BATCH_SIZE = 1000
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _csv_value(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False, default=_json_default)
+    return value
+
+
+def _iter_batches(stmt: Select) -> Iterator[List[Any]]:
+    """以獨立 Session 串流查詢 (依賴注入的 Session 在回應開始傳送前就會關閉)"""
+    db = SessionLocal()
+    try:
+        result = db.execute(stmt.execution_options(stream_results=True, yield_per=EXPORT_BATCH_SIZE))
+        for batch in result.partitions():
+            yield batch
+    finally:
+        db.close()
+
+
+def _ndjson_chunks(stmt: Select, columns: List[str]) -> Iterator[str]:
+    for batch in _iter_batches(stmt):
+        yield "".join(
+            json.dumps(dict(zip(columns, row)), ensure_ascii=False, default=_json_default) + "\n"
+            for row in batch
+        )
+
+
+def _csv_chunks(stmt: Select, columns: List[str]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # UTF-8 BOM 讓 Excel 正確辨識中文
+    buffer.write("\ufeff")
+    writer.writerow(columns)
+    for batch in _iter_batches(stmt):
+        writer.writerows([_csv_value(v) for v in row] for row in batch)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def stream_export(stmt: Select, export_format: str, filename: str) -> StreamingResponse:
+    """
+    將查詢結果以 NDJSON 或 CSV 串流回傳
+
+    Args:
+        stmt: 只選取欄位的查詢 (例如 select(*Model.__table__.columns))，不載入 ORM 物件
+        export_format: ndjson / csv
+        filename: 下載檔名 (不含副檔名)
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"不支援的匯出格式: {export_format}")
+
+    columns = [column.key for column in stmt.selected_columns]
+    chunks = _ndjson_chunks(stmt, columns) if export_format == "ndjson" else _csv_chunks(stmt, columns)
+    extension = "csv" if export_format == "csv" else "ndjson"
+    return StreamingResponse(
+        chunks,
+        media_type=MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{extension}"'},
+    )
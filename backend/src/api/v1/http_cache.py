@@ -0,0 +1,76 @@
+"""
+條件式 GET (ETag / If-None-Match) 與回應快取的共用處理
+"""
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from fastapi import Request, Response
+from fastapi.concurrency import run_in_threadpool
+
+from infra.cache.response_cache import CachedResponse, schedule_response_cache
+
+# 內容不可變但網址可能指向新排程 (例如 offset=0)，要求瀏覽器每次以 ETag 重新驗證
+CACHE_CONTROL = "no-cache"
+
+
+def _etag_matches(request: Request, entry: CachedResponse) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    tags = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return entry.etag in tags or entry.gzip_etag in tags
+
+
+def _build_response(
+    request: Request, entry: CachedResponse, extra_headers: Optional[Dict[str, str]] = None
+) -> Response:
+    use_gzip = "gzip" in request.headers.get("accept-encoding", "")
+    headers = {
+        "ETag": entry.gzip_etag if use_gzip else entry.etag,
+        "Cache-Control": CACHE_CONTROL,
+        "Vary": "Accept-Encoding",
+        **(extra_headers or {}),
+    }
+
+    if _etag_matches(request, entry):
+        return Response(status_code=304, headers=headers)
+    if use_gzip:
+        headers["Content-Encoding"] = "gzip"
+        return Response(content=entry.gzip_body, media_type="application/json", headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
+
+
+def cached_json_response(
+    request: Request, key: Hashable, build: Callable[[], Any], extra_headers: Optional[Dict[str, str]] = None
+) -> Response:
+    """
+    以快取回應 JSON：命中時不查詢資料庫、不重新序列化
+
+    - If-None-Match 相符時回傳 304 (無內容)
+    - 用戶端接受 gzip 時直接送出預先壓縮的位元組 (GZipMiddleware 會略過已設定 Content-Encoding 的回應)
+    - extra_headers 放不屬於快取內容、每次請求另外提供的值 (例如 X-Total-Count)，304 回應也會帶上
+    """
+    entry = schedule_response_cache.get(key)
+    if entry is None:
+        generation = schedule_response_cache.generation
+        entry = schedule_response_cache.put(key, build(), generation=generation)
+    return _build_response(request, entry, extra_headers)
+
+
+async def cached_json_response_async(
+    request: Request, key: Hashable, build: Callable[[], Awaitable[Any]],
+    extra_headers: Optional[Dict[str, str]] = None,
+) -> Response:
+    """cached_json_response 的非同步版本 (序列化與壓縮移至 threadpool，避免阻塞事件迴圈)"""
+    entry = schedule_response_cache.get(key)
+    if entry is None:
+        generation = schedule_response_cache.generation
+        payload = await build()
+        entry = await run_in_threadpool(schedule_response_cache.put, key, payload, generation)
+    return _build_response(request, entry, extra_headers)
+
+
+def invalidate_schedule_cache() -> None:
+    """排程資料被修改 (快照還原、手動更新或刪除) 時清空回應快取"""
+    schedule_response_cache.invalidate()
@@ -0,0 +1,80 @@
+"""
+Keyset (游標) 分頁的共用處理
+以排序鍵的最後一筆值作為下一頁起點，深層翻頁不需掃過前面所有資料列
+
+游標為排序鍵值的 base64url JSON，對用戶端不透明；下一頁游標以回應標頭 X-Next-Cursor 回傳，
+回應本體仍為原本的列表，既有用戶端不受影響。
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence
+
+from fastapi import HTTPException, Response
+from sqlalchemy import and_, or_
+from sqlalchemy.sql import Select
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in values], ensure_ascii=False)
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, key_columns: Sequence[Any]) -> List[Any]:
+    """解析游標並依欄位型別還原 (datetime 欄位由 ISO 字串轉回)"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if not isinstance(values, list) or len(values) != len(key_columns):
+            raise ValueError("key length mismatch")
+        return [
+            datetime.fromisoformat(v) if v is not None and column.type.python_type is datetime else v
+            for column, v in zip(key_columns, values)
+        ]
+    except (ValueError, TypeError, NotImplementedError):
+        raise HTTPException(status_code=400, detail="無效的分頁游標")
+
+
+def _after(key_columns: Sequence[Any], values: Sequence[Any], descending: bool):
+    """(a, b) > (x, y) 展開為 a > x OR (a = x AND b > y)，讓 MySQL 以索引範圍掃描"""
+    conditions = []
+    for i, column in enumerate(key_columns):
+        equal = [key_columns[j] == values[j] for j in range(i)]
+        compare = column < values[i] if descending else column > values[i]
+        conditions.append(and_(*equal, compare))
+    return or_(*conditions)
+
+
+def apply_keyset(
+    stmt: Select,
+    key_columns: Sequence[Any],
+    cursor: Optional[str],
+    limit: int,
+    descending: bool = False,
+) -> Select:
+    """
+    套用 keyset 條件與排序
+
+    多取一筆用來判斷是否還有下一頁 (見 keyset_page_rows)
+    """
+    if cursor:
+        stmt = stmt.where(_after(key_columns, decode_cursor(cursor, key_columns), descending))
+    order = [column.desc() if descending else column.asc() for column in key_columns]
+    return stmt.order_by(*order).limit(limit + 1)
+
+
+def keyset_page_rows(
+    rows: Sequence[Any],
+    key_columns: Sequence[Any],
+    limit: int,
+    response: Response,
+) -> Sequence[Any]:
+    """截掉多取的一筆，並在還有下一頁時設定 X-Next-Cursor 標頭"""
+    if len(rows) <= limit:
+        return rows
+    rows = rows[:limit]
+    last = rows[-1]
+    response.headers[NEXT_CURSOR_HEADER] = encode_cursor([getattr(last, column.key) for column in key_columns])
+    return rows
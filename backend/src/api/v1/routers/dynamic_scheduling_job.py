@@ -1,11 +1,13 @@
 """
 DynamicSchedulingJob API 路由
 """
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.orm import Session
 from typing import List
 from infra.db.database import get_db
 from domain.models import DynamicSchedulingJob
+from infra.repositories import schedule_result_repository as result_repository
+from api.v1.http_cache import cached_json_response, invalidate_schedule_cache
 from api.v1.schemas.dynamic_scheduling_job import (
     DynamicSchedulingJobCreate,
     DynamicSchedulingJobUpdate,
@@ -27,12 +29,18 @@ def get_scheduling_jobs(
 
 
 @router.get("/{schedule_id}", response_model=DynamicSchedulingJobResponse)
-def get_scheduling_job(schedule_id: str, db: Session = Depends(get_db)):
-    """取得單一動態排程作業"""
-    job = db.query(DynamicSchedulingJob).filter(DynamicSchedulingJob.ScheduleId == schedule_id).first()
-    if not job:
-        raise HTTPException(status_code=404, detail=f"動態排程作業 {schedule_id} 不存在")
-    return job
+def get_scheduling_job(schedule_id: str, request: Request, db: Session = Depends(get_db)):
+    """取得單一動態排程作業 (回應快取,支援 ETag / If-None-Match)"""
+    def build():
+        job = db.query(DynamicSchedulingJob).filter(DynamicSchedulingJob.ScheduleId == schedule_id).first()
+        if not job:
+            raise HTTPException(status_code=404, detail=f"動態排程作業 {schedule_id} 不存在")
+
+        # JSON 欄位為空時 (正規化儲存模式),由排程結果子資料表組出
+        response = DynamicSchedulingJobResponse.model_validate(job)
+        return response.model_copy(update=result_repository.build_result_views(db, job))
+
+    return cached_json_response(request, ("job", schedule_id), build)
 
 
 @router.post("", response_model=DynamicSchedulingJobResponse, status_code=201)
@@ -46,6 +54,7 @@ def create_scheduling_job(job: DynamicSchedulingJobCreate, db: Session = Depends
     db.add(db_job)
     db.commit()
     db.refresh(db_job)
+    invalidate_schedule_cache()
     return db_job
 
 
@@ -66,6 +75,7 @@ def update_scheduling_job(
     
     db.commit()
     db.refresh(db_job)
+    invalidate_schedule_cache()
     return db_job
 
 
@@ -78,4 +88,5 @@ def delete_scheduling_job(schedule_id: str, db: Session = Depends(get_db)):
     
     db.delete(db_job)
     db.commit()
+    invalidate_schedule_cache()
     return None
@@ -1,12 +1,20 @@
 """
 DynamicSchedulingJobSnap API 路由
 """
-from fastapi import APIRouter, Depends, HTTPException, Query
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
-from typing import List
-from infra.db.database import get_db
-from domain.models import DynamicSchedulingJobSnap, DynamicSchedulingJob
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from infra.db.database import SessionLocal, get_db
+from infra.repositories import snapshot_repository
+from domain.models import DynamicSchedulingJobSnap
 from core.config import settings
+from api.v1.http_cache import invalidate_schedule_cache
+from api.v1.pagination import apply_keyset, keyset_page_rows
+from api.v1.export import stream_export
 from api.v1.schemas.dynamic_scheduling_job_snap import (
     DynamicSchedulingJobSnapCreate,
     DynamicSchedulingJobSnapResponse
@@ -14,106 +22,152 @@ from api.v1.schemas.dynamic_scheduling_job_snap import (
 
 router = APIRouter(prefix="/dynamic-scheduling-job-snaps", tags=["DynamicSchedulingJobSnaps"])
 
+# 依 CreateDate DESC 排序，id 作為同一時間的次序
+SNAP_KEY_COLUMNS = (DynamicSchedulingJobSnap.CreateDate, DynamicSchedulingJobSnap.id)
+
 
 @router.get("", response_model=List[DynamicSchedulingJobSnapResponse])
 def get_simulation_planning_jobs(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="keyset 分頁游標 (第一頁傳空字串，下一頁帶入回應標頭 X-Next-Cursor)"),
     db: Session = Depends(get_db)
 ):
-    """取得所有模擬規劃備份"""
+    """取得所有模擬規劃備份 (帶 cursor 時依 CreateDate, id 做 keyset 分頁並忽略 skip)"""
+    if cursor is not None:
+        stmt = apply_keyset(select(DynamicSchedulingJobSnap), SNAP_KEY_COLUMNS, cursor, limit, descending=True)
+        return keyset_page_rows(db.execute(stmt).scalars().all(), SNAP_KEY_COLUMNS, limit, response)
     jobs = db.query(DynamicSchedulingJobSnap).order_by(DynamicSchedulingJobSnap.CreateDate.desc()).offset(skip).limit(limit).all()
     return jobs
 
 
+@router.get("/export")
+def export_simulation_planning_jobs(
+    export_format: str = Query("ndjson", alias="format", description="ndjson / csv"),
+):
+    """串流匯出所有模擬規劃備份 (NDJSON / CSV，含排程結果 JSON 欄位)"""
+    stmt = select(*DynamicSchedulingJobSnap.__table__.columns).order_by(
+        *(column.desc() for column in SNAP_KEY_COLUMNS)
+    )
+    return stream_export(stmt, export_format, "dynamic_scheduling_job_snaps")
+
+
+def _copy_event_stream(
+    run_copy: Callable[[Session], Iterator[Tuple[int, int]]],
+    build_result: Callable[[int], Dict[str, Any]],
+    after_commit: Optional[Callable[[], None]] = None,
+) -> StreamingResponse:
+    """
+    以 SSE 串流分段複製的進度 (progress → done / error)
+
+    使用獨立 Session：依賴注入的 Session 在回應開始傳送前就會關閉；
+    用戶端中途斷線時 generator 被關閉，未 commit 的交易隨 Session 關閉回滾
+    """
+    def event_generator():
+        db = SessionLocal()
+        try:
+            copied = 0
+            for copied, total in run_copy(db):
+                yield f"data: {json.dumps({'type': 'progress', 'copied': copied, 'total': total})}\n\n"
+            db.commit()
+            if after_commit:
+                after_commit()
+            yield f"data: {json.dumps({'type': 'done', **build_result(copied)}, ensure_ascii=False)}\n\n"
+        except SQLAlchemyError as e:
+            db.rollback()
+            print(f"ERROR during snapshot copy: {e}")
+            yield f"data: {json.dumps({'type': 'error', 'content': str(e)}, ensure_ascii=False)}\n\n"
+        finally:
+            db.close()
+
+    return StreamingResponse(event_generator(), media_type="text/event-stream")
+
+
 @router.post("/save", status_code=201)
 def save_current_job_to_simulation(
     job_info: DynamicSchedulingJobSnapCreate,
+    progress: bool = Query(False, description="以 SSE 串流複製進度"),
     db: Session = Depends(get_db)
 ):
-    """將現有的所有 DynamicSchedulingJob 存入模擬規劃"""
-    # 1. 取得所有資料 (使用原生 SQL 以排除 ORM 問題)
-    from sqlalchemy import text
-    result = db.execute(text("SELECT * FROM DynamicSchedulingJob"))
-    current_jobs = result.fetchall()
-    count = len(current_jobs)
-    print(f"DEBUG: Found {count} records in DynamicSchedulingJob via RAW SQL")
-    
+    """
+    將現有的所有 DynamicSchedulingJob 存入模擬規劃
+
+    以分段 INSERT ... SELECT 在資料庫內複製 (排程 JSON 不載入後端記憶體)，全部段落在同一個交易中 commit
+    """
+    count = snapshot_repository.count_current_jobs(db)
     if count == 0:
         raise HTTPException(status_code=404, detail="目前沒有任何動態排程作業可以儲存")
-    
-    # 2. 轉換為 dict 列表進行批量插入
-    data_to_save = []
-    for job in current_jobs:
-        # 使用 _mapping 或是直接轉換
-        job_dict = dict(job._mapping) if hasattr(job, '_mapping') else dict(job)
-        data_to_save.append({
-            "key_value": job_info.key_value,
-            "remark": job_info.remark,
-            "ScheduleId": job_dict.get("ScheduleId"),
-            "LotPlanRaw": job_dict.get("LotPlanRaw"),
-            "CreateUser": job_dict.get("CreateUser"),
-            "PlanSummary": job_dict.get("PlanSummary"),
-            "LotPlanResult": job_dict.get("LotPlanResult"),
-            "LotStepResult": job_dict.get("LotStepResult"),
-            "machineTaskSegment": job_dict.get("machineTaskSegment"),
-            "simulation_end_time": job_dict.get("simulation_end_time")
-        })
-    
-    # 3. 執行批量插入
-    try:
-        db.bulk_insert_mappings(DynamicSchedulingJobSnap, data_to_save)
-        db.commit()
-        print(f"DEBUG: Successfully bulk inserted {len(data_to_save)} records")
+
+    def build_result(copied: int) -> Dict[str, Any]:
         return {
-            "message": f"成功儲存 {len(data_to_save)} 筆記錄", 
-            "count": len(data_to_save),
+            "message": f"成功儲存 {copied} 筆記錄",
+            "count": copied,
             "db_info": {
                 "host": settings.DB_HOST,
                 "user": settings.DB_USER,
                 "name": settings.DB_NAME
             }
         }
-    except Exception as e:
+
+    if progress:
+        return _copy_event_stream(
+            lambda session: snapshot_repository.iter_save_snapshot(session, job_info.key_value, job_info.remark),
+            build_result,
+        )
+
+    try:
+        copied = 0
+        for copied, _ in snapshot_repository.iter_save_snapshot(db, job_info.key_value, job_info.remark):
+            pass
+        db.commit()
+    except SQLAlchemyError as e:
         db.rollback()
-        print(f"ERROR during bulk insert: {e}")
+        print(f"ERROR during snapshot save: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+    print(f"Saved {copied} records to snapshot {job_info.key_value}")
+    return build_result(copied)
 
 
 @router.post("/load/{job_id}", status_code=200)
 def load_simulation_job(
     job_id: int,
+    progress: bool = Query(False, description="以 SSE 串流複製進度"),
     db: Session = Depends(get_db)
 ):
-    """從模擬規劃還原至 DynamicSchedulingJob (還原當初整批存入的所有記錄)"""
+    """
+    從模擬規劃還原至 DynamicSchedulingJob (還原當初整批存入的所有記錄)
+
+    清空與分段 INSERT ... SELECT 複製在同一個交易中完成
+    """
     # 1. 取得指定的備份點資料，並找出其對應的 key_value
-    target_backup = db.query(DynamicSchedulingJobSnap).filter(DynamicSchedulingJobSnap.id == job_id).first()
+    target_backup = db.query(DynamicSchedulingJobSnap.key_value).filter(DynamicSchedulingJobSnap.id == job_id).first()
     if not target_backup:
         raise HTTPException(status_code=404, detail=f"找不到 ID 為 {job_id} 的模擬規劃")
-    
-    # 根據 key_value 找出同一批的所有備份
-    all_backups = db.query(DynamicSchedulingJobSnap).filter(DynamicSchedulingJobSnap.key_value == target_backup.key_value).all()
-    
-    # 2. 刪除現有的 DynamicSchedulingJob
-    db.query(DynamicSchedulingJob).delete()
-    
-    # 3. 插入還原資料
-    for backup_job in all_backups:
-        new_job = DynamicSchedulingJob(
-            ScheduleId=backup_job.ScheduleId,
-            LotPlanRaw=backup_job.LotPlanRaw,
-            CreateUser=backup_job.CreateUser,
-            PlanSummary=backup_job.PlanSummary,
-            LotPlanResult=backup_job.LotPlanResult,
-            LotStepResult=backup_job.LotStepResult,
-            machineTaskSegment=backup_job.machineTaskSegment,
-            simulation_end_time=backup_job.simulation_end_time
+    key_value = target_backup.key_value
+
+    def build_result(copied: int) -> Dict[str, Any]:
+        return {"message": f"還原成功，共還原 {copied} 筆記錄", "key_value": key_value, "count": copied}
+
+    # 還原後 DynamicSchedulingJob 內容改變,清空排程讀取快取
+    if progress:
+        return _copy_event_stream(
+            lambda session: snapshot_repository.iter_restore_snapshot(session, key_value),
+            build_result,
+            after_commit=invalidate_schedule_cache,
         )
-        db.add(new_job)
-    
-    db.commit()
-    
-    return {"message": f"還原成功，共還原 {len(all_backups)} 筆記錄", "key_value": target_backup.key_value}
+
+    try:
+        copied = 0
+        for copied, _ in snapshot_repository.iter_restore_snapshot(db, key_value):
+            pass
+        db.commit()
+    except SQLAlchemyError as e:
+        db.rollback()
+        print(f"ERROR during snapshot restore: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    invalidate_schedule_cache()
+    return build_result(copied)
 
 
 @router.delete("/{job_id}", status_code=204)
@@ -0,0 +1,92 @@
+"""
+KPI 儀表板 API 路由
+GUI 與網頁共用的儀表板數據：每個來源資料表只掃描一次，結果以短時間 TTL 快取
+"""
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from core.config import settings
+from domain.models import DynamicSchedulingJob
+from domain.services import kpi_service, schedule_diff_service
+from infra.cache.ttl_cache import TTLCache
+from infra.db.database import get_db
+from infra.repositories import kpi_repository, ui_setting_repository
+from infra.repositories import schedule_diff_repository as diff_repository
+from infra.repositories import schedule_result_repository as result_repository
+from api.v1.schemas.kpi import KpiResponse
+
+router = APIRouter(
+    prefix="/kpi",
+    tags=["KPI"]
+)
+
+kpi_cache = TTLCache(ttl_seconds=settings.KPI_CACHE_TTL_SECONDS)
+
+
+def _resolve_as_of(db: Session, as_of: Optional[datetime]) -> datetime:
+    """WIP 滯留時間的基準時間：請求指定 > 模擬時鐘 (ui_settings)"""
+    if as_of is not None:
+        return as_of
+    return datetime.strptime(ui_setting_repository.get_simulation_start_time(db), ui_setting_repository.TIME_FORMAT)
+
+
+def _latest_schedule_id(db: Session) -> Optional[str]:
+    schedule_id = result_repository.get_schedule_id_at(db, DynamicSchedulingJob, 0)
+    if schedule_id and not result_repository.has_step_results(db, schedule_id):
+        job = db.query(DynamicSchedulingJob).filter(DynamicSchedulingJob.ScheduleId == schedule_id).first()
+        if job:
+            result_repository.ensure_results(db, job)
+    return schedule_id
+
+
+def _plan_stability(db: Session, latest_id: Optional[str]) -> Optional[float]:
+    """最新排程相對前一次排程的計畫穩定度 (開始時間需完全相同)"""
+    previous_id = result_repository.get_schedule_id_at(db, DynamicSchedulingJob, 1)
+    if not latest_id or not previous_id:
+        return None
+    return schedule_diff_service.plan_stability(diff_repository.get_op_summary(db, previous_id, latest_id, 0))
+
+
+def compute_kpis(db: Session, as_of: datetime, include_stability: bool = False) -> Dict[str, Any]:
+    """計算所有儀表板 KPI"""
+    op_kpis = kpi_repository.get_operation_kpis(db, as_of)
+
+    schedule_id = _latest_schedule_id(db)
+    delay_kpis = kpi_repository.get_delay_kpis(db, schedule_id) if schedule_id else None
+
+    # 稼動率以最新排程的 PlanID 為準，舊排程沒有 PlanID 時取最近一次寫入的稼動率
+    plan_id = (delay_kpis or {}).get("plan_id") or kpi_repository.get_latest_utilization_plan_id(db)
+    utilization_rows = kpi_repository.get_group_utilization(db, plan_id) if plan_id else []
+
+    return {
+        "generated_at": datetime.now(),
+        "status": kpi_service.build_status(kpi_repository.count_lots(db), op_kpis),
+        "delay": kpi_service.build_delay(schedule_id, delay_kpis),
+        "utilization": kpi_service.build_utilization(plan_id, utilization_rows),
+        "wip_age": kpi_service.build_wip_age(op_kpis, as_of),
+        "plan_stability": _plan_stability(db, schedule_id) if include_stability else None,
+    }
+
+
+@router.get("", response_model=KpiResponse)
+def get_kpis(
+    as_of: Optional[datetime] = Query(None, description="WIP 滯留時間基準 (預設為模擬時鐘)"),
+    include_stability: bool = Query(False, description="是否計算相對前一次排程的計畫穩定度"),
+    refresh: bool = Query(False, description="略過此查詢條件的快取重新計算"),
+    db: Session = Depends(get_db)
+):
+    """
+    取得儀表板 KPI：Lot / 作業狀態計數、準時率與延遲、各機台群組稼動率、WIP 滯留時間
+
+    結果快取 KPI_CACHE_TTL_SECONDS 秒，同時間的多個請求只會計算一次；
+    refresh 只移除本次查詢條件的快取，其他儀表板的快取不受影響
+    """
+    as_of = _resolve_as_of(db, as_of)
+    key = (as_of, include_stability)
+    if refresh:
+        kpi_cache.evict(key)
+    payload, age = kpi_cache.get_or_compute(key, lambda: compute_kpis(db, as_of, include_stability))
+    return {**payload, "cache_age_seconds": round(age, 2)}
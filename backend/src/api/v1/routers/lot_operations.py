@@ -1,42 +1,71 @@
 """
 LotOperations API 路由
 """
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from typing import List
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 from datetime import datetime
 from infra.db.database import get_db
+from infra.db.async_database import get_async_db
+from infra.repositories import bulk_ingest_repository
+from infra.scheduler.reschedule_trigger import notify_schedule_change
 from domain.models import LotOperation
 from api.v1.schemas.lot_operations import LotOperationCreate, LotOperationUpdate, LotOperationResponse
+from api.v1.schemas.bulk_ingest import BulkIngestResponse
+from api.v1.bulk_ingest import ingest_items, read_bulk_items
+from api.v1.pagination import apply_keyset, keyset_page_rows
+from api.v1.export import stream_export
 
 router = APIRouter(prefix="/lot-operations", tags=["LotOperations"])
 
+LOT_OPERATION_KEY_COLUMNS = (LotOperation.LotId, LotOperation.Step)
+
 
 @router.get("", response_model=List[LotOperationResponse])
-def get_lot_operations(
+async def get_lot_operations(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="keyset 分頁游標 (第一頁傳空字串，下一頁帶入回應標頭 X-Next-Cursor)"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """取得所有工單作業 (帶 cursor 時依 LotId, Step 做 keyset 分頁並忽略 skip)"""
+    if cursor is not None:
+        result = await db.execute(apply_keyset(select(LotOperation), LOT_OPERATION_KEY_COLUMNS, cursor, limit))
+        return keyset_page_rows(result.scalars().all(), LOT_OPERATION_KEY_COLUMNS, limit, response)
+    result = await db.execute(select(LotOperation).offset(skip).limit(limit))
+    return result.scalars().all()
+
+
+@router.get("/export")
+def export_lot_operations(
+    export_format: str = Query("ndjson", alias="format", description="ndjson / csv"),
 ):
-    """取得所有工單作業"""
-    operations = db.query(LotOperation).offset(skip).limit(limit).all()
-    return operations
+    """串流匯出所有工單作業 (NDJSON / CSV)"""
+    stmt = select(*LotOperation.__table__.columns).order_by(*LOT_OPERATION_KEY_COLUMNS)
+    return stream_export(stmt, export_format, "lot_operations")
 
 
 @router.get("/lot/{lot_id}", response_model=List[LotOperationResponse])
-def get_lot_operations_by_lot(lot_id: str, db: Session = Depends(get_db)):
+async def get_lot_operations_by_lot(lot_id: str, db: AsyncSession = Depends(get_async_db)):
     """取得指定工單的所有作業"""
-    operations = db.query(LotOperation).filter(LotOperation.LotId == lot_id).order_by(LotOperation.Sequence).all()
-    return operations
+    stmt = select(LotOperation).where(LotOperation.LotId == lot_id).order_by(LotOperation.Sequence)
+    result = await db.execute(stmt)
+    return result.scalars().all()
 
 
 @router.get("/{lot_id}/{step}", response_model=LotOperationResponse)
-def get_lot_operation(lot_id: str, step: str, db: Session = Depends(get_db)):
+async def get_lot_operation(lot_id: str, step: str, db: AsyncSession = Depends(get_async_db)):
     """取得單一工單作業"""
-    operation = db.query(LotOperation).filter(
+    result = await db.execute(select(LotOperation).where(
         LotOperation.LotId == lot_id,
         LotOperation.Step == step
-    ).first()
+    ))
+    operation = result.scalars().first()
     if not operation:
         raise HTTPException(status_code=404, detail=f"工單作業 {lot_id}/{step} 不存在")
     return operation
@@ -60,6 +89,44 @@ def create_lot_operation(operation: LotOperationCreate, db: Session = Depends(ge
     return db_operation
 
 
+def _check_lots_exist(db: Session, operations: List[LotOperationCreate]) -> List[Optional[str]]:
+    """檢查作業所屬工單是否存在 (一次查詢)"""
+    existing = bulk_ingest_repository.find_existing_lot_ids(db, [op.LotId for op in operations])
+    return [None if op.LotId in existing else f"工單 {op.LotId} 不存在" for op in operations]
+
+
+@router.post("/bulk", response_model=BulkIngestResponse)
+async def bulk_upsert_lot_operations(
+    request: Request,
+    atomic: bool = Query(False, description="任一筆錯誤時整批不寫入"),
+    db: Session = Depends(get_db)
+):
+    """
+    批次建立 / 更新工單作業 (JSON 陣列或 NDJSON)
+
+    已存在的作業只更新 MachineGroup / Duration / Sequence，不覆蓋 CheckIn/Out 與計畫欄位；
+    回傳逐筆結果 (created / updated / error / skipped)
+    """
+    raw_items = await read_bulk_items(request)
+    report = await run_in_threadpool(
+        ingest_items,
+        db,
+        raw_items,
+        schema=LotOperationCreate,
+        key_of=lambda op: (op.LotId, op.Step),
+        format_key=lambda key: f"{key[0]}/{key[1]}",
+        find_existing=bulk_ingest_repository.find_existing_operation_keys,
+        upsert=bulk_ingest_repository.upsert_lot_operations,
+        check=_check_lots_exist,
+        atomic=atomic,
+    )
+    if report["created"] or report["updated"]:
+        notify_schedule_change("lot_operations_bulk_ingested")
+    if atomic and report["failed"]:
+        return JSONResponse(status_code=422, content=report)
+    return report
+
+
 @router.put("/{lot_id}/{step}", response_model=LotOperationResponse)
 def update_lot_operation(
     lot_id: str,
@@ -114,6 +181,7 @@ def check_in_operation(lot_id: str, step: str, db: Session = Depends(get_db)):
     
     db.commit()
     db.refresh(db_operation)
+    notify_schedule_change("check_in")
     return db_operation
 
 
@@ -132,4 +200,5 @@ def check_out_operation(lot_id: str, step: str, db: Session = Depends(get_db)):
     
     db.commit()
     db.refresh(db_operation)
+    notify_schedule_change("check_out")
     return db_operation
@@ -1,37 +1,68 @@
 """
 Lots API 路由
 """
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from infra.db.database import get_db
+from infra.db.async_database import get_async_db
+from infra.repositories import bulk_ingest_repository
+from infra.scheduler.reschedule_trigger import notify_schedule_change
 from domain.models import Lot
 from api.v1.schemas.lots import LotCreate, LotUpdate, LotResponse
+from api.v1.schemas.bulk_ingest import BulkIngestResponse
+from api.v1.bulk_ingest import ingest_items, read_bulk_items
+from api.v1.pagination import apply_keyset, keyset_page_rows
+from api.v1.export import stream_export
 
 router = APIRouter(prefix="/lots", tags=["Lots"])
 
+LOT_KEY_COLUMNS = (Lot.LotId,)
+
 
 @router.get("", response_model=List[LotResponse])
-def get_lots(
+async def get_lots(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
     customer_id: Optional[str] = None,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="keyset 分頁游標 (第一頁傳空字串，下一頁帶入回應標頭 X-Next-Cursor)"),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """取得所有工單 (支援分頁和篩選)"""
-    query = db.query(Lot)
+    """取得所有工單 (支援分頁和篩選；帶 cursor 時依 LotId 做 keyset 分頁並忽略 skip)"""
+    stmt = select(Lot)
     
     if customer_id:
-        query = query.filter(Lot.CustomerID == customer_id)
+        stmt = stmt.where(Lot.CustomerID == customer_id)
     
-    lots = query.offset(skip).limit(limit).all()
-    return lots
+    if cursor is not None:
+        result = await db.execute(apply_keyset(stmt, LOT_KEY_COLUMNS, cursor, limit))
+        return keyset_page_rows(result.scalars().all(), LOT_KEY_COLUMNS, limit, response)
+    
+    result = await db.execute(stmt.offset(skip).limit(limit))
+    return result.scalars().all()
+
+
+@router.get("/export")
+def export_lots(
+    export_format: str = Query("ndjson", alias="format", description="ndjson / csv"),
+    customer_id: Optional[str] = None,
+):
+    """串流匯出所有工單 (NDJSON / CSV)"""
+    stmt = select(*Lot.__table__.columns).order_by(*LOT_KEY_COLUMNS)
+    if customer_id:
+        stmt = stmt.where(Lot.CustomerID == customer_id)
+    return stream_export(stmt, export_format, "lots")
 
 
 @router.get("/{lot_id}", response_model=LotResponse)
-def get_lot(lot_id: str, db: Session = Depends(get_db)):
+async def get_lot(lot_id: str, db: AsyncSession = Depends(get_async_db)):
     """取得單一工單"""
-    lot = db.query(Lot).filter(Lot.LotId == lot_id).first()
+    lot = await db.get(Lot, lot_id)
     if not lot:
         raise HTTPException(status_code=404, detail=f"工單 {lot_id} 不存在")
     return lot
@@ -49,9 +80,40 @@ def create_lot(lot: LotCreate, db: Session = Depends(get_db)):
     db.add(db_lot)
     db.commit()
     db.refresh(db_lot)
+    notify_schedule_change("lot_created")
     return db_lot
 
 
+@router.post("/bulk", response_model=BulkIngestResponse)
+async def bulk_upsert_lots(
+    request: Request,
+    atomic: bool = Query(False, description="任一筆錯誤時整批不寫入"),
+    db: Session = Depends(get_db)
+):
+    """
+    批次建立 / 更新工單 (JSON 陣列或 NDJSON)
+
+    已存在的工單只更新主檔欄位；回傳逐筆結果 (created / updated / error / skipped)
+    """
+    raw_items = await read_bulk_items(request)
+    report = await run_in_threadpool(
+        ingest_items,
+        db,
+        raw_items,
+        schema=LotCreate,
+        key_of=lambda lot: lot.LotId,
+        format_key=str,
+        find_existing=bulk_ingest_repository.find_existing_lot_ids,
+        upsert=bulk_ingest_repository.upsert_lots,
+        atomic=atomic,
+    )
+    if report["created"] or report["updated"]:
+        notify_schedule_change("lots_bulk_ingested")
+    if atomic and report["failed"]:
+        return JSONResponse(status_code=422, content=report)
+    return report
+
+
 @router.put("/{lot_id}", response_model=LotResponse)
 def update_lot(lot_id: str, lot: LotUpdate, db: Session = Depends(get_db)):
     """更新工單"""
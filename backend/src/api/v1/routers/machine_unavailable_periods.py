@@ -6,6 +6,7 @@ from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime
 from infra.db.database import get_db
+from infra.scheduler.reschedule_trigger import notify_schedule_change
 from domain.models import MachineUnavailablePeriod
 from domain.models.machine_unavailable_periods import UnavailableType
 from api.v1.schemas.machine_unavailable_periods import (
@@ -57,6 +58,7 @@ def create_unavailable_period(period: MachineUnavailablePeriodCreate, db: Sessio
     db.add(db_period)
     db.commit()
     db.refresh(db_period)
+    notify_schedule_change("unavailable_period_created")
     return db_period
 
 
@@ -81,6 +83,7 @@ def update_unavailable_period(
     
     db.commit()
     db.refresh(db_period)
+    notify_schedule_change("unavailable_period_updated")
     return db_period
 
 
@@ -97,4 +100,5 @@ def delete_unavailable_period(period_id: int, db: Session = Depends(get_db)):
     
     db.delete(db_period)
     db.commit()
+    notify_schedule_change("unavailable_period_deleted")
     return None
@@ -2,9 +2,12 @@
 Machines and MachineGroups API 路由
 """
 from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from infra.db.database import get_db
+from infra.db.async_database import get_async_db
 from domain.models import Machine, MachineGroup
 from api.v1.schemas.machines import (
     MachineCreate, MachineUpdate, MachineResponse,
@@ -16,14 +19,14 @@ router = APIRouter(tags=["Machines"])
 
 # MachineGroup 路由
 @router.get("/machine-groups", response_model=List[MachineGroupResponse])
-def get_machine_groups(
+async def get_machine_groups(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """取得所有機器群組"""
-    groups = db.query(MachineGroup).offset(skip).limit(limit).all()
-    return groups
+    result = await db.execute(select(MachineGroup).offset(skip).limit(limit))
+    return result.scalars().all()
 
 
 @router.get("/machine-groups/{group_id}", response_model=MachineGroupResponse)
@@ -79,29 +82,29 @@ def delete_machine_group(group_id: str, db: Session = Depends(get_db)):
 
 # Machine 路由
 @router.get("/machines", response_model=List[MachineResponse])
-def get_machines(
+async def get_machines(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
     group_id: str = None,
     is_active: bool = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """取得所有機器 (支援依群組和啟用狀態篩選)"""
-    query = db.query(Machine)
+    stmt = select(Machine)
     
     if group_id:
-        query = query.filter(Machine.GroupId == group_id)
+        stmt = stmt.where(Machine.GroupId == group_id)
     if is_active is not None:
-        query = query.filter(Machine.is_active == is_active)
+        stmt = stmt.where(Machine.is_active == is_active)
     
-    machines = query.offset(skip).limit(limit).all()
-    return machines
+    result = await db.execute(stmt.offset(skip).limit(limit))
+    return result.scalars().all()
 
 
 @router.get("/machines/{machine_id}", response_model=MachineResponse)
-def get_machine(machine_id: str, db: Session = Depends(get_db)):
+async def get_machine(machine_id: str, db: AsyncSession = Depends(get_async_db)):
     """取得單一機器"""
-    machine = db.query(Machine).filter(Machine.MachineId == machine_id).first()
+    machine = await db.get(Machine, machine_id)
     if not machine:
         raise HTTPException(status_code=404, detail=f"機器 {machine_id} 不存在")
     return machine
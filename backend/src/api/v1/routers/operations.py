@@ -1,9 +1,10 @@
 """
 Operations API 路由 (Completed, WIP, Frozen)
 """
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from infra.db.database import get_db
 from domain.models import CompletedOperation, WIPOperation, FrozenOperation
 from api.v1.schemas.operations import (
@@ -11,22 +12,40 @@ from api.v1.schemas.operations import (
     WIPOperationCreate, WIPOperationUpdate, WIPOperationResponse,
     FrozenOperationCreate, FrozenOperationUpdate, FrozenOperationResponse
 )
+from api.v1.pagination import apply_keyset, keyset_page_rows
+from api.v1.export import stream_export
 
 router = APIRouter(tags=["Operations"])
 
+COMPLETED_OPERATION_KEY_COLUMNS = (CompletedOperation.LotId, CompletedOperation.Step)
+
 
 # CompletedOperations 路由
 @router.get("/completed-operations", response_model=List[CompletedOperationResponse])
 def get_completed_operations(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="keyset 分頁游標 (第一頁傳空字串，下一頁帶入回應標頭 X-Next-Cursor)"),
     db: Session = Depends(get_db)
 ):
-    """取得所有已完成作業"""
+    """取得所有已完成作業 (帶 cursor 時依 LotId, Step 做 keyset 分頁並忽略 skip)"""
+    if cursor is not None:
+        stmt = apply_keyset(select(CompletedOperation), COMPLETED_OPERATION_KEY_COLUMNS, cursor, limit)
+        return keyset_page_rows(db.execute(stmt).scalars().all(), COMPLETED_OPERATION_KEY_COLUMNS, limit, response)
     operations = db.query(CompletedOperation).offset(skip).limit(limit).all()
     return operations
 
 
+@router.get("/completed-operations/export")
+def export_completed_operations(
+    export_format: str = Query("ndjson", alias="format", description="ndjson / csv"),
+):
+    """串流匯出所有已完成作業 (NDJSON / CSV)"""
+    stmt = select(*CompletedOperation.__table__.columns).order_by(*COMPLETED_OPERATION_KEY_COLUMNS)
+    return stream_export(stmt, export_format, "completed_operations")
+
+
 @router.get("/completed-operations/{lot_id}/{step}", response_model=CompletedOperationResponse)
 def get_completed_operation(lot_id: str, step: str, db: Session = Depends(get_db)):
     """取得單一已完成作業"""
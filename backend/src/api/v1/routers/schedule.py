@@ -1,23 +1,49 @@
 """
 Schedule API 路由 (專為甘特圖設計)
 """
-from fastapi import APIRouter, Depends, Query
+import json
+import time
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, select
+from datetime import datetime
 from infra.db.database import get_db
+from infra.db.async_database import get_async_db
+from infra.repositories import schedule_segment_repository as segment_repository
+from infra.repositories import schedule_result_repository as result_repository
+from infra.repositories import schedule_diff_repository as diff_repository
 from domain.models import DynamicSchedulingJob, DynamicSchedulingJobHist
+from domain.services import gantt_service, schedule_result_service, schedule_diff_service
 from api.v1.schemas.dynamic_scheduling_job import DynamicSchedulingJobResponse
-from typing import Any, Dict, Optional
+from api.v1.http_cache import cached_json_response, cached_json_response_async
+from core.config import settings
+from typing import Any, Dict, List, Optional, Tuple
 
 router = APIRouter(tags=["Schedule"])
 
+# 排程總數 (依 source)：(取得時間, 總數)。總數會因刪除或移入歷史而改變，不放進依 ScheduleId 快取的回應內容
+_schedule_totals: Dict[str, Tuple[float, int]] = {}
+
+
+async def _schedule_total(db: AsyncSession, model: Any, source: str) -> int:
+    """取得排程總數 (SCHEDULE_TOTAL_TTL_SECONDS 內重複使用，輪詢時不必每次 COUNT(*))"""
+    cached = _schedule_totals.get(source)
+    if cached is not None and time.monotonic() - cached[0] < settings.SCHEDULE_TOTAL_TTL_SECONDS:
+        return cached[1]
+    total = (await db.execute(select(func.count(model.ScheduleId)))).scalar()
+    _schedule_totals[source] = (time.monotonic(), total)
+    return total
+
 
 @router.get("/schedule")
-def get_schedule_for_gantt(
+async def get_schedule_for_gantt(
+    request: Request,
     offset: int = Query(0, ge=0, description="偏移量 (0 是最新一筆)"),
     limit: int = Query(1, ge=1, le=10, description="限制數量"),
     source: str = Query("current", description="資料來源: current (目前), history (歷史)"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> Dict[str, Any]:
     """
     取得排程資料 (專為甘特圖設計)
@@ -25,6 +51,9 @@ def get_schedule_for_gantt(
     - offset: 偏移量,0 是最新一筆,1 是第二新,依此類推
     - limit: 限制數量,預設 1
     - source: 資料來源
+    - 支援 ETag / If-None-Match,資料未變時回傳 304
+    - 非同步端點:等待 MySQL 時不佔用 threadpool
+    - 排程總數放在 X-Total-Count 標頭 (不屬於快取的回應內容,304 也會帶上)
     
     返回格式:
     {
@@ -32,46 +61,271 @@ def get_schedule_for_gantt(
         "CreateDate": "2026-01-23T19:48:45.000Z",
         "CreateUser": "user",
         "PlanSummary": "summary",
-        "machineTaskSegment": [...],
-        "total": 30
+        "machineTaskSegment": [...]
     }
     """
     # 決定使用的 Model
     model = DynamicSchedulingJobHist if source == "history" else DynamicSchedulingJob
+
+    # 只查詢目標排程的 ScheduleId (CreateDate 索引);回應內容依 ScheduleId 快取,總數另外以短時間快取提供
+    schedule_id = await db.run_sync(result_repository.get_schedule_id_at, model, offset)
     
-    # 計算總數
-    total = db.query(func.count(model.ScheduleId)).scalar()
-    
-    # 查詢排程資料 (按 CreateDate DESC 排序)
-    jobs = db.query(model)\
-        .order_by(model.CreateDate.desc())\
-        .offset(offset)\
-        .limit(limit)\
-        .all()
-    
-    if not jobs:
-        return {
+    total_header = {"X-Total-Count": str(await _schedule_total(db, model, source))}
+    if schedule_id is None:
+        return JSONResponse({
             "ScheduleId": None,
             "CreateDate": None,
             "CreateUser": None,
             "PlanSummary": None,
             "machineTaskSegment": [],
-            "total": total,
+            "source": source
+        }, headers=total_header)
+
+    async def build() -> Dict[str, Any]:
+        job = (await db.execute(select(model).where(model.ScheduleId == schedule_id))).scalars().first()
+
+        # JSON 欄位為空時 (正規化儲存模式),由 ScheduleStepResult / ScheduleLotResult / ScheduleTaskSegment 組出
+        views = await db.run_sync(result_repository.build_result_views, job)
+        
+        return {
+            "ScheduleId": job.ScheduleId,
+            "CreateDate": job.CreateDate.isoformat() if job.CreateDate else None,
+            "CreateUser": job.CreateUser,
+            "PlanSummary": job.PlanSummary,
+            "machineTaskSegment": views["machineTaskSegment"] or [],
+            "LotPlanResult": views["LotPlanResult"] or {},
+            "LotStepResult": views["LotStepResult"] or {},
+            "simulation_end_time": job.simulation_end_time.isoformat() if job.simulation_end_time else None,
             "source": source
         }
-    
-    # 取第一筆 (因為 limit 通常是 1)
-    job = jobs[0]
-    
+
+    return await cached_json_response_async(request, ("schedule", source, schedule_id), build, total_header)
+
+
+def _split_csv(value: Optional[str]) -> Optional[List[str]]:
+    if not value:
+        return None
+    return [v.strip() for v in value.split(",") if v.strip()]
+
+
+@router.get("/schedule/segments")
+def get_schedule_segments(
+    request: Request,
+    schedule_id: Optional[str] = Query(None, description="排程 ID (未指定則取最新一筆)"),
+    start: Optional[datetime] = Query(None, description="視窗起點 (未指定則為排程起點)"),
+    end: Optional[datetime] = Query(None, description="視窗終點 (未指定則為排程終點)"),
+    machines: Optional[str] = Query(None, description="機台篩選,以逗號分隔"),
+    groups: Optional[str] = Query(None, description="機台群組篩選,以逗號分隔"),
+    zoom: str = Query("auto", pattern="^(auto|detail|hour|shift|day)$", description="縮放層級"),
+    source: str = Query("current", description="資料來源: current (目前), history (歷史)"),
+    db: Session = Depends(get_db)
+) -> Dict[str, Any]:
+    """
+    取得時間視窗內的甘特圖區段 (依機台 / 群組篩選)
+
+    - 只回傳與 [start, end) 重疊的區段,甘特圖捲動時可逐段載入
+    - zoom 為 hour / shift / day 時,依 (機台, 時間桶) 彙總為單一區段
+    - 舊排程第一次查詢時,會由 machineTaskSegment JSON 回填正規化區段
+    - 回應依 (ScheduleId, 視窗參數) 快取,支援 ETag / If-None-Match
+    """
+    model = DynamicSchedulingJobHist if source == "history" else DynamicSchedulingJob
+
+    if schedule_id is None:
+        schedule_id = result_repository.get_schedule_id_at(db, model, 0)
+        if schedule_id is None:
+            raise HTTPException(status_code=404, detail="目前沒有任何排程資料")
+
+    key = ("segments", source, schedule_id, start, end, machines, groups, zoom)
+    return cached_json_response(
+        request, key, lambda: _build_segments_view(db, model, schedule_id, start, end, machines, groups, zoom)
+    )
+
+
+def _build_segments_view(
+    db: Session,
+    model: Any,
+    schedule_id: str,
+    start: Optional[datetime],
+    end: Optional[datetime],
+    machines: Optional[str],
+    groups: Optional[str],
+    zoom: str,
+) -> Dict[str, Any]:
+    """組出甘特圖區段檢視 (快取未命中時才執行)"""
+    if not segment_repository.has_segments(db, schedule_id):
+        job = db.query(model).filter(model.ScheduleId == schedule_id).first()
+        if not job:
+            raise HTTPException(status_code=404, detail=f"排程 {schedule_id} 不存在")
+        task_segments = job.machineTaskSegment or []
+        if isinstance(task_segments, str):
+            task_segments = json.loads(task_segments)
+        segment_repository.backfill_segments(db, schedule_id, task_segments)
+
+    machine_ids = segment_repository.resolve_machine_ids(db, _split_csv(machines), _split_csv(groups))
+    bounds = segment_repository.get_segment_bounds(db, schedule_id, machine_ids)
+
+    window_start = start or bounds["start"]
+    window_end = end or bounds["end"]
+    if window_start is None or window_end is None:
+        return {
+            "ScheduleId": schedule_id,
+            "window": {"start": None, "end": None},
+            "bounds": {"start": None, "end": None, "total": 0},
+            "zoom": zoom,
+            "machines": [],
+            "segments": [],
+        }
+    if window_end <= window_start:
+        raise HTTPException(status_code=400, detail="end 必須晚於 start")
+
+    level = gantt_service.resolve_zoom(zoom, window_start, window_end)
+    bucket_minutes = gantt_service.ZOOM_BUCKET_MINUTES[level]
+    if bucket_minutes is None:
+        rows = segment_repository.query_segments(db, schedule_id, window_start, window_end, machine_ids)
+        segments = [gantt_service.segment_to_task(r) for r in rows]
+    else:
+        buckets = segment_repository.aggregate_segments(
+            db, schedule_id, window_start, window_end, bucket_minutes, machine_ids
+        )
+        segments = [gantt_service.bucket_to_task(b, bucket_minutes) for b in buckets]
+
     return {
-        "ScheduleId": job.ScheduleId,
-        "CreateDate": job.CreateDate.isoformat() if job.CreateDate else None,
-        "CreateUser": job.CreateUser,
-        "PlanSummary": job.PlanSummary,
-        "machineTaskSegment": job.machineTaskSegment if job.machineTaskSegment else [],
-        "LotPlanResult": job.LotPlanResult if job.LotPlanResult else {},
-        "LotStepResult": job.LotStepResult if job.LotStepResult else {},
-        "simulation_end_time": job.simulation_end_time.isoformat() if job.simulation_end_time else None,
-        "total": total,
-        "source": source
+        "ScheduleId": schedule_id,
+        "window": {"start": window_start.isoformat(), "end": window_end.isoformat()},
+        "bounds": {
+            "start": bounds["start"].isoformat() if bounds["start"] else None,
+            "end": bounds["end"].isoformat() if bounds["end"] else None,
+            "total": bounds["total"],
+        },
+        "zoom": level,
+        "bucket_minutes": bucket_minutes,
+        "machines": gantt_service.build_machine_rows(bounds["machines"]),
+        "segments": segments,
     }
+
+
+def _get_job_or_404(db: Session, schedule_id: str, source: str):
+    model = DynamicSchedulingJobHist if source == "history" else DynamicSchedulingJob
+    job = db.query(model).filter(model.ScheduleId == schedule_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail=f"排程 {schedule_id} 不存在")
+    return job
+
+
+def _find_job_or_404(db: Session, schedule_id: str):
+    """依序於目前與歷史排程中尋找 (比較對象可能已被移入歷史)"""
+    for model in (DynamicSchedulingJob, DynamicSchedulingJobHist):
+        job = db.query(model).filter(model.ScheduleId == schedule_id).first()
+        if job:
+            return job
+    raise HTTPException(status_code=404, detail=f"排程 {schedule_id} 不存在")
+
+
+def _resolve_diff_side(db: Session, schedule_id: Optional[str], plan_id: Optional[str], offset: int) -> str:
+    """比較對象：ScheduleId > PlanID > 目前排程中第 offset 新的一筆"""
+    if schedule_id:
+        return schedule_id
+    if plan_id:
+        resolved = diff_repository.resolve_schedule_id_by_plan(db, plan_id)
+        if not resolved:
+            raise HTTPException(status_code=404, detail=f"計畫 {plan_id} 不存在")
+        return resolved
+    resolved = result_repository.get_schedule_id_at(db, DynamicSchedulingJob, offset)
+    if not resolved:
+        raise HTTPException(status_code=404, detail="沒有可比較的排程")
+    return resolved
+
+
+@router.get("/schedule/diff")
+def get_schedule_diff(
+    request: Request,
+    base: Optional[str] = Query(None, description="原排程 ScheduleId (預設為前一次排程)"),
+    target: Optional[str] = Query(None, description="新排程 ScheduleId (預設為最新排程)"),
+    base_plan: Optional[str] = Query(None, description="以 PlanID 指定原排程"),
+    target_plan: Optional[str] = Query(None, description="以 PlanID 指定新排程"),
+    tolerance_minutes: int = Query(0, ge=0, description="開始時間變動在此範圍內視為未移動"),
+    lot_id: Optional[str] = Query(None, description="只看單一 Lot 的明細"),
+    include_unchanged: bool = Query(False, description="作業明細是否包含未變動的作業"),
+    op_limit: int = Query(1000, ge=0, le=50000, description="作業明細筆數上限"),
+    lot_limit: int = Query(1000, ge=0, le=50000, description="Lot 明細筆數上限"),
+    db: Session = Depends(get_db)
+) -> Dict[str, Any]:
+    """
+    比較兩份排程：逐作業 (移動、換機、新增、移除) 與逐 Lot (完工與延遲變化)，並計算計畫穩定度
+
+    比對以 ScheduleStepResult / ScheduleLotResult 的 JOIN 與聚合在資料庫內完成
+    """
+    base_id = _resolve_diff_side(db, base, base_plan, 1)
+    target_id = _resolve_diff_side(db, target, target_plan, 0)
+    tolerance_seconds = tolerance_minutes * 60
+
+    def build() -> Dict[str, Any]:
+        for schedule_id in (base_id, target_id):
+            result_repository.ensure_results(db, _find_job_or_404(db, schedule_id))
+
+        summary = schedule_diff_service.build_summary(
+            diff_repository.get_op_summary(db, base_id, target_id, tolerance_seconds),
+            diff_repository.get_tardiness_summary(db, base_id, target_id),
+            tolerance_seconds,
+        )
+        lots = schedule_diff_service.merge_lot_changes(
+            diff_repository.get_lot_changes(db, base_id, target_id, tolerance_seconds, lot_id),
+            diff_repository.get_lot_tardiness_changes(db, base_id, target_id, lot_id),
+            lot_limit,
+        )
+        ops = schedule_diff_service.build_op_changes(
+            diff_repository.get_op_changes(
+                db, base_id, target_id, tolerance_seconds, lot_id, include_unchanged, op_limit + 1
+            ),
+            op_limit,
+        )
+        return {"base": base_id, "target": target_id, "summary": summary, "lots": lots, "ops": ops}
+
+    key = ("diff", base_id, target_id, tolerance_seconds, lot_id, include_unchanged, op_limit, lot_limit)
+    return cached_json_response(request, key, build)
+
+
+@router.get("/schedule/{schedule_id}/steps")
+def get_schedule_step_results(
+    request: Request,
+    schedule_id: str,
+    lot_id: Optional[str] = Query(None, description="Lot 篩選"),
+    machines: Optional[str] = Query(None, description="機台篩選,以逗號分隔"),
+    groups: Optional[str] = Query(None, description="機台群組篩選,以逗號分隔"),
+    start: Optional[datetime] = Query(None, description="視窗起點"),
+    end: Optional[datetime] = Query(None, description="視窗終點"),
+    source: str = Query("current", description="資料來源: current (目前), history (歷史)"),
+    db: Session = Depends(get_db)
+) -> List[Dict[str, Any]]:
+    """
+    依 Lot / 機台 / 時間視窗查詢逐站排程結果 (LotStepResult 格式)
+
+    查詢直接使用 ScheduleStepResult 索引,不需解析整份 JSON
+    """
+    def build() -> List[Dict[str, Any]]:
+        job = _get_job_or_404(db, schedule_id, source)
+        result_repository.ensure_results(db, job)
+        machine_ids = segment_repository.resolve_machine_ids(db, _split_csv(machines), _split_csv(groups))
+        rows = result_repository.get_step_rows(db, schedule_id, lot_id, machine_ids, start, end)
+        return schedule_result_service.build_lot_step_result(rows)
+
+    key = ("steps", source, schedule_id, lot_id, machines, groups, start, end)
+    return cached_json_response(request, key, build)
+
+
+@router.get("/schedule/{schedule_id}/lots")
+def get_schedule_lot_results(
+    request: Request,
+    schedule_id: str,
+    lot_id: Optional[str] = Query(None, description="Lot 篩選"),
+    source: str = Query("current", description="資料來源: current (目前), history (歷史)"),
+    db: Session = Depends(get_db)
+) -> List[Dict[str, Any]]:
+    """查詢逐 Lot 排程結果 (LotPlanResult.lot_results 格式)"""
+    def build() -> List[Dict[str, Any]]:
+        job = _get_job_or_404(db, schedule_id, source)
+        result_repository.ensure_results(db, job)
+        rows = result_repository.get_lot_rows(db, schedule_id, lot_id)
+        return schedule_result_service.build_lot_plan_result(rows)["lot_results"]
+
+    return cached_json_response(request, ("lots", source, schedule_id, lot_id), build)
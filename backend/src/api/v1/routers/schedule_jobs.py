@@ -0,0 +1,136 @@
+"""
+排程作業佇列 API 路由
+提交增量排程、查詢作業狀態，並以 SSE 串流進度與輸出
+"""
+import json
+import asyncio
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from starlette.requests import Request
+from infra.db.database import get_db
+from infra.repositories import ui_setting_repository
+from infra.scheduler.schedule_job_manager import (
+    FINISHED_STATUSES,
+    ScheduleQueueFullError,
+    get_job_manager,
+)
+from infra.scheduler.reschedule_trigger import get_reschedule_trigger
+from core.config import settings
+from api.v1.schemas.schedule_jobs import (
+    ScheduleJobCreate,
+    ScheduleJobResponse,
+    ScheduleJobSubmitResponse,
+    RescheduleTriggerResponse,
+)
+
+router = APIRouter(
+    prefix="/schedule-jobs",
+    tags=["ScheduleJobs"]
+)
+
+# SSE 輪詢間隔與心跳間隔 (秒)
+SSE_POLL_INTERVAL = 0.5
+SSE_KEEPALIVE_INTERVAL = 15
+
+
+def _resolve_start_time(payload: ScheduleJobCreate, db: Session) -> str:
+    """排程起點：請求指定 > ui_settings 模擬起始時間 > 預設值"""
+    if payload.start_time is not None:
+        return payload.start_time.strftime(ui_setting_repository.TIME_FORMAT)
+    return ui_setting_repository.get_simulation_start_time(db)
+
+
+@router.post("", response_model=ScheduleJobSubmitResponse, status_code=202)
+def submit_schedule_job(payload: ScheduleJobCreate, db: Session = Depends(get_db)):
+    """提交增量排程 (相同起點的排隊 / 執行中作業會直接合併)"""
+    start_time = _resolve_start_time(payload, db)
+    try:
+        job, coalesced = get_job_manager().submit(start_time, max_active=settings.SCHEDULER_MAX_QUEUED_JOBS)
+    except ScheduleQueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    return {**job.to_dict(), "coalesced": coalesced}
+
+
+@router.get("", response_model=List[ScheduleJobResponse])
+def get_schedule_jobs():
+    """取得排程作業列表 (最新在前)"""
+    return [job.to_dict() for job in get_job_manager().list_jobs()]
+
+
+@router.get("/trigger", response_model=RescheduleTriggerResponse)
+def get_reschedule_trigger_stats():
+    """取得資料變更觸發重排的狀態 (待處理事件與提交次數)"""
+    return {"enabled": settings.RESCHEDULE_TRIGGER_ENABLED, **get_reschedule_trigger().stats()}
+
+
+@router.post("/trigger/flush", response_model=RescheduleTriggerResponse)
+def flush_reschedule_trigger():
+    """立即提交待處理的變更事件 (不等待 debounce)"""
+    trigger = get_reschedule_trigger()
+    trigger.flush()
+    return {"enabled": settings.RESCHEDULE_TRIGGER_ENABLED, **trigger.stats()}
+
+
+@router.get("/{job_id}", response_model=ScheduleJobResponse)
+def get_schedule_job(job_id: str):
+    """取得單一排程作業狀態"""
+    job = get_job_manager().get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"排程作業 {job_id} 不存在")
+    return job.to_dict()
+
+
+@router.delete("/{job_id}", response_model=ScheduleJobResponse)
+def cancel_schedule_job(job_id: str):
+    """取消排隊中的排程作業 (執行中的求解無法中斷)"""
+    manager = get_job_manager()
+    job = manager.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"排程作業 {job_id} 不存在")
+    if not manager.cancel(job_id):
+        raise HTTPException(status_code=409, detail=f"排程作業 {job_id} 狀態為 {job.status}，無法取消")
+    return job.to_dict()
+
+
+@router.get("/{job_id}/events")
+async def stream_schedule_job(job_id: str, request: Request, log_cursor: int = 0):
+    """以 SSE 串流作業狀態與輸出 (log_cursor 供重新連線時從中斷處續傳)"""
+    manager = get_job_manager()
+    if manager.get(job_id) is None:
+        raise HTTPException(status_code=404, detail=f"排程作業 {job_id} 不存在")
+
+    async def event_generator():
+        cursor = log_cursor
+        last_version = -1
+        idle = 0.0
+
+        while True:
+            if await request.is_disconnected():
+                break
+
+            snapshot = manager.snapshot(job_id, cursor)
+            if snapshot is None:
+                yield f"data: {json.dumps({'type': 'error', 'content': 'Job expired'})}\n\n"
+                break
+            state, logs, cursor, version = snapshot
+
+            for line in logs:
+                yield f"data: {json.dumps({'type': 'log', 'content': line, 'cursor': cursor}, ensure_ascii=False)}\n\n"
+            if version != last_version:
+                last_version = version
+                idle = 0.0
+                yield f"data: {json.dumps({'type': 'status', 'job': state}, default=str, ensure_ascii=False)}\n\n"
+
+            if state["status"] in FINISHED_STATUSES:
+                yield f"data: {json.dumps({'type': 'finished', 'job': state}, default=str, ensure_ascii=False)}\n\n"
+                break
+
+            idle += SSE_POLL_INTERVAL
+            if idle >= SSE_KEEPALIVE_INTERVAL:
+                idle = 0.0
+                yield ": keepalive\n\n"
+            await asyncio.sleep(SSE_POLL_INTERVAL)
+
+    return StreamingResponse(event_generator(), media_type="text/event-stream")
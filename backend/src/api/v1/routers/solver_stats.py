@@ -0,0 +1,86 @@
+"""
+求解統計 API 路由
+讀取排程程式寫入的 SolverRunStats：各次執行摘要、目標值隨時間變化，以及依 workers / 時間上限 / 資料量的比較
+"""
+from datetime import datetime
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from domain.services import solver_stats_service
+from infra.db.database import get_db
+from infra.repositories import solver_stats_repository
+from api.v1.schemas.solver_stats import (
+    SolverRunSummary,
+    SolverRunDetail,
+    SolverRunComparison,
+    SolverScalingResponse,
+)
+
+router = APIRouter(
+    prefix="/solver-stats",
+    tags=["SolverStats"]
+)
+
+MAX_COMPARE_RUNS = 10
+
+
+@router.get("/runs", response_model=List[SolverRunSummary])
+def list_solver_runs(
+    plan_id: Optional[str] = Query(None, description="只列出指定 PlanID"),
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db)
+):
+    """列出最近的排程執行求解摘要 (各批次彙總)，最新的在前"""
+    rows = solver_stats_repository.list_runs(db, plan_id, limit)
+    return [solver_stats_service.build_run_summary(row) for row in rows]
+
+
+@router.get("/runs/{run_id}", response_model=SolverRunDetail)
+def get_solver_run(
+    run_id: str,
+    include_log: bool = Query(False, description="是否回傳完整搜尋日誌"),
+    db: Session = Depends(get_db)
+):
+    """取得一次排程執行的各批次求解統計與目標值曲線"""
+    batches = solver_stats_repository.get_batches(db, [run_id], include_log)
+    if not batches:
+        raise HTTPException(status_code=404, detail=f"找不到執行 {run_id} 的求解統計")
+    summary = solver_stats_repository.list_runs(db, run_ids=[run_id])[0]
+    return {"summary": solver_stats_service.build_run_summary(summary), "batches": batches}
+
+
+@router.get("/compare", response_model=SolverRunComparison)
+def compare_solver_runs(
+    run_ids: List[str] = Query(..., description="要比較的 RunId (可重複指定)"),
+    db: Session = Depends(get_db)
+):
+    """比較多次排程執行：各執行摘要，以及依 BatchIndex 對齊的批次統計與目標值曲線"""
+    run_ids = list(dict.fromkeys(run_ids))
+    if len(run_ids) > MAX_COMPARE_RUNS:
+        raise HTTPException(status_code=400, detail=f"一次最多比較 {MAX_COMPARE_RUNS} 次執行")
+    summaries = [solver_stats_service.build_run_summary(row)
+                 for row in solver_stats_repository.list_runs(db, limit=len(run_ids), run_ids=run_ids)]
+    missing = sorted(set(run_ids) - {summary["run_id"] for summary in summaries})
+    if missing:
+        raise HTTPException(status_code=404, detail=f"找不到執行 {', '.join(missing)} 的求解統計")
+    batches = solver_stats_repository.get_batches(db, run_ids)
+    return solver_stats_service.compare_runs(run_ids, summaries, batches)
+
+
+@router.get("/scaling", response_model=SolverScalingResponse)
+def get_solver_scaling(
+    since: Optional[datetime] = Query(None, description="只統計此時間之後的求解"),
+    plan_id: Optional[str] = Query(None),
+    bucket_size: int = Query(50, ge=1, description="作業數區間大小"),
+    db: Session = Depends(get_db)
+):
+    """
+    依 workers、時間上限與批次作業數分組比較求解品質
+
+    - cliffs：同一設定下被時間上限截斷或無解的批次比例首次過半的資料量
+    - diminishing_returns：加 worker 或加時間後 gap 與最佳解比例都沒有改善的設定
+    """
+    rows = solver_stats_repository.get_scaling_rows(db, since, plan_id)
+    return solver_stats_service.build_scaling(rows, bucket_size)
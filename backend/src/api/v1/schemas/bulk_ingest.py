@@ -0,0 +1,23 @@
+"""
+Bulk Ingest Pydantic Schemas
+"""
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+
+class BulkItemResult(BaseModel):
+    """單筆處理結果"""
+    index: int = Field(..., description="在請求中的位置 (JSON 陣列索引或 NDJSON 行號，從 0 起算)")
+    key: Optional[str] = Field(None, description="主鍵 (LotId 或 LotId/Step)")
+    status: str = Field(..., description="created / updated / error / skipped")
+    error: Optional[str] = None
+
+
+class BulkIngestResponse(BaseModel):
+    """批次寫入回應 Schema"""
+    total: int
+    created: int
+    updated: int
+    failed: int
+    skipped: int
+    items: List[BulkItemResult]
@@ -0,0 +1,69 @@
+"""
+KPI Pydantic Schemas
+"""
+from pydantic import BaseModel, Field
+from datetime import datetime
+from typing import List, Optional
+
+
+class KpiStatus(BaseModel):
+    """Lot 與作業狀態計數"""
+    total_lots: int
+    completed_lots: int = Field(..., description="所有作業皆已完成的 Lot 數")
+    wip_lots: int = Field(..., description="已有作業進站但尚未全部完成的 Lot 數")
+    not_started_lots: int
+    total_ops: int
+    completed_count: int = Field(..., description="Completed 作業數 (StepStatus = 2)")
+    wip_count: int = Field(..., description="WIP 作業數 (StepStatus = 1)")
+    normal_count: int = Field(..., description="已排程未進站作業數 (StepStatus = 0 且有計畫進站時間)")
+    new_add_count: int = Field(..., description="新加入未排程作業數 (StepStatus = 0 且無計畫進站時間)")
+
+
+class KpiDelay(BaseModel):
+    """最新排程的準時率與延遲"""
+    schedule_id: Optional[str] = None
+    lots: int
+    on_time_lots: int
+    late_lots: int
+    on_time_rate: Optional[float] = Field(None, description="準時 Lot 比例 (0~1)")
+    total_delay_seconds: int
+    avg_delay_seconds: Optional[float] = Field(None, description="延遲 Lot 的平均延遲秒數")
+    max_delay_seconds: Optional[int] = None
+    makespan_end: Optional[datetime] = None
+
+
+class KpiGroupUtilization(BaseModel):
+    """單一機台群組稼動率"""
+    group_id: str
+    machine_count: int
+    used_minutes: int
+    capacity_minutes: int
+    utilization_rate: float = Field(..., description="稼動率 (%)")
+
+
+class KpiUtilization(BaseModel):
+    """各機台群組稼動率"""
+    plan_id: Optional[str] = None
+    overall_rate: Optional[float] = Field(None, description="依產能加權的整體稼動率 (%)")
+    groups: List[KpiGroupUtilization] = Field(default_factory=list)
+
+
+class KpiWipAge(BaseModel):
+    """WIP 作業滯留時間"""
+    as_of: datetime
+    wip_ops: int
+    avg_age_seconds: Optional[float] = None
+    max_age_seconds: Optional[int] = None
+
+
+class KpiResponse(BaseModel):
+    """儀表板 KPI 回應 Schema"""
+    generated_at: datetime
+    cache_age_seconds: float = Field(..., description="快取結果已存在的秒數 (0 表示本次計算)")
+    status: KpiStatus
+    delay: KpiDelay
+    utilization: KpiUtilization
+    wip_age: KpiWipAge
+    plan_stability: Optional[float] = Field(
+        None, description="最新排程相對前一次排程的計畫穩定度 (include_stability=true 時計算)"
+    )
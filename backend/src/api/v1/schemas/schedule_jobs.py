@@ -0,0 +1,45 @@
+"""
+ScheduleJob Pydantic Schemas
+"""
+from pydantic import BaseModel, Field
+from datetime import datetime
+from typing import Optional, Any, Dict
+
+
+class ScheduleJobCreate(BaseModel):
+    """建立排程作業 Schema (未指定 start_time 時使用 ui_settings 的模擬起始時間)"""
+    start_time: Optional[datetime] = Field(None, description="排程起點")
+
+
+class ScheduleJobResponse(BaseModel):
+    """排程作業回應 Schema"""
+    job_id: str
+    start_time: str
+    status: str
+    progress: int
+    message: str
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    request_count: int
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
+class ScheduleJobSubmitResponse(ScheduleJobResponse):
+    """提交排程作業回應 Schema"""
+    coalesced: bool = Field(False, description="是否合併到既有的排隊 / 執行中作業")
+
+
+class RescheduleTriggerResponse(BaseModel):
+    """資料變更觸發重排狀態 Schema"""
+    enabled: bool
+    debounce_seconds: float
+    max_delay_seconds: float
+    pending_events: Dict[str, int] = Field(default_factory=dict, description="等待中的事件數 (依事件類型)")
+    event_count: int
+    submit_count: int
+    last_job_id: Optional[str] = None
+    last_submitted_at: Optional[datetime] = None
+    consecutive_failures: int = Field(0, description="連續提交失敗次數 (成功後歸零)")
+    last_error: Optional[str] = Field(None, description="最近一次提交失敗的原因")
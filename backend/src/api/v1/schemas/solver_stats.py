@@ -0,0 +1,159 @@
+"""
+求解統計 Pydantic Schemas
+"""
+from pydantic import BaseModel, ConfigDict, Field
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+
+class SolverRunSummary(BaseModel):
+    """一次排程執行的求解摘要 (各批次彙總)"""
+    run_id: str
+    plan_id: Optional[str] = None
+    schedule_id: Optional[str] = None
+    created_at: Optional[datetime] = None
+    batch_count: int
+    lot_count: int
+    operation_count: int
+    max_variables: Optional[int] = Field(None, description="最大批次的變數數 (presolve 前)")
+    objective_type: Optional[str] = None
+    num_workers: Optional[int] = None
+    max_time_seconds: Optional[float] = None
+    wall_time: float = Field(..., description="各批次求解時間加總 (秒)")
+    objective: Optional[float] = Field(None, description="各批次目標值加總")
+    best_bound: Optional[float] = Field(None, description="各批次最佳下界加總")
+    gap: Optional[float] = Field(None, description="|objective - bound| / |objective|")
+    solutions: int
+    optimal_batches: int
+    no_solution_batches: int
+    time_limit_batches: int = Field(..., description="未證明最佳且耗時達時間上限的批次數")
+    optimal_rate: Optional[float] = None
+    time_limit_rate: Optional[float] = None
+
+
+class SolverBatchStats(BaseModel):
+    """單一批次求解統計"""
+    RunId: str
+    ScheduleId: Optional[str] = None
+    PlanID: Optional[str] = None
+    BatchIndex: int
+    BatchCount: Optional[int] = None
+    LotCount: Optional[int] = None
+    OperationCount: Optional[int] = None
+    NumVariables: Optional[int] = None
+    NumConstraints: Optional[int] = None
+    PresolvedVariables: Optional[int] = None
+    PresolvedConstraints: Optional[int] = None
+    PresolveSeconds: Optional[float] = None
+    ObjectiveType: Optional[str] = None
+    NumWorkers: Optional[int] = None
+    MaxTimeSeconds: Optional[float] = None
+    Status: str
+    ObjectiveValue: Optional[float] = None
+    BestBound: Optional[float] = None
+    Gap: Optional[float] = None
+    GapIntegral: Optional[float] = None
+    WallTime: Optional[float] = None
+    UserTime: Optional[float] = None
+    DeterministicTime: Optional[float] = None
+    NumConflicts: Optional[int] = None
+    NumBranches: Optional[int] = None
+    NumRestarts: Optional[int] = None
+    NumLpIterations: Optional[int] = None
+    NumSolutions: int
+    FirstSolutionSeconds: Optional[float] = None
+    LastImprovementSeconds: Optional[float] = None
+    ObjectiveTrace: Optional[List[List[Optional[float]]]] = Field(None, description="每個解的 [秒數, 目標值, 當時下界]")
+    PresolveSummary: Optional[Dict[str, Any]] = None
+    SearchLog: Optional[str] = Field(None, description="完整搜尋日誌 (SOLVER_LOG_SEARCH_PROGRESS=true 時才保存)")
+    CreatedAt: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class SolverRunDetail(BaseModel):
+    """一次排程執行的摘要與各批次統計"""
+    summary: SolverRunSummary
+    batches: List[SolverBatchStats]
+
+
+class SolverBatchPoint(BaseModel):
+    """比較用的批次欄位"""
+    status: str
+    lot_count: Optional[int] = None
+    operation_count: Optional[int] = None
+    num_variables: Optional[int] = None
+    num_workers: Optional[int] = None
+    max_time_seconds: Optional[float] = None
+    wall_time: Optional[float] = None
+    objective: Optional[float] = None
+    best_bound: Optional[float] = None
+    gap: Optional[float] = None
+    num_solutions: int
+    first_solution_seconds: Optional[float] = None
+    last_improvement_seconds: Optional[float] = None
+    idle_share: Optional[float] = Field(None, description="最後一次改善之後的求解時間占比")
+    hit_time_limit: bool
+    objective_trace: List[List[Optional[float]]] = Field(default_factory=list)
+
+
+class SolverBatchComparison(BaseModel):
+    """同一 BatchIndex 在各執行的統計 (run_id -> 統計)"""
+    batch_index: int
+    runs: Dict[str, SolverBatchPoint]
+
+
+class SolverRunComparison(BaseModel):
+    """多次排程執行的求解比較"""
+    runs: List[SolverRunSummary]
+    batches: List[SolverBatchComparison]
+
+
+class SolverScalingGroup(BaseModel):
+    """(workers, 時間上限, 作業數區間) 分組統計"""
+    num_workers: Optional[int] = None
+    max_time_seconds: Optional[float] = None
+    operations_from: int
+    operations_to: int
+    batches: int
+    runs: int
+    avg_lots: Optional[float] = None
+    avg_variables: Optional[float] = None
+    avg_presolved_variables: Optional[float] = None
+    avg_wall_time: Optional[float] = None
+    avg_gap: Optional[float] = None
+    max_gap: Optional[float] = None
+    optimal_rate: Optional[float] = None
+    time_limit_rate: Optional[float] = None
+    no_solution_rate: Optional[float] = None
+    avg_first_solution_seconds: Optional[float] = None
+    avg_idle_share: Optional[float] = Field(None, description="最後一次改善之後的求解時間平均占比，接近 1 表示再加時間幫助不大")
+
+
+class SolverScalingCliff(BaseModel):
+    """截斷或無解比例首次達門檻的作業數區間"""
+    num_workers: Optional[int] = None
+    max_time_seconds: Optional[float] = None
+    operations_from: int
+    previous_operations_from: Optional[int] = None
+    failure_rate: float
+    avg_gap: Optional[float] = None
+
+
+class SolverDiminishingReturn(BaseModel):
+    """加 worker (dimension=workers) 或加時間 (dimension=max_time) 後沒有改善的相鄰設定"""
+    dimension: str
+    operations_from: int
+    fixed_value: Optional[float] = Field(None, description="固定的另一個參數 (時間上限或 workers)")
+    from_value: Optional[float] = None
+    to_value: Optional[float] = None
+    avg_gap_before: Optional[float] = None
+    avg_gap_after: Optional[float] = None
+
+
+class SolverScalingResponse(BaseModel):
+    """依 workers / 時間上限 / 資料量比較求解品質"""
+    bucket_size: int
+    groups: List[SolverScalingGroup]
+    cliffs: List[SolverScalingCliff]
+    diminishing_returns: List[SolverDiminishingReturn]
@@ -28,11 +28,48 @@ class Settings(BaseSettings):
     @property
     def DB_NAME(self) -> str: return self.MYSQL_DATABASE
     
+    # 連線池配置 (同步與非同步引擎各自一組連線池)
+    DB_POOL_SIZE: int = 20
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: int = 10
+    DB_POOL_RECYCLE: int = 1800
+    
     # API 配置
     API_TITLE: str = "生產排程系統 API"
     API_VERSION: str = "1.0.0"
     API_PREFIX: str = "/api/v1"
     
+    # 排程讀取回應快取配置
+    RESPONSE_CACHE_MAX_ENTRIES: int = 256
+    RESPONSE_CACHE_MAX_MB: int = 256
+    # 快取項目存活秒數 (0 表示單一程序時不過期)；uvicorn 以 WEB_CONCURRENCY 個 worker 執行時，
+    # 其他 worker 的 invalidate() 傳不到本程序，未指定存活秒數則使用 RESPONSE_CACHE_MULTI_WORKER_TTL_SECONDS
+    RESPONSE_CACHE_TTL_SECONDS: float = 0.0
+    RESPONSE_CACHE_MULTI_WORKER_TTL_SECONDS: float = 30.0
+    WEB_CONCURRENCY: int = 1
+    # /api/schedule 的排程總數 (X-Total-Count) 重複使用秒數
+    SCHEDULE_TOTAL_TTL_SECONDS: float = 5.0
+
+    # 排程作業佇列配置 (排程程式所在目錄預設為專案根目錄；Docker 中即為掛載點 /)
+    SCHEDULER_BASE_DIR: str = str(Path(__file__).resolve().parent.parent.parent.parent)
+    SCHEDULER_MODULE: str = "Scheduler_Full_Example_Qtime_V1_Wip_DB_Incremental_Scheduling"
+    SCHEDULER_MAX_CONCURRENT_JOBS: int = 1
+    SCHEDULER_MAX_QUEUED_JOBS: int = 10
+    SCHEDULER_POOL_PREWARM: bool = False
+
+    # 批次寫入單次上限 (筆)
+    BULK_INGEST_MAX_ITEMS: int = 50000
+
+    # 資料變更觸發重排 (預設關閉)
+    RESCHEDULE_TRIGGER_ENABLED: bool = False
+    RESCHEDULE_DEBOUNCE_SECONDS: float = 5.0
+    RESCHEDULE_MAX_DELAY_SECONDS: float = 60.0
+    # 提交失敗 (例如佇列已滿) 時的重試間隔上限 (由 debounce 秒數起倍增)
+    RESCHEDULE_RETRY_MAX_SECONDS: float = 300.0
+
+    # KPI 儀表板快取秒數 (模擬進行中允許的資料延遲)
+    KPI_CACHE_TTL_SECONDS: float = 5.0
+    
     # CORS 配置
     CORS_ORIGINS: str = "http://localhost:5173,http://localhost:3000,http://127.0.0.1:5500,http://localhost:5500,http://127.0.0.1:5501,http://localhost:5501,http://localhost:8080"
     
@@ -50,6 +87,11 @@ class Settings(BaseSettings):
         """取得資料庫連線 URL"""
         return f"mysql+pymysql://{self.MYSQL_USER}:{self.MYSQL_PASSWORD}@{self.MYSQL_HOST}:{self.MYSQL_PORT}/{self.MYSQL_DATABASE}"
     
+    @property
+    def async_database_url(self) -> str:
+        """取得非同步資料庫連線 URL (aiomysql)"""
+        return f"mysql+aiomysql://{self.MYSQL_USER}:{self.MYSQL_PASSWORD}@{self.MYSQL_HOST}:{self.MYSQL_PORT}/{self.MYSQL_DATABASE}"
+    
     @property
     def cors_origins_list(self) -> List[str]:
         """取得 CORS 來源清單"""
@@ -13,6 +13,11 @@ from .simulation_data import SimulationData
 from .dynamic_scheduling_job_snap import DynamicSchedulingJobSnap
 from .dynamic_scheduling_job_snap_hist import DynamicSchedulingJob_Snap_Hist
 from .dynamic_scheduling_job_hist import DynamicSchedulingJobHist
+from .schedule_task_segment import ScheduleTaskSegment
+from .schedule_result import ScheduleStepResult, ScheduleLotResult
+from .machine_group_utilization import MachineGroupUtilization
+from .scheduler_run_metrics import SchedulerRunMetric
+from .solver_run_stats import SolverRunStat
 
 __all__ = [
     "Lot",
@@ -30,4 +35,10 @@ __all__ = [
     "SimulationData",
     "DynamicSchedulingJobSnap",
     "DynamicSchedulingJob_Snap_Hist",
+    "ScheduleTaskSegment",
+    "ScheduleStepResult",
+    "ScheduleLotResult",
+    "MachineGroupUtilization",
+    "SchedulerRunMetric",
+    "SolverRunStat",
 ]
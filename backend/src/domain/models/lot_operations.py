@@ -1,7 +1,7 @@
 """
 LotOperations 資料表模型
 """
-from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, JSON
+from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, Index, JSON
 from sqlalchemy.orm import relationship
 from infra.db.database import Base
 
@@ -9,6 +9,9 @@ from infra.db.database import Base
 class LotOperation(Base):
     """工單的作業步驟"""
     __tablename__ = "LotOperations"
+    __table_args__ = (
+        Index("idx_lot_sequence_step", "LotId", "Sequence", "Step"),
+    )
     
     LotId = Column(String(50), ForeignKey("Lots.LotId"), primary_key=True)
     Step = Column(String(20), primary_key=True)
@@ -0,0 +1,25 @@
+"""
+MachineGroupUtilization 資料表模型
+"""
+from sqlalchemy import Column, Integer, String, DateTime, Numeric, Index, text
+from infra.db.database import Base
+
+
+class MachineGroupUtilization(Base):
+    """排程後各機台群組的稼動率 (由排程程式於每次排程寫入)"""
+    __tablename__ = "MachineGroupUtilization"
+    __table_args__ = (
+        Index("idx_group", "GroupId"),
+        Index("idx_plan", "PlanID"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    PlanID = Column(String(50), nullable=False)
+    GroupId = Column(String(20), nullable=False)
+    CalculationWindowStart = Column(DateTime, nullable=False)
+    CalculationWindowEnd = Column(DateTime, nullable=False)
+    MachineCount = Column(Integer, nullable=False)
+    TotalUsedMinutes = Column(Integer, nullable=False)
+    TotalCapacityMinutes = Column(Integer, nullable=False)
+    UtilizationRate = Column(Numeric(5, 2), nullable=False)
+    CreatedAt = Column(DateTime, nullable=False, server_default=text("CURRENT_TIMESTAMP"))
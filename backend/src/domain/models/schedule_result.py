@@ -0,0 +1,49 @@
+"""
+ScheduleStepResult / ScheduleLotResult 資料表模型
+"""
+from sqlalchemy import Column, BigInteger, String, Integer, DateTime, Index, UniqueConstraint
+from infra.db.database import Base
+
+
+class ScheduleStepResult(Base):
+    """排程逐站結果 (LotStepResult 正規化後的逐筆資料)"""
+    __tablename__ = "ScheduleStepResult"
+    __table_args__ = (
+        UniqueConstraint("ScheduleId", "LotId", "Step", name="uq_schedule_lot_step"),
+        Index("idx_schedule_machine_start", "ScheduleId", "MachineId", "StartTime"),
+        Index("idx_schedule_start", "ScheduleId", "StartTime"),
+        Index("idx_plan", "PlanID"),
+    )
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    ScheduleId = Column(String(50), nullable=False)
+    PlanID = Column(String(50), nullable=True)
+    LotId = Column(String(50), nullable=False)
+    Step = Column(String(20), nullable=False)
+    StepIdx = Column(Integer, nullable=False)
+    Product = Column(String(50), nullable=True)
+    Priority = Column(Integer, nullable=True)
+    MachineId = Column(String(20), nullable=False)
+    StartTime = Column(DateTime, nullable=False)
+    EndTime = Column(DateTime, nullable=False)
+    Booking = Column(Integer, nullable=False, default=0)
+
+
+class ScheduleLotResult(Base):
+    """排程逐 Lot 結果 (LotPlanResult.lot_results 正規化後的逐筆資料)"""
+    __tablename__ = "ScheduleLotResult"
+    __table_args__ = (
+        UniqueConstraint("ScheduleId", "LotId", name="uq_schedule_lot"),
+        Index("idx_plan", "PlanID"),
+    )
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    ScheduleId = Column(String(50), nullable=False)
+    PlanID = Column(String(50), nullable=True)
+    LotId = Column(String(50), nullable=False)
+    Product = Column(String(50), nullable=True)
+    Priority = Column(Integer, nullable=True)
+    DueDate = Column(DateTime, nullable=True)
+    PlanFinishDate = Column(DateTime, nullable=True)
+    ActualFinishDate = Column(DateTime, nullable=True)
+    DelaySeconds = Column(BigInteger, nullable=True)
@@ -0,0 +1,28 @@
+"""
+ScheduleTaskSegment 資料表模型
+"""
+from sqlalchemy import Column, BigInteger, String, Integer, DateTime, Index, UniqueConstraint
+from infra.db.database import Base
+
+
+class ScheduleTaskSegment(Base):
+    """排程甘特圖區段 (machineTaskSegment 正規化後的逐筆資料)"""
+    __tablename__ = "ScheduleTaskSegment"
+    __table_args__ = (
+        UniqueConstraint("ScheduleId", "SegmentId", name="uq_schedule_segment"),
+        Index("idx_schedule_machine_start", "ScheduleId", "MachineId", "StartTime"),
+        Index("idx_schedule_start", "ScheduleId", "StartTime"),
+    )
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    ScheduleId = Column(String(50), nullable=False)
+    SegmentId = Column(String(150), nullable=False)
+    MachineId = Column(String(20), nullable=False)
+    GroupId = Column(String(20), nullable=True)
+    LotId = Column(String(50), nullable=True)
+    Step = Column(String(20), nullable=True)
+    Text = Column(String(255), nullable=True)
+    StartTime = Column(DateTime, nullable=False)
+    EndTime = Column(DateTime, nullable=False)
+    Booking = Column(Integer, nullable=False, default=0)
+    Color = Column(String(20), nullable=True)
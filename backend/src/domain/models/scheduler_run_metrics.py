@@ -0,0 +1,30 @@
+"""
+SchedulerRunMetrics 資料表模型
+"""
+from sqlalchemy import Column, BigInteger, String, Integer, DateTime, Float, JSON, Index, UniqueConstraint, text
+from infra.db.database import Base
+
+
+class SchedulerRunMetric(Base):
+    """排程執行各階段耗時 (由排程程式於每次排程結束時寫入，每個 span 一列；根 span 的 Attributes 含整次執行摘要)"""
+    __tablename__ = "SchedulerRunMetrics"
+    __table_args__ = (
+        UniqueConstraint("RunId", "SpanId", name="uq_run_span"),
+        Index("idx_span_start", "SpanName", "StartTime"),
+        Index("idx_schedule", "ScheduleId"),
+    )
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    RunId = Column(String(50), nullable=False)
+    ScheduleId = Column(String(50), nullable=True)
+    PlanID = Column(String(50), nullable=True)
+    SpanId = Column(Integer, nullable=False)
+    ParentSpanId = Column(Integer, nullable=True)
+    SpanName = Column(String(100), nullable=False)
+    Depth = Column(Integer, nullable=False)
+    StartTime = Column(DateTime, nullable=False)
+    DurationMs = Column(Float, nullable=False)
+    PeakRssMB = Column(Float, nullable=True)
+    RssGrowthMB = Column(Float, nullable=True)
+    Attributes = Column(JSON, nullable=True)
+    CreatedAt = Column(DateTime, nullable=True, server_default=text("CURRENT_TIMESTAMP"))
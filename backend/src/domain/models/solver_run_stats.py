@@ -0,0 +1,51 @@
+"""
+SolverRunStats 資料表模型
+"""
+from sqlalchemy import Column, BigInteger, String, Integer, DateTime, Float, JSON, Text, Index, UniqueConstraint, text
+from infra.db.database import Base
+
+
+class SolverRunStat(Base):
+    """每個批次一次 CP-SAT 求解的統計 (由排程程式於每次排程結束時寫入；RunId 與 SchedulerRunMetrics 相同)"""
+    __tablename__ = "SolverRunStats"
+    __table_args__ = (
+        UniqueConstraint("RunId", "BatchIndex", name="uq_run_batch"),
+        Index("idx_plan", "PlanID"),
+        Index("idx_created", "CreatedAt"),
+    )
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    RunId = Column(String(50), nullable=False)
+    ScheduleId = Column(String(50), nullable=True)
+    PlanID = Column(String(50), nullable=True)
+    BatchIndex = Column(Integer, nullable=False)
+    BatchCount = Column(Integer, nullable=True)
+    LotCount = Column(Integer, nullable=True)
+    OperationCount = Column(Integer, nullable=True)
+    NumVariables = Column(Integer, nullable=True)
+    NumConstraints = Column(Integer, nullable=True)
+    PresolvedVariables = Column(Integer, nullable=True)
+    PresolvedConstraints = Column(Integer, nullable=True)
+    PresolveSeconds = Column(Float, nullable=True)
+    ObjectiveType = Column(String(50), nullable=True)
+    NumWorkers = Column(Integer, nullable=True)
+    MaxTimeSeconds = Column(Float, nullable=True)
+    Status = Column(String(20), nullable=False)
+    ObjectiveValue = Column(Float, nullable=True)
+    BestBound = Column(Float, nullable=True)
+    Gap = Column(Float, nullable=True)
+    GapIntegral = Column(Float, nullable=True)
+    WallTime = Column(Float, nullable=True)
+    UserTime = Column(Float, nullable=True)
+    DeterministicTime = Column(Float, nullable=True)
+    NumConflicts = Column(BigInteger, nullable=True)
+    NumBranches = Column(BigInteger, nullable=True)
+    NumRestarts = Column(BigInteger, nullable=True)
+    NumLpIterations = Column(BigInteger, nullable=True)
+    NumSolutions = Column(Integer, nullable=False, default=0)
+    FirstSolutionSeconds = Column(Float, nullable=True)
+    LastImprovementSeconds = Column(Float, nullable=True)
+    ObjectiveTrace = Column(JSON, nullable=True)
+    PresolveSummary = Column(JSON, nullable=True)
+    SearchLog = Column(Text, nullable=True)
+    CreatedAt = Column(DateTime, nullable=True, server_default=text("CURRENT_TIMESTAMP"))
@@ -0,0 +1,78 @@
+"""
+甘特圖視窗服務
+負責縮放層級解析與 DHTMLX 甘特圖格式轉換 (不直接存取資料庫)
+"""
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+# 縮放層級 -> 彙總時間桶 (分鐘)，None 代表回傳明細
+ZOOM_BUCKET_MINUTES: Dict[str, Optional[int]] = {
+    "detail": None,
+    "hour": 60,
+    "shift": 8 * 60,
+    "day": 24 * 60,
+}
+
+# auto 模式：依視窗長度自動選擇層級
+AUTO_ZOOM_RULES = [
+    (timedelta(days=2), "detail"),
+    (timedelta(days=10), "hour"),
+    (timedelta(days=30), "shift"),
+]
+
+AGGREGATE_COLOR = "#5DC85D"
+UNAVAILABLE_COLOR = "#FF4500"
+BUCKET_ORIGIN = datetime(1970, 1, 1)
+TIME_FORMAT = "%Y-%m-%dT%H:%M:%S"
+
+
+def resolve_zoom(zoom: str, start: datetime, end: datetime) -> str:
+    """將 auto 轉為實際縮放層級"""
+    if zoom != "auto":
+        return zoom
+    window = end - start
+    for limit, level in AUTO_ZOOM_RULES:
+        if window <= limit:
+            return level
+    return "day"
+
+
+def build_machine_rows(machines: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """建立甘特圖機台父節點列"""
+    return [
+        {"id": m["MachineId"], "text": m["MachineId"], "parent": None, "render": "split", "group": m.get("GroupId")}
+        for m in machines
+    ]
+
+
+def segment_to_task(segment) -> Dict[str, Any]:
+    """明細區段轉為 DHTMLX task (與 machineTaskSegment 格式一致)"""
+    return {
+        "id": segment.SegmentId,
+        "text": segment.Text,
+        "parent": segment.MachineId,
+        "start_date": segment.StartTime.strftime(TIME_FORMAT),
+        "end_date": segment.EndTime.strftime(TIME_FORMAT),
+        "Booking": segment.Booking,
+        "color": segment.Color,
+    }
+
+
+def bucket_to_task(bucket: Dict[str, Any], bucket_minutes: int) -> Dict[str, Any]:
+    """彙總時間桶轉為 DHTMLX task"""
+    bucket_start = BUCKET_ORIGIN + timedelta(minutes=bucket["bucket_idx"] * bucket_minutes)
+    bucket_end = bucket_start + timedelta(minutes=bucket_minutes)
+    utilization = min(1.0, bucket["busy_minutes"] / bucket_minutes) if bucket_minutes else 0.0
+    kind = "unavailable" if bucket["is_unavailable"] else "tasks"
+    return {
+        "id": f"{bucket['MachineId']}_{kind}_{bucket['bucket_idx']}_{bucket_minutes}",
+        "text": f"{bucket['task_count']} {kind} ({utilization:.0%})",
+        "parent": bucket["MachineId"],
+        "start_date": bucket_start.strftime(TIME_FORMAT),
+        "end_date": bucket_end.strftime(TIME_FORMAT),
+        "Booking": -1 if bucket["is_unavailable"] else None,
+        "color": UNAVAILABLE_COLOR if bucket["is_unavailable"] else AGGREGATE_COLOR,
+        "aggregated": True,
+        "task_count": bucket["task_count"],
+        "utilization": round(utilization, 4),
+    }
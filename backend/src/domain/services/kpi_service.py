@@ -0,0 +1,86 @@
+"""
+KPI 服務
+將資料庫彙總結果組成儀表板 KPI (不直接存取資料庫)
+"""
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+
+def _ratio(numerator: int, denominator: int) -> Optional[float]:
+    return round(numerator / denominator, 4) if denominator else None
+
+
+def build_status(total_lots: int, op_kpis: Dict[str, Any]) -> Dict[str, Any]:
+    """作業與 Lot 狀態計數 (欄位名稱與 GUI 統計相同)"""
+    ops = {key: int(op_kpis[key] or 0) for key in (
+        "total_ops", "completed_ops", "wip_ops", "normal_ops", "new_add_ops",
+        "lots_with_ops", "completed_lots", "not_started_lots",
+    )}
+    return {
+        "total_lots": total_lots,
+        "completed_lots": ops["completed_lots"],
+        "wip_lots": ops["lots_with_ops"] - ops["completed_lots"] - ops["not_started_lots"],
+        "not_started_lots": ops["not_started_lots"],
+        "total_ops": ops["total_ops"],
+        "completed_count": ops["completed_ops"],
+        "wip_count": ops["wip_ops"],
+        "normal_count": ops["normal_ops"],
+        "new_add_count": ops["new_add_ops"],
+    }
+
+
+def build_wip_age(op_kpis: Dict[str, Any], as_of: datetime) -> Dict[str, Any]:
+    """WIP 作業自進站起的滯留時間 (以模擬時鐘為基準)"""
+    wip_ops = int(op_kpis["wip_ops"] or 0)
+    age_sum = int(op_kpis["wip_age_sum"] or 0)
+    return {
+        "as_of": as_of,
+        "wip_ops": wip_ops,
+        "avg_age_seconds": round(age_sum / wip_ops, 1) if wip_ops else None,
+        "max_age_seconds": int(op_kpis["wip_age_max"]) if op_kpis["wip_age_max"] is not None else None,
+    }
+
+
+def build_delay(schedule_id: Optional[str], delay_kpis: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """最新排程的準時率與延遲統計"""
+    if not schedule_id or not delay_kpis or not delay_kpis["lots"]:
+        return {"schedule_id": schedule_id, "lots": 0, "on_time_lots": 0, "late_lots": 0,
+                "on_time_rate": None, "total_delay_seconds": 0, "avg_delay_seconds": None,
+                "max_delay_seconds": None, "makespan_end": None}
+
+    lots = int(delay_kpis["lots"])
+    late = int(delay_kpis["late_lots"])
+    total_delay = int(delay_kpis["total_delay_seconds"])
+    max_delay = delay_kpis["max_delay_seconds"]
+    return {
+        "schedule_id": schedule_id,
+        "lots": lots,
+        "on_time_lots": lots - late,
+        "late_lots": late,
+        "on_time_rate": _ratio(lots - late, lots),
+        "total_delay_seconds": total_delay,
+        # 平均延遲只計入延遲的 Lot
+        "avg_delay_seconds": round(total_delay / late, 1) if late else 0.0,
+        "max_delay_seconds": max(int(max_delay), 0) if max_delay is not None else None,
+        "makespan_end": delay_kpis["makespan_end"],
+    }
+
+
+def build_utilization(plan_id: Optional[str], rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """各機台群組稼動率與整體稼動率 (依產能加權)"""
+    used = sum(int(r["TotalUsedMinutes"]) for r in rows)
+    capacity = sum(int(r["TotalCapacityMinutes"]) for r in rows)
+    return {
+        "plan_id": plan_id,
+        "overall_rate": round(used / capacity * 100, 2) if capacity else None,
+        "groups": [
+            {
+                "group_id": r["GroupId"],
+                "machine_count": int(r["MachineCount"]),
+                "used_minutes": int(r["TotalUsedMinutes"]),
+                "capacity_minutes": int(r["TotalCapacityMinutes"]),
+                "utilization_rate": float(r["UtilizationRate"]),
+            }
+            for r in rows
+        ],
+    }
@@ -0,0 +1,136 @@
+"""
+排程差異服務
+將資料庫彙總結果組成差異報表，並計算計畫穩定度 KPI (不直接存取資料庫)
+"""
+from typing import Any, Dict, List, Optional
+
+TIME_FORMAT = "%Y-%m-%dT%H:%M:%S"
+
+
+def _format_time(value) -> Optional[str]:
+    return value.strftime(TIME_FORMAT) if value else None
+
+
+def _to_int(value) -> Optional[int]:
+    return int(value) if value is not None else None
+
+
+def _delta(after: Optional[int], before: Optional[int]) -> Optional[int]:
+    if after is None or before is None:
+        return None
+    return after - before
+
+
+def plan_stability(op_summary: Dict[str, Any]) -> float:
+    """機台相同且開始時間變動不超過容許值的作業數 / 原計畫 (base) 作業數；兩份排程完全相同時為 1.0"""
+    base_ops = int(op_summary["base_ops"] or 0)
+    return round(int(op_summary["unchanged_ops"] or 0) / base_ops, 4) if base_ops else 1.0
+
+
+def build_summary(
+    op_summary: Dict[str, Any],
+    tardiness_summary: Dict[str, Any],
+    tolerance_seconds: int,
+) -> Dict[str, Any]:
+    """差異彙總與計畫穩定度 (見 plan_stability)"""
+    ops = {key: _to_int(value) for key, value in op_summary.items() if key != "mean_abs_shift_seconds"}
+    mean_shift = op_summary.get("mean_abs_shift_seconds")
+    tardiness = {key: _to_int(value) for key, value in tardiness_summary.items()}
+
+    return {
+        "tolerance_seconds": tolerance_seconds,
+        "ops": {
+            **ops,
+            "mean_abs_shift_seconds": round(float(mean_shift), 1) if mean_shift is not None else None,
+        },
+        "tardiness": {
+            **tardiness,
+            "total_tardiness_delta_seconds": tardiness["target_total_tardiness_seconds"]
+            - tardiness["base_total_tardiness_seconds"],
+            "late_lots_delta": tardiness["target_late_lots"] - tardiness["base_late_lots"],
+        },
+        "plan_stability": plan_stability(op_summary),
+    }
+
+
+def merge_lot_changes(
+    op_lots: List[Dict[str, Any]],
+    tardiness_lots: List[Dict[str, Any]],
+    limit: int,
+) -> Dict[str, Any]:
+    """合併逐 Lot 的作業變動與延遲變動，依延遲變化幅度、最大位移排序"""
+    lots: Dict[str, Dict[str, Any]] = {}
+
+    def entry(lot_id: str) -> Dict[str, Any]:
+        if lot_id not in lots:
+            lots[lot_id] = {
+                "LotId": lot_id,
+                "added_ops": 0,
+                "removed_ops": 0,
+                "machine_changed_ops": 0,
+                "moved_ops": 0,
+                "max_abs_shift_seconds": None,
+                "base_finish": None,
+                "target_finish": None,
+                "finish_shift_seconds": None,
+                "DueDate": None,
+                "base_delay_seconds": None,
+                "target_delay_seconds": None,
+                "tardiness_delta_seconds": None,
+                "status": "changed",
+            }
+        return lots[lot_id]
+
+    for row in op_lots:
+        lot = entry(row["LotId"])
+        for key in ("added_ops", "removed_ops", "machine_changed_ops", "moved_ops", "max_abs_shift_seconds"):
+            lot[key] = _to_int(row[key])
+        lot["base_finish"] = _format_time(row["base_finish"])
+        lot["target_finish"] = _format_time(row["target_finish"])
+        if row["base_finish"] and row["target_finish"]:
+            lot["finish_shift_seconds"] = int((row["target_finish"] - row["base_finish"]).total_seconds())
+
+    for row in tardiness_lots:
+        lot = entry(row["LotId"])
+        base_delay, target_delay = _to_int(row["base_delay"]), _to_int(row["target_delay"])
+        lot["DueDate"] = _format_time(row["DueDate"])
+        lot["base_delay_seconds"] = base_delay
+        lot["target_delay_seconds"] = target_delay
+        lot["tardiness_delta_seconds"] = _delta(max(target_delay or 0, 0), max(base_delay or 0, 0))
+        if not row["in_base"]:
+            lot["status"] = "added"
+        elif not row["in_target"]:
+            lot["status"] = "removed"
+
+    ordered = sorted(
+        lots.values(),
+        key=lambda lot: (
+            -abs(lot["tardiness_delta_seconds"] or 0),
+            -(lot["max_abs_shift_seconds"] or 0),
+            lot["LotId"],
+        ),
+    )
+    return {"total": len(ordered), "truncated": len(ordered) > limit, "items": ordered[:limit]}
+
+
+def build_op_changes(rows: List[Dict[str, Any]], limit: int) -> Dict[str, Any]:
+    """逐站差異明細 (rows 已依變動幅度排序並多取一筆判斷是否截斷)"""
+    return {
+        "truncated": len(rows) > limit,
+        "items": [
+            {
+                "LotId": r["LotId"],
+                "Step": r["Step"],
+                "StepIdx": r["StepIdx"],
+                "change": r["change"],
+                "base_machine": r["base_machine"],
+                "target_machine": r["target_machine"],
+                "base_start": _format_time(r["base_start"]),
+                "target_start": _format_time(r["target_start"]),
+                "base_end": _format_time(r["base_end"]),
+                "target_end": _format_time(r["target_end"]),
+                "start_shift_seconds": _to_int(r["start_shift_seconds"]),
+            }
+            for r in rows[:limit]
+        ],
+    }
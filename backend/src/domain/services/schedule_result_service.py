@@ -0,0 +1,79 @@
+"""
+排程結果檢視服務
+由正規化結果資料列組出與原 JSON 欄位相同格式的 LotStepResult / LotPlanResult / machineTaskSegment
+"""
+from datetime import timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+TIME_FORMAT = "%Y-%m-%dT%H:%M:%S"
+
+
+def _format_time(value) -> Optional[str]:
+    return value.strftime(TIME_FORMAT) if value else None
+
+
+def format_delay(delay_seconds: Optional[int]) -> Optional[str]:
+    """還原 LotPlanResult 的 "delay time" 字串 (天:小時)"""
+    if delay_seconds is None:
+        return None
+    diff = timedelta(seconds=delay_seconds)
+    if diff.total_seconds() > 0:
+        return f"{diff.days}:{diff.seconds // 3600:02d}"
+    return f"-{abs(diff).days}:{abs(diff).seconds // 3600:02d}"
+
+
+def build_lot_step_result(step_rows: Iterable[Any]) -> List[Dict[str, Any]]:
+    """ScheduleStepResult -> LotStepResult"""
+    return [
+        {
+            "LotId": r.LotId,
+            "Product": r.Product or "",
+            "Priority": r.Priority,
+            "StepIdx": r.StepIdx,
+            "Step": r.Step,
+            "Machine": r.MachineId,
+            "Start": _format_time(r.StartTime),
+            "End": _format_time(r.EndTime),
+            "Booking": r.Booking,
+        }
+        for r in step_rows
+    ]
+
+
+def build_lot_plan_result(lot_rows: Iterable[Any], statistics: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """ScheduleLotResult -> LotPlanResult"""
+    return {
+        "statistics": statistics or {},
+        "lot_results": [
+            {
+                "Lot": r.LotId,
+                "Product": r.Product or "",
+                "Priority": r.Priority,
+                "DueDate": _format_time(r.DueDate),
+                "PlanFinishDate": _format_time(r.PlanFinishDate),
+                "ActualFinishDate": _format_time(r.ActualFinishDate),
+                "delay time": format_delay(r.DelaySeconds),
+            }
+            for r in lot_rows
+        ],
+    }
+
+
+def build_machine_task_segment(segment_rows: Iterable[Any]) -> List[Dict[str, Any]]:
+    """ScheduleTaskSegment (依 MachineId, id 排序) -> machineTaskSegment (每台機台前置父節點)"""
+    result = []
+    current_machine = None
+    for r in segment_rows:
+        if r.MachineId != current_machine:
+            current_machine = r.MachineId
+            result.append({"id": current_machine, "text": current_machine, "parent": None, "render": "split"})
+        result.append({
+            "id": r.SegmentId,
+            "text": r.Text,
+            "parent": r.MachineId,
+            "start_date": _format_time(r.StartTime),
+            "end_date": _format_time(r.EndTime),
+            "Booking": r.Booking,
+            "color": r.Color,
+        })
+    return result
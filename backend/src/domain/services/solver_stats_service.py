@@ -0,0 +1,189 @@
+"""
+求解統計服務
+整理 SolverRunStats 的比較結果 (不直接存取資料庫)：
+- 執行摘要：整體 gap、最佳解比例、被時間上限截斷的批次比例
+- 執行比較：依 BatchIndex 對齊多次執行的各批次統計與目標值曲線
+- 規模比較：依 (workers, 時間上限, 作業數區間) 分組，找出加 worker / 加時間已無改善的設定與求解品質崩落的資料量
+"""
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+# 與 solver_stats_repository.TIME_LIMIT_RATIO 相同
+TIME_LIMIT_RATIO = 0.95
+# 同一設定下，被時間上限截斷或無解的批次比例達此值的最小作業數區間視為崩落點
+CLIFF_FAILURE_RATE = 0.5
+# 加 worker / 加時間後平均 gap 改善不到此值且最佳解比例未提升，視為沒有幫助
+MIN_GAP_GAIN = 0.005
+
+
+def _ratio(numerator: float, denominator: float) -> Optional[float]:
+    return round(numerator / denominator, 4) if denominator else None
+
+
+def _avg(values: Iterable[Optional[float]], digits: int = 4) -> Optional[float]:
+    values = [value for value in values if value is not None]
+    return round(sum(values) / len(values), digits) if values else None
+
+
+def relative_gap(objective: Optional[float], bound: Optional[float]) -> Optional[float]:
+    """|objective - bound| / |objective| (與排程程式寫入的 Gap 相同定義)"""
+    if objective is None or bound is None:
+        return None
+    return round(abs(objective - bound) / max(abs(objective), 1e-9), 6)
+
+
+def hit_time_limit(status: str, wall_time: Optional[float], max_time: Optional[float]) -> bool:
+    return status in ("FEASIBLE", "UNKNOWN") and bool(max_time) and (wall_time or 0) >= max_time * TIME_LIMIT_RATIO
+
+
+def idle_share(wall_time: Optional[float], last_improvement: Optional[float]) -> Optional[float]:
+    """最後一次改善之後的求解時間占比；接近 1 表示大部分時間沒有進展，再加時間幫助不大"""
+    if not wall_time or last_improvement is None:
+        return None
+    return round(max(wall_time - last_improvement, 0.0) / wall_time, 4)
+
+
+def build_run_summary(row: Dict[str, Any]) -> Dict[str, Any]:
+    """補上整次執行的 gap 與各比例"""
+    batches = row["batch_count"]
+    return {
+        **row,
+        "gap": relative_gap(row["objective"], row["best_bound"]),
+        "optimal_rate": _ratio(row["optimal_batches"], batches),
+        "time_limit_rate": _ratio(row["time_limit_batches"], batches),
+    }
+
+
+def build_batch_point(stat: Dict[str, Any]) -> Dict[str, Any]:
+    """單一批次用於比較的欄位 (含目標值曲線)"""
+    return {
+        "status": stat["Status"],
+        "lot_count": stat["LotCount"],
+        "operation_count": stat["OperationCount"],
+        "num_variables": stat["NumVariables"],
+        "num_workers": stat["NumWorkers"],
+        "max_time_seconds": stat["MaxTimeSeconds"],
+        "wall_time": stat["WallTime"],
+        "objective": stat["ObjectiveValue"],
+        "best_bound": stat["BestBound"],
+        "gap": stat["Gap"],
+        "num_solutions": stat["NumSolutions"],
+        "first_solution_seconds": stat["FirstSolutionSeconds"],
+        "last_improvement_seconds": stat["LastImprovementSeconds"],
+        "idle_share": idle_share(stat["WallTime"], stat["LastImprovementSeconds"]),
+        "hit_time_limit": hit_time_limit(stat["Status"], stat["WallTime"], stat["MaxTimeSeconds"]),
+        "objective_trace": stat["ObjectiveTrace"] or [],
+    }
+
+
+def compare_runs(run_ids: Sequence[str], summaries: List[Dict[str, Any]], batches: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """依請求順序列出各執行摘要，並依 BatchIndex 對齊各執行的批次統計"""
+    summary_by_run = {summary["run_id"]: summary for summary in summaries}
+    by_index: Dict[int, Dict[str, Any]] = {}
+    for stat in batches:
+        by_index.setdefault(stat["BatchIndex"], {})[stat["RunId"]] = build_batch_point(stat)
+    return {
+        "runs": [summary_by_run[run_id] for run_id in run_ids if run_id in summary_by_run],
+        "batches": [{"batch_index": index, "runs": by_index[index]} for index in sorted(by_index)],
+    }
+
+
+def build_scaling(rows: List[Dict[str, Any]], bucket_size: int) -> Dict[str, Any]:
+    """
+    依 (workers, 時間上限, 作業數區間) 分組彙總批次統計
+
+    Returns:
+        groups: 各分組的平均耗時、gap、最佳解 / 截斷 / 無解比例、首解時間與閒置占比
+        cliffs: 各 (workers, 時間上限) 下截斷或無解比例首次達 CLIFF_FAILURE_RATE 的作業數區間
+        diminishing_returns: 同一作業數區間內，加 worker 或加時間後 gap 與最佳解比例都沒有改善的設定
+    """
+    buckets: Dict[tuple, List[Dict[str, Any]]] = {}
+    for row in rows:
+        start = (row["OperationCount"] or 0) // bucket_size * bucket_size
+        buckets.setdefault((row["NumWorkers"], row["MaxTimeSeconds"], start), []).append(row)
+
+    groups = []
+    for (workers, max_time, start), items in sorted(buckets.items(), key=lambda item: tuple(v or 0 for v in item[0])):
+        count = len(items)
+        time_limited = sum(1 for row in items if hit_time_limit(row["Status"], row["WallTime"], max_time))
+        no_solution = sum(1 for row in items if row["Status"] not in ("OPTIMAL", "FEASIBLE"))
+        groups.append({
+            "num_workers": workers,
+            "max_time_seconds": max_time,
+            "operations_from": start,
+            "operations_to": start + bucket_size - 1,
+            "batches": count,
+            "runs": len({row["RunId"] for row in items}),
+            "avg_lots": _avg((row["LotCount"] for row in items), 1),
+            "avg_variables": _avg((row["NumVariables"] for row in items), 0),
+            "avg_presolved_variables": _avg((row["PresolvedVariables"] for row in items), 0),
+            "avg_wall_time": _avg((row["WallTime"] for row in items), 3),
+            "avg_gap": _avg(row["Gap"] for row in items),
+            "max_gap": max((row["Gap"] for row in items if row["Gap"] is not None), default=None),
+            "optimal_rate": _ratio(sum(1 for row in items if row["Status"] == "OPTIMAL"), count),
+            "time_limit_rate": _ratio(time_limited, count),
+            "no_solution_rate": _ratio(no_solution, count),
+            "avg_first_solution_seconds": _avg((row["FirstSolutionSeconds"] for row in items), 3),
+            "avg_idle_share": _avg(idle_share(row["WallTime"], row["LastImprovementSeconds"]) for row in items),
+        })
+
+    return {
+        "bucket_size": bucket_size,
+        "groups": groups,
+        "cliffs": _find_cliffs(groups),
+        "diminishing_returns": _find_diminishing_returns(groups),
+    }
+
+
+def _failure_rate(group: Dict[str, Any]) -> float:
+    return max(group["time_limit_rate"] or 0, group["no_solution_rate"] or 0)
+
+
+def _find_cliffs(groups: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    cliffs = []
+    series: Dict[tuple, List[Dict[str, Any]]] = {}
+    for group in groups:
+        series.setdefault((group["num_workers"], group["max_time_seconds"]), []).append(group)
+    for (workers, max_time), items in series.items():
+        for previous, group in zip([None] + items[:-1], items):
+            if _failure_rate(group) >= CLIFF_FAILURE_RATE and (previous is None or _failure_rate(previous) < CLIFF_FAILURE_RATE):
+                cliffs.append({
+                    "num_workers": workers,
+                    "max_time_seconds": max_time,
+                    "operations_from": group["operations_from"],
+                    "previous_operations_from": previous["operations_from"] if previous else None,
+                    "failure_rate": round(_failure_rate(group), 4),
+                    "avg_gap": group["avg_gap"],
+                })
+                break
+    return cliffs
+
+
+def _no_gain(smaller: Dict[str, Any], larger: Dict[str, Any]) -> bool:
+    if smaller["avg_gap"] is None or larger["avg_gap"] is None:
+        return False
+    gap_gain = smaller["avg_gap"] - larger["avg_gap"]
+    return gap_gain < MIN_GAP_GAIN and (larger["optimal_rate"] or 0) <= (smaller["optimal_rate"] or 0)
+
+
+def _find_diminishing_returns(groups: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """同一作業數區間內，沿 workers (時間上限相同) 與沿時間上限 (workers 相同) 比較相鄰設定；fixed_value 為固定的另一個參數"""
+    findings = []
+    for dimension, fixed, varied in (("workers", "max_time_seconds", "num_workers"),
+                                     ("max_time", "num_workers", "max_time_seconds")):
+        series: Dict[tuple, List[Dict[str, Any]]] = {}
+        for group in groups:
+            series.setdefault((group["operations_from"], group[fixed]), []).append(group)
+        for (start, fixed_value), items in series.items():
+            items = sorted(items, key=lambda group: group[varied] or 0)
+            for smaller, larger in zip(items, items[1:]):
+                if _no_gain(smaller, larger):
+                    findings.append({
+                        "dimension": dimension,
+                        "operations_from": start,
+                        "fixed_value": fixed_value,
+                        "from_value": smaller[varied],
+                        "to_value": larger[varied],
+                        "avg_gap_before": smaller["avg_gap"],
+                        "avg_gap_after": larger["avg_gap"],
+                    })
+    return findings
@@ -0,0 +1,140 @@
+"""
+排程讀取回應快取
+以 (ScheduleId, 檢視參數) 為鍵，保存已序列化且已 gzip 壓縮的回應內容與強 ETag
+
+排程資料建立後即不再變動，同一鍵的回應可重複使用；
+新排程寫入時鍵中的 ScheduleId 會改變，快照還原或手動修改時呼叫 invalidate() 清空。
+invalidate() 只清空本程序的快取：以多個 worker 執行 (WEB_CONCURRENCY > 1) 時項目另有存活時間上限，
+其他 worker 的修改最晚在存活時間後生效。
+"""
+import gzip
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+from fastapi.encoders import jsonable_encoder
+
+from core.config import settings
+
+
+class CachedResponse:
+    """已序列化的回應 (原始與 gzip 兩種編碼，各自帶有強 ETag)"""
+
+    __slots__ = ("body", "gzip_body", "etag", "gzip_etag", "created")
+
+    def __init__(self, body: bytes):
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        self.created = time.monotonic()
+        self.body = body
+        self.gzip_body = gzip.compress(body, compresslevel=6, mtime=0)
+        # 不同 Content-Encoding 的內容位元組不同，強 ETag 也需區分
+        self.etag = f'"{digest}"'
+        self.gzip_etag = f'"{digest}-gzip"'
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + len(self.gzip_body)
+
+
+def serialize(payload: Any) -> bytes:
+    """與 FastAPI JSONResponse 相同的序列化方式"""
+    return json.dumps(
+        jsonable_encoder(payload),
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+class ResponseCache:
+    """執行緒安全的 LRU 回應快取 (依筆數與總位元組數淘汰；max_age_seconds 為 0 時項目不過期)"""
+
+    def __init__(self, max_entries: int, max_bytes: int, max_age_seconds: float = 0.0):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self._entries: "OrderedDict[Hashable, CachedResponse]" = OrderedDict()
+        self._bytes = 0
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def generation(self) -> int:
+        """每次 invalidate() 遞增，用來丟棄失效前開始建立的回應"""
+        return self._generation
+
+    def get(self, key: Hashable) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.max_age_seconds and time.monotonic() - entry.created >= self.max_age_seconds:
+                del self._entries[key]
+                self._bytes -= entry.size
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: Hashable, payload: Any, generation: Optional[int] = None) -> CachedResponse:
+        """
+        序列化並保存回應
+
+        generation 與目前不同時 (建立期間發生失效) 只回傳結果、不寫入快取
+        """
+        entry = CachedResponse(serialize(payload))
+        if entry.size > self.max_bytes:
+            return entry
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return entry
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old.size
+            self._entries[key] = entry
+            self._bytes += entry.size
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+        return entry
+
+    def invalidate(self) -> None:
+        """清空所有快取 (快照還原、排程修改或刪除時呼叫)"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._generation += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "generation": self._generation,
+            }
+
+
+def _max_age_seconds() -> float:
+    """單一程序時項目不過期 (invalidate() 即可)；多個 worker 時未指定則使用 RESPONSE_CACHE_MULTI_WORKER_TTL_SECONDS"""
+    if settings.RESPONSE_CACHE_TTL_SECONDS:
+        return settings.RESPONSE_CACHE_TTL_SECONDS
+    if settings.WEB_CONCURRENCY > 1:
+        return settings.RESPONSE_CACHE_MULTI_WORKER_TTL_SECONDS
+    return 0.0
+
+
+# 建立全域快取實例
+schedule_response_cache = ResponseCache(
+    max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+    max_bytes=settings.RESPONSE_CACHE_MAX_MB * 1024 * 1024,
+    max_age_seconds=_max_age_seconds(),
+)
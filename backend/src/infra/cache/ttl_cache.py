@@ -0,0 +1,72 @@
+"""
+短時間 TTL 快取
+用於會隨模擬持續變動、但允許數秒延遲的彙總結果 (例如 KPI)；
+同一鍵同時只有一個請求計算，其餘請求等待並共用結果，避免儀表板同時刷新時重複掃描
+"""
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+
+class TTLCache:
+    """執行緒安全的 TTL 快取 (每個鍵一把計算鎖)"""
+
+    def __init__(self, ttl_seconds: float, max_entries: int = 64):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: Dict[Hashable, Tuple[float, Any]] = {}
+        self._key_locks: Dict[Hashable, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _fresh(self, key: Hashable):
+        entry = self._entries.get(key)
+        if entry is not None and time.monotonic() - entry[0] < self.ttl_seconds:
+            return entry
+        return None
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Tuple[Any, float]:
+        """
+        取得快取值，過期或不存在時計算
+
+        Returns:
+            (value, age_seconds): 值與其已存在的秒數
+        """
+        with self._lock:
+            entry = self._fresh(key)
+            if entry is not None:
+                self.hits += 1
+                return entry[1], time.monotonic() - entry[0]
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            # 等待期間其他請求可能已完成計算
+            with self._lock:
+                entry = self._fresh(key)
+                if entry is not None:
+                    self.hits += 1
+                    return entry[1], time.monotonic() - entry[0]
+                self.misses += 1
+
+            value = compute()
+            with self._lock:
+                if len(self._entries) >= self.max_entries and key not in self._entries:
+                    oldest = min(self._entries, key=lambda k: self._entries[k][0])
+                    self._entries.pop(oldest)
+                    self._key_locks.pop(oldest, None)
+                self._entries[key] = (time.monotonic(), value)
+            return value, 0.0
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def evict(self, key: Hashable) -> None:
+        """只移除單一鍵 (其他鍵的快取不受影響)"""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,38 @@
+"""
+非同步資料庫連線模組
+建立 SQLAlchemy AsyncEngine 和 AsyncSession (aiomysql)
+
+高頻讀取端點改用 async def + AsyncSession，等待 MySQL 時不佔用 threadpool 的執行緒；
+其餘端點仍使用 infra.db.database 的同步 Session。
+"""
+from typing import AsyncGenerator
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from core.config import settings
+
+
+# 建立非同步資料庫引擎
+async_engine = create_async_engine(
+    settings.async_database_url,
+    pool_pre_ping=True,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    echo=False,
+)
+
+# 建立 AsyncSession 工廠 (commit 後不使物件失效，回傳時不會再觸發延遲載入)
+AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False, autoflush=False)
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    取得非同步資料庫 Session (依賴注入用)
+
+    Yields:
+        AsyncSession: 非同步資料庫 Session
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
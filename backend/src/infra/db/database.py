@@ -12,9 +12,12 @@ from core.config import settings
 # 建立資料庫引擎
 engine = create_engine(
     settings.database_url,
-    pool_pre_ping=True,  # 連線前檢查
-    pool_recycle=3600,   # 每小時回收連線
-    echo=False,          # 不顯示 SQL 語句
+    pool_pre_ping=True,                       # 連線前檢查
+    pool_size=settings.DB_POOL_SIZE,          # 常駐連線數 (預設 5 在儀表板並行查詢時不足)
+    max_overflow=settings.DB_MAX_OVERFLOW,    # 尖峰時額外連線數
+    pool_timeout=settings.DB_POOL_TIMEOUT,    # 取得連線的等待上限 (秒)
+    pool_recycle=settings.DB_POOL_RECYCLE,    # 定期回收連線
+    echo=False,                               # 不顯示 SQL 語句
 )
 
 # 建立 Session 工廠
@@ -0,0 +1,96 @@
+"""
+/metrics 輸出
+組合三類指標 (Prometheus text exposition format)：
+1. API：各路由延遲分布 (http_metrics)
+2. 資料庫連線池：同步 / 非同步 engine 的容量、使用中、溢出連線數
+3. 排程：本程序作業佇列深度與作業耗時 (schedule_job_manager)，
+   以及最近一次排程執行摘要 (各排程程式寫入的 SchedulerRunMetrics，涵蓋 GUI worker 與命令列執行)
+"""
+import time
+from typing import Callable, List
+
+from sqlalchemy.orm import Session
+
+from infra.db.async_database import async_engine
+from infra.db.database import engine
+from infra.metrics.registry import render_registry, write_gauge
+from infra.repositories.scheduler_metrics_repository import get_last_run
+from infra.scheduler.schedule_job_manager import get_job_manager
+
+# 最近一次排程摘要：(指標名稱, 說明, Attributes 鍵)
+LAST_RUN_GAUGES = (
+    ("aps_scheduler_last_run_duration_seconds", "Wall time of the last schedule run", "duration_seconds"),
+    ("aps_scheduler_last_solve_seconds", "CP-SAT wall time summed over the batches of the last schedule run", "solve_seconds"),
+    ("aps_scheduler_last_objective", "Objective value summed over the batches of the last schedule run", "objective"),
+    ("aps_scheduler_last_best_bound", "Best objective bound summed over the batches of the last schedule run", "best_bound"),
+    ("aps_scheduler_last_gap", "Relative gap |objective - bound| / |objective| of the last schedule run", "gap"),
+    ("aps_scheduler_last_lots_scheduled", "Lots scheduled by the last schedule run", "scheduled_lot_count"),
+    ("aps_scheduler_last_lot_count", "Lots loaded by the last schedule run", "lot_count"),
+    ("aps_scheduler_last_batch_count", "Solver batches of the last schedule run", "batch_count"),
+    ("aps_scheduler_last_peak_rss_megabytes", "Peak RSS of the process that ran the last schedule run", "peak_rss_mb"),
+)
+
+
+def _read_pool(read, pool):
+    """NullPool / StaticPool 等沒有容量概念的連線池不輸出"""
+    try:
+        return read(pool)
+    except AttributeError:
+        return None
+
+
+def _write_pool_metrics(lines: List[str]) -> None:
+    pools = {"sync": engine.pool, "async": async_engine.sync_engine.pool}
+    for name, help_text, read in (
+        ("aps_db_pool_size", "Configured persistent connections of the DB pool", lambda pool: pool.size()),
+        ("aps_db_pool_checked_out", "DB connections currently in use", lambda pool: pool.checkedout()),
+        ("aps_db_pool_checked_in", "Idle DB connections in the pool", lambda pool: pool.checkedin()),
+        ("aps_db_pool_overflow", "DB connections opened beyond pool_size (negative while the pool is warming up)",
+         lambda pool: pool.overflow()),
+    ):
+        write_gauge(lines, name, help_text, [({"engine": engine_name}, _read_pool(read, pool)) for engine_name, pool in pools.items()])
+
+
+def _write_job_queue_metrics(lines: List[str]) -> None:
+    counts = get_job_manager().status_counts()
+    write_gauge(lines, "aps_schedule_jobs", "Schedule jobs queued or running in this API process (queue depth)",
+                [({"status": status}, count) for status, count in counts.items()])
+
+
+def _write_last_run_metrics(lines: List[str], db_factory: Callable[[], Session]) -> None:
+    try:
+        db = db_factory()
+        try:
+            last_run = get_last_run(db)
+        finally:
+            db.close()
+    except Exception as e:
+        # 資料表尚未建立或資料庫無法連線時，其餘指標照常輸出
+        print(f"Scheduler run metrics unavailable: {e}")
+        write_gauge(lines, "aps_scheduler_run_metrics_up", "Whether SchedulerRunMetrics could be read", [({}, 0)])
+        return
+
+    write_gauge(lines, "aps_scheduler_run_metrics_up", "Whether SchedulerRunMetrics could be read", [({}, 1)])
+    if last_run is None:
+        return
+    write_gauge(lines, "aps_scheduler_last_run_timestamp_seconds", "Start time of the last schedule run (unix seconds)",
+                [({}, time.mktime(last_run["start_time"].timetuple()))])
+    write_gauge(lines, "aps_scheduler_last_run_success", "1 if the last schedule run saved its results",
+                [({}, 1 if last_run.get("status") == "completed" else 0)])
+    for name, help_text, key in LAST_RUN_GAUGES:
+        write_gauge(lines, name, help_text, [({}, last_run.get(key))])
+
+
+def render_metrics(db_factory: Callable[[], Session]) -> str:
+    """
+    產生 /metrics 內容
+
+    Args:
+        db_factory: 建立同步 Session 的函式 (讀取 SchedulerRunMetrics 用)；先輸出連線池狀態，不會把本次查詢算進使用中連線
+    """
+    lines: List[str] = []
+    render_registry(lines)
+    _write_pool_metrics(lines)
+    _write_job_queue_metrics(lines)
+    _write_last_run_metrics(lines, db_factory)
+    return "\n".join(lines) + "\n"
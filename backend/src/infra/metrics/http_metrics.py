@@ -0,0 +1,62 @@
+"""
+API 請求延遲指標
+純 ASGI middleware (不經 BaseHTTPMiddleware，不影響 SSE 串流)，依路由樣板記錄延遲分布：
+- route 使用路由樣板 (例如 /api/v1/lots/{lot_id})，避免每個 LotId 產生一組時間序列；未匹配的路徑一律記為 "unmatched"
+- 延遲量測到送出回應標頭為止，SSE 等串流回應不會把整段連線時間算進延遲
+"""
+import time
+
+from infra.metrics.registry import Counter, Histogram
+
+UNMATCHED_ROUTE = "unmatched"
+
+http_request_duration = Histogram(
+    "aps_http_request_duration_seconds",
+    "API request latency until response headers are sent, by route template",
+    ("method", "route", "status"),
+)
+http_request_exceptions = Counter(
+    "aps_http_request_exceptions_total",
+    "API requests that raised an unhandled exception",
+    ("method", "route"),
+)
+
+
+def _route_template(scope) -> str:
+    path = getattr(scope.get("route"), "path", None)
+    return path or UNMATCHED_ROUTE
+
+
+class PrometheusMiddleware:
+    """記錄每個 HTTP 請求的延遲 (依 method / 路由樣板 / 狀態碼)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        recorded = False
+
+        async def send_wrapper(message):
+            nonlocal recorded
+            if message["type"] == "http.response.start" and not recorded:
+                recorded = True
+                http_request_duration.observe(
+                    time.perf_counter() - started,
+                    method=scope["method"], route=_route_template(scope), status=str(message["status"]),
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception:
+            http_request_exceptions.inc(method=scope["method"], route=_route_template(scope))
+            if not recorded:
+                http_request_duration.observe(
+                    time.perf_counter() - started, method=scope["method"], route=_route_template(scope), status="500",
+                )
+            raise
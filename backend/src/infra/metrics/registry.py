@@ -0,0 +1,140 @@
+"""
+Prometheus 文字格式指標 (不依賴 prometheus_client)
+
+只實作本系統需要的 Counter / Histogram 與 text exposition format 0.0.4：
+- 以 labels 元組為鍵、執行緒安全地累加
+- 建立時自動登記到 REGISTRY，/metrics 依登記順序輸出
+- 連線池、佇列深度等即時數值於輸出時計算，以 write_gauge() 直接寫出
+"""
+import math
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# 秒為單位的預設 bucket (API 延遲)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+def write_header(lines: List[str], name: str, help_text: str, metric_type: str) -> None:
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} {metric_type}")
+
+
+def write_gauge(lines: List[str], name: str, help_text: str,
+                samples: Iterable[Tuple[Dict[str, str], Optional[float]]]) -> None:
+    """寫出即時計算的 gauge；samples 為 (labels, value)，value 為 None 的樣本略過"""
+    samples = [(labels, value) for labels, value in samples if value is not None]
+    if not samples:
+        return
+    write_header(lines, name, help_text, "gauge")
+    for labels, value in samples:
+        lines.append(f"{name}{_format_labels(list(labels), list(labels.values()))} {_format_value(value)}")
+
+
+class _Metric:
+    metric_type = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self, lines: List[str]) -> None:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """只增不減的累計值"""
+    metric_type = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help_text, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self, lines: List[str]) -> None:
+        with self._lock:
+            values = sorted(self._values.items())
+        write_header(lines, self.name, self.help_text, self.metric_type)
+        for key, value in values:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+
+
+class Histogram(_Metric):
+    """累積分布 (每個 labels 組合保存各 bucket 計數、總和與次數)"""
+    metric_type = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [各 bucket 非累積計數..., 超出最大 bucket 的計數, 總和]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [0.0] * (len(self.buckets) + 2)
+            entry[index] += 1
+            entry[-1] += value
+
+    def render(self, lines: List[str]) -> None:
+        with self._lock:
+            values = sorted((key, list(entry)) for key, entry in self._values.items())
+        write_header(lines, self.name, self.help_text, self.metric_type)
+        bucket_labels = self.labelnames + ("le",)
+        for key, entry in values:
+            cumulative = 0.0
+            for bound, count in zip(self.buckets, entry):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(bucket_labels, key + (_format_value(bound),))} "
+                             f"{_format_value(cumulative)}")
+            cumulative += entry[len(self.buckets)]
+            lines.append(f"{self.name}_bucket{_format_labels(bucket_labels, key + ('+Inf',))} {_format_value(cumulative)}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(entry[-1])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {_format_value(cumulative)}")
+
+
+REGISTRY: List[_Metric] = []
+
+
+def render_registry(lines: List[str]) -> None:
+    for metric in REGISTRY:
+        metric.render(lines)
@@ -0,0 +1,62 @@
+"""
+Lots / LotOperations 批次寫入 Repository
+以多列 INSERT ... ON DUPLICATE KEY UPDATE 批次 upsert，由呼叫端在同一個交易中 commit
+"""
+from typing import Any, Dict, List, Sequence, Set, Tuple
+
+from sqlalchemy import select, tuple_
+from sqlalchemy.dialects.mysql import insert
+from sqlalchemy.orm import Session
+
+from domain.models import Lot, LotOperation
+
+UPSERT_CHUNK_SIZE = 500
+KEY_QUERY_CHUNK_SIZE = 1000
+
+# 重複時更新的欄位 (主檔資料)；實績與計畫欄位 (CheckIn/Out、StepStatus、Plan*) 只在新增時寫入，
+# 避免 MES 重送主檔時覆蓋現場進度與排程結果
+LOT_UPDATE_COLUMNS = (
+    "Priority", "DueDate", "ProductID", "ProductName", "CustomerID", "CustomerName", "LotCreateDate",
+)
+LOT_OPERATION_UPDATE_COLUMNS = ("MachineGroup", "Duration", "Sequence")
+
+
+def find_existing_lot_ids(db: Session, lot_ids: Sequence[str]) -> Set[str]:
+    """取得已存在的 LotId"""
+    unique_ids = list(dict.fromkeys(lot_ids))
+    existing: Set[str] = set()
+    for i in range(0, len(unique_ids), KEY_QUERY_CHUNK_SIZE):
+        chunk = unique_ids[i:i + KEY_QUERY_CHUNK_SIZE]
+        existing.update(db.execute(select(Lot.LotId).where(Lot.LotId.in_(chunk))).scalars())
+    return existing
+
+
+def find_existing_operation_keys(db: Session, keys: Sequence[Tuple[str, str]]) -> Set[Tuple[str, str]]:
+    """取得已存在的 (LotId, Step)"""
+    unique_keys = list(dict.fromkeys(keys))
+    existing: Set[Tuple[str, str]] = set()
+    for i in range(0, len(unique_keys), KEY_QUERY_CHUNK_SIZE):
+        chunk = unique_keys[i:i + KEY_QUERY_CHUNK_SIZE]
+        stmt = select(LotOperation.LotId, LotOperation.Step).where(
+            tuple_(LotOperation.LotId, LotOperation.Step).in_(chunk)
+        )
+        existing.update((lot_id, step) for lot_id, step in db.execute(stmt))
+    return existing
+
+
+def _upsert(db: Session, model: Any, rows: List[Dict[str, Any]], update_columns: Sequence[str]) -> int:
+    for i in range(0, len(rows), UPSERT_CHUNK_SIZE):
+        stmt = insert(model).values(rows[i:i + UPSERT_CHUNK_SIZE])
+        stmt = stmt.on_duplicate_key_update({col: stmt.inserted[col] for col in update_columns})
+        db.execute(stmt)
+    return len(rows)
+
+
+def upsert_lots(db: Session, rows: List[Dict[str, Any]]) -> int:
+    """批次 upsert 工單 (不 commit)"""
+    return _upsert(db, Lot, rows, LOT_UPDATE_COLUMNS)
+
+
+def upsert_lot_operations(db: Session, rows: List[Dict[str, Any]]) -> int:
+    """批次 upsert 工單作業 (不 commit)"""
+    return _upsert(db, LotOperation, rows, LOT_OPERATION_UPDATE_COLUMNS)
@@ -0,0 +1,104 @@
+"""
+KPI Repository
+每個來源資料表只掃描一次：以 GROUP BY 與條件加總一次取得儀表板所需的所有計數
+"""
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import and_, case, func, literal_column, select
+from sqlalchemy.orm import Session
+
+from domain.models import Lot, LotOperation, MachineGroupUtilization, ScheduleLotResult
+
+STATUS_NEW = 0
+STATUS_WIP = 1
+STATUS_COMPLETED = 2
+
+_SECOND = literal_column("SECOND")
+
+
+def _count(condition):
+    return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+
+def _total(column):
+    return func.coalesce(func.sum(column), 0)
+
+
+def get_operation_kpis(db: Session, as_of: datetime) -> Dict[str, Any]:
+    """
+    作業與 Lot 狀態計數、WIP 滯留時間 (LotOperations 只掃描一次)
+
+    內層依 LotId 分組取得各 Lot 的狀態計數，外層再彙總成作業計數與 Lot 狀態計數：
+    - Lot 完工：所有作業皆為 Completed
+    - Lot 未開始：沒有任何作業進站
+    - 其餘為在製 Lot
+    """
+    op = LotOperation
+    wip_age = func.timestampdiff(_SECOND, op.CheckInTime, as_of)
+    is_wip = op.StepStatus == STATUS_WIP
+
+    per_lot = select(
+        op.LotId.label("LotId"),
+        func.count().label("ops"),
+        _count(op.StepStatus == STATUS_COMPLETED).label("completed"),
+        _count(is_wip).label("wip"),
+        _count(and_(op.StepStatus == STATUS_NEW, op.PlanCheckInTime.isnot(None))).label("normal"),
+        _count(and_(op.StepStatus == STATUS_NEW, op.PlanCheckInTime.is_(None))).label("new_add"),
+        func.sum(case((is_wip, wip_age))).label("wip_age_sum"),
+        func.max(case((is_wip, wip_age))).label("wip_age_max"),
+    ).group_by(op.LotId).subquery("per_lot")
+
+    row = db.execute(select(
+        func.count().label("lots_with_ops"),
+        _total(per_lot.c.ops).label("total_ops"),
+        _total(per_lot.c.completed).label("completed_ops"),
+        _total(per_lot.c.wip).label("wip_ops"),
+        _total(per_lot.c.normal).label("normal_ops"),
+        _total(per_lot.c.new_add).label("new_add_ops"),
+        _count(per_lot.c.completed == per_lot.c.ops).label("completed_lots"),
+        _count(and_(per_lot.c.completed == 0, per_lot.c.wip == 0)).label("not_started_lots"),
+        _total(per_lot.c.wip_age_sum).label("wip_age_sum"),
+        func.max(per_lot.c.wip_age_max).label("wip_age_max"),
+    )).one()
+    return dict(row._mapping)
+
+
+def count_lots(db: Session) -> int:
+    return db.execute(select(func.count()).select_from(Lot)).scalar() or 0
+
+
+def get_delay_kpis(db: Session, schedule_id: str) -> Dict[str, Any]:
+    """排程結果的準時率與延遲統計 (ScheduleLotResult 只掃描一次，使用 uq_schedule_lot 索引)"""
+    r = ScheduleLotResult
+    late = r.DelaySeconds > 0
+    row = db.execute(select(
+        func.count().label("lots"),
+        _count(late).label("late_lots"),
+        _total(case((late, r.DelaySeconds), else_=0)).label("total_delay_seconds"),
+        func.max(r.DelaySeconds).label("max_delay_seconds"),
+        func.max(r.PlanFinishDate).label("makespan_end"),
+        func.max(r.PlanID).label("plan_id"),
+    ).where(r.ScheduleId == schedule_id)).one()
+    return dict(row._mapping)
+
+
+def get_latest_utilization_plan_id(db: Session) -> Optional[str]:
+    """最近一次寫入稼動率的 PlanID"""
+    stmt = select(MachineGroupUtilization.PlanID).order_by(MachineGroupUtilization.id.desc()).limit(1)
+    return db.execute(stmt).scalar()
+
+
+def get_group_utilization(db: Session, plan_id: str) -> List[Dict[str, Any]]:
+    """指定 PlanID 各機台群組的稼動率 (使用 idx_plan 索引)"""
+    u = MachineGroupUtilization
+    stmt = select(
+        u.GroupId,
+        u.MachineCount,
+        u.TotalUsedMinutes,
+        u.TotalCapacityMinutes,
+        u.UtilizationRate,
+        u.CalculationWindowStart,
+        u.CalculationWindowEnd,
+    ).where(u.PlanID == plan_id).order_by(u.UtilizationRate.desc(), u.GroupId)
+    return [dict(row._mapping) for row in db.execute(stmt)]
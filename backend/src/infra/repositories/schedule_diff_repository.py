@@ -0,0 +1,244 @@
+"""
+排程差異 Repository
+以 ScheduleStepResult / ScheduleLotResult 的集合式 JOIN 比較兩份排程，比對與彙總都在資料庫內完成
+
+MySQL 不支援 FULL OUTER JOIN，以「base LEFT JOIN target」UNION ALL「target 中 base 沒有的資料列」組出完整對照；
+兩側都以 uq_schedule_lot_step / uq_schedule_lot 唯一索引對應，不需載入整份排程到 Python
+"""
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import and_, case, func, literal, literal_column, null, or_, select, union_all
+from sqlalchemy.orm import Session, aliased
+
+from domain.models import ScheduleLotResult, ScheduleStepResult
+
+CHANGE_ADDED = "added"
+CHANGE_REMOVED = "removed"
+CHANGE_MACHINE = "machine_changed"
+CHANGE_MOVED = "moved"
+CHANGE_UNCHANGED = "unchanged"
+
+_SECOND = literal_column("SECOND")
+
+
+def resolve_schedule_id_by_plan(db: Session, plan_id: str) -> Optional[str]:
+    """由 PlanID 取得 ScheduleId (使用 idx_plan 索引)"""
+    stmt = select(ScheduleLotResult.ScheduleId).where(ScheduleLotResult.PlanID == plan_id).limit(1)
+    return db.execute(stmt).scalar()
+
+
+def _op_pairs(base_id: str, target_id: str, lot_id: Optional[str] = None):
+    """逐站對照子查詢：(LotId, Step, base 機台/開始/結束, target 機台/開始/結束)"""
+    a = aliased(ScheduleStepResult)
+    b = aliased(ScheduleStepResult)
+
+    base_side = select(
+        a.LotId.label("LotId"),
+        a.Step.label("Step"),
+        a.StepIdx.label("StepIdx"),
+        a.MachineId.label("base_machine"),
+        a.StartTime.label("base_start"),
+        a.EndTime.label("base_end"),
+        b.MachineId.label("target_machine"),
+        b.StartTime.label("target_start"),
+        b.EndTime.label("target_end"),
+    ).select_from(a).outerjoin(
+        b, and_(b.ScheduleId == target_id, b.LotId == a.LotId, b.Step == a.Step)
+    ).where(a.ScheduleId == base_id)
+
+    a2 = aliased(ScheduleStepResult)
+    b2 = aliased(ScheduleStepResult)
+    target_only = select(
+        b2.LotId,
+        b2.Step,
+        b2.StepIdx,
+        null(),
+        null(),
+        null(),
+        b2.MachineId,
+        b2.StartTime,
+        b2.EndTime,
+    ).select_from(b2).outerjoin(
+        a2, and_(a2.ScheduleId == base_id, a2.LotId == b2.LotId, a2.Step == b2.Step)
+    ).where(b2.ScheduleId == target_id, a2.id.is_(None))
+
+    if lot_id:
+        base_side = base_side.where(a.LotId == lot_id)
+        target_only = target_only.where(b2.LotId == lot_id)
+    return union_all(base_side, target_only).subquery("op_pairs")
+
+
+def _op_columns(pairs, tolerance_seconds: int):
+    shift = func.timestampdiff(_SECOND, pairs.c.base_start, pairs.c.target_start)
+    machine_changed = and_(
+        pairs.c.base_machine.isnot(None),
+        pairs.c.target_machine.isnot(None),
+        pairs.c.base_machine != pairs.c.target_machine,
+    )
+    moved = func.abs(shift) > tolerance_seconds
+    change_type = case(
+        (pairs.c.base_machine.is_(None), literal(CHANGE_ADDED)),
+        (pairs.c.target_machine.is_(None), literal(CHANGE_REMOVED)),
+        (machine_changed, literal(CHANGE_MACHINE)),
+        (moved, literal(CHANGE_MOVED)),
+        else_=literal(CHANGE_UNCHANGED),
+    )
+    return shift, machine_changed, moved, change_type
+
+
+def _count(condition):
+    return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+
+def get_op_summary(db: Session, base_id: str, target_id: str, tolerance_seconds: int) -> Dict[str, Any]:
+    """逐站差異彙總 (一次聚合查詢)"""
+    pairs = _op_pairs(base_id, target_id)
+    shift, machine_changed, moved, _ = _op_columns(pairs, tolerance_seconds)
+    common = and_(pairs.c.base_machine.isnot(None), pairs.c.target_machine.isnot(None))
+
+    row = db.execute(select(
+        _count(pairs.c.base_machine.isnot(None)).label("base_ops"),
+        _count(pairs.c.target_machine.isnot(None)).label("target_ops"),
+        _count(common).label("common_ops"),
+        _count(pairs.c.base_machine.is_(None)).label("added_ops"),
+        _count(pairs.c.target_machine.is_(None)).label("removed_ops"),
+        _count(machine_changed).label("machine_changed_ops"),
+        _count(and_(common, moved)).label("moved_ops"),
+        _count(and_(common, ~machine_changed, ~moved)).label("unchanged_ops"),
+        func.avg(func.abs(shift)).label("mean_abs_shift_seconds"),
+        func.max(func.abs(shift)).label("max_abs_shift_seconds"),
+        func.coalesce(func.sum(shift), 0).label("net_shift_seconds"),
+    )).one()
+    return dict(row._mapping)
+
+
+def get_op_changes(
+    db: Session,
+    base_id: str,
+    target_id: str,
+    tolerance_seconds: int,
+    lot_id: Optional[str] = None,
+    include_unchanged: bool = False,
+    limit: int = 1000,
+) -> List[Dict[str, Any]]:
+    """逐站差異明細 (依變動幅度排序)"""
+    pairs = _op_pairs(base_id, target_id, lot_id)
+    shift, machine_changed, _, change_type = _op_columns(pairs, tolerance_seconds)
+
+    stmt = select(
+        pairs.c.LotId,
+        pairs.c.Step,
+        pairs.c.StepIdx,
+        change_type.label("change"),
+        pairs.c.base_machine,
+        pairs.c.target_machine,
+        pairs.c.base_start,
+        pairs.c.target_start,
+        pairs.c.base_end,
+        pairs.c.target_end,
+        shift.label("start_shift_seconds"),
+    )
+    if not include_unchanged:
+        stmt = stmt.where(change_type != CHANGE_UNCHANGED)
+    stmt = stmt.order_by(
+        case((change_type.in_([CHANGE_ADDED, CHANGE_REMOVED]), 0), else_=1),
+        func.abs(func.coalesce(shift, 0)).desc(),
+        pairs.c.LotId,
+        pairs.c.StepIdx,
+    ).limit(limit)
+    return [dict(row._mapping) for row in db.execute(stmt)]
+
+
+def get_lot_changes(
+    db: Session,
+    base_id: str,
+    target_id: str,
+    tolerance_seconds: int,
+    lot_id: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """逐 Lot 彙總逐站差異 (只回傳有變動的 Lot)"""
+    pairs = _op_pairs(base_id, target_id, lot_id)
+    shift, machine_changed, moved, _ = _op_columns(pairs, tolerance_seconds)
+    common = and_(pairs.c.base_machine.isnot(None), pairs.c.target_machine.isnot(None))
+
+    changed_ops = _count(or_(pairs.c.base_machine.is_(None), pairs.c.target_machine.is_(None), machine_changed, moved))
+    stmt = select(
+        pairs.c.LotId,
+        _count(pairs.c.base_machine.is_(None)).label("added_ops"),
+        _count(pairs.c.target_machine.is_(None)).label("removed_ops"),
+        _count(machine_changed).label("machine_changed_ops"),
+        _count(and_(common, moved)).label("moved_ops"),
+        func.max(func.abs(shift)).label("max_abs_shift_seconds"),
+        func.max(pairs.c.base_end).label("base_finish"),
+        func.max(pairs.c.target_end).label("target_finish"),
+    ).group_by(pairs.c.LotId).having(changed_ops > 0).order_by(pairs.c.LotId)
+    return [dict(row._mapping) for row in db.execute(stmt)]
+
+
+def _lot_pairs(base_id: str, target_id: str, lot_id: Optional[str] = None):
+    a = aliased(ScheduleLotResult)
+    b = aliased(ScheduleLotResult)
+    base_side = select(
+        a.LotId.label("LotId"),
+        a.DueDate.label("DueDate"),
+        a.DelaySeconds.label("base_delay"),
+        b.DelaySeconds.label("target_delay"),
+        literal(1).label("in_base"),
+        case((b.id.isnot(None), 1), else_=0).label("in_target"),
+    ).select_from(a).outerjoin(
+        b, and_(b.ScheduleId == target_id, b.LotId == a.LotId)
+    ).where(a.ScheduleId == base_id)
+
+    a2 = aliased(ScheduleLotResult)
+    b2 = aliased(ScheduleLotResult)
+    target_only = select(
+        b2.LotId, b2.DueDate, null(), b2.DelaySeconds, literal(0), literal(1),
+    ).select_from(b2).outerjoin(
+        a2, and_(a2.ScheduleId == base_id, a2.LotId == b2.LotId)
+    ).where(b2.ScheduleId == target_id, a2.id.is_(None))
+
+    if lot_id:
+        base_side = base_side.where(a.LotId == lot_id)
+        target_only = target_only.where(b2.LotId == lot_id)
+    return union_all(base_side, target_only).subquery("lot_pairs")
+
+
+def _tardiness(delay):
+    return case((delay > 0, delay), else_=0)
+
+
+def get_tardiness_summary(db: Session, base_id: str, target_id: str) -> Dict[str, Any]:
+    """延遲 (tardiness) 彙總比較"""
+    pairs = _lot_pairs(base_id, target_id)
+    both = and_(pairs.c.in_base == 1, pairs.c.in_target == 1)
+    row = db.execute(select(
+        _count(pairs.c.in_base == 1).label("base_lots"),
+        _count(pairs.c.in_target == 1).label("target_lots"),
+        _count(pairs.c.base_delay > 0).label("base_late_lots"),
+        _count(pairs.c.target_delay > 0).label("target_late_lots"),
+        func.coalesce(func.sum(_tardiness(pairs.c.base_delay)), 0).label("base_total_tardiness_seconds"),
+        func.coalesce(func.sum(_tardiness(pairs.c.target_delay)), 0).label("target_total_tardiness_seconds"),
+        _count(and_(both, _tardiness(pairs.c.target_delay) > _tardiness(pairs.c.base_delay))).label("worsened_lots"),
+        _count(and_(both, _tardiness(pairs.c.target_delay) < _tardiness(pairs.c.base_delay))).label("improved_lots"),
+    )).one()
+    return dict(row._mapping)
+
+
+def get_lot_tardiness_changes(
+    db: Session, base_id: str, target_id: str, lot_id: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """延遲時間有變動 (或只存在於一側) 的 Lot"""
+    pairs = _lot_pairs(base_id, target_id, lot_id)
+    stmt = select(
+        pairs.c.LotId,
+        pairs.c.DueDate,
+        pairs.c.base_delay,
+        pairs.c.target_delay,
+        pairs.c.in_base,
+        pairs.c.in_target,
+    ).where(or_(
+        pairs.c.in_base == 0,
+        pairs.c.in_target == 0,
+        func.coalesce(pairs.c.base_delay, 0) != func.coalesce(pairs.c.target_delay, 0),
+    ))
+    return [dict(row._mapping) for row in db.execute(stmt)]
@@ -0,0 +1,134 @@
+"""
+ScheduleStepResult / ScheduleLotResult Repository
+提供以索引查詢排程結果、由正規化資料表組出 JSON 檢視，以及舊排程的回填
+"""
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from domain.models import ScheduleLotResult, ScheduleStepResult, ScheduleTaskSegment
+from domain.services import schedule_result_service
+from infra.scheduler.shared_modules import import_scheduler_module
+
+BACKFILL_CHUNK_SIZE = 1000
+
+
+def _load_json(value: Any) -> Any:
+    if isinstance(value, str):
+        return json.loads(value) if value else None
+    return value
+
+
+def get_schedule_id_at(db: Session, model: Any, offset: int = 0) -> Optional[str]:
+    """依 CreateDate DESC 取得第 offset 筆排程的 ScheduleId (只讀索引欄位，不載入 JSON)"""
+    stmt = select(model.ScheduleId).order_by(model.CreateDate.desc()).offset(offset).limit(1)
+    return db.execute(stmt).scalar()
+
+
+def has_step_results(db: Session, schedule_id: str) -> bool:
+    """該排程是否已有正規化逐站結果"""
+    stmt = select(ScheduleStepResult.id).where(ScheduleStepResult.ScheduleId == schedule_id).limit(1)
+    return db.execute(stmt).first() is not None
+
+
+def backfill_results(db: Session, schedule_id: str, lot_step_result: Any, lot_plan_result: Any) -> Dict[str, int]:
+    """
+    由 JSON 欄位回填正規化逐站與逐 Lot 結果 (僅在舊排程第一次被查詢時執行一次)
+
+    Returns:
+        dict: 各資料表寫入筆數
+    """
+    store = import_scheduler_module("schedule_result_store")
+    step_rows = [
+        dict(zip(store.STEP_RESULT_COLUMNS, row))
+        for row in store.build_step_rows(schedule_id, None, _load_json(lot_step_result) or [])
+    ]
+    lot_rows = [
+        dict(zip(store.LOT_RESULT_COLUMNS, row))
+        for row in store.build_lot_rows(schedule_id, None, (_load_json(lot_plan_result) or {}).get("lot_results", []))
+    ]
+
+    # 同一排程可能被兩個請求同時第一次查詢：依既有唯一鍵以 INSERT IGNORE 避免重複回填
+    for model, rows in ((ScheduleStepResult, step_rows), (ScheduleLotResult, lot_rows)):
+        stmt = insert(model).prefix_with("IGNORE", dialect="mysql").prefix_with("OR IGNORE", dialect="sqlite")
+        for i in range(0, len(rows), BACKFILL_CHUNK_SIZE):
+            db.execute(stmt, rows[i:i + BACKFILL_CHUNK_SIZE])
+    db.commit()
+    return {"steps": len(step_rows), "lots": len(lot_rows)}
+
+
+def ensure_results(db: Session, job: Any) -> None:
+    """確保排程已有正規化結果 (舊排程由 JSON 欄位回填)"""
+    if not has_step_results(db, job.ScheduleId) and job.LotStepResult:
+        backfill_results(db, job.ScheduleId, job.LotStepResult, job.LotPlanResult)
+
+
+def get_step_rows(
+    db: Session,
+    schedule_id: str,
+    lot_id: Optional[str] = None,
+    machine_ids: Optional[List[str]] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> List[ScheduleStepResult]:
+    """依 Lot / 機台 / 時間視窗查詢逐站結果 (使用 ScheduleId 開頭的索引)"""
+    stmt = select(ScheduleStepResult).where(ScheduleStepResult.ScheduleId == schedule_id)
+    if lot_id:
+        stmt = stmt.where(ScheduleStepResult.LotId == lot_id)
+    if machine_ids is not None:
+        stmt = stmt.where(ScheduleStepResult.MachineId.in_(machine_ids))
+    if end is not None:
+        stmt = stmt.where(ScheduleStepResult.StartTime < end)
+    if start is not None:
+        stmt = stmt.where(ScheduleStepResult.EndTime > start)
+    stmt = stmt.order_by(ScheduleStepResult.id)
+    return list(db.execute(stmt).scalars())
+
+
+def get_lot_rows(db: Session, schedule_id: str, lot_id: Optional[str] = None) -> List[ScheduleLotResult]:
+    """查詢逐 Lot 結果"""
+    stmt = select(ScheduleLotResult).where(ScheduleLotResult.ScheduleId == schedule_id)
+    if lot_id:
+        stmt = stmt.where(ScheduleLotResult.LotId == lot_id)
+    stmt = stmt.order_by(ScheduleLotResult.id)
+    return list(db.execute(stmt).scalars())
+
+
+def get_segment_rows(db: Session, schedule_id: str) -> List[ScheduleTaskSegment]:
+    """查詢整份排程的甘特圖區段 (依機台分組、保留寫入順序)"""
+    stmt = (
+        select(ScheduleTaskSegment)
+        .where(ScheduleTaskSegment.ScheduleId == schedule_id)
+        .order_by(ScheduleTaskSegment.MachineId, ScheduleTaskSegment.id)
+    )
+    return list(db.execute(stmt).scalars())
+
+
+def build_result_views(db: Session, job: Any) -> Dict[str, Any]:
+    """
+    取得排程的 JSON 檢視：JSON 欄位有值時直接使用，否則由正規化資料表即時組出
+
+    Returns:
+        dict: LotPlanResult, LotStepResult, machineTaskSegment
+    """
+    lot_plan_result = _load_json(job.LotPlanResult) or {}
+    lot_step_result = _load_json(job.LotStepResult)
+    task_segments = _load_json(job.machineTaskSegment)
+
+    if lot_step_result is None:
+        lot_step_result = schedule_result_service.build_lot_step_result(get_step_rows(db, job.ScheduleId))
+    if not lot_plan_result.get("lot_results"):
+        lot_plan_result = schedule_result_service.build_lot_plan_result(
+            get_lot_rows(db, job.ScheduleId), lot_plan_result.get("statistics")
+        )
+    if task_segments is None:
+        task_segments = schedule_result_service.build_machine_task_segment(get_segment_rows(db, job.ScheduleId))
+
+    return {
+        "LotPlanResult": lot_plan_result,
+        "LotStepResult": lot_step_result,
+        "machineTaskSegment": task_segments,
+    }
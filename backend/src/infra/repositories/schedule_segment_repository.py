@@ -0,0 +1,192 @@
+"""
+ScheduleTaskSegment Repository
+提供甘特圖區段的時間視窗查詢、粗粒度彙總與舊排程的回填
+"""
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import case, func, insert, literal, literal_column, select
+from sqlalchemy.orm import Session
+
+from domain.models import Machine, ScheduleTaskSegment
+from domain.services.gantt_service import BUCKET_ORIGIN
+from infra.scheduler.shared_modules import import_scheduler_module
+
+BACKFILL_CHUNK_SIZE = 1000
+
+
+def get_machine_group_map(db: Session) -> Dict[str, str]:
+    """取得 MachineId -> GroupId 對照"""
+    return {m_id: g_id for m_id, g_id in db.execute(select(Machine.MachineId, Machine.GroupId))}
+
+
+def resolve_machine_ids(
+    db: Session,
+    machine_ids: Optional[Sequence[str]] = None,
+    group_ids: Optional[Sequence[str]] = None,
+) -> Optional[List[str]]:
+    """將機台 / 群組篩選條件展開為機台清單 (皆未指定時回傳 None 代表不篩選)"""
+    if not machine_ids and not group_ids:
+        return None
+    result = set(machine_ids or [])
+    if group_ids:
+        rows = db.execute(select(Machine.MachineId).where(Machine.GroupId.in_(group_ids)))
+        result.update(m_id for (m_id,) in rows)
+    return sorted(result)
+
+
+def has_segments(db: Session, schedule_id: str) -> bool:
+    """該排程是否已有正規化區段"""
+    stmt = select(ScheduleTaskSegment.id).where(ScheduleTaskSegment.ScheduleId == schedule_id).limit(1)
+    return db.execute(stmt).first() is not None
+
+
+def backfill_segments(db: Session, schedule_id: str, task_segments: List[Dict[str, Any]]) -> int:
+    """
+    由 machineTaskSegment JSON 回填正規化區段 (僅在舊排程第一次被查詢時執行一次)
+
+    Returns:
+        int: 寫入筆數
+    """
+    store = import_scheduler_module("schedule_result_store")
+    rows = [
+        dict(zip(store.TASK_SEGMENT_COLUMNS, row))
+        for row in store.build_segment_rows(schedule_id, task_segments or [], get_machine_group_map(db))
+    ]
+
+    # 同一排程可能被兩個請求同時第一次查詢：以 (ScheduleId, SegmentId) 唯一鍵 + INSERT IGNORE 避免重複回填
+    stmt = insert(ScheduleTaskSegment).prefix_with("IGNORE", dialect="mysql").prefix_with("OR IGNORE", dialect="sqlite")
+    for i in range(0, len(rows), BACKFILL_CHUNK_SIZE):
+        db.execute(stmt, rows[i:i + BACKFILL_CHUNK_SIZE])
+    db.commit()
+    return len(rows)
+
+
+def _window_filter(stmt, schedule_id: str, start: datetime, end: datetime, machine_ids: Optional[List[str]]):
+    stmt = stmt.where(
+        ScheduleTaskSegment.ScheduleId == schedule_id,
+        ScheduleTaskSegment.StartTime < end,
+        ScheduleTaskSegment.EndTime > start,
+    )
+    if machine_ids is not None:
+        stmt = stmt.where(ScheduleTaskSegment.MachineId.in_(machine_ids))
+    return stmt
+
+
+def get_segment_bounds(db: Session, schedule_id: str, machine_ids: Optional[List[str]] = None) -> Dict[str, Any]:
+    """取得排程區段的整體時間範圍與機台清單 (供甘特圖建立時間軸與列)"""
+    base = select(
+        func.min(ScheduleTaskSegment.StartTime),
+        func.max(ScheduleTaskSegment.EndTime),
+        func.count(ScheduleTaskSegment.id),
+    ).where(ScheduleTaskSegment.ScheduleId == schedule_id)
+    if machine_ids is not None:
+        base = base.where(ScheduleTaskSegment.MachineId.in_(machine_ids))
+    min_start, max_end, total = db.execute(base).one()
+
+    machine_stmt = (
+        select(ScheduleTaskSegment.MachineId, ScheduleTaskSegment.GroupId)
+        .where(ScheduleTaskSegment.ScheduleId == schedule_id)
+        .group_by(ScheduleTaskSegment.MachineId, ScheduleTaskSegment.GroupId)
+        .order_by(ScheduleTaskSegment.MachineId)
+    )
+    if machine_ids is not None:
+        machine_stmt = machine_stmt.where(ScheduleTaskSegment.MachineId.in_(machine_ids))
+    machines = [{"MachineId": m_id, "GroupId": g_id} for m_id, g_id in db.execute(machine_stmt)]
+
+    return {"start": min_start, "end": max_end, "total": total, "machines": machines}
+
+
+def query_segments(
+    db: Session,
+    schedule_id: str,
+    start: datetime,
+    end: datetime,
+    machine_ids: Optional[List[str]] = None,
+) -> List[ScheduleTaskSegment]:
+    """查詢與時間視窗重疊的明細區段"""
+    stmt = _window_filter(select(ScheduleTaskSegment), schedule_id, start, end, machine_ids)
+    stmt = stmt.order_by(ScheduleTaskSegment.MachineId, ScheduleTaskSegment.StartTime)
+    return list(db.execute(stmt).scalars())
+
+
+def _origin_seconds(column):
+    """時間點距 BUCKET_ORIGIN 的秒數"""
+    return func.timestampdiff(literal_column("SECOND"), literal(BUCKET_ORIGIN), column)
+
+
+def aggregate_segments(
+    db: Session,
+    schedule_id: str,
+    start: datetime,
+    end: datetime,
+    bucket_minutes: int,
+    machine_ids: Optional[List[str]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    粗粒度彙總：依 (機台, 時間桶, 是否為不可用時段) 分組，回傳每桶的作業數與佔用分鐘數
+
+    時間桶以 1970-01-01 為原點對齊，捲動時同一桶的邊界不變，可被前端快取。
+    區段以時間桶邊界與查詢視窗裁切，跨越多個時間桶的區段在每個重疊的桶各計一次：
+    - 落在單一時間桶內的區段 (絕大多數) 直接在 SQL 分組加總
+    - 跨桶的區段只取出時間欄位，在程式中逐桶裁切後併入
+    """
+    start_seconds = _origin_seconds(ScheduleTaskSegment.StartTime)
+    start_bucket = func.floor(start_seconds / (bucket_minutes * 60))
+    # 結束時間不含邊界 (剛好在桶邊界結束的區段不屬於下一桶)
+    end_bucket = func.floor(
+        func.greatest(start_seconds, _origin_seconds(ScheduleTaskSegment.EndTime) - 1) / (bucket_minutes * 60)
+    )
+    busy_seconds = func.sum(
+        func.timestampdiff(
+            literal_column("SECOND"),
+            func.greatest(ScheduleTaskSegment.StartTime, start),
+            func.least(ScheduleTaskSegment.EndTime, end),
+        )
+    )
+    is_unavailable = case((ScheduleTaskSegment.Booking < 0, 1), else_=0)
+
+    stmt = select(
+        ScheduleTaskSegment.MachineId,
+        start_bucket.label("bucket_idx"),
+        is_unavailable.label("is_unavailable"),
+        func.count(ScheduleTaskSegment.id).label("task_count"),
+        busy_seconds.label("busy_seconds"),
+    )
+    stmt = _window_filter(stmt, schedule_id, start, end, machine_ids).where(start_bucket == end_bucket)
+    stmt = stmt.group_by(ScheduleTaskSegment.MachineId, "bucket_idx", "is_unavailable")
+
+    buckets: Dict[tuple, Dict[str, Any]] = {}
+    for row in db.execute(stmt):
+        key = (row.MachineId, int(row.bucket_idx), bool(row.is_unavailable))
+        buckets[key] = {"task_count": int(row.task_count), "busy_seconds": int(row.busy_seconds or 0)}
+
+    spanning = select(
+        ScheduleTaskSegment.MachineId, ScheduleTaskSegment.StartTime, ScheduleTaskSegment.EndTime,
+        ScheduleTaskSegment.Booking,
+    )
+    spanning = _window_filter(spanning, schedule_id, start, end, machine_ids).where(start_bucket < end_bucket)
+    bucket_size = timedelta(minutes=bucket_minutes)
+    for machine_id, seg_start, seg_end, booking in db.execute(spanning):
+        clipped_start, clipped_end = max(seg_start, start), min(seg_end, end)
+        idx = (clipped_start - BUCKET_ORIGIN) // bucket_size
+        while True:
+            bucket_start = BUCKET_ORIGIN + idx * bucket_size
+            if bucket_start >= clipped_end:
+                break
+            overlap = min(clipped_end, bucket_start + bucket_size) - max(clipped_start, bucket_start)
+            bucket = buckets.setdefault((machine_id, idx, booking < 0), {"task_count": 0, "busy_seconds": 0})
+            bucket["task_count"] += 1
+            bucket["busy_seconds"] += int(overlap.total_seconds())
+            idx += 1
+
+    return [
+        {
+            "MachineId": machine_id,
+            "bucket_idx": bucket_idx,
+            "is_unavailable": unavailable,
+            "task_count": bucket["task_count"],
+            "busy_minutes": bucket["busy_seconds"] // 60,
+        }
+        for (machine_id, bucket_idx, unavailable), bucket in sorted(buckets.items())
+    ]
@@ -0,0 +1,43 @@
+"""
+SchedulerRunMetrics Repository
+排程程式 (後端 worker pool、GUI 常駐 worker、命令列) 每次執行結束都會把各階段耗時寫入 SchedulerRunMetrics，
+根 span ("schedule run") 的 Attributes 含整次執行摘要 (狀態、批次數、Lot 數、求解耗時、目標值、gap)
+"""
+import json
+from typing import Any, Dict, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from domain.models import SchedulerRunMetric
+
+ROOT_SPAN_NAME = "schedule run"
+
+
+def get_last_run(db: Session) -> Optional[Dict[str, Any]]:
+    """取得最近一次排程執行的摘要 (以 idx_span_start 取根 span 最新一列)；尚無紀錄時回傳 None"""
+    row = db.execute(
+        select(
+            SchedulerRunMetric.RunId,
+            SchedulerRunMetric.StartTime,
+            SchedulerRunMetric.DurationMs,
+            SchedulerRunMetric.PeakRssMB,
+            SchedulerRunMetric.Attributes,
+        )
+        .where(SchedulerRunMetric.SpanName == ROOT_SPAN_NAME)
+        .order_by(SchedulerRunMetric.StartTime.desc())
+        .limit(1)
+    ).first()
+    if row is None:
+        return None
+
+    attributes = row.Attributes
+    if isinstance(attributes, str):
+        attributes = json.loads(attributes)
+    return {
+        "run_id": row.RunId,
+        "start_time": row.StartTime,
+        "duration_seconds": row.DurationMs / 1000,
+        "peak_rss_mb": row.PeakRssMB,
+        **(attributes or {}),
+    }
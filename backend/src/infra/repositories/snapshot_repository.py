@@ -0,0 +1,97 @@
+"""
+DynamicSchedulingJob_Snap Repository
+以伺服器端 INSERT ... SELECT 分段複製排程快照，JSON 欄位不經過 Python，記憶體用量與歷史筆數無關
+"""
+from typing import Any, Callable, Iterator, List, Sequence, Tuple
+
+from sqlalchemy import String, Text, delete, func, insert, literal, select
+from sqlalchemy.orm import Session
+
+from domain.models import DynamicSchedulingJob, DynamicSchedulingJobSnap
+
+# 每段複製筆數 (每筆含整份排程 JSON，分段可限制單一語句的暫存與鎖定範圍)
+COPY_CHUNK_SIZE = 200
+
+# 快照與排程主表共用的欄位 (CreateDate 由資料庫於寫入時產生，與原本的 ORM 寫法相同)
+COPY_COLUMNS = (
+    "ScheduleId",
+    "LotPlanRaw",
+    "CreateUser",
+    "PlanSummary",
+    "LotPlanResult",
+    "LotStepResult",
+    "machineTaskSegment",
+    "simulation_end_time",
+)
+
+
+def _copy_in_chunks(
+    db: Session,
+    key_column: Any,
+    filters: Sequence[Any],
+    build_insert: Callable[[List[Any]], Any],
+    chunk_size: int,
+) -> Iterator[Tuple[int, int]]:
+    """
+    依 key_column 分段執行 INSERT ... SELECT
+
+    每段先取出下一段的鍵範圍 (只讀鍵值)，再以範圍條件讓資料庫自行複製該段資料列
+
+    Yields:
+        (copied, total): 每段完成後的累計筆數與總筆數
+    """
+    total = db.execute(select(func.count()).select_from(key_column.table).where(*filters)).scalar() or 0
+    copied = 0
+    last = None
+    while True:
+        stmt = select(key_column).where(*filters).order_by(key_column).limit(chunk_size)
+        if last is not None:
+            stmt = stmt.where(key_column > last)
+        keys = db.execute(stmt).scalars().all()
+        if not keys:
+            break
+        db.execute(build_insert([*filters, key_column >= keys[0], key_column <= keys[-1]]))
+        copied += len(keys)
+        last = keys[-1]
+        yield copied, total
+
+
+def count_current_jobs(db: Session) -> int:
+    return db.execute(select(func.count()).select_from(DynamicSchedulingJob)).scalar() or 0
+
+
+def iter_save_snapshot(
+    db: Session, key_value: str, remark: Any, chunk_size: int = COPY_CHUNK_SIZE
+) -> Iterator[Tuple[int, int]]:
+    """將目前所有 DynamicSchedulingJob 複製為一批快照 (不 commit，由呼叫端決定交易範圍)"""
+    source_columns = [getattr(DynamicSchedulingJob, name) for name in COPY_COLUMNS]
+
+    def build_insert(conditions):
+        return insert(DynamicSchedulingJobSnap).from_select(
+            ["key_value", "remark", *COPY_COLUMNS],
+            select(literal(key_value, String), literal(remark, Text), *source_columns).where(*conditions),
+        )
+
+    yield from _copy_in_chunks(db, DynamicSchedulingJob.ScheduleId, [], build_insert, chunk_size)
+
+
+def iter_restore_snapshot(
+    db: Session, key_value: str, chunk_size: int = COPY_CHUNK_SIZE
+) -> Iterator[Tuple[int, int]]:
+    """清空 DynamicSchedulingJob 並由指定批次的快照複製回來 (不 commit)"""
+    source_columns = [getattr(DynamicSchedulingJobSnap, name) for name in COPY_COLUMNS]
+
+    def build_insert(conditions):
+        return insert(DynamicSchedulingJob).from_select(
+            list(COPY_COLUMNS),
+            select(*source_columns).where(*conditions),
+        )
+
+    db.execute(delete(DynamicSchedulingJob))
+    yield from _copy_in_chunks(
+        db,
+        DynamicSchedulingJobSnap.id,
+        [DynamicSchedulingJobSnap.key_value == key_value],
+        build_insert,
+        chunk_size,
+    )
@@ -0,0 +1,88 @@
+"""
+SolverRunStats Repository
+排程程式每個批次一次求解寫入一列 (回應統計、presolve 摘要、目標值隨時間變化)，以 RunId 分組為一次排程執行
+"""
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import and_, case, func, select
+from sqlalchemy.orm import Session
+
+from domain.models import SolverRunStat
+
+# 非 OPTIMAL 且耗時達時間上限的 95% 視為被時間上限截斷
+TIME_LIMIT_RATIO = 0.95
+
+# 規模比較只需要的欄位 (不讀取 ObjectiveTrace / SearchLog)
+SCALING_COLUMNS = (
+    "RunId", "NumWorkers", "MaxTimeSeconds", "LotCount", "OperationCount", "NumVariables", "PresolvedVariables",
+    "Status", "WallTime", "Gap", "FirstSolutionSeconds", "LastImprovementSeconds", "NumConflicts",
+)
+
+
+def _count(condition):
+    return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+
+def _total(column):
+    return func.coalesce(func.sum(column), 0)
+
+
+def _hit_time_limit():
+    stat = SolverRunStat
+    return and_(stat.Status.in_(("FEASIBLE", "UNKNOWN")), stat.WallTime >= stat.MaxTimeSeconds * TIME_LIMIT_RATIO)
+
+
+def list_runs(db: Session, plan_id: Optional[str] = None, limit: int = 50,
+              run_ids: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """各次排程執行的求解摘要 (依 RunId 彙總各批次)，最新的在前；指定 run_ids 時只取這些執行"""
+    stat = SolverRunStat
+    query = select(
+        stat.RunId.label("run_id"),
+        func.max(stat.PlanID).label("plan_id"),
+        func.max(stat.ScheduleId).label("schedule_id"),
+        func.min(stat.CreatedAt).label("created_at"),
+        func.count().label("batch_count"),
+        _total(stat.LotCount).label("lot_count"),
+        _total(stat.OperationCount).label("operation_count"),
+        func.max(stat.NumVariables).label("max_variables"),
+        func.max(stat.ObjectiveType).label("objective_type"),
+        func.max(stat.NumWorkers).label("num_workers"),
+        func.max(stat.MaxTimeSeconds).label("max_time_seconds"),
+        _total(stat.WallTime).label("wall_time"),
+        func.sum(stat.ObjectiveValue).label("objective"),
+        func.sum(stat.BestBound).label("best_bound"),
+        _total(stat.NumSolutions).label("solutions"),
+        _count(stat.Status == "OPTIMAL").label("optimal_batches"),
+        _count(stat.Status.notin_(("OPTIMAL", "FEASIBLE"))).label("no_solution_batches"),
+        _count(_hit_time_limit()).label("time_limit_batches"),
+    ).group_by(stat.RunId)
+    if plan_id:
+        query = query.where(stat.PlanID == plan_id)
+    if run_ids is not None:
+        query = query.where(stat.RunId.in_(run_ids))
+    rows = db.execute(query.order_by(func.min(stat.CreatedAt).desc()).limit(limit)).mappings().all()
+    return [dict(row) for row in rows]
+
+
+def get_batches(db: Session, run_ids: List[str], include_log: bool = False) -> List[Dict[str, Any]]:
+    """指定執行的各批次統計 (含 ObjectiveTrace；SearchLog 只在 include_log 時讀取)，依 RunId、BatchIndex 排序"""
+    stat = SolverRunStat
+    columns = [column for column in stat.__table__.columns if include_log or column.name != "SearchLog"]
+    rows = db.execute(
+        select(*columns).where(stat.RunId.in_(run_ids)).order_by(stat.RunId, stat.BatchIndex)
+    ).mappings().all()
+    return [dict(row) for row in rows]
+
+
+def get_scaling_rows(db: Session, since: Optional[datetime] = None, plan_id: Optional[str] = None,
+                     limit: int = 5000) -> List[Dict[str, Any]]:
+    """規模 / 參數比較用的批次資料列 (最新的 limit 筆)"""
+    stat = SolverRunStat
+    query = select(*(getattr(stat, column) for column in SCALING_COLUMNS))
+    if since is not None:
+        query = query.where(stat.CreatedAt >= since)
+    if plan_id:
+        query = query.where(stat.PlanID == plan_id)
+    rows = db.execute(query.order_by(stat.CreatedAt.desc()).limit(limit)).mappings().all()
+    return [dict(row) for row in rows]
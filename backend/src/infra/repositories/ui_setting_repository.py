@@ -0,0 +1,34 @@
+"""
+UISetting Repository
+提供排程相關 UI 參數的查詢
+"""
+from datetime import datetime
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from domain.models import UISetting
+
+# 與排程腳本 DEFAULT_START_TIME 相同
+DEFAULT_START_TIME = "2026-01-22 14:00:00"
+START_TIME_SETTINGS = ("simulation_start_time_setting", "simulation_start_time")
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def get_simulation_start_time(db: Session) -> str:
+    """取得排程起點：ui_settings 模擬起始時間 (依 START_TIME_SETTINGS 順序) > 預設值"""
+    rows = db.execute(
+        select(UISetting.parameter_name, UISetting.parameter_value).where(
+            UISetting.parameter_name.in_(START_TIME_SETTINGS)
+        )
+    ).all()
+    values = {name: value for name, value in rows}
+    for name in START_TIME_SETTINGS:
+        value = (values.get(name) or "").strip()
+        if not value:
+            continue
+        try:
+            return datetime.fromisoformat(value).strftime(TIME_FORMAT)
+        except ValueError:
+            print(f"Invalid {name} value: {value}")
+    return DEFAULT_START_TIME
@@ -0,0 +1,191 @@
+"""
+資料變更觸發重排 (debounce + 合併)
+
+工單建立、CheckIn / CheckOut、機台不可用時段異動等事件不再各自觸發完整求解：
+- 事件到達後等待 debounce 時間，期間的新事件會重新計時，整批只提交一次排程
+- 持續有事件時最多延遲 max_delay 秒，避免排程結果過舊
+- 求解執行中到達的事件不合併到執行中作業 (其資料已讀取)，而是在其後排入一個作業；
+  同一時間最多只會有一個排隊中的重排作業
+- 提交失敗 (例如 ScheduleQueueFullError) 時保留事件，以倍增的間隔重試，資料變更不會遺失
+"""
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from core.config import settings
+from infra.db.database import SessionLocal
+from infra.repositories import ui_setting_repository
+from infra.scheduler.schedule_job_manager import ScheduleJob, get_job_manager
+
+
+class RescheduleTrigger:
+    """將短時間內的多個變更事件合併為一次排程提交"""
+
+    def __init__(
+        self,
+        submit: Callable[[], Tuple[ScheduleJob, bool]],
+        debounce_seconds: float,
+        max_delay_seconds: float,
+        retry_max_seconds: float = 300.0,
+    ):
+        self.submit = submit
+        self.debounce_seconds = debounce_seconds
+        self.max_delay_seconds = max(max_delay_seconds, debounce_seconds)
+        self.retry_max_seconds = retry_max_seconds
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        self._pending: Counter = Counter()
+        self._first_event_at: Optional[float] = None
+        self._retry_at: Optional[float] = None   # 提交失敗後的下次重試時間 (期間的新事件不提早提交)
+        self._closed = False
+        self.consecutive_failures = 0
+        self.last_error: Optional[str] = None
+        self.event_count = 0
+        self.submit_count = 0
+        self.last_job_id: Optional[str] = None
+        self.last_submitted_at: Optional[datetime] = None
+
+    def notify(self, reason: str) -> None:
+        """記錄一個資料變更事件並 (重新) 計時"""
+        now = time.monotonic()
+        with self._lock:
+            if self._closed:
+                return
+            self._pending[reason] += 1
+            self.event_count += 1
+            if self._first_event_at is None:
+                self._first_event_at = now
+            deadline = self._first_event_at + self.max_delay_seconds
+            delay = max(0.0, min(self.debounce_seconds, deadline - now))
+            if self._retry_at is not None:
+                delay = max(delay, self._retry_at - now)
+            self._arm(delay)
+
+    def _arm(self, delay: float) -> None:
+        """(重新) 設定提交計時器 (呼叫端須持有鎖)"""
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = threading.Timer(delay, self._fire)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def flush(self) -> Optional[ScheduleJob]:
+        """立即提交待處理的事件 (不等待 debounce)"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        return self._fire()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            self._closed = True
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._pending.clear()
+            self._first_event_at = None
+            self._retry_at = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "debounce_seconds": self.debounce_seconds,
+                "max_delay_seconds": self.max_delay_seconds,
+                "pending_events": dict(self._pending),
+                "event_count": self.event_count,
+                "submit_count": self.submit_count,
+                "last_job_id": self.last_job_id,
+                "last_submitted_at": self.last_submitted_at,
+                "consecutive_failures": self.consecutive_failures,
+                "last_error": self.last_error,
+            }
+
+    def _fire(self) -> Optional[ScheduleJob]:
+        with self._lock:
+            self._timer = None
+            pending, self._pending = self._pending, Counter()
+            self._first_event_at = None
+        if not pending:
+            return None
+
+        try:
+            job, coalesced = self.submit()
+        except Exception as e:
+            self._retry(pending, e)
+            return None
+
+        with self._lock:
+            self.consecutive_failures = 0
+            self.last_error = None
+            self._retry_at = None
+            self.submit_count += 1
+            self.last_job_id = job.job_id
+            self.last_submitted_at = datetime.now()
+        action = "merged into" if coalesced else "queued as"
+        print(f"Reschedule after {sum(pending.values())} change events {dict(pending)} {action} {job.job_id}")
+        return job
+
+    def _retry(self, pending: Counter, error: Exception) -> None:
+        """提交失敗：事件放回待處理並以倍增的間隔重新計時 (debounce 秒數起，上限 retry_max_seconds)"""
+        with self._lock:
+            if self._closed:
+                return
+            self._pending.update(pending)
+            self.consecutive_failures += 1
+            self.last_error = str(error)
+            delay = min(self.debounce_seconds * 2 ** (self.consecutive_failures - 1), self.retry_max_seconds)
+            now = time.monotonic()
+            self._retry_at = now + delay
+            if self._first_event_at is None:
+                self._first_event_at = now
+            self._arm(delay)
+        print(f"Reschedule trigger failed ({dict(pending)}): {error}; retrying in {delay:.1f}s")
+
+
+def _submit_reschedule() -> Tuple[ScheduleJob, bool]:
+    """以 ui_settings 的模擬起始時間提交重排 (只合併排隊中的作業)"""
+    db = SessionLocal()
+    try:
+        start_time = ui_setting_repository.get_simulation_start_time(db)
+    finally:
+        db.close()
+    return get_job_manager().submit(
+        start_time,
+        max_active=settings.SCHEDULER_MAX_QUEUED_JOBS,
+        coalesce_running=False,
+    )
+
+
+_trigger: Optional[RescheduleTrigger] = None
+_trigger_lock = threading.Lock()
+
+
+def get_reschedule_trigger() -> RescheduleTrigger:
+    """取得全域重排觸發器 (延遲建立)"""
+    global _trigger
+    with _trigger_lock:
+        if _trigger is None:
+            _trigger = RescheduleTrigger(
+                submit=_submit_reschedule,
+                debounce_seconds=settings.RESCHEDULE_DEBOUNCE_SECONDS,
+                max_delay_seconds=settings.RESCHEDULE_MAX_DELAY_SECONDS,
+                retry_max_seconds=settings.RESCHEDULE_RETRY_MAX_SECONDS,
+            )
+        return _trigger
+
+
+def notify_schedule_change(reason: str) -> None:
+    """資料變更後呼叫 (RESCHEDULE_TRIGGER_ENABLED 關閉時不做任何事)"""
+    if settings.RESCHEDULE_TRIGGER_ENABLED:
+        get_reschedule_trigger().notify(reason)
+
+
+def shutdown_reschedule_trigger() -> None:
+    global _trigger
+    with _trigger_lock:
+        trigger, _trigger = _trigger, None
+    if trigger is not None:
+        trigger.shutdown()
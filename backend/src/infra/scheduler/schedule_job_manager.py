@@ -0,0 +1,467 @@
+"""
+排程作業佇列 (Scheduler-as-a-service)
+
+以常駐的 ProcessPoolExecutor 執行增量排程，取代每次重新啟動 Python 直譯器與 OR-Tools 的子程序：
+- worker 啟動時即匯入排程模組 (OR-Tools 只載入一次)，之後的求解直接呼叫 run_incremental_schedule()
+- 相同參數的請求在佇列中或執行中時直接合併為同一個作業
+- 同時執行的求解數受 SCHEDULER_MAX_CONCURRENT_JOBS 限制，避免求解佔滿 CPU 拖慢 API
+- worker 的進度與輸出經由 multiprocessing.Queue 回傳，供 SSE 串流
+- worker 異常終止 (BrokenProcessPool) 時捨棄整個 pool，下一次提交重新建立 pool、事件佇列與接收執行緒
+"""
+import contextlib
+import importlib
+import multiprocessing
+import os
+import sys
+import threading
+import traceback
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from core.config import settings
+from infra.cache.response_cache import schedule_response_cache
+from infra.metrics.registry import Counter, Histogram
+
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_SUCCEEDED = "succeeded"
+STATUS_FAILED = "failed"
+STATUS_CANCELLED = "cancelled"
+
+# run_incremental_schedule() 求解完成但結果未寫入資料庫時回傳的狀態
+RESULT_SAVE_FAILED = "save_failed"
+
+ACTIVE_STATUSES = (STATUS_QUEUED, STATUS_RUNNING)
+FINISHED_STATUSES = (STATUS_SUCCEEDED, STATUS_FAILED, STATUS_CANCELLED)
+
+# 每個作業保留的輸出行數上限 (SSE 重新連線時可補送)
+MAX_LOG_LINES = 2000
+
+# 作業耗時以秒計，求解上限預設 30 秒 / 批次，多批次可達數分鐘
+JOB_DURATION_BUCKETS = (1, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+
+schedule_jobs_finished = Counter(
+    "aps_schedule_jobs_finished_total",
+    "Schedule jobs finished in this API process, by final status",
+    ("status",),
+)
+schedule_job_duration = Histogram(
+    "aps_schedule_job_duration_seconds",
+    "Schedule job run time from worker start to finish",
+    ("status",),
+    buckets=JOB_DURATION_BUCKETS,
+)
+schedule_job_wait = Histogram(
+    "aps_schedule_job_queue_wait_seconds",
+    "Time schedule jobs spent queued before a worker picked them up",
+    buckets=JOB_DURATION_BUCKETS,
+)
+
+# ---------------------------------------------------------------------------
+# worker 程序端
+# ---------------------------------------------------------------------------
+_worker_queue = None
+_scheduler_module = None
+
+
+class _QueueWriter:
+    """將 print 輸出逐行轉送到父程序 (取代 stdout)"""
+
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        self._buffer = ""
+
+    def write(self, text: str) -> int:
+        self._buffer += text
+        while "\n" in self._buffer:
+            line, self._buffer = self._buffer.split("\n", 1)
+            if line.strip():
+                _worker_queue.put((self.job_id, "log", line))
+        return len(text)
+
+    def flush(self) -> None:
+        if self._buffer.strip():
+            _worker_queue.put((self.job_id, "log", self._buffer))
+        self._buffer = ""
+
+
+def _init_worker(event_queue, scheduler_dir: str, module_name: str) -> None:
+    """worker 初始化：切換到排程程式目錄並預先匯入模組 (保持引擎常駐)"""
+    global _worker_queue, _scheduler_module
+    _worker_queue = event_queue
+    if scheduler_dir not in sys.path:
+        sys.path.insert(0, scheduler_dir)
+    os.chdir(scheduler_dir)
+    _scheduler_module = importlib.import_module(module_name)
+    # 排程模組的 OR-Tools 改為延遲匯入，worker 啟動時先行載入以維持常駐引擎
+    preload = getattr(_scheduler_module, "preload_solver", None)
+    if preload is not None:
+        preload()
+
+
+def _warm_up() -> int:
+    """預熱用的空作業 (觸發 worker 啟動與模組匯入)"""
+    return os.getpid()
+
+
+def _run_job(job_id: str, start_time: str) -> Dict[str, Any]:
+    """
+    在 worker 程序中執行一次排程
+
+    結束狀態也經由事件佇列回報，確保父程序先收到所有輸出再標記作業完成；
+    失敗事件的內容為 (錯誤訊息, 結果)，結果未寫入資料庫 (save_failed) 也以失敗結束並保留結果摘要
+    """
+    _worker_queue.put((job_id, "started", os.getpid()))
+
+    def progress(percent: int, message: str) -> None:
+        _worker_queue.put((job_id, "progress", (percent, message)))
+
+    writer = _QueueWriter(job_id)
+    with contextlib.redirect_stdout(writer), contextlib.redirect_stderr(writer):
+        try:
+            result = _scheduler_module.run_incremental_schedule(start_time, progress=progress)
+        except BaseException as e:
+            writer.flush()
+            error = "".join(traceback.format_exception_only(type(e), e)).strip()
+            _worker_queue.put((job_id, STATUS_FAILED, (error, None)))
+            raise
+        writer.flush()
+    if isinstance(result, dict) and result.get("status") == RESULT_SAVE_FAILED:
+        error = f"Schedule solved but saving results to the database failed (plan_id={result.get('plan_id')})"
+        _worker_queue.put((job_id, STATUS_FAILED, (error, result)))
+    else:
+        _worker_queue.put((job_id, STATUS_SUCCEEDED, result))
+    return result
+
+
+# ---------------------------------------------------------------------------
+# API 程序端
+# ---------------------------------------------------------------------------
+class ScheduleQueueFullError(Exception):
+    """排隊與執行中的作業數已達上限"""
+    pass
+
+
+class ScheduleJob:
+    """排程作業狀態"""
+
+    def __init__(self, start_time: str):
+        self.job_id = f"JOB_{datetime.now().strftime('%Y%m%d%H%M%S')}_{uuid.uuid4().hex[:6]}"
+        self.start_time = start_time
+        self.status = STATUS_QUEUED
+        self.progress = 0
+        self.message = "Queued"
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.request_count = 1
+        self.created_at = datetime.now()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.logs: List[str] = []
+        self.log_offset = 0   # 已被截斷的行數，讓 SSE 游標維持單調遞增
+        self.version = 0      # 每次狀態變更遞增，SSE 依此判斷是否推送
+        self.future: Optional[Future] = None
+
+    @property
+    def coalesce_key(self) -> Tuple[str]:
+        return (self.start_time,)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "start_time": self.start_time,
+            "status": self.status,
+            "progress": self.progress,
+            "message": self.message,
+            "result": self.result,
+            "error": self.error,
+            "request_count": self.request_count,
+            "created_at": self.created_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+
+class ScheduleJobManager:
+    """執行緒安全的排程作業佇列 (內部以 ProcessPoolExecutor 執行)"""
+
+    def __init__(self, max_workers: int, scheduler_dir: str, module_name: str, history_size: int = 50):
+        self.max_workers = max_workers
+        self.scheduler_dir = scheduler_dir
+        self.module_name = module_name
+        self.history_size = history_size
+        self._jobs: Dict[str, ScheduleJob] = {}
+        self._order: List[str] = []
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._event_queue = None
+        self._listener: Optional[threading.Thread] = None
+        self._listeners: List[Callable[[ScheduleJob], None]] = []
+
+    # ---- 生命週期 -----------------------------------------------------------
+    def start(self, prewarm: bool = False) -> None:
+        """建立 worker pool (spawn 模式，不繼承 API 程序的連線與執行緒)"""
+        with self._lock:
+            executor = self._ensure_pool()
+        if prewarm:
+            for _ in range(self.max_workers):
+                executor.submit(_warm_up)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor = self._executor
+        if executor is not None:
+            self._discard_pool(executor)
+
+    def _ensure_pool(self) -> ProcessPoolExecutor:
+        """取得目前的 pool，尚未建立 (或已捨棄) 時建立新的 pool、事件佇列與接收執行緒 (呼叫端須持有鎖)"""
+        if self._executor is not None:
+            return self._executor
+        ctx = multiprocessing.get_context("spawn")
+        self._event_queue = ctx.Queue()
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=ctx,
+            initializer=_init_worker,
+            initargs=(self._event_queue, self.scheduler_dir, self.module_name),
+        )
+        self._listener = threading.Thread(target=self._listen, args=(self._event_queue,),
+                                          name="schedule-job-events", daemon=True)
+        self._listener.start()
+        return self._executor
+
+    def _discard_pool(self, executor: ProcessPoolExecutor) -> None:
+        """關閉指定的 pool 並停止其事件接收執行緒；已被替換的 pool 不影響目前的 pool"""
+        with self._lock:
+            if self._executor is not executor:
+                return
+            event_queue = self._event_queue
+            self._executor = None
+            self._event_queue = None
+            self._listener = None
+        executor.shutdown(wait=False, cancel_futures=True)
+        if event_queue is not None:
+            event_queue.put(None)
+
+    def add_listener(self, callback: Callable[[ScheduleJob], None]) -> None:
+        """註冊作業結束時的回呼 (例如清空回應快取、串接下一次排程)"""
+        self._listeners.append(callback)
+
+    # ---- 作業操作 -----------------------------------------------------------
+    def submit(self, start_time: str, max_active: Optional[int] = None,
+               coalesce_running: bool = True) -> Tuple[ScheduleJob, bool]:
+        """
+        提交排程請求
+
+        Args:
+            start_time: 排程起點 ('YYYY-MM-DD HH:MM:SS')
+            max_active: 排隊與執行中作業數上限 (合併到既有作業時不受限制)
+            coalesce_running: 是否合併到執行中的作業；資料已變更時應為 False，
+                              只合併排隊中的作業 (開始時才讀取資料)，否則在執行中作業之後排入新作業
+
+        Returns:
+            (job, coalesced): coalesced 為 True 代表合併到既有的排隊 / 執行中作業
+
+        Raises:
+            ScheduleQueueFullError: 作業數已達上限
+        """
+        with self._lock:
+            active = 0
+            for job_id in reversed(self._order):
+                job = self._jobs[job_id]
+                if job.status not in ACTIVE_STATUSES:
+                    continue
+                if job.coalesce_key == (start_time,) and (coalesce_running or job.status == STATUS_QUEUED):
+                    job.request_count += 1
+                    job.version += 1
+                    return job, True
+                active += 1
+            if max_active is not None and active >= max_active:
+                raise ScheduleQueueFullError(f"{active} schedule jobs are already queued or running")
+
+            job = ScheduleJob(start_time)
+            executor = self._ensure_pool()
+            try:
+                job.future = executor.submit(_run_job, job.job_id, start_time)
+            except BrokenProcessPool:
+                broken = executor
+            else:
+                broken = None
+        if broken is not None:
+            # worker 已異常終止：重建 pool 後重試一次 (仍失敗時例外往上拋，作業不會留在佇列中)
+            print("Schedule worker pool is broken, restarting it")
+            self._discard_pool(broken)
+            with self._lock:
+                executor = self._ensure_pool()
+                job.future = executor.submit(_run_job, job.job_id, start_time)
+        with self._lock:
+            # 送出成功後才登記作業
+            self._jobs[job.job_id] = job
+            self._order.append(job.job_id)
+            self._trim_history()
+        job.future.add_done_callback(lambda f, j=job, e=executor: self._on_done(j, f, e))
+        return job, False
+
+    def cancel(self, job_id: str) -> bool:
+        """取消排隊中的作業 (執行中的求解無法中斷)"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status != STATUS_QUEUED or job.future is None:
+                return False
+            future = job.future
+        # 取消成功時 done callback 會同步執行並取得鎖，需在鎖外呼叫
+        return future.cancel()
+
+    def get(self, job_id: str) -> Optional[ScheduleJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list_jobs(self) -> List[ScheduleJob]:
+        with self._lock:
+            return [self._jobs[job_id] for job_id in reversed(self._order)]
+
+    def active_count(self) -> int:
+        with self._lock:
+            return sum(1 for job in self._jobs.values() if job.status in ACTIVE_STATUSES)
+
+    def status_counts(self) -> Dict[str, int]:
+        """排隊中 / 執行中的作業數 (佇列深度)"""
+        with self._lock:
+            counts = {status: 0 for status in ACTIVE_STATUSES}
+            for job in self._jobs.values():
+                if job.status in counts:
+                    counts[job.status] += 1
+            return counts
+
+    def snapshot(self, job_id: str, log_cursor: int = 0) -> Optional[Tuple[Dict[str, Any], List[str], int, int]]:
+        """
+        取得作業狀態與游標之後的新輸出 (供 SSE 使用)
+
+        Returns:
+            (state, new_logs, next_cursor, version)
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            start = max(log_cursor, job.log_offset) - job.log_offset
+            new_logs = job.logs[start:]
+            return job.to_dict(), new_logs, job.log_offset + len(job.logs), job.version
+
+    # ---- 內部 ---------------------------------------------------------------
+    def _trim_history(self) -> None:
+        finished = [job_id for job_id in self._order if self._jobs[job_id].status in FINISHED_STATUSES]
+        for job_id in finished[:max(0, len(self._order) - self.history_size)]:
+            self._order.remove(job_id)
+            del self._jobs[job_id]
+
+    def _listen(self, event_queue) -> None:
+        """接收 worker 回報的開始 / 進度 / 輸出 / 結束事件 (每個 pool 各自一個事件佇列)"""
+        while True:
+            item = event_queue.get()
+            if item is None:
+                return
+            job_id, kind, payload = item
+            if kind == STATUS_SUCCEEDED:
+                self._finish(job_id, STATUS_SUCCEEDED, result=payload)
+                continue
+            if kind == STATUS_FAILED:
+                error, result = payload
+                self._finish(job_id, STATUS_FAILED, result=result, error=error)
+                continue
+            with self._lock:
+                job = self._jobs.get(job_id)
+                if job is None or job.status in FINISHED_STATUSES:
+                    continue
+                if kind == "started":
+                    job.status = STATUS_RUNNING
+                    job.started_at = datetime.now()
+                    job.message = "Running"
+                elif kind == "progress":
+                    job.progress, job.message = payload
+                elif kind == "log":
+                    job.logs.append(payload)
+                    if len(job.logs) > MAX_LOG_LINES:
+                        overflow = len(job.logs) - MAX_LOG_LINES
+                        del job.logs[:overflow]
+                        job.log_offset += overflow
+                job.version += 1
+
+    def _on_done(self, job: ScheduleJob, future: Future, executor: ProcessPoolExecutor) -> None:
+        """
+        Future 完成回呼：只處理取消與 worker 異常終止 (例如 BrokenProcessPool)
+
+        正常結束由 worker 經事件佇列回報 (見 _run_job)；pool 損壞時捨棄，下一次提交重新建立
+        """
+        if future.cancelled():
+            self._finish(job.job_id, STATUS_CANCELLED)
+        elif future.exception() is not None:
+            exc = future.exception()
+            self._finish(job.job_id, STATUS_FAILED, error="".join(traceback.format_exception_only(type(exc), exc)).strip())
+            if isinstance(exc, BrokenProcessPool):
+                self._discard_pool(executor)
+
+    def _finish(self, job_id: str, status: str, result: Optional[Dict[str, Any]] = None,
+                error: Optional[str] = None) -> None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status in FINISHED_STATUSES:
+                return
+            job.status = status
+            job.finished_at = datetime.now()
+            job.result = result
+            job.error = error
+            if status == STATUS_SUCCEEDED:
+                job.progress = 100
+            job.message = {STATUS_SUCCEEDED: "Completed", STATUS_FAILED: "Failed", STATUS_CANCELLED: "Cancelled"}[status]
+            job.version += 1
+        for callback in self._listeners:
+            try:
+                callback(job)
+            except Exception as e:
+                print(f"Schedule job listener error: {e}")
+
+
+_manager: Optional[ScheduleJobManager] = None
+_manager_lock = threading.Lock()
+
+
+def _invalidate_cache_on_success(job: ScheduleJob) -> None:
+    """新排程寫入後清空排程讀取快取"""
+    if job.status == STATUS_SUCCEEDED:
+        schedule_response_cache.invalidate()
+
+
+def _record_job_metrics(job: ScheduleJob) -> None:
+    """作業結束時更新 /metrics 的作業計數與耗時分布"""
+    schedule_jobs_finished.inc(status=job.status)
+    if job.started_at is not None:
+        schedule_job_wait.observe((job.started_at - job.created_at).total_seconds())
+        if job.finished_at is not None:
+            schedule_job_duration.observe((job.finished_at - job.started_at).total_seconds(), status=job.status)
+
+
+def get_job_manager() -> ScheduleJobManager:
+    """取得全域排程作業佇列 (延遲建立，匯入本模組時不會啟動任何程序)"""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = ScheduleJobManager(
+                max_workers=settings.SCHEDULER_MAX_CONCURRENT_JOBS,
+                scheduler_dir=settings.SCHEDULER_BASE_DIR,
+                module_name=settings.SCHEDULER_MODULE,
+            )
+            _manager.add_listener(_invalidate_cache_on_success)
+            _manager.add_listener(_record_job_metrics)
+        return _manager
+
+
+def shutdown_job_manager() -> None:
+    global _manager
+    with _manager_lock:
+        manager, _manager = _manager, None
+    if manager is not None:
+        manager.shutdown()
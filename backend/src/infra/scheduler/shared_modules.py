@@ -0,0 +1,17 @@
+"""
+排程程式共用模組載入
+schedule_result_store 等模組放在排程程式目錄 (SCHEDULER_BASE_DIR；docker 以 volume 掛載到 /)，
+後端需要與排程程式相同的資料列組裝邏輯時由此載入，不另外維護一份
+"""
+import importlib
+import sys
+from types import ModuleType
+
+from core.config import settings
+
+
+def import_scheduler_module(module_name: str) -> ModuleType:
+    """由排程程式目錄匯入模組 (目錄加在 sys.path 最後，不遮蔽後端自己的模組)"""
+    if settings.SCHEDULER_BASE_DIR not in sys.path:
+        sys.path.append(settings.SCHEDULER_BASE_DIR)
+    return importlib.import_module(module_name)
@@ -1,10 +1,17 @@
 """
 FastAPI 主應用程式
 """
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
 from core.config import settings
+from infra.db.async_database import async_engine
+from infra.db.database import SessionLocal
+from infra.metrics.exporter import render_metrics
+from infra.metrics.http_metrics import PrometheusMiddleware
+from infra.metrics.registry import CONTENT_TYPE as METRICS_CONTENT_TYPE
+from infra.scheduler.schedule_job_manager import get_job_manager, shutdown_job_manager
+from infra.scheduler.reschedule_trigger import shutdown_reschedule_trigger
 from api.v1.routers import (
     lots,
     lot_operations,
@@ -16,7 +23,10 @@ from api.v1.routers import (
     simulation_data,
     dynamic_scheduling_job_snap,
     schedule,
-    automation
+    schedule_jobs,
+    automation,
+    kpi,
+    solver_stats
 )
 
 # 建立 FastAPI 應用程式
@@ -35,6 +45,9 @@ app = FastAPI(
     - 動態排程作業管理 (DynamicSchedulingJobs)
     - UI 介面參數管理 (UI Settings)
     - 模擬結果追蹤管理 (Simulation Data)
+    - 排程作業佇列 (Schedule Jobs)
+    - 儀表板 KPI (KPI)
+    - 求解統計 (Solver Stats)
     """,
     docs_url="/docs",
     redoc_url="/redoc",
@@ -47,11 +60,15 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Total-Count"],
 )
 
 # 設定 GZip 壓縮 (對於大型 JSON 如 machineTaskSegment 特別重要)
 app.add_middleware(GZipMiddleware, minimum_size=1000)
 
+# 記錄各路由延遲 (最外層，包含 CORS 與 GZip 的處理時間)
+app.add_middleware(PrometheusMiddleware)
+
 # 註冊路由
 app.include_router(lots.router, prefix=settings.API_PREFIX)
 app.include_router(lot_operations.router, prefix=settings.API_PREFIX)
@@ -63,11 +80,34 @@ app.include_router(ui_settings.router, prefix=settings.API_PREFIX)
 app.include_router(simulation_data.router, prefix=settings.API_PREFIX)
 app.include_router(dynamic_scheduling_job_snap.router, prefix=settings.API_PREFIX)
 app.include_router(automation.router, prefix=settings.API_PREFIX)
+app.include_router(schedule_jobs.router, prefix=settings.API_PREFIX)
+app.include_router(kpi.router, prefix=settings.API_PREFIX)
+app.include_router(solver_stats.router, prefix=settings.API_PREFIX)
 
 # 專為甘特圖設計的排程 API (在 /api 路徑下,不是 /api/v1)
 app.include_router(schedule.router, prefix="/api")
 
 
+@app.on_event("startup")
+def start_schedule_workers():
+    """預先啟動排程 worker (匯入 OR-Tools)，第一次求解不需等待冷啟動"""
+    if settings.SCHEDULER_POOL_PREWARM:
+        get_job_manager().start(prewarm=True)
+
+
+@app.on_event("shutdown")
+async def dispose_async_engine():
+    """關閉非同步連線池"""
+    await async_engine.dispose()
+
+
+@app.on_event("shutdown")
+def stop_schedule_workers():
+    """停止重排觸發器並關閉排程 worker pool"""
+    shutdown_reschedule_trigger()
+    shutdown_job_manager()
+
+
 @app.get("/")
 def root():
     """根路徑"""
@@ -85,6 +125,12 @@ def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus 指標 (API 延遲、DB 連線池、排程佇列與最近一次排程摘要)"""
+    return Response(content=render_metrics(SessionLocal), media_type=METRICS_CONTENT_TYPE)
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
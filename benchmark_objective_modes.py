@@ -0,0 +1,264 @@
+"""
+多目標合成方式基準測試 (weighted vs lexicographic)
+
+以隨機產生的彈性零工排程 (與增量排程相同的建模：每站可選群組內任一機台、前後站順序、NoOverlap)
+比較兩種多目標合成方式在相同時間上限與 workers 下的解品質與求解時間：
+- weighted：原本的放大係數加權和
+- lexicographic：lexicographic_solve.solve_lexicographic 依序求解
+
+目標組合 (--objective)：
+- weighted_delay：Priority 加權延遲 → makespan        (weighted = sum(delay) * 1000 + makespan)
+- machine_balance：makespan → 機台工作時間差          (weighted = makespan * 1000 + balance_penalty)
+- weighted_completion：加權完成時間 → makespan        (weighted = alpha_int * wc + beta_int * makespan)
+
+不需要資料庫。使用方式：
+    python benchmark_objective_modes.py --lots 20 40 80 --seeds 3 --time-limit 20
+    python benchmark_objective_modes.py --objective machine_balance --output balance.json
+
+解品質以 (主要目標, 次要目標) 依序比較；另列出以 weighted 公式計算的值供參考。
+weighted_completion 的 weighted 模式是 α / β 的折衷 (本來就不以主要目標優先)，依序比較對它不公平：
+只列出兩種模式的各目標值，不判定優劣。
+"""
+import sys
+import os
+import json
+import time
+import random
+import argparse
+from typing import Any, Dict, List
+
+from ortools.sat.python import cp_model
+
+from lexicographic_solve import solve_lexicographic
+
+# 設定 UTF-8 編碼輸出（解決 Windows 控制台編碼問題）
+if sys.platform == 'win32':
+    import io
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+OBJECTIVES = ("weighted_delay", "machine_balance", "weighted_completion")
+MODES = ("weighted", "lexicographic")
+# weighted 公式以放大係數近似「先顧主要目標」的目標組合 (可依 (主要, 次要) 依序判定優劣)
+LEXICOGRAPHIC_OBJECTIVES = ("weighted_delay", "machine_balance")
+VERDICTS = ("lexicographic", "weighted", "tie")
+
+
+def generate_instance(lot_count, operation_count, group_count, seed):
+    """產生隨機 Lot (Priority、DueDate 以分鐘計) 與機台群組"""
+    rng = random.Random(seed)
+    machine_groups = {f"G{g + 1:02d}": [f"G{g + 1:02d}-{m + 1}" for m in range(rng.randint(2, 4))]
+                      for g in range(group_count)}
+    groups = list(machine_groups)
+    lots = []
+    for index in range(lot_count):
+        operations = [(f"STEP{k + 1}", rng.choice(groups), rng.randint(10, 120)) for k in range(operation_count)]
+        work = sum(duration for _, _, duration in operations)
+        lots.append({
+            "LotId": f"LOT{index + 1:04d}",
+            "Priority": rng.randint(1, 100),
+            "DueMinutes": int(work * rng.uniform(1.0, 3.0)) + rng.randint(0, 60 * 24),
+            "Operations": operations,
+        })
+    return lots, machine_groups
+
+
+def build_model(lots, machine_groups, objective, alpha=0.5, beta=0.5):
+    """
+    建立模型與兩種模式共用的目標運算式
+
+    Returns:
+        tuple: (model, stages, weighted_expression)
+            stages: [(名稱, 運算式)] 依重要性排序 (lexicographic 使用)
+            weighted_expression: 原本的放大係數加權和 (weighted 使用)
+    """
+    model = cp_model.CpModel()
+    horizon = sum(duration for lot in lots for _, _, duration in lot["Operations"])
+    machines = {m: [] for group in machine_groups.values() for m in group}
+    lot_ends = []
+
+    for lot in lots:
+        lot_id = lot["LotId"]
+        prev_end = 0
+        for step, group, duration in lot["Operations"]:
+            start = model.NewIntVar(0, horizon, f"{lot_id}_{step}_start")
+            end = model.NewIntVar(0, horizon, f"{lot_id}_{step}_end")
+            model.Add(start >= prev_end)
+            presents = []
+            for m in machine_groups[group]:
+                present = model.NewBoolVar(f"{lot_id}_{step}_p_{m}")
+                machines[m].append(model.NewOptionalIntervalVar(start, duration, end, present, f"{lot_id}_{step}_{m}"))
+                presents.append(present)
+            model.AddExactlyOne(presents)
+            prev_end = end
+        lot_ends.append(prev_end)
+
+    for intervals in machines.values():
+        if intervals:
+            model.AddNoOverlap(intervals)
+
+    makespan = model.NewIntVar(0, horizon, "makespan")
+    model.AddMaxEquality(makespan, lot_ends)
+
+    if objective == "weighted_delay":
+        delays = []
+        for lot, lot_end in zip(lots, lot_ends):
+            delay = model.NewIntVar(0, horizon, f"{lot['LotId']}_delay")
+            model.Add(delay >= lot_end - lot["DueMinutes"])
+            delays.append(delay * lot["Priority"])
+        tardiness = sum(delays)
+        return model, [("weighted_tardiness", tardiness), ("makespan", makespan)], tardiness * 1000 + makespan
+
+    if objective == "machine_balance":
+        work_times = []
+        for m, intervals in machines.items():
+            work = model.NewIntVar(0, horizon, f"work_{m}")
+            model.Add(work == sum(interval.SizeExpr() for interval in intervals))
+            work_times.append(work)
+        min_work = model.NewIntVar(0, horizon, "min_work")
+        max_work = model.NewIntVar(0, horizon, "max_work")
+        model.AddMinEquality(min_work, work_times)
+        model.AddMaxEquality(max_work, work_times)
+        balance = max_work - min_work
+        return model, [("makespan", makespan), ("balance", balance)], makespan * 1000 + balance
+
+    weighted_completion = sum(lot_end * lot["Priority"] for lot, lot_end in zip(lots, lot_ends))
+    weighted = int(alpha * 100) * weighted_completion + int(beta * 100) * makespan
+    return model, [("weighted_completion", weighted_completion), ("makespan", makespan)], weighted
+
+
+def run_case(lots, machine_groups, objective, mode, time_limit, workers, seed, tolerance):
+    """以指定模式求解一次，回傳狀態、耗時與各目標值"""
+    model, stages, weighted_expression = build_model(lots, machine_groups, objective)
+
+    def make_solver():
+        solver = cp_model.CpSolver()
+        solver.parameters.max_time_in_seconds = time_limit
+        solver.parameters.num_search_workers = workers
+        solver.parameters.random_seed = seed
+        return solver
+
+    started = time.perf_counter()
+    if mode == "lexicographic":
+        status, solver, stage_results = solve_lexicographic(
+            cp_model, model, stages, make_solver, time_limit, tolerance=tolerance
+        )
+    else:
+        model.Minimize(weighted_expression)
+        solver = make_solver()
+        status = solver.Solve(model)
+        stage_results = []
+    elapsed = time.perf_counter() - started
+
+    result = {"mode": mode, "status": solver.StatusName(status), "seconds": round(elapsed, 3),
+              "primary": None, "secondary": None, "weighted": None,
+              "stages": [{key: stage[key] for key in ("stage", "status", "objective", "wall_time")}
+                         for stage in stage_results]}
+    if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        result["primary"] = solver.Value(stages[0][1])
+        result["secondary"] = solver.Value(stages[1][1])
+        result["weighted"] = solver.Value(weighted_expression)
+    return result
+
+
+def compare(objective, weighted, lexicographic):
+    """
+    (主要, 次要) 依序比較：回傳 'lexicographic' / 'weighted' / 'tie'
+
+    不在 LEXICOGRAPHIC_OBJECTIVES 的目標組合 (weighted_completion) 回傳 None (不判定)
+    """
+    if objective not in LEXICOGRAPHIC_OBJECTIVES:
+        return None
+    if lexicographic["primary"] is None or weighted["primary"] is None:
+        if lexicographic["primary"] is weighted["primary"]:
+            return "tie"
+        return "weighted" if lexicographic["primary"] is None else "lexicographic"
+    a = (weighted["primary"], weighted["secondary"])
+    b = (lexicographic["primary"], lexicographic["secondary"])
+    return "tie" if a == b else ("lexicographic" if b < a else "weighted")
+
+
+def run_benchmark(args) -> Dict[str, Any]:
+    cases = []
+    for lot_count in args.lots:
+        for seed in range(1, args.seeds + 1):
+            lots, machine_groups = generate_instance(lot_count, args.ops, args.groups, seed)
+            results = {mode: run_case(lots, machine_groups, args.objective, mode, args.time_limit, args.workers,
+                                      seed, args.tolerance)
+                       for mode in MODES}
+            case = {"lots": lot_count, "operations": lot_count * args.ops, "seed": seed, **results,
+                    "better": compare(args.objective, results["weighted"], results["lexicographic"])}
+            cases.append(case)
+            print_case(case)
+    return {"objective": args.objective, "time_limit": args.time_limit, "workers": args.workers,
+            "tolerance": args.tolerance, "cases": cases, "summary": summarize(cases)}
+
+
+def summarize(cases: List[Dict[str, Any]]) -> Dict[str, Any]:
+    summary = {"cases": len(cases), "better": None}
+    if any(case["better"] is not None for case in cases):
+        summary["better"] = {key: sum(1 for c in cases if c["better"] == key) for key in VERDICTS}
+    for mode in MODES:
+        runs = [case[mode] for case in cases]
+        summary[mode] = {
+            "avg_seconds": round(sum(run["seconds"] for run in runs) / len(runs), 3) if runs else None,
+            "optimal": sum(1 for run in runs if run["status"] == "OPTIMAL"),
+            "no_solution": sum(1 for run in runs if run["primary"] is None),
+        }
+    return summary
+
+
+def _value(value):
+    return f"{value:,}" if value is not None else "-"
+
+
+def print_case(case):
+    verdict = f" -> better: {case['better']}" if case["better"] is not None else ""
+    print(f"\n{case['lots']} lots / {case['operations']} ops (seed {case['seed']}){verdict}")
+    for mode in MODES:
+        run = case[mode]
+        print(f"  {mode:<14} {run['status']:>10} {run['seconds']:8.2f}s  primary={_value(run['primary']):>14}  "
+              f"secondary={_value(run['secondary']):>10}  weighted={_value(run['weighted'])}")
+    sys.stdout.flush()
+
+
+def print_summary(report):
+    summary = report["summary"]
+    print(f"\n=== Summary ({report['objective']}, {report['time_limit']}s, {report['workers']} workers) ===")
+    if summary["better"] is not None:
+        print(f"  better: lexicographic {summary['better']['lexicographic']} / weighted {summary['better']['weighted']} "
+              f"/ tie {summary['better']['tie']}  (of {summary['cases']})")
+    else:
+        print(f"  no verdict: weighted mode blends objectives with alpha/beta, compare the values above "
+              f"({summary['cases']} cases)")
+    for mode in MODES:
+        stats = summary[mode]
+        print(f"  {mode:<14} avg {stats['avg_seconds']:.2f}s  optimal {stats['optimal']}  "
+              f"no solution {stats['no_solution']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="比較 weighted 與 lexicographic 多目標求解的解品質與速度")
+    parser.add_argument('--objective', choices=OBJECTIVES, default='weighted_delay', help='目標組合')
+    parser.add_argument('--lots', type=int, nargs='+', default=[20, 40], help='Lot 數 (可多個)')
+    parser.add_argument('--ops', type=int, default=6, help='每個 Lot 的站數')
+    parser.add_argument('--groups', type=int, default=8, help='機台群組數')
+    parser.add_argument('--seeds', type=int, default=3, help='每個規模的隨機資料組數')
+    parser.add_argument('--time-limit', type=float, default=float(os.getenv('SOLVER_MAX_TIME_IN_SECONDS', '20')),
+                        help='每次求解的總時間上限 (秒，lexicographic 各階段合計)')
+    parser.add_argument('--workers', type=int, default=int(os.getenv('SOLVER_NUM_SEARCH_WORKERS', '8')))
+    parser.add_argument('--tolerance', type=float, default=float(os.getenv('SOLVER_LEXICOGRAPHIC_TOLERANCE', '0')),
+                        help='lexicographic 固定前一階段目標的相對容許量')
+    parser.add_argument('--output', help='結果 JSON 輸出路徑')
+    args = parser.parse_args()
+
+    report = run_benchmark(args)
+    print_summary(report)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\nResults saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
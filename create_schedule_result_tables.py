@@ -0,0 +1,51 @@
+"""
+本程式用於建立排程結果正規化資料表。
+主要功能：
+1. 從 .env 讀取資料庫連線資訊。
+2. 建立 `ScheduleStepResult`、`ScheduleLotResult`、`ScheduleTaskSegment` 資料表 (定義於 schedule_result_store.py)，取代 DynamicSchedulingJob 的 JSON 欄位查詢。
+3. 為 `DynamicSchedulingJob`、`DynamicSchedulingJob_Hist` 的 CreateDate 建立索引 (供後端快速取得最新排程)。
+4. 建立 `SchedulerRunMetrics` 資料表 (定義於 scheduler_trace.py)，保存每次排程各階段耗時。
+5. 建立 `SolverRunStats` 資料表 (定義於 solver_stats.py)，保存每個批次的求解統計與目標值隨時間變化。
+6. 若資料表或索引已存在，則不會重複建立。
+"""
+import mysql.connector
+import os
+from dotenv import load_dotenv
+from schedule_result_store import create_tables, ensure_create_date_indexes
+from scheduler_trace import create_tables as create_run_metrics_tables
+from solver_stats import create_tables as create_solver_stats_tables
+
+# 載入環境變數
+load_dotenv()
+
+# 設定資料庫連線參數
+db_config = {
+    'host': os.getenv('MYSQL_HOST'),
+    'user': os.getenv('MYSQL_USER'),
+    'password': os.getenv('MYSQL_PASSWORD'),
+    'database': os.getenv('MYSQL_DATABASE')
+}
+
+
+def main():
+    """執行資料表建立作業"""
+    try:
+        conn = mysql.connector.connect(**db_config)
+        cursor = conn.cursor()
+        print("Creating schedule result tables...")
+
+        create_tables(cursor)
+        ensure_create_date_indexes(cursor)
+        create_run_metrics_tables(cursor)
+        create_solver_stats_tables(cursor)
+        conn.commit()
+
+        cursor.close()
+        conn.close()
+        print("Schedule result tables created successfully or already exist.")
+    except Exception as e:
+        print(f"Error: {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+字典序多目標求解 (Lexicographic Solve)
+
+原本多目標以放大係數合成單一目標 (例如 sum(delay) * 1000 + makespan、makespan * 1000 + balance_penalty、
+alpha_int * weighted_completion + beta_int * makespan)。係數很大時 LP 鬆弛變弱，也會觸發
+"objective may exceed limit" 警告，而且權重只是近似「先顧 A 再顧 B」。
+
+字典序模式依序求解各階段目標：
+1. 最小化第一個目標 (例如 Priority 加權延遲)
+2. 將第一個目標固定為上限 (value + 容許量)，以上一階段的解作為 hint，再最小化下一個目標
+3. 依此類推；最後階段之前的每個階段使用剩餘時間的 STAGE_TIME_SHARE (後面的階段有上限與 hint，通常很快)，
+   最後階段使用全部剩餘時間，提早證明最佳的階段把剩餘時間留給後面
+
+每個階段使用新的 CpSolver (make_solver 建立)；後面的階段若沒有解，沿用上一個有解階段的 solver，
+呼叫端一律以回傳的 solver.Value() 取值。
+
+SOLVER_OBJECTIVE_MODE=weighted|lexicographic 選擇模式 (預設 weighted)，
+SOLVER_LEXICOGRAPHIC_TOLERANCE 為固定前一階段目標時的相對容許量 (預設 0，即不得變差)。
+
+本模組只使用標準函式庫；OR-Tools 由呼叫端傳入 (cp_model 延遲匯入)。
+"""
+import os
+import sys
+import time
+
+OBJECTIVE_MODES = ("weighted", "lexicographic")
+
+# 非最後階段可使用的剩餘時間比例
+STAGE_TIME_SHARE = 0.7
+
+
+def objective_mode(default="weighted"):
+    """由 SOLVER_OBJECTIVE_MODE 讀取目標合成方式"""
+    mode = os.getenv("SOLVER_OBJECTIVE_MODE", default).strip().lower()
+    if mode not in OBJECTIVE_MODES:
+        raise ValueError(f"Invalid SOLVER_OBJECTIVE_MODE: {mode} (expected one of {', '.join(OBJECTIVE_MODES)})")
+    return mode
+
+
+def lexicographic_tolerance():
+    """由 SOLVER_LEXICOGRAPHIC_TOLERANCE 讀取相對容許量 (0.02 表示前一階段目標最多變差 2%)"""
+    tolerance = float(os.getenv("SOLVER_LEXICOGRAPHIC_TOLERANCE", "0"))
+    if tolerance < 0:
+        raise ValueError(f"SOLVER_LEXICOGRAPHIC_TOLERANCE must be >= 0, got {tolerance}")
+    return tolerance
+
+
+def stage_bound(value, tolerance=0.0):
+    """固定前一階段目標時的上限 (整數目標，容許量向下取整)"""
+    value = int(round(value))
+    return value + int(abs(value) * tolerance)
+
+
+def _add_solution_hint(model, solver):
+    """以 solver 最近一次的解作為 model 全部變數的 hint"""
+    model.ClearHints()
+    for index, value in enumerate(solver.ResponseProto().solution):
+        model.AddHint(model.GetIntVarFromProtoIndex(index), value)
+
+
+def solve_lexicographic(cp_model, model, stages, make_solver, max_time_in_seconds, tolerance=0.0, solve=None,
+                        stage_time_share=STAGE_TIME_SHARE):
+    """
+    依序最小化 stages 中的目標
+
+    Args:
+        cp_model: ortools.sat.python.cp_model 模組
+        model: 已建好限制式的 CpModel (目標函數由本函式設定，求解後會留下各階段的上限限制與最後的 hint)
+        stages: [(名稱, 線性運算式), ...]，依重要性排序
+        make_solver: 回傳設定好參數 (workers / seed 等) 的新 CpSolver；時間上限由本函式設定
+        max_time_in_seconds: 全部階段的總時間上限
+        tolerance: 固定前一階段目標時的相對容許量
+        solve: solve(solver, model) -> status；預設 solver.Solve(model) (可傳入 SolverStatsRecorder 收集統計)
+        stage_time_share: 非最後階段可使用的剩餘時間比例
+
+    Returns:
+        tuple: (status, solver, stage_results)
+            status: 全部階段都證明最佳為 OPTIMAL，有解為 FEASIBLE，否則為第一階段的狀態
+            solver: 最後一個有解階段的 solver (沒有解時為第一階段的 solver)
+            stage_results: 各階段 {stage, status, objective, best_bound, bound, wall_time}
+    """
+    solve = solve or (lambda stage_solver, stage_model: stage_solver.Solve(stage_model))
+    deadline = time.monotonic() + max_time_in_seconds
+    best_solver = None
+    all_optimal = True
+    stage_results = []
+
+    for index, (name, expression) in enumerate(stages):
+        remaining = max(deadline - time.monotonic(), 0.1)
+        solver = make_solver()
+        is_last = index == len(stages) - 1
+        solver.parameters.max_time_in_seconds = remaining if is_last else remaining * stage_time_share
+
+        model.Minimize(expression)
+        if best_solver is not None:
+            _add_solution_hint(model, best_solver)
+        stage_status = solve(solver, model)
+
+        result = {"stage": name, "status": solver.StatusName(stage_status), "objective": None,
+                  "best_bound": None, "bound": None, "wall_time": round(solver.WallTime(), 3)}
+        stage_results.append(result)
+
+        if stage_status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            if best_solver is None:
+                return stage_status, solver, stage_results
+            # 後面的階段沒有解：沿用上一階段的解
+            all_optimal = False
+            print(f"  Lexicographic stage '{name}' found no solution ({result['status']}), keeping previous stage")
+            sys.stdout.flush()
+            break
+
+        all_optimal = all_optimal and stage_status == cp_model.OPTIMAL
+        best_solver = solver
+        result["objective"] = solver.ObjectiveValue()
+        result["best_bound"] = solver.BestObjectiveBound()
+        if not is_last:
+            result["bound"] = stage_bound(result["objective"], tolerance)
+            model.Add(expression <= result["bound"])
+
+    status = cp_model.OPTIMAL if all_optimal else cp_model.FEASIBLE
+    return status, best_solver, stage_results
+
+
+def print_stage_results(stage_results):
+    """列出各階段目標值、下界、固定的上限與耗時"""
+    for result in stage_results:
+        objective = f"{result['objective']:.0f}" if result["objective"] is not None else "-"
+        best_bound = f"{result['best_bound']:.0f}" if result["best_bound"] is not None else "-"
+        bound = f" (fixed <= {result['bound']})" if result["bound"] is not None else ""
+        print(f"  Stage {result['stage']}: {result['status']} objective={objective} bound={best_bound}"
+              f"{bound} time={result['wall_time']:.2f}s")
+    sys.stdout.flush()
@@ -0,0 +1,162 @@
+"""
+後端 API 負載測試
+以多執行緒並行呼叫高頻讀取端點，統計每個端點在不同並行數下的 p50 / p95 / p99 延遲與吞吐量。
+
+使用方式 (本機 MySQL 替身)：
+1. docker compose up -d db backend        # 啟動本機 MySQL 與後端
+2. python create_test_data.py              # 產生測試資料 (MYSQL_HOST 指向本機)
+3. python load_test_api.py --output before.json      # 在非同步化前的版本執行
+4. python load_test_api.py --baseline before.json    # 在目前版本執行並與基準比較
+
+結果以 JSON 保存，--baseline 會逐項列出 p50 / p99 的變化。
+"""
+import sys
+import os
+import json
+import math
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+
+import requests
+
+# 設定 UTF-8 編碼輸出（解決 Windows 控制台編碼問題）
+if sys.platform == 'win32':
+    import io
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+DEFAULT_BASE_URL = os.getenv('API_BASE_URL', 'http://localhost:8000')
+
+# 高頻讀取端點 (儀表板與甘特圖輪詢)
+DEFAULT_ENDPOINTS = [
+    '/api/schedule',
+    '/api/v1/lots?limit=100',
+    '/api/v1/lot-operations?limit=100',
+    '/api/v1/machines?limit=100',
+]
+
+_thread_local = threading.local()
+
+
+def _get_session() -> requests.Session:
+    """每個執行緒各自保持一個 HTTP 連線"""
+    if not hasattr(_thread_local, 'session'):
+        _thread_local.session = requests.Session()
+        _thread_local.session.headers.update({'Accept-Encoding': 'gzip'})
+    return _thread_local.session
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """最近排名法百分位數 (輸入需已排序)"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def _timed_get(url: str, timeout: float) -> Dict[str, Any]:
+    start = time.perf_counter()
+    try:
+        response = _get_session().get(url, timeout=timeout)
+        ok = response.status_code in (200, 304)
+    except requests.RequestException:
+        ok = False
+    return {'ok': ok, 'ms': (time.perf_counter() - start) * 1000}
+
+
+def run_endpoint(base_url: str, path: str, concurrency: int, total_requests: int,
+                 warmup: int, timeout: float) -> Dict[str, Any]:
+    """以指定並行數對單一端點發送請求並統計延遲"""
+    url = base_url.rstrip('/') + path
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(lambda _: _timed_get(url, timeout), range(warmup)))
+
+        wall_start = time.perf_counter()
+        results = list(pool.map(lambda _: _timed_get(url, timeout), range(total_requests)))
+        wall_seconds = time.perf_counter() - wall_start
+
+    latencies = sorted(r['ms'] for r in results if r['ok'])
+    errors = sum(1 for r in results if not r['ok'])
+    return {
+        'endpoint': path,
+        'concurrency': concurrency,
+        'requests': total_requests,
+        'errors': errors,
+        'p50_ms': round(percentile(latencies, 50), 2),
+        'p95_ms': round(percentile(latencies, 95), 2),
+        'p99_ms': round(percentile(latencies, 99), 2),
+        'max_ms': round(latencies[-1], 2) if latencies else 0.0,
+        'throughput_rps': round(len(latencies) / wall_seconds, 1) if wall_seconds > 0 else 0.0,
+    }
+
+
+def print_results(results: List[Dict[str, Any]]):
+    print(f"{'Endpoint':<36} {'Conc':>5} {'p50(ms)':>9} {'p95(ms)':>9} {'p99(ms)':>9} {'RPS':>8} {'Err':>5}")
+    print('-' * 88)
+    for r in results:
+        print(f"{r['endpoint']:<36} {r['concurrency']:>5} {r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} "
+              f"{r['p99_ms']:>9.2f} {r['throughput_rps']:>8.1f} {r['errors']:>5}")
+
+
+def print_comparison(results: List[Dict[str, Any]], baseline: List[Dict[str, Any]]):
+    """與基準結果比較 p50 / p99 (負值代表變快)"""
+    base_map = {(r['endpoint'], r['concurrency']): r for r in baseline}
+    print(f"\n{'Endpoint':<36} {'Conc':>5} {'p50 base':>9} {'p50 now':>9} {'Δp50':>8} "
+          f"{'p99 base':>9} {'p99 now':>9} {'Δp99':>8}")
+    print('-' * 100)
+    for r in results:
+        base = base_map.get((r['endpoint'], r['concurrency']))
+        if not base:
+            continue
+
+        def delta(now, before):
+            return f"{(now - before) / before * 100:+.1f}%" if before else 'n/a'
+
+        print(f"{r['endpoint']:<36} {r['concurrency']:>5} {base['p50_ms']:>9.2f} {r['p50_ms']:>9.2f} "
+              f"{delta(r['p50_ms'], base['p50_ms']):>8} {base['p99_ms']:>9.2f} {r['p99_ms']:>9.2f} "
+              f"{delta(r['p99_ms'], base['p99_ms']):>8}")
+
+
+def main():
+    """主程式"""
+    parser = argparse.ArgumentParser(description='Backend API load test (p50/p99 latency)')
+    parser.add_argument('--base-url', default=DEFAULT_BASE_URL, help='後端 API 位址')
+    parser.add_argument('--endpoints', nargs='+', default=DEFAULT_ENDPOINTS, help='測試端點路徑')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 16, 64], help='並行數 (可多個)')
+    parser.add_argument('--requests', type=int, default=500, help='每個端點、每個並行數的請求數')
+    parser.add_argument('--warmup', type=int, default=20, help='預熱請求數 (不計入統計)')
+    parser.add_argument('--timeout', type=float, default=30.0, help='單一請求逾時 (秒)')
+    parser.add_argument('--output', help='將結果寫入 JSON 檔')
+    parser.add_argument('--baseline', help='與先前保存的 JSON 結果比較')
+    args = parser.parse_args()
+
+    print(f"Load testing {args.base_url} "
+          f"(requests={args.requests}, concurrency={args.concurrency})\n")
+
+    results = []
+    for path in args.endpoints:
+        for concurrency in args.concurrency:
+            results.append(run_endpoint(args.base_url, path, concurrency, args.requests, args.warmup, args.timeout))
+            r = results[-1]
+            print(f"  done {path} @ {concurrency}: p50={r['p50_ms']}ms p99={r['p99_ms']}ms")
+
+    print()
+    print_results(results)
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            print_comparison(results, json.load(f)['results'])
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'base_url': args.base_url, 'created_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+                       'results': results}, f, indent=2, ensure_ascii=False)
+        print(f"\nResults saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,324 @@
+"""
+自動化測試批次執行器 (多程序平行)
+以 ProcessPoolExecutor 同時執行 test_scripts/ 下的多個測試配置，並彙整比較報表。
+
+每個配置使用獨立的 MySQL 資料庫 (schema)，彼此不會互相清除或搶用 Lot 資料：
+1. 依 .env 的 MYSQL_DATABASE (基準資料庫) 建立 `<基準資料庫>_<前綴>_<配置名稱>`，
+   複製全部資料表結構、Stored Procedure / Function、Trigger 與 View。
+2. 只複製主檔資料 (機台、機台群組、不可用時段、ui_settings)；Lot 與排程結果由測試流程自行產生。
+3. 於子程序中以 AutomatedTestRunner(database=...) 執行完整流程 (清空 -> 產生 Lot -> 排程 -> 模擬)，
+   產生 Lot、排程與模擬的子程序都經由 MYSQL_DATABASE 環境變數改用該資料庫，
+   並以 <輸出目錄>/work/<配置名稱> 為工作目錄 (排程的 plan_result/*.json 與模擬事件日誌各自一份)。
+4. 測試完成後讀取 KPI，預設刪除測試資料庫 (--keep-schemas 保留以便事後檢查)。
+
+報表內容：各步驟累計耗時 (清空 / 產生 Lot / 排程 / 模擬)、排程求解耗時與 KPI
+(Lot 數、完工數、延遲 Lot 數、總延遲時數、作業完成率)，輸出為主控台表格、CSV 與 JSON。
+每個配置的完整輸出寫入 <輸出目錄>/logs/<配置名稱>.log。
+
+注意：連線帳號需要 CREATE / DROP DATABASE 權限；平行數過高時 CP-SAT 會互相搶用 CPU，
+求解耗時與 KPI 可能與單獨執行時不同，比較配置時請使用相同的 --workers。
+
+使用方式：
+    python parallel_test_runner.py                                  # test_scripts/*.json 全部
+    python parallel_test_runner.py --workers 4 --output test_results/batch01
+    python parallel_test_runner.py --configs test_scripts/test_config_01.json test_scripts/test_config_04.json
+"""
+import sys
+import os
+import re
+import csv
+import glob
+import json
+import time
+import argparse
+import contextlib
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, List
+
+import mysql.connector
+
+import automated_test_runner
+from automated_test_runner import AutomatedTestRunner
+
+# 設定 UTF-8 編碼輸出（解決 Windows 控制台編碼問題）
+if sys.platform == 'win32':
+    import io
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# 複製資料的主檔資料表 (其餘資料表只複製結構)
+REFERENCE_TABLES = ('MachineGroups', 'Machines', 'machine_unavailable_periods', 'ui_settings')
+
+# 報表中的步驟欄位 (對應 AutomatedTestRunner._run_script 的 step_name)
+STAGES = ('Clean test data', 'Generate Lot', 'Reschedule', 'Simulation Clock')
+
+KPI_QUERY = """
+    SELECT
+        COUNT(*) AS lots,
+        SUM(ActualFinishDate IS NOT NULL) AS finished_lots,
+        SUM(COALESCE(ActualFinishDate, PlanFinishDate) > DueDate) AS late_lots,
+        SUM(GREATEST(TIMESTAMPDIFF(SECOND, DueDate, COALESCE(ActualFinishDate, PlanFinishDate)), 0)) AS tardiness_seconds,
+        MAX(GREATEST(TIMESTAMPDIFF(SECOND, DueDate, COALESCE(ActualFinishDate, PlanFinishDate)), 0)) AS max_tardiness_seconds
+    FROM Lots
+"""
+
+OPERATION_KPI_QUERY = """
+    SELECT COUNT(*) AS operations, SUM(StepStatus = 2) AS completed_operations
+    FROM LotOperations
+"""
+
+_DEFINER_PATTERN = re.compile(r"\s+DEFINER\s*=\s*(`[^`]*`|'[^']*'|\S+?)@(`[^`]*`|'[^']*'|\S+)")
+
+
+def schema_name(base_database: str, prefix: str, config_path: str) -> str:
+    """測試資料庫名稱：<基準資料庫>_<前綴>_<配置檔名> (MySQL 名稱上限 64 字元)"""
+    stem = re.sub(r'[^0-9A-Za-z_]', '_', os.path.splitext(os.path.basename(config_path))[0])
+    return f"{base_database}_{prefix}_{stem}"[:64]
+
+
+def _strip_definer(sql: str) -> str:
+    """移除 DEFINER，讓物件以目前連線帳號建立"""
+    return _DEFINER_PATTERN.sub('', sql, count=1)
+
+
+def create_isolated_schema(cursor, base: str, target: str, reference_tables=REFERENCE_TABLES):
+    """依基準資料庫建立測試資料庫 (資料表結構、主檔資料、Stored Procedure / Function、Trigger、View)"""
+    cursor.execute(f"DROP DATABASE IF EXISTS `{target}`")
+    cursor.execute(f"CREATE DATABASE `{target}`")
+    cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+    try:
+        cursor.execute(
+            "SELECT TABLE_NAME, TABLE_TYPE FROM information_schema.TABLES WHERE TABLE_SCHEMA = %s",
+            (base,)
+        )
+        tables = cursor.fetchall()
+        for table, table_type in tables:
+            if table_type != 'BASE TABLE':
+                continue
+            cursor.execute(f"CREATE TABLE `{target}`.`{table}` LIKE `{base}`.`{table}`")
+            if table in reference_tables:
+                cursor.execute(f"INSERT INTO `{target}`.`{table}` SELECT * FROM `{base}`.`{table}`")
+
+        cursor.execute(f"USE `{target}`")
+        for routine_type in ('PROCEDURE', 'FUNCTION'):
+            cursor.execute(f"SHOW {routine_type} STATUS WHERE Db = %s", (base,))
+            names = [row[1] for row in cursor.fetchall()]
+            for name in names:
+                cursor.execute(f"SHOW CREATE {routine_type} `{base}`.`{name}`")
+                create_sql = cursor.fetchone()[2]
+                if create_sql is None:
+                    raise RuntimeError(f"No privilege to read {routine_type} {base}.{name}")
+                cursor.execute(_strip_definer(create_sql))
+
+        for table, table_type in tables:
+            if table_type == 'VIEW':
+                cursor.execute(f"SHOW CREATE VIEW `{base}`.`{table}`")
+                create_sql = cursor.fetchone()[1].replace(f"`{base}`.", f"`{target}`.")
+                cursor.execute(_strip_definer(create_sql))
+
+        cursor.execute(f"SHOW TRIGGERS FROM `{base}`")
+        triggers = [row[0] for row in cursor.fetchall()]
+        for name in triggers:
+            cursor.execute(f"SHOW CREATE TRIGGER `{base}`.`{name}`")
+            cursor.execute(_strip_definer(cursor.fetchone()[2]))
+    finally:
+        cursor.execute("SET FOREIGN_KEY_CHECKS = 1")
+
+
+def collect_kpis(cursor) -> Dict[str, Any]:
+    """讀取測試資料庫的 KPI"""
+    cursor.execute(KPI_QUERY)
+    lots = cursor.fetchone()
+    cursor.execute(OPERATION_KPI_QUERY)
+    operations = cursor.fetchone()
+    total_operations = int(operations['operations'] or 0)
+    completed_operations = int(operations['completed_operations'] or 0)
+    return {
+        'lots': int(lots['lots'] or 0),
+        'finished_lots': int(lots['finished_lots'] or 0),
+        'late_lots': int(lots['late_lots'] or 0),
+        'total_tardiness_hours': round(float(lots['tardiness_seconds'] or 0) / 3600, 2),
+        'max_tardiness_hours': round(float(lots['max_tardiness_seconds'] or 0) / 3600, 2),
+        'operations': total_operations,
+        'operation_completion_rate': round(completed_operations / total_operations, 4) if total_operations else None,
+    }
+
+
+def run_config(config_path: str, schema_prefix: str, log_dir: str, keep_schema: bool,
+               work_root: str) -> Dict[str, Any]:
+    """
+    在獨立資料庫中執行單一測試配置 (於 ProcessPoolExecutor 的子程序中執行)
+
+    Returns:
+        報表資料列 (狀態、各步驟耗時、求解耗時、KPI)
+    """
+    base_database = automated_test_runner.db_config['database']
+    target = schema_name(base_database, schema_prefix, config_path)
+    stem = os.path.splitext(os.path.basename(config_path))[0]
+    log_path = os.path.join(log_dir, f"{stem}.log")
+    row: Dict[str, Any] = {'config': os.path.basename(config_path), 'schema': target, 'status': 'failed', 'error': None}
+
+    started = time.perf_counter()
+    with open(log_path, 'w', encoding='utf-8') as log_file, \
+            contextlib.redirect_stdout(log_file), contextlib.redirect_stderr(log_file):
+        conn = None
+        try:
+            conn = mysql.connector.connect(**automated_test_runner.db_config, autocommit=True)
+            cursor = conn.cursor()
+            setup_started = time.perf_counter()
+            print(f"Creating isolated schema {target} from {base_database}...", flush=True)
+            create_isolated_schema(cursor, base_database, target)
+            cursor.close()
+            row['setup_seconds'] = round(time.perf_counter() - setup_started, 2)
+
+            runner = AutomatedTestRunner(config_path, database=target, work_dir=os.path.join(work_root, stem))
+            row['name'] = runner.config['name']
+            succeeded = runner.run()
+            row['status'] = 'ok' if succeeded else 'failed'
+            if not succeeded:
+                row['error'] = f"{runner.failed_step} failed"
+            for stage in STAGES:
+                row[stage] = round(runner.stage_seconds.get(stage, 0.0), 2)
+            row['solve_seconds'] = round(runner.solve_seconds, 2)
+            row['solve_batches'] = runner.solve_batches
+
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute(f"USE `{target}`")
+            row.update(collect_kpis(cursor))
+            cursor.close()
+        except SystemExit:
+            # AutomatedTestRunner.load_config 讀取失敗時會 sys.exit(1)
+            row['error'] = "Failed to load config file"
+        except Exception as e:
+            print(f"❌ Error: {e}", flush=True)
+            row['error'] = str(e)
+        finally:
+            if conn is not None:
+                if not keep_schema:
+                    try:
+                        conn.cursor().execute(f"DROP DATABASE IF EXISTS `{target}`")
+                    except Exception as e:
+                        print(f"⚠️ Failed to drop schema {target}: {e}", flush=True)
+                conn.close()
+    row['wall_seconds'] = round(time.perf_counter() - started, 2)
+    row['log'] = log_path
+    return row
+
+
+REPORT_COLUMNS = [
+    ('config', 'config', 18),
+    ('status', 'status', 7),
+    ('wall_seconds', 'wall(s)', 8),
+    ('setup_seconds', 'setup(s)', 8),
+    ('Generate Lot', 'lots(s)', 8),
+    ('Reschedule', 'sched(s)', 8),
+    ('Simulation Clock', 'sim(s)', 8),
+    ('solve_seconds', 'solve(s)', 8),
+    ('lots', 'lots', 5),
+    ('finished_lots', 'done', 5),
+    ('late_lots', 'late', 5),
+    ('total_tardiness_hours', 'tardy(h)', 9),
+    ('operation_completion_rate', 'op_rate', 7),
+]
+
+
+def print_report(rows: List[Dict[str, Any]], total_seconds: float):
+    """印出比較表"""
+    def fmt(value, width):
+        if value is None:
+            value = '-'
+        elif isinstance(value, float):
+            value = f"{value:.2f}"
+        return f"{str(value):>{width}}"
+
+    print("\n" + "=" * 120)
+    print(" ".join(f"{title:>{width}}" for _, title, width in REPORT_COLUMNS))
+    print("-" * 120)
+    for row in rows:
+        print(" ".join(fmt(row.get(key), width) for key, _, width in REPORT_COLUMNS))
+    print("=" * 120)
+
+    ok_rows = [row for row in rows if row['status'] == 'ok']
+    serial_seconds = sum(row['wall_seconds'] for row in rows)
+    print(f"Configs: {len(rows)} (ok: {len(ok_rows)}, failed: {len(rows) - len(ok_rows)})")
+    print(f"Batch wall time: {total_seconds:.2f}s (sum of config wall times: {serial_seconds:.2f}s)")
+    for row in rows:
+        if row['error']:
+            print(f"❌ {row['config']}: {row['error']} (log: {row['log']})")
+
+
+def write_report(rows: List[Dict[str, Any]], output_dir: str, meta: Dict[str, Any]):
+    """輸出 report.csv 與 report.json"""
+    keys = []
+    for row in rows:
+        keys.extend(key for key in row if key not in keys)
+    with open(os.path.join(output_dir, 'report.csv'), 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=keys)
+        writer.writeheader()
+        writer.writerows(rows)
+    with open(os.path.join(output_dir, 'report.json'), 'w', encoding='utf-8') as f:
+        json.dump({**meta, 'results': rows}, f, ensure_ascii=False, indent=2)
+
+
+def main():
+    """主程式"""
+    parser = argparse.ArgumentParser(description='自動化測試批次執行器 (多程序平行，每個配置使用獨立資料庫)')
+    parser.add_argument('--configs', nargs='+', help='測試配置檔案 (預設 test_scripts/*.json)')
+    parser.add_argument('--workers', type=int, default=min(4, os.cpu_count() or 1), help='平行執行的配置數')
+    parser.add_argument('--schema-prefix', default='batch', help='測試資料庫名稱前綴')
+    parser.add_argument('--output', help='報表輸出目錄 (預設 test_results/batch_<時間>)')
+    parser.add_argument('--keep-schemas', action='store_true', help='測試完成後保留測試資料庫')
+    args = parser.parse_args()
+
+    if not automated_test_runner.db_config['database']:
+        print("❌ MYSQL_DATABASE is not set", flush=True)
+        sys.exit(1)
+
+    configs = args.configs or sorted(glob.glob(os.path.join(BASE_DIR, 'test_scripts', '*.json')))
+    if not configs:
+        print("❌ No test configs found", flush=True)
+        sys.exit(1)
+
+    output_dir = args.output or os.path.join(BASE_DIR, 'test_results', datetime.now().strftime('batch_%Y%m%d_%H%M%S'))
+    log_dir = os.path.join(output_dir, 'logs')
+    work_root = os.path.join(output_dir, 'work')
+    os.makedirs(log_dir, exist_ok=True)
+
+    print(f"Running {len(configs)} configs with {args.workers} workers "
+          f"(base database: {automated_test_runner.db_config['database']})", flush=True)
+    started = time.perf_counter()
+    rows = []
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        futures = {
+            executor.submit(run_config, path, args.schema_prefix, log_dir, args.keep_schemas, work_root): path
+            for path in configs
+        }
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                row = future.result()
+            except Exception as e:
+                row = {'config': os.path.basename(path), 'status': 'failed', 'error': str(e),
+                       'wall_seconds': 0.0, 'log': None}
+            rows.append(row)
+            icon = '✅' if row['status'] == 'ok' else '❌'
+            print(f"{icon} [{len(rows)}/{len(configs)}] {row['config']} ({row['wall_seconds']:.2f}s)", flush=True)
+
+    total_seconds = time.perf_counter() - started
+    rows.sort(key=lambda row: row['config'])
+    print_report(rows, total_seconds)
+    write_report(rows, output_dir, {
+        'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'base_database': automated_test_runner.db_config['database'],
+        'workers': args.workers,
+        'batch_wall_seconds': round(total_seconds, 2),
+    })
+    print(f"Report saved to {output_dir}", flush=True)
+    sys.exit(0 if all(row['status'] == 'ok' for row in rows) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+"""
+排程結果正規化儲存 (Schedule Result Store)
+
+將 DynamicSchedulingJob 的 JSON 結果拆成以 ScheduleId 為鍵、建立索引的子資料表：
+- ScheduleStepResult: 逐站結果 (對應 LotStepResult)
+- ScheduleLotResult: 逐 Lot 結果 (對應 LotPlanResult.lot_results)
+- ScheduleTaskSegment: 甘特圖區段 (對應 machineTaskSegment)
+
+求解結束時一次批次寫入，JSON 檢視改由後端依需求即時組出，
+依 Lot、機台或時間視窗的查詢可直接使用索引，不必解析整份 JSON。
+
+本模組只依賴 DB-API cursor (mysql.connector / PyMySQL 皆可)，供排程程式與建表腳本共用。
+"""
+from datetime import datetime
+
+INSERT_CHUNK_SIZE = 1000
+
+CREATE_TASK_SEGMENT_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS ScheduleTaskSegment (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    ScheduleId VARCHAR(50) NOT NULL,
+    SegmentId VARCHAR(150) NOT NULL,
+    MachineId VARCHAR(20) NOT NULL,
+    GroupId VARCHAR(20) NULL,
+    LotId VARCHAR(50) NULL,
+    Step VARCHAR(20) NULL,
+    Text VARCHAR(255) NULL,
+    StartTime DATETIME NOT NULL,
+    EndTime DATETIME NOT NULL,
+    Booking INT NOT NULL DEFAULT 0,
+    Color VARCHAR(20) NULL,
+    UNIQUE KEY uq_schedule_segment (ScheduleId, SegmentId),
+    INDEX idx_schedule_machine_start (ScheduleId, MachineId, StartTime),
+    INDEX idx_schedule_start (ScheduleId, StartTime)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+"""
+
+CREATE_STEP_RESULT_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS ScheduleStepResult (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    ScheduleId VARCHAR(50) NOT NULL,
+    PlanID VARCHAR(50) NULL,
+    LotId VARCHAR(50) NOT NULL,
+    Step VARCHAR(20) NOT NULL,
+    StepIdx INT NOT NULL,
+    Product VARCHAR(50) NULL,
+    Priority INT NULL,
+    MachineId VARCHAR(20) NOT NULL,
+    StartTime DATETIME NOT NULL,
+    EndTime DATETIME NOT NULL,
+    Booking INT NOT NULL DEFAULT 0,
+    UNIQUE KEY uq_schedule_lot_step (ScheduleId, LotId, Step),
+    INDEX idx_schedule_machine_start (ScheduleId, MachineId, StartTime),
+    INDEX idx_schedule_start (ScheduleId, StartTime),
+    INDEX idx_plan (PlanID)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+"""
+
+CREATE_LOT_RESULT_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS ScheduleLotResult (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    ScheduleId VARCHAR(50) NOT NULL,
+    PlanID VARCHAR(50) NULL,
+    LotId VARCHAR(50) NOT NULL,
+    Product VARCHAR(50) NULL,
+    Priority INT NULL,
+    DueDate DATETIME NULL,
+    PlanFinishDate DATETIME NULL,
+    ActualFinishDate DATETIME NULL,
+    DelaySeconds BIGINT NULL,
+    UNIQUE KEY uq_schedule_lot (ScheduleId, LotId),
+    INDEX idx_plan (PlanID)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+"""
+
+# 後端以 ORDER BY CreateDate DESC LIMIT 1 探測最新排程 (回應快取的鍵)，快照列表以 (CreateDate, id) 做 keyset 分頁，
+# 需要索引避免全表排序 (InnoDB 次要索引隱含主鍵 id)
+CREATE_DATE_INDEXED_TABLES = ("DynamicSchedulingJob", "DynamicSchedulingJob_Hist", "DynamicSchedulingJob_Snap")
+CREATE_DATE_INDEX_NAME = "idx_create_date"
+
+INSERT_STEP_RESULT_SQL = """
+INSERT INTO ScheduleStepResult
+    (ScheduleId, PlanID, LotId, Step, StepIdx, Product, Priority, MachineId, StartTime, EndTime, Booking)
+VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+INSERT_LOT_RESULT_SQL = """
+INSERT INTO ScheduleLotResult
+    (ScheduleId, PlanID, LotId, Product, Priority, DueDate, PlanFinishDate, ActualFinishDate, DelaySeconds)
+VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+# build_*_rows 資料列的欄位順序 (後端回填以 dict 寫入時使用)
+STEP_RESULT_COLUMNS = (
+    "ScheduleId", "PlanID", "LotId", "Step", "StepIdx", "Product", "Priority", "MachineId", "StartTime", "EndTime",
+    "Booking",
+)
+LOT_RESULT_COLUMNS = (
+    "ScheduleId", "PlanID", "LotId", "Product", "Priority", "DueDate", "PlanFinishDate", "ActualFinishDate",
+    "DelaySeconds",
+)
+TASK_SEGMENT_COLUMNS = (
+    "ScheduleId", "SegmentId", "MachineId", "GroupId", "LotId", "Step", "Text", "StartTime", "EndTime", "Booking", "Color",
+)
+SEGMENT_UNIQUE_KEY_NAME = "uq_schedule_segment"
+
+INSERT_TASK_SEGMENT_SQL = """
+INSERT INTO ScheduleTaskSegment
+    (ScheduleId, SegmentId, MachineId, GroupId, LotId, Step, Text, StartTime, EndTime, Booking, Color)
+VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+
+def _parse_time(value):
+    if value is None or isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(str(value).replace("Z", ""))
+
+
+def build_segment_rows(schedule_id, task_segments, machine_to_group=None):
+    """
+    將 machineTaskSegment (DHTMLX 格式) 轉為 ScheduleTaskSegment 資料列
+
+    - 機台父節點 (parent 為 None、沒有時間) 不寫入，由 Machines 表提供
+    - Lot 作業區段以 "{Machine}_{LotId}_{Step}" 為 id，另拆出 LotId / Step 欄位
+    """
+    machine_to_group = machine_to_group or {}
+    rows = []
+    for seg in task_segments:
+        machine_id = seg.get("parent")
+        start = _parse_time(seg.get("start_date"))
+        end = _parse_time(seg.get("end_date"))
+        if not machine_id or start is None or end is None:
+            continue
+
+        lot_id, step = None, None
+        booking = seg.get("Booking", 0)
+        if booking is not None and booking >= 0:
+            text_parts = str(seg.get("text", "")).split(" ")
+            if len(text_parts) == 2:
+                lot_id, step = text_parts
+
+        rows.append((
+            schedule_id,
+            str(seg.get("id")),
+            machine_id,
+            machine_to_group.get(machine_id),
+            lot_id,
+            step,
+            seg.get("text"),
+            start,
+            end,
+            booking if booking is not None else 0,
+            seg.get("color"),
+        ))
+    return rows
+
+
+def build_step_rows(schedule_id, plan_id, lot_step_results):
+    """將 LotStepResult 項目轉為 ScheduleStepResult 資料列"""
+    return [
+        (
+            schedule_id,
+            plan_id,
+            r["LotId"],
+            r["Step"],
+            r.get("StepIdx", 0),
+            r.get("Product") or None,
+            r.get("Priority"),
+            r["Machine"],
+            _parse_time(r["Start"]),
+            _parse_time(r["End"]),
+            r.get("Booking", 0),
+        )
+        for r in lot_step_results
+    ]
+
+
+def build_lot_rows(schedule_id, plan_id, lot_plan_results):
+    """將 LotPlanResult.lot_results 項目轉為 ScheduleLotResult 資料列 (延遲以秒保存，可還原原始字串)"""
+    rows = []
+    for r in lot_plan_results:
+        due_date = _parse_time(r.get("DueDate"))
+        plan_finish = _parse_time(r.get("PlanFinishDate"))
+        delay_seconds = None
+        if plan_finish is not None:
+            delay_seconds = int((plan_finish - (due_date or plan_finish)).total_seconds())
+        rows.append((
+            schedule_id,
+            plan_id,
+            r["Lot"],
+            r.get("Product") or None,
+            r.get("Priority"),
+            due_date,
+            plan_finish,
+            _parse_time(r.get("ActualFinishDate")),
+            delay_seconds,
+        ))
+    return rows
+
+
+def _insert_chunked(cursor, sql, rows):
+    for i in range(0, len(rows), INSERT_CHUNK_SIZE):
+        cursor.executemany(sql, rows[i:i + INSERT_CHUNK_SIZE])
+    return len(rows)
+
+
+def save_task_segments(cursor, schedule_id, task_segments, machine_to_group=None):
+    """以多列 INSERT 分批寫入甘特圖區段，回傳寫入筆數 (由呼叫端負責 commit)"""
+    return _insert_chunked(cursor, INSERT_TASK_SEGMENT_SQL, build_segment_rows(schedule_id, task_segments, machine_to_group))
+
+
+def save_schedule_results(cursor, schedule_id, plan_id, lot_step_results, lot_plan_results,
+                          task_segments, machine_to_group=None):
+    """
+    求解結束時批次寫入所有正規化結果 (由呼叫端負責 commit，可與 DynamicSchedulingJob 同一交易)
+
+    Returns:
+        dict: 各資料表寫入筆數
+    """
+    return {
+        "steps": _insert_chunked(cursor, INSERT_STEP_RESULT_SQL, build_step_rows(schedule_id, plan_id, lot_step_results)),
+        "lots": _insert_chunked(cursor, INSERT_LOT_RESULT_SQL, build_lot_rows(schedule_id, plan_id, lot_plan_results)),
+        "segments": save_task_segments(cursor, schedule_id, task_segments, machine_to_group),
+    }
+
+
+def ensure_create_date_indexes(cursor):
+    """為排程主表的 CreateDate 建立索引 (MySQL 不支援 CREATE INDEX IF NOT EXISTS，先查 information_schema)"""
+    for table in CREATE_DATE_INDEXED_TABLES:
+        cursor.execute(
+            "SELECT COUNT(*) FROM information_schema.STATISTICS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s",
+            (table, CREATE_DATE_INDEX_NAME),
+        )
+        if cursor.fetchone()[0] == 0:
+            cursor.execute(f"CREATE INDEX {CREATE_DATE_INDEX_NAME} ON {table} (CreateDate)")
+
+
+def ensure_segment_unique_key(cursor):
+    """
+    為既有的 ScheduleTaskSegment 補上 (ScheduleId, SegmentId) 唯一鍵
+
+    舊版資料表沒有唯一鍵，同一排程被兩個請求同時第一次查詢時會重複回填；先刪除重複列 (保留最小 id) 再建立
+    """
+    cursor.execute(
+        "SELECT COUNT(*) FROM information_schema.STATISTICS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'ScheduleTaskSegment' AND INDEX_NAME = %s",
+        (SEGMENT_UNIQUE_KEY_NAME,),
+    )
+    if cursor.fetchone()[0] == 0:
+        cursor.execute(
+            "DELETE s FROM ScheduleTaskSegment s JOIN ScheduleTaskSegment k "
+            "ON k.ScheduleId = s.ScheduleId AND k.SegmentId = s.SegmentId AND k.id < s.id"
+        )
+        cursor.execute(
+            f"ALTER TABLE ScheduleTaskSegment ADD UNIQUE KEY {SEGMENT_UNIQUE_KEY_NAME} (ScheduleId, SegmentId)"
+        )
+
+
+def create_tables(cursor):
+    """建立正規化結果資料表 (若不存在)"""
+    cursor.execute(CREATE_STEP_RESULT_TABLE_SQL)
+    cursor.execute(CREATE_LOT_RESULT_TABLE_SQL)
+    cursor.execute(CREATE_TASK_SEGMENT_TABLE_SQL)
+    ensure_segment_unique_key(cursor)
@@ -0,0 +1,260 @@
+"""
+排程執行追蹤 (Scheduler Run Trace)
+
+以 context manager 記錄排程各階段 (載入 -> 建模 -> 求解 -> 結果擷取 -> 寫檔 -> SP 更新 -> 利用率) 的耗時：
+- span(name, **attrs)：可巢狀的階段，記錄起訖時間、屬性與計數器
+- count(name, value)：累加到目前 span 的計數器 (例如變數數、寫入筆數)
+- 每個 span 結束時記錄行程 RSS 高水位 (peak RSS) 與期間增加量，不使用 tracemalloc，額外成本可忽略
+
+匯出：
+- write_chrome_trace(path)：Chrome trace 格式 JSON，可用 chrome://tracing 或 https://ui.perfetto.dev 開啟
+- save_metrics(cursor, ...)：每個 span 一列寫入 SchedulerRunMetrics (由呼叫端負責 commit)
+
+本模組只使用標準函式庫與 DB-API cursor，供排程程式與建表腳本共用。
+"""
+import os
+import sys
+import json
+import time
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows 沒有 resource 模組，peak RSS 記為 None
+    resource = None
+
+CREATE_RUN_METRICS_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS SchedulerRunMetrics (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    RunId VARCHAR(50) NOT NULL,
+    ScheduleId VARCHAR(50) NULL,
+    PlanID VARCHAR(50) NULL,
+    SpanId INT NOT NULL,
+    ParentSpanId INT NULL,
+    SpanName VARCHAR(100) NOT NULL,
+    Depth INT NOT NULL,
+    StartTime DATETIME(3) NOT NULL,
+    DurationMs DOUBLE NOT NULL,
+    PeakRssMB DOUBLE NULL,
+    RssGrowthMB DOUBLE NULL,
+    Attributes JSON NULL,
+    CreatedAt DATETIME DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE KEY uq_run_span (RunId, SpanId),
+    INDEX idx_span_start (SpanName, StartTime),
+    INDEX idx_schedule (ScheduleId)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+"""
+
+INSERT_RUN_METRICS_SQL = """
+INSERT INTO SchedulerRunMetrics
+    (RunId, ScheduleId, PlanID, SpanId, ParentSpanId, SpanName, Depth, StartTime, DurationMs, PeakRssMB, RssGrowthMB, Attributes)
+VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+
+def peak_rss_mb():
+    """行程 RSS 高水位 (MB)；Linux 的 ru_maxrss 單位為 KB，macOS 為 bytes"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+class Span:
+    """單一階段的量測結果"""
+
+    def __init__(self, span_id, name, parent, attrs):
+        self.span_id = span_id
+        self.name = name
+        self.parent = parent
+        self.depth = parent.depth + 1 if parent else 0
+        self.attrs = dict(attrs)
+        self.counters = {}
+        self.wall_start = datetime.now()
+        self.start = time.perf_counter()
+        self.end = None
+        self.thread_id = threading.get_ident()
+        self.rss_start = peak_rss_mb()
+        self.peak_rss = None
+
+    @property
+    def duration(self):
+        return (self.end if self.end is not None else time.perf_counter()) - self.start
+
+    def set(self, **attrs):
+        """補記屬性 (例如求解狀態、目標值)"""
+        self.attrs.update(attrs)
+
+    def count(self, name, value=1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def close(self):
+        self.end = time.perf_counter()
+        self.peak_rss = peak_rss_mb()
+
+    @property
+    def rss_growth(self):
+        if self.peak_rss is None or self.rss_start is None:
+            return None
+        return self.peak_rss - self.rss_start
+
+
+class RunTrace:
+    """一次排程執行的追蹤紀錄；建立時即開始根 span，finish() 時結束"""
+
+    def __init__(self, name="schedule run", run_id=None, **attrs):
+        self.run_id = run_id or f"RUN_{datetime.now().strftime('%Y%m%d%H%M%S%f')}"
+        self.spans = []
+        self._local = threading.local()
+        self.root = self._open(name, attrs)
+
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            # 其他執行緒的 span 掛在根 span 之下
+            stack = self._local.stack = [self.root]
+        return stack
+
+    def _open(self, name, attrs):
+        stack = self._stack() if self.spans else []
+        span = Span(len(self.spans) + 1, name, stack[-1] if stack else None, attrs)
+        self.spans.append(span)
+        if not stack:
+            self._local.stack = [span]
+        else:
+            stack.append(span)
+        return span
+
+    @contextmanager
+    def span(self, name, **attrs):
+        span = self._open(name, attrs)
+        try:
+            yield span
+        except BaseException as e:
+            span.set(error=type(e).__name__)
+            raise
+        finally:
+            span.close()
+            stack = self._stack()
+            if stack and stack[-1] is span:
+                stack.pop()
+
+    def current(self):
+        return self._stack()[-1]
+
+    def count(self, name, value=1):
+        """累加到目前 span 的計數器"""
+        self.current().count(name, value)
+
+    def finish(self, **attrs):
+        """結束根 span (可重複呼叫，只記錄第一次)"""
+        if self.root.end is None:
+            self.root.set(**attrs)
+            self.root.close()
+
+    # ---- 匯出 ----
+    def to_chrome_trace(self):
+        """轉為 Chrome trace 格式 (ph=X 完整事件；RSS 高水位以 ph=C 計數事件呈現)"""
+        pid = os.getpid()
+        origin = self.root.start
+        events = []
+        for span in self.spans:
+            args = dict(span.attrs)
+            args.update(span.counters)
+            if span.peak_rss is not None:
+                args["peak_rss_mb"] = round(span.peak_rss, 1)
+            events.append({
+                "name": span.name,
+                "cat": "scheduler",
+                "ph": "X",
+                "ts": round((span.start - origin) * 1e6, 1),
+                "dur": round(span.duration * 1e6, 1),
+                "pid": pid,
+                "tid": span.thread_id,
+                "args": args,
+            })
+            if span.peak_rss is not None:
+                events.append({
+                    "name": "peak_rss_mb",
+                    "ph": "C",
+                    "ts": round(((span.end or origin) - origin) * 1e6, 1),
+                    "pid": pid,
+                    "args": {"peak_rss_mb": round(span.peak_rss, 1)},
+                })
+        events.sort(key=lambda event: event["ts"])
+        return {
+            "traceEvents": events,
+            "displayTimeUnit": "ms",
+            "otherData": {"run_id": self.run_id, "started_at": self.root.wall_start.isoformat()},
+        }
+
+    def write_chrome_trace(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_chrome_trace(), f, ensure_ascii=False, default=str)
+        return path
+
+    def metric_rows(self, schedule_id=None, plan_id=None):
+        rows = []
+        for span in self.spans:
+            attrs = dict(span.attrs)
+            attrs.update(span.counters)
+            rows.append((
+                self.run_id,
+                schedule_id,
+                plan_id,
+                span.span_id,
+                span.parent.span_id if span.parent else None,
+                span.name[:100],
+                span.depth,
+                span.wall_start,
+                round(span.duration * 1000, 3),
+                round(span.peak_rss, 1) if span.peak_rss is not None else None,
+                round(span.rss_growth, 1) if span.rss_growth is not None else None,
+                json.dumps(attrs, ensure_ascii=False, default=str) if attrs else None,
+            ))
+        return rows
+
+    def save_metrics(self, cursor, schedule_id=None, plan_id=None):
+        """每個 span 一列寫入 SchedulerRunMetrics，回傳寫入筆數 (由呼叫端負責 commit)"""
+        create_tables(cursor)
+        rows = self.metric_rows(schedule_id, plan_id)
+        cursor.executemany(INSERT_RUN_METRICS_SQL, rows)
+        return len(rows)
+
+    def summary(self):
+        """依階段名稱彙總 (次數、總耗時、最長一次、peak RSS)，依第一次出現的順序排列"""
+        stages = {}
+        for span in self.spans[1:]:
+            stage = stages.setdefault(span.name, {
+                "name": span.name, "depth": span.depth, "count": 0, "total_ms": 0.0, "max_ms": 0.0, "peak_rss_mb": None,
+            })
+            duration_ms = span.duration * 1000
+            stage["count"] += 1
+            stage["total_ms"] += duration_ms
+            stage["max_ms"] = max(stage["max_ms"], duration_ms)
+            if span.peak_rss is not None:
+                stage["peak_rss_mb"] = max(stage["peak_rss_mb"] or 0.0, span.peak_rss)
+        return list(stages.values())
+
+    def print_summary(self):
+        """列出各階段耗時與占整次執行的比例"""
+        total_ms = self.root.duration * 1000 or 1e-9
+        print(f"\n=== Scheduler trace ({self.run_id}) ===")
+        print(f"  {'stage':<46} {'count':>6} {'total ms':>11} {'max ms':>10} {'share':>7} {'peak RSS':>10}")
+        for stage in self.summary():
+            label = "  " * (stage["depth"] - 1) + stage["name"]
+            rss = f"{stage['peak_rss_mb']:7.1f} MB" if stage["peak_rss_mb"] is not None else ""
+            print(f"  {label:<46} {stage['count']:>6} {stage['total_ms']:11.1f} {stage['max_ms']:10.1f} "
+                  f"{stage['total_ms'] / total_ms * 100:6.1f}% {rss:>10}")
+        print(f"  {self.root.name:<46} {1:>6} {total_ms:11.1f}")
+        sys.stdout.flush()
+
+
+def create_tables(cursor):
+    """建立 SchedulerRunMetrics (已存在則略過)"""
+    cursor.execute(CREATE_RUN_METRICS_TABLE_SQL)
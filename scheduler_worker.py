@@ -0,0 +1,141 @@
+"""
+常駐排程 worker (供 Qt GUI「重新排程」分頁使用)
+
+GUI 只啟動本程式一次，之後每次重新排程都經由 stdin / stdout 以 JSON Lines 溝通，
+省下每次重新啟動 Python、匯入 OR-Tools、建立 MySQL 連線與重新載入全部資料的時間：
+1. 啟動時匯入 OR-Tools 與增量排程模組 (只匯入一次)。
+2. 機台群組、不可用時段與 Lots / LotOperations 資料列由 SchedulingDataCache 保留，
+   每次排程只重新讀取有異動的部分。
+3. 排程程式的 print 輸出與進度會即時以事件回傳。
+
+協定 (每行一個 JSON 物件，UTF-8)：
+    請求  {"id": 1, "method": "reschedule", "params": {"start_time": "YYYY-MM-DD HH:MM:SS"}}
+          {"id": 2, "method": "invalidate"}      清除資料快取，下次排程整批重新載入
+          {"id": 3, "method": "ping"}
+          {"id": 4, "method": "shutdown"}        (關閉 stdin 也會結束)
+    事件  {"event": "ready", "pid": 1234, "startup_seconds": 1.8}
+          {"event": "log", "id": 1, "line": "..."}
+          {"event": "progress", "id": 1, "percent": 45, "message": "..."}
+    回應  {"id": 1, "result": {...}} 或 {"id": 1, "error": "..."}
+
+命令列直接執行單次排程仍請使用 Scheduler_Full_Example_Qtime_V1_Wip_DB_Incremental_Scheduling.py。
+"""
+import sys
+import io
+import os
+import json
+import time
+import importlib
+import traceback
+from dotenv import load_dotenv
+
+SCHEDULER_MODULE = "Scheduler_Full_Example_Qtime_V1_Wip_DB_Incremental_Scheduling"
+
+_protocol_out = None
+
+
+def send(message):
+    """輸出一行協定訊息 (stdout 已被 _LogWriter 取代，協定訊息寫到原本的 stdout)"""
+    _protocol_out.write(json.dumps(message, ensure_ascii=False, default=str) + "\n")
+    _protocol_out.flush()
+
+
+class _LogWriter:
+    """將排程程式的 print 輸出逐行包成 log 事件 (取代 sys.stdout)"""
+
+    def __init__(self):
+        self.request_id = None
+        self._buffer = ""
+
+    def write(self, text):
+        self._buffer += text
+        while "\n" in self._buffer:
+            line, self._buffer = self._buffer.split("\n", 1)
+            if line.strip():
+                send({"event": "log", "id": self.request_id, "line": line})
+        return len(text)
+
+    def flush(self):
+        if self._buffer.strip():
+            send({"event": "log", "id": self.request_id, "line": self._buffer})
+        self._buffer = ""
+
+
+def handle_request(request, scheduler, data_cache):
+    """執行單一請求並回傳 result (錯誤以例外拋出)"""
+    request_id = request.get("id")
+    method = request.get("method")
+    params = request.get("params") or {}
+
+    if method == "reschedule":
+        # 與每次重新啟動程式相同：重新讀取 .env (例如 SOLVER_* 參數)
+        load_dotenv(override=True)
+        started = time.perf_counter()
+        result = scheduler.run_incremental_schedule(
+            params.get("start_time", scheduler.DEFAULT_START_TIME),
+            progress=lambda percent, message: send(
+                {"event": "progress", "id": request_id, "percent": percent, "message": message}
+            ),
+            data_cache=data_cache,
+        )
+        result["elapsed_seconds"] = round(time.perf_counter() - started, 2)
+        return result
+    if method == "invalidate":
+        data_cache.invalidate()
+        return {"invalidated": True}
+    if method == "ping":
+        return {"pid": os.getpid()}
+    raise ValueError(f"Unknown method: {method}")
+
+
+def main():
+    global _protocol_out
+    started = time.perf_counter()
+    if sys.platform == 'win32':
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+    stdin = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8', errors='replace')
+
+    _protocol_out = sys.stdout
+    log_writer = _LogWriter()
+    sys.stdout = log_writer
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    scheduler = importlib.import_module(SCHEDULER_MODULE)
+    scheduler.preload_solver()
+    data_cache = scheduler.SchedulingDataCache()
+    log_writer.flush()
+    send({"event": "ready", "pid": os.getpid(), "startup_seconds": round(time.perf_counter() - started, 2)})
+
+    for line in iter(stdin.readline, ""):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            request = json.loads(line)
+        except ValueError as e:
+            send({"id": None, "error": f"Invalid request: {e}"})
+            continue
+
+        request_id = request.get("id")
+        if request.get("method") == "shutdown":
+            send({"id": request_id, "result": {"shutdown": True}})
+            break
+
+        log_writer.request_id = request_id
+        try:
+            result = handle_request(request, scheduler, data_cache)
+            log_writer.flush()
+            send({"id": request_id, "result": result})
+        except Exception as e:
+            log_writer.flush()
+            traceback.print_exc()
+            send({"id": request_id, "error": str(e)})
+        finally:
+            log_writer.request_id = None
+
+    data_cache.close()
+
+
+if __name__ == "__main__":
+    main()
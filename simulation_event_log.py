@@ -0,0 +1,235 @@
+"""
+模擬事件日誌 (Simulation Event Log)
+
+以 gzip 壓縮 CSV 儲存 SimulateAPS.py 產生的結構化事件，取代解析 stdout 的做法。
+- 寫入：每次執行寫入自己的檔案 SimulationEvents_<run_id>.csv.gz (由基準路徑 SimulationEvents.csv.gz 衍生)。
+  不再附加到同一個檔案：中途結束的執行會留下截斷的 gzip member，之後附加的所有執行都會無法讀取。
+- 讀取：提供逐筆 (iter_events) 與欄式 (load_event_columns) 兩種 API，方便分析計畫與實際偏差；
+  依基準路徑讀取全部執行的檔案 (含舊版附加式的基準檔)，截斷的檔案讀到截斷處為止並略過其餘部分。
+
+欄位：
+    run_id, sim_time, lot_id, step, machine, event_type, planned_time, actual_time, deviation_minutes
+"""
+import csv
+import glob
+import gzip
+import os
+import sys
+import zlib
+from datetime import datetime
+
+EVENT_FIELDS = [
+    "run_id",
+    "sim_time",
+    "lot_id",
+    "step",
+    "machine",
+    "event_type",
+    "planned_time",
+    "actual_time",
+    "deviation_minutes",
+]
+
+EVENT_CHECKIN = "CheckIn"
+EVENT_CHECKOUT = "CheckOut"
+EVENT_LOT_COMPLETED = "LotCompleted"
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+DEFAULT_EVENT_LOG_PATH = os.path.join("plan_result", "SimulationEvents.csv.gz")
+EVENT_LOG_SUFFIX = ".csv.gz"
+
+
+def _split_log_path(path):
+    if path.endswith(EVENT_LOG_SUFFIX):
+        return path[:-len(EVENT_LOG_SUFFIX)], EVENT_LOG_SUFFIX
+    return os.path.splitext(path)
+
+
+def run_log_path(path, run_id):
+    """單次執行的事件檔路徑：<基準檔名>_<run_id>.csv.gz"""
+    stem, suffix = _split_log_path(path)
+    return f"{stem}_{run_id}{suffix}"
+
+
+def event_log_files(path=DEFAULT_EVENT_LOG_PATH, run_id=None):
+    """基準路徑對應的事件檔 (舊版附加式的基準檔在前，各次執行的檔案依檔名排序)；指定 run_id 時只回傳該次執行"""
+    if run_id:
+        candidate = run_log_path(path, run_id)
+        if os.path.exists(candidate):
+            return [candidate]
+    stem, suffix = _split_log_path(path)
+    files = sorted(glob.glob(f"{glob.escape(stem)}_*{glob.escape(suffix)}"))
+    if os.path.exists(path):
+        files.insert(0, path)
+    return files
+
+
+def _format_time(value):
+    return value.strftime(TIME_FORMAT) if value else ""
+
+
+def _parse_time(value):
+    return datetime.strptime(value, TIME_FORMAT) if value else None
+
+
+class SimulationEventLogWriter:
+    """事件寫入器 (每次執行寫入自己的 SimulationEvents_<run_id>.csv.gz)"""
+
+    def __init__(self, path=DEFAULT_EVENT_LOG_PATH, run_id=None):
+        self.base_path = path
+        self.run_id = run_id or datetime.now().strftime("SIM_%Y%m%d%H%M%S")
+        self.path = run_log_path(path, self.run_id)
+        self._file = None
+        self._writer = None
+
+    def open(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if os.path.exists(self.path):
+            # 同一秒內啟動的另一次執行：以程序編號區分
+            self.run_id = f"{self.run_id}_{os.getpid()}"
+            self.path = run_log_path(self.base_path, self.run_id)
+        self._file = gzip.open(self.path, "xt", encoding="utf-8", newline="")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(EVENT_FIELDS)
+        return self
+
+    def write(self, sim_time, lot_id, step, machine, event_type, planned_time=None, actual_time=None):
+        """寫入單筆事件，deviation_minutes = 實際 - 計畫 (分鐘)"""
+        deviation = ""
+        if planned_time and actual_time:
+            deviation = round((actual_time - planned_time).total_seconds() / 60, 2)
+        self._writer.writerow([
+            self.run_id,
+            _format_time(sim_time),
+            lot_id,
+            step,
+            machine or "",
+            event_type,
+            _format_time(planned_time),
+            _format_time(actual_time),
+            deviation,
+        ])
+
+    def flush(self):
+        if self._file:
+            self._file.flush()
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+            self._writer = None
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def iter_events(path=DEFAULT_EVENT_LOG_PATH, run_id=None, lot_id=None, event_type=None):
+    """
+    逐筆讀取事件 (串流，不會一次載入整個檔案)
+
+    path 為基準路徑，讀取 event_log_files(path) 的全部檔案；
+    中途結束的執行留下的截斷檔案讀到截斷處為止，其他檔案不受影響
+
+    Yields:
+        dict: 時間欄位轉為 datetime，deviation_minutes 轉為 float (無資料為 None)
+    """
+    for file_path in event_log_files(path, run_id):
+        try:
+            yield from _iter_file_events(file_path, run_id, lot_id, event_type)
+        except (EOFError, gzip.BadGzipFile, zlib.error) as e:
+            print(f"Warning: event log {file_path} is truncated or corrupt, skipping the rest of it ({e})",
+                  file=sys.stderr)
+
+
+def _iter_file_events(path, run_id, lot_id, event_type):
+    with gzip.open(path, "rt", encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        for row in reader:
+            # 舊版附加式檔案的每個 gzip member 可能帶有自己的標頭列；欄位數不符為截斷處的不完整資料列
+            if not row or row[0] == EVENT_FIELDS[0] or len(row) != len(EVENT_FIELDS):
+                continue
+            event = dict(zip(EVENT_FIELDS, row))
+            if run_id and event["run_id"] != run_id:
+                continue
+            if lot_id and event["lot_id"] != lot_id:
+                continue
+            if event_type and event["event_type"] != event_type:
+                continue
+            event["sim_time"] = _parse_time(event["sim_time"])
+            event["planned_time"] = _parse_time(event["planned_time"])
+            event["actual_time"] = _parse_time(event["actual_time"])
+            event["deviation_minutes"] = float(event["deviation_minutes"]) if event["deviation_minutes"] else None
+            yield event
+
+
+def load_event_columns(path=DEFAULT_EVENT_LOG_PATH, **filters):
+    """
+    以欄式結構載入事件 (NumPy 陣列)，適合大量事件的向量化分析
+
+    Returns:
+        dict: 欄位名稱 -> np.ndarray；時間欄位為 datetime64[s]，deviation_minutes 為 float64 (NaN 代表無資料)
+    """
+    import numpy as np
+
+    columns = {name: [] for name in EVENT_FIELDS}
+    for event in iter_events(path, **filters):
+        for name in EVENT_FIELDS:
+            columns[name].append(event[name])
+
+    result = {}
+    for name in ("run_id", "lot_id", "step", "machine", "event_type"):
+        result[name] = np.array(columns[name], dtype=object)
+    for name in ("sim_time", "planned_time", "actual_time"):
+        result[name] = np.array(
+            [v if v is not None else np.datetime64("NaT") for v in columns[name]], dtype="datetime64[s]"
+        )
+    result["deviation_minutes"] = np.array(
+        [v if v is not None else np.nan for v in columns["deviation_minutes"]], dtype=np.float64
+    )
+    return result
+
+
+def deviation_summary(path=DEFAULT_EVENT_LOG_PATH, **filters):
+    """
+    依事件類型彙總計畫與實際偏差 (分鐘)
+
+    Returns:
+        dict: event_type -> {count, mean, p50, p95, max}
+    """
+    import numpy as np
+
+    columns = load_event_columns(path, **filters)
+    summary = {}
+    for event_type in np.unique(columns["event_type"]):
+        values = columns["deviation_minutes"][columns["event_type"] == event_type]
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            summary[event_type] = {"count": 0}
+            continue
+        summary[event_type] = {
+            "count": int(values.size),
+            "mean": float(values.mean()),
+            "p50": float(np.percentile(values, 50)),
+            "p95": float(np.percentile(values, 95)),
+            "max": float(values.max()),
+        }
+    return summary
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Simulation event log summary")
+    parser.add_argument("path", nargs="?", default=DEFAULT_EVENT_LOG_PATH,
+                        help="Event log base path (.csv.gz); reads every <base>_<run_id>.csv.gz")
+    parser.add_argument("--run-id", type=str, default=None, help="Filter by simulation run id")
+    cli_args = parser.parse_args()
+
+    print(json.dumps(deviation_summary(cli_args.path, run_id=cli_args.run_id), indent=2, ensure_ascii=False))
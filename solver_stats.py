@@ -0,0 +1,347 @@
+"""
+求解統計收集 (Solver Run Stats)
+
+每次 CP-SAT 求解 (每個批次一次) 收集一列統計，寫入 SolverRunStats：
+- 回應統計：狀態、目標值、最佳下界、gap、wall / user / deterministic time、conflicts、branches、restarts、LP iterations
+- 目標值隨時間變化：以 solution callback 記錄每個解的 (秒數, 目標值, 當時下界)，存成 ObjectiveTrace JSON
+- presolve：由 OR-Tools 搜尋日誌 (log_callback 擷取，不輸出到 C++ stdout) 解析 presolve 前後的變數 / 約束數、
+  presolve 耗時與各規則套用次數
+- 模型規模與求解參數 (Lot 數、作業數、變數數、workers、時間上限)，供比較「加 worker / 加時間是否還有幫助」
+  與「資料量到多大時求解品質崩落」
+
+SOLVER_LOG_SEARCH_PROGRESS=true 時仍會把日誌印到 stdout，並把整段日誌存入 SearchLog 欄位。
+
+本模組只使用標準函式庫與 DB-API cursor；OR-Tools 由呼叫端傳入 (cp_model 延遲匯入)。
+"""
+import re
+import sys
+import json
+
+CREATE_SOLVER_RUN_STATS_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS SolverRunStats (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    RunId VARCHAR(50) NOT NULL,
+    ScheduleId VARCHAR(50) NULL,
+    PlanID VARCHAR(50) NULL,
+    BatchIndex INT NOT NULL,
+    BatchCount INT NULL,
+    LotCount INT NULL,
+    OperationCount INT NULL,
+    NumVariables INT NULL,
+    NumConstraints INT NULL,
+    PresolvedVariables INT NULL,
+    PresolvedConstraints INT NULL,
+    PresolveSeconds DOUBLE NULL,
+    ObjectiveType VARCHAR(50) NULL,
+    NumWorkers INT NULL,
+    MaxTimeSeconds DOUBLE NULL,
+    Status VARCHAR(20) NOT NULL,
+    ObjectiveValue DOUBLE NULL,
+    BestBound DOUBLE NULL,
+    Gap DOUBLE NULL,
+    GapIntegral DOUBLE NULL,
+    WallTime DOUBLE NULL,
+    UserTime DOUBLE NULL,
+    DeterministicTime DOUBLE NULL,
+    NumConflicts BIGINT NULL,
+    NumBranches BIGINT NULL,
+    NumRestarts BIGINT NULL,
+    NumLpIterations BIGINT NULL,
+    NumSolutions INT NOT NULL DEFAULT 0,
+    FirstSolutionSeconds DOUBLE NULL,
+    LastImprovementSeconds DOUBLE NULL,
+    ObjectiveTrace JSON NULL,
+    PresolveSummary JSON NULL,
+    SearchLog MEDIUMTEXT NULL,
+    CreatedAt DATETIME DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE KEY uq_run_batch (RunId, BatchIndex),
+    INDEX idx_plan (PlanID),
+    INDEX idx_created (CreatedAt)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+"""
+
+# 依 INSERT 欄位順序
+STAT_COLUMNS = (
+    "BatchIndex", "BatchCount", "LotCount", "OperationCount", "NumVariables", "NumConstraints",
+    "PresolvedVariables", "PresolvedConstraints", "PresolveSeconds", "ObjectiveType", "NumWorkers", "MaxTimeSeconds",
+    "Status", "ObjectiveValue", "BestBound", "Gap", "GapIntegral", "WallTime", "UserTime", "DeterministicTime",
+    "NumConflicts", "NumBranches", "NumRestarts", "NumLpIterations", "NumSolutions",
+    "FirstSolutionSeconds", "LastImprovementSeconds", "ObjectiveTrace", "PresolveSummary", "SearchLog",
+)
+JSON_COLUMNS = ("ObjectiveTrace", "PresolveSummary")
+
+INSERT_SOLVER_RUN_STATS_SQL = f"""
+INSERT INTO SolverRunStats (RunId, ScheduleId, PlanID, {', '.join(STAT_COLUMNS)})
+VALUES ({', '.join(['%s'] * (len(STAT_COLUMNS) + 3))})
+"""
+
+# 日誌中的數字使用 1'234 千分位
+_NUMBER = r"([\d']+)"
+_MODEL_HEADER = re.compile(r"^(Initial|Presolved) (?:optimization|satisfaction) model")
+_VARIABLES = re.compile(rf"^#Variables: {_NUMBER}")
+_CONSTRAINT = re.compile(rf"^#k\w+: {_NUMBER}")
+_SEARCH_START = re.compile(r"^Starting search at ([\d.]+)s")
+_AFFINE = re.compile(rf"^\s*- {_NUMBER} affine relations were detected")
+_RULE = re.compile(rf"^\s*- rule '(.+)' was applied {_NUMBER} times?")
+
+
+def _int(text):
+    return int(text.replace("'", ""))
+
+
+def parse_search_log(lines):
+    """
+    由 CP-SAT 搜尋日誌解析 presolve 摘要
+
+    Returns:
+        dict: initial_variables / initial_constraints / presolved_variables / presolved_constraints /
+              presolve_seconds / affine_relations / rules (規則 -> 套用次數)；日誌沒有的項目不列出
+    """
+    summary = {}
+    rules = {}
+    section = None
+    for line in lines:
+        header = _MODEL_HEADER.match(line)
+        if header:
+            section = header.group(1).lower()
+            summary[f"{section}_constraints"] = 0
+            continue
+        if not line.strip():
+            section = None
+            continue
+        if section:
+            match = _VARIABLES.match(line)
+            if match:
+                summary[f"{section}_variables"] = _int(match.group(1))
+                continue
+            match = _CONSTRAINT.match(line)
+            if match:
+                summary[f"{section}_constraints"] += _int(match.group(1))
+            continue
+
+        match = _SEARCH_START.match(line)
+        if match:
+            summary.setdefault("presolve_seconds", float(match.group(1)))
+            continue
+        match = _AFFINE.match(line)
+        if match:
+            summary["affine_relations"] = _int(match.group(1))
+            continue
+        match = _RULE.match(line)
+        if match:
+            rules[match.group(1)] = rules.get(match.group(1), 0) + _int(match.group(2))
+    if rules:
+        summary["rules"] = rules
+    return summary
+
+
+_callback_classes = {}
+
+
+def _solution_callback_class(cp_model):
+    """建立 (並快取) 繼承 CpSolverSolutionCallback 的解記錄類別 (cp_model 由呼叫端延遲匯入)"""
+    callback_class = _callback_classes.get(cp_model)
+    if callback_class is None:
+        class SolutionTraceCallback(cp_model.CpSolverSolutionCallback):
+            """記錄每個解的 (秒數, 目標值, 當時下界)"""
+
+            def __init__(self, has_objective):
+                super().__init__()
+                self.has_objective = has_objective
+                self.points = []
+
+            def on_solution_callback(self):
+                if self.has_objective:
+                    self.points.append([round(self.WallTime(), 3), self.ObjectiveValue(), self.BestObjectiveBound()])
+                else:
+                    self.points.append([round(self.WallTime(), 3), None, None])
+
+        callback_class = _callback_classes[cp_model] = SolutionTraceCallback
+    return callback_class
+
+
+def relative_gap(objective, bound):
+    """|objective - bound| / |objective| (objective 為 0 時以 1e-9 代替)"""
+    if objective is None or bound is None:
+        return None
+    return round(abs(objective - bound) / max(abs(objective), 1e-9), 6)
+
+
+class SolverStatsRecorder:
+    """
+    單一批次求解的統計收集器
+
+    用法：
+        recorder = SolverStatsRecorder(cp_model, solver, echo_log=True)
+        status = recorder.solve(model)
+        row = recorder.stats(batch_index=1, lot_count=..., ...)
+    """
+
+    def __init__(self, cp_model, solver, echo_log=False, keep_log=None):
+        self.cp_model = cp_model
+        self.solver = solver
+        self.echo_log = echo_log
+        self.keep_log = echo_log if keep_log is None else keep_log
+        self.log_lines = []
+        self.callback = None
+        self.status = None
+        # 日誌一律開啟並導向 log_callback 解析 presolve 摘要；只有 echo_log 時才印出
+        solver.parameters.log_search_progress = True
+        solver.parameters.log_to_stdout = False
+        solver.log_callback = self._on_log
+
+    def _on_log(self, line):
+        self.log_lines.extend(line.splitlines() or [""])
+        if self.echo_log:
+            print(line)
+            sys.stdout.flush()
+
+    def solve(self, model):
+        self.callback = _solution_callback_class(self.cp_model)(model.HasObjective())
+        self.status = self.solver.Solve(model, self.callback)
+        return self.status
+
+    @property
+    def status_name(self):
+        return self.solver.StatusName(self.status)
+
+    @property
+    def has_solution(self):
+        return self.status in (self.cp_model.OPTIMAL, self.cp_model.FEASIBLE)
+
+    def objective(self):
+        """有目標函數且有解時回傳 (目標值, 最佳下界)，否則 (None, None)"""
+        if not self.has_solution or not self.callback.has_objective:
+            return None, None
+        return self.solver.ObjectiveValue(), self.solver.BestObjectiveBound()
+
+    def stats(self, batch_index, batch_count=None, lot_count=None, operation_count=None, objective_type=None):
+        """整理成一列 SolverRunStats (欄位名稱同資料表)"""
+        solver = self.solver
+        response = solver.ResponseProto()
+        presolve = parse_search_log(self.log_lines)
+        objective, bound = self.objective()
+
+        points = self.callback.points if self.callback else []
+        last_improvement = None
+        best = None
+        for seconds, value, _ in points:
+            if value is not None and (best is None or value != best):
+                best = value
+                last_improvement = seconds
+
+        return {
+            "BatchIndex": batch_index,
+            "BatchCount": batch_count,
+            "LotCount": lot_count,
+            "OperationCount": operation_count,
+            "NumVariables": presolve.get("initial_variables"),
+            "NumConstraints": presolve.get("initial_constraints"),
+            "PresolvedVariables": presolve.get("presolved_variables"),
+            "PresolvedConstraints": presolve.get("presolved_constraints"),
+            "PresolveSeconds": presolve.get("presolve_seconds"),
+            "ObjectiveType": objective_type,
+            "NumWorkers": solver.parameters.num_workers or solver.parameters.num_search_workers,
+            "MaxTimeSeconds": solver.parameters.max_time_in_seconds,
+            "Status": self.status_name,
+            "ObjectiveValue": objective,
+            "BestBound": bound,
+            "Gap": relative_gap(objective, bound),
+            "GapIntegral": round(response.gap_integral, 6) if objective is not None else None,
+            "WallTime": round(response.wall_time, 3),
+            "UserTime": round(response.user_time, 3),
+            "DeterministicTime": round(response.deterministic_time, 3),
+            "NumConflicts": response.num_conflicts,
+            "NumBranches": response.num_branches,
+            "NumRestarts": response.num_restarts,
+            "NumLpIterations": response.num_lp_iterations,
+            "NumSolutions": len(points),
+            "FirstSolutionSeconds": points[0][0] if points else None,
+            "LastImprovementSeconds": last_improvement if last_improvement is not None else (points[-1][0] if points else None),
+            "ObjectiveTrace": points,
+            "PresolveSummary": {key: value for key, value in presolve.items()
+                                if key in ("affine_relations", "rules")} or None,
+            "SearchLog": "\n".join(self.log_lines) if self.keep_log else None,
+        }
+
+
+SUMMED_COLUMNS = ("WallTime", "UserTime", "DeterministicTime", "NumConflicts", "NumBranches", "NumRestarts",
+                  "NumLpIterations", "NumSolutions")
+
+
+def combine_stage_stats(stage_stats, status_name, max_time_in_seconds=None):
+    """
+    字典序求解 (lexicographic_solve) 的各階段統計合併為一列
+
+    耗時與搜尋計數加總；模型規模與 presolve 取第一階段；目標值、下界與 gap 取最後一個有解的階段；
+    ObjectiveTrace 依各階段開始時間平移後串接 (不同階段的目標值單位不同)
+    """
+    first = stage_stats[0]
+    solved = [stat for stat in stage_stats if stat["ObjectiveValue"] is not None]
+    last = solved[-1] if solved else stage_stats[-1]
+    combined = dict(first)
+    for column in ("ObjectiveValue", "BestBound", "Gap", "GapIntegral"):
+        combined[column] = last[column]
+    for column in SUMMED_COLUMNS:
+        combined[column] = round(sum(stat[column] or 0 for stat in stage_stats), 3)
+    combined["Status"] = status_name
+    if max_time_in_seconds is not None:
+        combined["MaxTimeSeconds"] = max_time_in_seconds
+
+    trace, offset, last_improvement = [], 0.0, None
+    for stat in stage_stats:
+        trace.extend([round(seconds + offset, 3), value, bound] for seconds, value, bound in stat["ObjectiveTrace"])
+        if stat["LastImprovementSeconds"] is not None:
+            last_improvement = round(stat["LastImprovementSeconds"] + offset, 3)
+        offset += stat["WallTime"] or 0
+    combined["ObjectiveTrace"] = trace
+    combined["FirstSolutionSeconds"] = trace[0][0] if trace else None
+    combined["LastImprovementSeconds"] = last_improvement
+    if first["SearchLog"] is not None:
+        combined["SearchLog"] = "\n".join(f"=== Stage {index} ===\n{stat['SearchLog']}"
+                                          for index, stat in enumerate(stage_stats, 1))
+    return combined
+
+
+def stat_rows(stats, run_id, schedule_id=None, plan_id=None):
+    rows = []
+    for stat in stats:
+        values = []
+        for column in STAT_COLUMNS:
+            value = stat.get(column)
+            if column in JSON_COLUMNS and value is not None:
+                value = json.dumps(value, ensure_ascii=False)
+            values.append(value)
+        rows.append((run_id, schedule_id, plan_id, *values))
+    return rows
+
+
+def save_stats(cursor, stats, run_id, schedule_id=None, plan_id=None):
+    """每個批次一列寫入 SolverRunStats，回傳寫入筆數 (由呼叫端負責 commit)"""
+    create_tables(cursor)
+    rows = stat_rows(stats, run_id, schedule_id, plan_id)
+    if rows:
+        cursor.executemany(INSERT_SOLVER_RUN_STATS_SQL, rows)
+    return len(rows)
+
+
+def print_stats(stats):
+    """列出各批次求解統計 (workers / 時間上限 / 耗時 / 首解與最後改善時間 / gap)"""
+    if not stats:
+        return
+    print("\n=== Solver stats ===")
+    print(f"  {'batch':>5} {'lots':>5} {'vars':>7} {'presolved':>9} {'status':>10} {'wall s':>8} {'1st sol s':>9} "
+          f"{'last imp s':>10} {'sols':>5} {'gap':>8} {'conflicts':>10}")
+    for stat in stats:
+        gap = f"{stat['Gap']:.4f}" if stat["Gap"] is not None else "-"
+        first = f"{stat['FirstSolutionSeconds']:.2f}" if stat["FirstSolutionSeconds"] is not None else "-"
+        last = f"{stat['LastImprovementSeconds']:.2f}" if stat["LastImprovementSeconds"] is not None else "-"
+        print(f"  {stat['BatchIndex']:>5} {stat['LotCount'] or 0:>5} {stat['NumVariables'] or 0:>7} "
+              f"{stat['PresolvedVariables'] or 0:>9} {stat['Status']:>10} {stat['WallTime']:8.2f} {first:>9} "
+              f"{last:>10} {stat['NumSolutions']:>5} {gap:>8} {stat['NumConflicts']:>10}")
+    sys.stdout.flush()
+
+
+def create_tables(cursor):
+    """建立 SolverRunStats (已存在則略過)"""
+    cursor.execute(CREATE_SOLVER_RUN_STATS_TABLE_SQL)
@@ -0,0 +1,65 @@
+"""
+排程程式啟動時間量測 (--profile-startup)
+
+排程程式的重量級相依 (OR-Tools、mysql.connector、Flask) 改為用到時才匯入 (timed_import)，
+讓 --help、--dry-run 與參數錯誤不必等待 OR-Tools 載入。
+各階段耗時都記錄在 startup_profiler；命令列加上 --profile-startup 時於結束前印出：
+- phase(name)：一段工作的耗時 (例如匯入、載入資料)
+- mark(name)：自程式進入點起算到某個里程碑的時間 (例如開始求解)
+
+本模組只使用標準函式庫，匯入成本可忽略。
+"""
+import importlib
+import sys
+import time
+from contextlib import contextmanager
+
+
+class StartupProfiler:
+    """記錄匯入與初始化各階段的耗時"""
+
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.enabled = False
+        self.phases = []       # (名稱, 秒)
+        self.milestones = []   # (名稱, 自 origin 起算秒數)
+
+    def enable(self, enabled=True):
+        self.enabled = enabled
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - start))
+
+    def mark(self, name):
+        """記錄里程碑 (同名里程碑只記第一次)"""
+        if all(existing != name for existing, _ in self.milestones):
+            self.milestones.append((name, time.perf_counter() - self.origin))
+
+    def report(self):
+        """--profile-startup 時印出各階段耗時"""
+        if not self.enabled:
+            return
+        print("\n=== Startup profile ===")
+        for name, seconds in self.phases:
+            print(f"  {name:<40} {seconds * 1000:10.1f} ms")
+        for name, seconds in self.milestones:
+            print(f"  @ {name:<38} {seconds * 1000:10.1f} ms")
+        print(f"  {'total (since entry point)':<40} {(time.perf_counter() - self.origin) * 1000:10.1f} ms")
+        sys.stdout.flush()
+
+
+startup_profiler = StartupProfiler()
+
+
+def timed_import(name):
+    """匯入模組並記錄耗時；已匯入的模組直接回傳 (不重複記錄)"""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    with startup_profiler.phase(f"import {name}"):
+        return importlib.import_module(name)
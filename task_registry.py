@@ -0,0 +1,49 @@
+"""
+依 Lot 索引的任務表 (Task Registry)
+
+建模時每道工序建立一筆任務 (dict：start / end / machine_idx / lot / op / machines)。
+過去以 all_tasks 串列保存，每次取某 Lot 的任務、第一道或最後一道工序都要掃描全部任務 (且以 dict 相等比較 Lot)，
+Priority 順序限制與目標函數各掃一次，2,000 lots × 12 站時光是建模就要數秒。
+
+TaskRegistry 依 LotId 保存各 Lot 依途程順序排列的任務陣列：
+- add(lot_id, task)：依途程順序加入 (建模迴圈依 lot["Operations"] 順序建立任務，並以同一順序串接前後站限制)
+- lot_tasks(lot_id) / first(lot_id) / last(lot_id)：O(1) 取得
+- 迭代 registry 依加入順序取得全部任務 (取代原本的 all_tasks 串列)
+
+本模組只使用標準函式庫，供 Scheduler_Full_Example*.py 共用。
+"""
+
+
+class TaskRegistry:
+    """依 LotId 索引、依途程順序排列的建模任務"""
+
+    def __init__(self):
+        self._tasks = []
+        self._by_lot = {}
+
+    def add(self, lot_id, task):
+        """加入一道工序的任務 (同一 Lot 須依途程順序加入)"""
+        self._tasks.append(task)
+        self._by_lot.setdefault(lot_id, []).append(task)
+        return task
+
+    def __iter__(self):
+        return iter(self._tasks)
+
+    def __len__(self):
+        return len(self._tasks)
+
+    def lot_ids(self):
+        return list(self._by_lot)
+
+    def lot_tasks(self, lot_id):
+        """該 Lot 依途程順序的任務陣列 (沒有任務時為空串列)"""
+        return self._by_lot.get(lot_id, [])
+
+    def first(self, lot_id):
+        """該 Lot 的第一道工序"""
+        return self._by_lot[lot_id][0]
+
+    def last(self, lot_id):
+        """該 Lot 的最後一道工序 (完工時間即其 end)"""
+        return self._by_lot[lot_id][-1]